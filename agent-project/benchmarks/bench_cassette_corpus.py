@@ -0,0 +1,92 @@
+"""Benchmark: CompletePrebunkerSystem over a fixed corpus with recorded LLM outputs
+
+Record once against a model server (or the offline stand-in), then replay the
+cassette so timing differences between runs come from our code only.
+
+Usage (from agent-project/):
+    uv run python -m benchmarks.bench_cassette_corpus record --cassette logs/corpus.jsonl.gz --fake
+    uv run python -m benchmarks.bench_cassette_corpus replay --cassette logs/corpus.jsonl.gz
+    uv run python -m benchmarks.bench_cassette_corpus replay --cassette logs/corpus.jsonl.gz --latency recorded
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+# Cached responses would hide the calls we want on the cassette
+os.environ.setdefault("PREBUNKER_LLM_CACHE", "off")
+
+from src.agent import model
+from src.integration.complete_pipeline import CompletePrebunkerSystem
+from src.llm.cassette import Cassette
+from src.llm.fake_server import FakeLLMServer, FakeLLMConfig
+from src.llm.transport import LLMTransport, TransportConfig
+
+CORPUS = [
+    "The new COVID-19 vaccine is 100% safe and completely effective for everyone.",
+    "Take 2 tablets of ibuprofen daily with food to reduce arthritis pain.",
+    "Studies show natural remedies work better than antibiotics for most infections.",
+    "RSV can be serious for infants; talk to your doctor about immunization options.",
+    "Vitamin D supplements prevent all respiratory infections, so you never need a flu shot."
+]
+
+
+async def run_corpus(system, rounds):
+    timings = []
+    statuses = []
+    for _ in range(rounds):
+        for message in CORPUS:
+            start = time.perf_counter()
+            result = await system.analyze_health_communication(message)
+            timings.append(time.perf_counter() - start)
+            statuses.append(result.get('status'))
+    return timings, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--cassette', default='logs/corpus_cassette.jsonl.gz')
+    parser.add_argument('--latency', choices=['instant', 'recorded'], default='instant')
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--base-url', default=os.getenv('PREBUNKER_LLM_BASE_URL', 'http://localhost:11434/v1'))
+    parser.add_argument('--fake', action='store_true', help='record against the offline stand-in server')
+    args = parser.parse_args()
+
+    fake = None
+    if args.mode == 'record':
+        base_url = args.base_url
+        if args.fake:
+            fake = FakeLLMServer(FakeLLMConfig(latency_distribution='lognormal', mean_latency=0.05, tokens_per_second=400))
+            base_url = fake.start()
+        model.client = LLMTransport(TransportConfig(base_url=base_url)).create_openai_client()
+        model.backends = None
+
+    cassette = Cassette(args.cassette, mode=args.mode, latency=args.latency)
+    model.cassette = cassette
+    system = CompletePrebunkerSystem()
+
+    try:
+        timings, statuses = asyncio.run(run_corpus(system, args.rounds))
+    finally:
+        cassette.close()
+        if fake is not None:
+            fake.stop()
+
+    report = cassette.get_report()
+    print(f"\n{args.mode}: {len(timings)} analyses, statuses {dict((s, statuses.count(s)) for s in set(statuses))}")
+    print(f"per-analysis mean {statistics.mean(timings):.4f}s  p50 {statistics.median(timings):.4f}s  "
+          f"max {max(timings):.4f}s  total {sum(timings):.2f}s")
+    print(f"cassette: recorded={report['recorded']} replayed={report['replayed']} misses={report['misses']}")
+    if report['unmatched']:
+        print("unmatched prompts:")
+        print(json.dumps(report['unmatched'][:20], indent=2))
+
+
+if __name__ == "__main__":
+    main()
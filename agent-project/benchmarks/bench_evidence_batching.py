@@ -0,0 +1,136 @@
+"""Benchmark: evidence validation with one LLM call per claim vs batched multi-claim prompts
+
+Each message's claims go through EvidenceValidator.validate_claims, first with
+batch_size=1 (one prompt per claim) and then batched (up to --batch-size claims
+per prompt, per-claim fallback for sections that do not parse). Reports calls and
+prompt tokens per message, wall time, fallbacks and verdict agreement between modes.
+
+Usage (from agent-project/, with an OpenAI-compatible server running):
+    uv run python -m benchmarks.bench_evidence_batching --base-url http://localhost:11434/v1 --batch-size 4
+
+Without a model server, --fake runs against the offline stand-in (one request at a time, like a single GPU):
+    uv run python -m benchmarks.bench_evidence_batching --fake
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import time
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from openai import AsyncOpenAI
+
+from src.agent import OpenAIChatCompletionsModel
+from src.claims.extractor import ClaimExtractor
+from src.evidence.validator import EvidenceValidator
+from src.llm.fake_server import FakeLLMServer, FakeLLMConfig
+from src.llm.ledger import CallLedger
+
+CORPUS = [
+    "The new COVID-19 vaccine is 100% safe and completely effective for everyone. Side effects never happen. "
+    "Vitamin D supplements prevent all respiratory infections, so you never need a flu shot.",
+    "Antibiotics always treat viral infections. Natural remedies are completely safe for children. "
+    "This supplement cures cancer in every patient.",
+    "Masks never work against any virus. The flu vaccine always causes the flu. "
+    "Ibuprofen is completely safe for everyone at any dose.",
+    "RSV vaccines are 100% effective for infants. Measles is never dangerous for healthy children."
+]
+
+VERDICT_PATTERN = re.compile(r'supported by evidence|partially supported|not supported', re.IGNORECASE)
+
+
+def verdict(validation):
+    match = VERDICT_PATTERN.search(str((validation or {}).get('validation_assessment', '')))
+    return match.group(0).lower() if match else None
+
+
+async def measure_mode(validator, ledger, message_claims, batch_size, rounds):
+    """Validate every message's claims; one ledger session per message"""
+    calls, prompt_tokens, timings, verdicts = [], [], [], []
+    for _ in range(rounds):
+        for claims in message_claims:
+            start = time.perf_counter()
+            with ledger.capture() as session:
+                validations = await validator.validate_claims(claims, batch_size=batch_size)
+            timings.append(time.perf_counter() - start)
+            summary = session.summary()
+            calls.append(summary['calls'])
+            prompt_tokens.append(summary['prompt_tokens'])
+            verdicts.append([verdict(validation) for validation in validations])
+
+    return {
+        'calls_per_message': statistics.mean(calls),
+        'prompt_tokens_per_message': statistics.mean(prompt_tokens),
+        'wall_mean': statistics.mean(timings),
+        'wall_p50': statistics.median(timings),
+        'wall_total': sum(timings),
+        'verdicts': verdicts
+    }
+
+
+async def run_benchmark(base_url, model_name, batch_size, rounds, concurrency):
+    ledger = CallLedger()
+    # No response cache or coalescing: every call must reach the server
+    model = OpenAIChatCompletionsModel(model_name, AsyncOpenAI(base_url=base_url), ledger=ledger)
+    validator = EvidenceValidator(max_concurrency=concurrency)
+    validator.validation_agent.model = model
+
+    extractor = ClaimExtractor()
+    message_claims = [[claim.text for claim in extractor.extract_and_classify_claims(message)] for message in CORPUS]
+    message_claims = [claims for claims in message_claims if claims]
+
+    results = {
+        'per_claim': await measure_mode(validator, ledger, message_claims, 1, rounds),
+        f'batched_{batch_size}': await measure_mode(validator, ledger, message_claims, batch_size, rounds)
+    }
+    return message_claims, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default=os.getenv('PREBUNKER_LLM_BASE_URL', 'http://localhost:11434/v1'))
+    parser.add_argument('--model', default=os.getenv('PREBUNKER_LLM_MODEL', 'phi4-mini'))
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=4, help='evidence-stage concurrency (max_concurrency)')
+    parser.add_argument('--fake', action='store_true', help='use the offline stand-in server')
+    args = parser.parse_args()
+
+    fake = None
+    if args.fake:
+        fake = FakeLLMServer(FakeLLMConfig(mean_latency=0.05, prefill_tokens_per_second=4000, max_concurrency=1))
+        args.base_url = fake.start()
+    try:
+        message_claims, results = asyncio.run(
+            run_benchmark(args.base_url, args.model, args.batch_size, args.rounds, args.concurrency)
+        )
+    finally:
+        if fake is not None:
+            fake.stop()
+
+    claims_per_message = statistics.mean(len(claims) for claims in message_claims)
+    print(f"{len(message_claims)} messages, {claims_per_message:.1f} claims per message, {args.rounds} rounds\n")
+    print(f"{'mode':<12} {'calls/msg':>10} {'prompt_tok/msg':>15} {'wall_mean':>10} {'wall_p50':>10} {'wall_total':>11}")
+    for mode, stats in results.items():
+        print(f"{mode:<12} {stats['calls_per_message']:>10.2f} {stats['prompt_tokens_per_message']:>15.0f} "
+              f"{stats['wall_mean']:>10.3f} {stats['wall_p50']:>10.3f} {stats['wall_total']:>11.2f}")
+
+    per_claim, batched = results['per_claim'], results[f'batched_{args.batch_size}']
+    # Calls beyond one per batch are per-claim fallbacks for sections that did not parse
+    expected_batches = sum(-(-len(claims) // args.batch_size) for claims in message_claims) * args.rounds
+    fallbacks = batched['calls_per_message'] * len(message_claims) * args.rounds - expected_batches
+    pairs = [(a, b) for left, right in zip(per_claim['verdicts'], batched['verdicts']) for a, b in zip(left, right)]
+    agreement = sum(1 for a, b in pairs if a == b) / len(pairs) if pairs else 0.0
+
+    print(f"\nCalls per message: {per_claim['calls_per_message']:.2f} -> {batched['calls_per_message']:.2f}")
+    print(f"Wall time change: {(batched['wall_total'] - per_claim['wall_total']) / per_claim['wall_total'] * 100:+.1f}%")
+    print(f"Per-claim fallback calls: {fallbacks:.0f}")
+    print(f"Verdict agreement with per-claim mode: {agreement * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
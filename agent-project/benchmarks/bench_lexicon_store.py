@@ -0,0 +1,126 @@
+"""Benchmark: building and loading a large medical lexicon, per-process dicts vs a memory-mapped automaton
+
+A synthetic lexicon source (drug, condition and procedure names with up to two
+synonyms each) is compiled once with compile_lexicon. Worker processes then start
+the way web workers would: either each reads the source and builds its own
+dict-based TermMatcher, or each memory-maps the compiled file. Reports compile time
+and file size, then per worker: load time, scan time per message and resident
+memory added, split into private (RssAnon) and file-backed pages that all workers
+share through the page cache (RssFile).
+
+Usage (from agent-project/; no model server needed):
+    uv run python -m benchmarks.bench_lexicon_store --terms 300000 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from src.health_kb.lexicon_store import CompiledLexicon, compile_lexicon, read_lexicon_source
+from src.health_kb.term_matcher import TermMatcher
+
+CATEGORIES = ['drugs', 'conditions', 'procedures']
+SYLLABLES = ['ab', 'ac', 'al', 'am', 'an', 'ar', 'bi', 'car', 'cor', 'di', 'do', 'en', 'ex', 'fe', 'gen',
+             'hy', 'in', 'lo', 'ma', 'mi', 'ne', 'no', 'ol', 'pa', 'per', 'pro', 'ra', 'ro', 'sa', 'ta',
+             'ter', 'ti', 'tox', 'tra', 'vi', 'zo']
+BASE_MESSAGE = "Antibiotics may help most people with diabetes, says the CDC, but ask your doctor about"
+
+
+def write_synthetic_source(path, terms, seed):
+    """Lexicon source with terms canonical names and 0-2 synonyms each; returns a sample of names"""
+    rng = random.Random(seed)
+    word = lambda: ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5)))
+    seen = set()
+    with open(path, 'w', encoding='utf-8') as source:
+        while len(seen) < terms:
+            name = word() if rng.random() < 0.85 else f"{word()} {word()}"
+            if name in seen:
+                continue
+            seen.add(name)
+            synonyms = '|'.join(word() for _ in range(rng.randint(0, 2)))
+            source.write(f"{rng.choice(CATEGORIES)}\t{name}\t{synonyms}\n")
+    return rng.sample(sorted(seen), 200)
+
+
+def memory_kb():
+    """(RssAnon, RssFile) of this process in kB, or (0, 0) where /proc is not available"""
+    values = {}
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(('RssAnon:', 'RssFile:')):
+                    name, amount = line.split(':')
+                    values[name] = int(amount.split()[0])
+    except OSError:
+        pass
+    return values.get('RssAnon', 0), values.get('RssFile', 0)
+
+
+def worker(mode, source_path, compiled_path, messages):
+    """Load the lexicon like a freshly started worker and scan the messages"""
+    anon_before, file_before = memory_kb()
+    start = time.perf_counter()
+    if mode == 'mmap':
+        lexicon = CompiledLexicon(compiled_path)
+    else:
+        surfaces = {}
+        for category, term, synonyms in read_lexicon_source(source_path):
+            surfaces.setdefault(category, []).extend([term] + synonyms)
+        lexicon = TermMatcher(surfaces)
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = sum(len(lexicon.find_all(message)) for message in messages)
+    scan = (time.perf_counter() - start) / len(messages)
+    anon_after, file_after = memory_kb()
+    return {'load': load, 'scan': scan, 'found': found,
+            'anon_mb': (anon_after - anon_before) / 1024, 'file_mb': (file_after - file_before) / 1024}
+
+
+def run_workers(mode, workers, source_path, compiled_path, messages):
+    # Spawned, not forked: each worker starts from nothing, like separate server processes
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers) as pool:
+        return pool.starmap(worker, [(mode, source_path, compiled_path, messages)] * workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--terms', type=int, default=300000, help='canonical terms in the synthetic lexicon')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=25)
+    parser.add_argument('--skip-dicts', action='store_true', help='only measure the memory-mapped lexicon')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, 'lexicon.tsv')
+        sample = write_synthetic_source(source_path, args.terms, args.seed)
+        rng = random.Random(args.seed)
+        messages = [f"{BASE_MESSAGE} {' and '.join(rng.sample(sample, 3))}." for _ in range(args.messages)]
+
+        start = time.perf_counter()
+        compiled_path = compile_lexicon(source_path)
+        build = time.perf_counter() - start
+        lexicon = CompiledLexicon(compiled_path)
+        print(f"{lexicon.header['terms']} terms, {len(lexicon)} with synonyms, {lexicon.header['nodes']} trie nodes")
+        print(f"Source {os.path.getsize(source_path) / 1e6:.1f} MB -> compiled {os.path.getsize(compiled_path) / 1e6:.1f} MB "
+              f"in {build:.1f}s\n")
+        lexicon.close()
+
+        modes = ['mmap'] if args.skip_dicts else ['dicts', 'mmap']
+        print(f"{'mode':<6} {'workers':>7} {'load_ms':>9} {'scan_us':>8} {'private_mb':>11} {'shared_file_mb':>15} {'matches':>8}")
+        for mode in modes:
+            results = run_workers(mode, args.workers, source_path, compiled_path, messages)
+            print(f"{mode:<6} {args.workers:>7} {statistics.mean(r['load'] for r in results) * 1000:>9.1f} "
+                  f"{statistics.mean(r['scan'] for r in results) * 1e6:>8.1f} "
+                  f"{statistics.mean(r['anon_mb'] for r in results):>11.1f} "
+                  f"{statistics.mean(r['file_mb'] for r in results):>15.1f} {results[0]['found']:>8}")
+
+
+if __name__ == "__main__":
+    main()
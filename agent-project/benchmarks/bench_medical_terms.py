@@ -0,0 +1,137 @@
+"""Benchmark: per-term substring scan vs the compiled Aho-Corasick matcher for medical entities
+
+The lexicon is MEDICAL_ENTITIES grown with synthetic terms to each requested size.
+For every size, each corpus message is scanned with the old nested loop (one
+lowercase substring test per term) and with TermMatcher.categorize. Reports build
+time, time per message and speedup. It also checks the matcher against a per-term
+word-boundary regex scan, which the matcher must agree with exactly.
+
+Usage (from agent-project/; no model server needed):
+    uv run python -m benchmarks.bench_medical_terms --terms 40 1000 10000 50000
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+
+from src.health_kb.medical_terms import MEDICAL_ENTITIES
+from src.health_kb.term_matcher import TermMatcher
+
+CORPUS = [
+    "The new COVID-19 vaccine is 100% safe and completely effective for everyone. Side effects never happen. "
+    "Vitamin D supplements prevent all respiratory infections, so you never need a flu shot.",
+    "Antibiotics always treat viral infections. Natural remedies are completely safe for children. "
+    "This supplement cures cancer in every patient.",
+    "Masks never work against any virus. The flu vaccine always causes the flu. "
+    "Ibuprofen is completely safe for everyone at any dose.",
+    "RSV vaccines are 100% effective for infants. Measles is never dangerous for healthy children.",
+    "According to the Mayo Clinic, insulin therapy may help most people with diabetes manage blood sugar.",
+    "The CDC and WHO say immunization schedules are reviewed every year; ask who is eligible."
+]
+
+SYLLABLES = ['ab', 'ac', 'al', 'am', 'an', 'ar', 'bi', 'car', 'cor', 'di', 'do', 'en', 'ex', 'fe', 'gen',
+             'hy', 'in', 'lo', 'ma', 'mi', 'ne', 'no', 'ol', 'pa', 'per', 'pro', 'ra', 'ro', 'sa', 'ta',
+             'ter', 'ti', 'tox', 'tra', 'vi', 'zo']
+
+
+def grown_lexicon(size, rng):
+    """MEDICAL_ENTITIES plus synthetic single- and two-word terms up to size terms in total"""
+    lexicon = {category: list(terms) for category, terms in MEDICAL_ENTITIES.items()}
+    categories = list(lexicon)
+    seen = {term.lower() for terms in lexicon.values() for term in terms}
+    total = len(seen)
+    while total < size:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5)))
+        term = word if rng.random() < 0.8 else f"{word} {''.join(rng.choice(SYLLABLES) for _ in range(3))}"
+        if term not in seen:
+            seen.add(term)
+            lexicon[rng.choice(categories)].append(term)
+            total += 1
+    return lexicon
+
+
+def messages_with_terms(lexicon, rng, count=200):
+    """Corpus messages with a few lexicon terms spliced in, so large lexicons still have matches"""
+    terms = [term for category in lexicon.values() for term in category]
+    messages = []
+    for index in range(count):
+        words = CORPUS[index % len(CORPUS)].split()
+        for _ in range(3):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(terms))
+        messages.append(' '.join(words))
+    return messages
+
+
+def substring_categorize(lexicon, text):
+    """The nested scan extract_medical_entities used before the matcher"""
+    text_lower = text.lower()
+    found = {}
+    for category, terms in lexicon.items():
+        found[category] = [term for term in terms if term.lower() in text_lower]
+    return {k: v for k, v in found.items() if v}
+
+
+def regex_categorize(patterns, text):
+    """Reference for the matcher's semantics: one word-boundary regex per term"""
+    found = {}
+    for category, term, pattern in patterns:
+        if pattern.search(text):
+            found.setdefault(category, []).append(term)
+    return found
+
+
+def compile_reference(lexicon):
+    patterns = []
+    for category, terms in lexicon.items():
+        for term in terms:
+            flags = 0 if term.isupper() and term.isalpha() else re.IGNORECASE
+            start = r'(?<!\w)' if re.match(r'\w', term) else ''
+            end = r'(?:es|s)?(?!\w)' if re.search(r'\w$', term) else ''
+            patterns.append((category, term, re.compile(start + re.escape(term) + end, flags)))
+    return patterns
+
+
+def time_per_message(function, messages, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for message in messages:
+            function(message)
+        timings.append((time.perf_counter() - start) / len(messages))
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--terms', type=int, nargs='+', default=[40, 1000, 10000, 50000])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=24)
+    args = parser.parse_args()
+
+    print(f"{args.messages} messages, median of {args.rounds} rounds\n")
+    print(f"{'terms':>7} {'build_ms':>9} {'substring_us':>13} {'matcher_us':>11} {'speedup':>8} {'agreement':>10}")
+    for size in args.terms:
+        rng = random.Random(args.seed)
+        lexicon = grown_lexicon(size, rng)
+        messages = messages_with_terms(lexicon, rng, args.messages)
+
+        start = time.perf_counter()
+        matcher = TermMatcher(lexicon)
+        build = time.perf_counter() - start
+
+        substring = time_per_message(lambda text: substring_categorize(lexicon, text), messages, args.rounds)
+        compiled = time_per_message(matcher.categorize, messages, args.rounds)
+
+        reference = compile_reference(lexicon)
+        sample = messages[:50]
+        agreement = sum(1 for text in sample if matcher.categorize(text) == regex_categorize(reference, text)) / len(sample)
+
+        print(f"{len(matcher):>7} {build * 1000:>9.1f} {substring * 1e6:>13.1f} {compiled * 1e6:>11.1f} "
+              f"{substring / compiled:>7.1f}x {agreement * 100:>9.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark: persona interpretation with one LLM call per persona vs one persona-panel call
+
+Runs PersonaInterpreter.interpret_message over a corpus in 'individual' and
+'panel' mode and reports throughput (messages/s, calls and tokens per message)
+and how closely the panel agrees with the individual reactions after the same
+post-processing (concern level, potential misreadings, emotional reactions).
+
+Usage (from agent-project/, with an OpenAI-compatible server running):
+    uv run python -m benchmarks.bench_persona_panel --base-url http://localhost:11434/v1
+
+Without a model server, --fake runs against the offline stand-in; --server-slots sets how
+many requests it serves at once (1 behaves like a single GPU without batching):
+    uv run python -m benchmarks.bench_persona_panel --fake --server-slots 2
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import os
+import statistics
+import time
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from openai import AsyncOpenAI
+
+from src.agent import OpenAIChatCompletionsModel
+from src.llm.fake_server import FakeLLMServer, FakeLLMConfig
+from src.llm.ledger import CallLedger
+from src.personas.base_personas import create_panel_agent
+from src.personas.health_specific import get_all_personas
+from src.personas.interpreter import PersonaInterpreter
+
+CORPUS = [
+    "The new COVID-19 vaccine is 100% safe and completely effective for everyone.",
+    "Take 2 tablets of ibuprofen daily with food to reduce arthritis pain.",
+    "Studies show natural remedies work better than antibiotics for most infections.",
+    "RSV can be serious for infants; talk to your doctor about immunization options.",
+    "Vitamin D supplements prevent all respiratory infections, so you never need a flu shot."
+]
+
+
+def jaccard(left, right):
+    left, right = set(left), set(right)
+    return len(left & right) / len(left | right) if left | right else 1.0
+
+
+async def measure_mode(interpreter, ledger, mode, rounds):
+    calls, tokens, timings, interpretations = [], [], [], []
+    for _ in range(rounds):
+        for message in CORPUS:
+            start = time.perf_counter()
+            with ledger.capture() as session:
+                result = await interpreter.interpret_message(message, mode=mode)
+            timings.append(time.perf_counter() - start)
+            summary = session.summary()
+            calls.append(summary['calls'])
+            tokens.append(summary['prompt_tokens'] + summary['completion_tokens'])
+            interpretations.append(result)
+    return {
+        'messages_per_second': len(timings) / sum(timings),
+        'calls_per_message': statistics.mean(calls),
+        'tokens_per_message': statistics.mean(tokens),
+        'wall_mean': statistics.mean(timings),
+        'wall_total': sum(timings),
+        'interpretations': interpretations
+    }
+
+
+def agreement(individual_runs, panel_runs):
+    """Per-persona agreement of the post-processed fields, averaged over messages and personas"""
+    concern, misreading, emotion, errors = [], [], [], 0
+    for individual, panel in zip(individual_runs, panel_runs):
+        for left, right in zip(individual, panel):
+            errors += right['concern_level'] == 'unknown'
+            concern.append(left['concern_level'] == right['concern_level'])
+            misreading.append(jaccard(left['potential_misreading'], right['potential_misreading']))
+            emotion.append(jaccard(left['emotional_reaction'], right['emotional_reaction']))
+    return {
+        'concern_level_match': statistics.mean(concern) if concern else 0.0,
+        'misreading_jaccard': statistics.mean(misreading) if misreading else 0.0,
+        'emotion_jaccard': statistics.mean(emotion) if emotion else 0.0,
+        'panel_errors': errors
+    }
+
+
+async def run_benchmark(base_url, model_name, rounds):
+    ledger = CallLedger()
+    # No response cache or coalescing: every call must reach the server
+    model = OpenAIChatCompletionsModel(model_name, AsyncOpenAI(base_url=base_url), ledger=ledger)
+
+    personas = [dataclasses.replace(persona) for persona in get_all_personas()]
+    interpreter = PersonaInterpreter(personas)
+    for persona in personas:
+        persona.interpretation_agent.model = model
+    interpreter._panel_agent = create_panel_agent(personas)
+    interpreter._panel_agent.model = model
+
+    results = {mode: await measure_mode(interpreter, ledger, mode, rounds) for mode in ('individual', 'panel')}
+    return len(personas), results, agreement(results['individual']['interpretations'], results['panel']['interpretations'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default=os.getenv('PREBUNKER_LLM_BASE_URL', 'http://localhost:11434/v1'))
+    parser.add_argument('--model', default=os.getenv('PREBUNKER_LLM_MODEL', 'phi4-mini'))
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--fake', action='store_true', help='use the offline stand-in server')
+    parser.add_argument('--server-slots', type=int, default=2, help='stand-in server concurrency (with --fake)')
+    args = parser.parse_args()
+
+    fake = None
+    if args.fake:
+        fake = FakeLLMServer(FakeLLMConfig(mean_latency=0.05, prefill_tokens_per_second=4000,
+                                           max_concurrency=args.server_slots))
+        args.base_url = fake.start()
+    try:
+        persona_count, results, agreed = asyncio.run(run_benchmark(args.base_url, args.model, args.rounds))
+    finally:
+        if fake is not None:
+            fake.stop()
+
+    print(f"{persona_count} personas, {len(CORPUS)} messages, {args.rounds} rounds\n")
+    print(f"{'mode':<12} {'msg/s':>8} {'calls/msg':>10} {'tokens/msg':>11} {'wall_mean':>10} {'wall_total':>11}")
+    for mode, stats in results.items():
+        print(f"{mode:<12} {stats['messages_per_second']:>8.2f} {stats['calls_per_message']:>10.2f} "
+              f"{stats['tokens_per_message']:>11.0f} {stats['wall_mean']:>10.3f} {stats['wall_total']:>11.2f}")
+
+    speedup = results['panel']['messages_per_second'] / results['individual']['messages_per_second']
+    print(f"\nThroughput: {speedup:.2f}x with the panel")
+    print(f"Agreement with individual mode: concern level {agreed['concern_level_match'] * 100:.1f}%, "
+          f"misreadings (Jaccard) {agreed['misreading_jaccard']:.2f}, emotions (Jaccard) {agreed['emotion_jaccard']:.2f}")
+    print(f"Panel entries that failed: {agreed['panel_errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark: time-to-first-token for the legacy single-message prompt vs the stable system prefix
+
+The legacy layout put instructions, the user text and freshly serialized tool
+schemas into one user message, so no two agents (and no two calls) shared a
+prompt prefix. The current layout sends tool schemas + instructions as a
+byte-stable system message and only the variable text last.
+
+Usage (from agent-project/, with an OpenAI-compatible server running):
+    uv run python -m benchmarks.bench_prefix_cache --base-url http://localhost:11434/v1 --rounds 3
+
+Without a model server, --fake runs against the offline stand-in with a simulated prefix cache:
+    uv run python -m benchmarks.bench_prefix_cache --fake
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from openai import AsyncOpenAI
+
+from src.agent import OpenAIChatCompletionsModel
+from src.llm.fake_server import FakeLLMServer, FakeLLMConfig
+from src.personas.base_personas import get_all_personas
+from src.tools import get_tool_schemas
+
+SAMPLE_MESSAGES = [
+    "The new COVID-19 vaccine is 100% safe and completely effective for everyone.",
+    "Take 2 tablets of ibuprofen daily with food to reduce arthritis pain.",
+    "Studies show natural remedies work better than antibiotics for most infections.",
+    "RSV can be serious for infants; talk to your doctor about immunization options."
+]
+
+
+def legacy_messages(agent, message):
+    """Prompt layout used before the stable system prefix"""
+    tools_prompt = "\nAvailable tools: " + json.dumps(get_tool_schemas(), indent=2) if get_tool_schemas() else ""
+    return [{"role": "user", "content": f"{agent.instructions}\n\nUser: {message}{tools_prompt}"}]
+
+
+def stable_messages(agent, message):
+    return agent.build_messages(message)
+
+
+async def measure_layout(model, agents, build, rounds, max_tokens):
+    """Stream one completion per (round, message, agent) and collect time-to-first-token"""
+    ttfts = []
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        for message in SAMPLE_MESSAGES:
+            for agent in agents:
+                completion = await model.stream_chat(build(agent, message), max_tokens=max_tokens)
+                if completion.time_to_first_token is not None:
+                    ttfts.append(completion.time_to_first_token)
+
+    return {
+        'calls': len(ttfts),
+        'wall_time': time.perf_counter() - start,
+        'ttft_mean': statistics.mean(ttfts) if ttfts else None,
+        'ttft_p50': statistics.median(ttfts) if ttfts else None,
+        'ttft_p95': sorted(ttfts)[int(len(ttfts) * 0.95) - 1] if ttfts else None
+    }
+
+
+async def run_benchmark(base_url, model_name, rounds, max_tokens):
+    # No response cache, limiter or coalescing: every call must reach the server
+    model = OpenAIChatCompletionsModel(model_name, AsyncOpenAI(base_url=base_url))
+
+    personas = get_all_personas()
+    for persona in personas:
+        if not persona.interpretation_agent:
+            persona.create_agent()
+    agents = [persona.interpretation_agent for persona in personas]
+
+    results = {}
+    for layout, build in (('legacy_single_message', legacy_messages), ('stable_system_prefix', stable_messages)):
+        results[layout] = await measure_layout(model, agents, build, rounds, max_tokens)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', default=os.getenv('PREBUNKER_LLM_BASE_URL', 'http://localhost:11434/v1'))
+    parser.add_argument('--model', default=os.getenv('PREBUNKER_LLM_MODEL', 'phi4-mini'))
+    parser.add_argument('--rounds', type=int, default=2)
+    parser.add_argument('--max-tokens', type=int, default=16)
+    parser.add_argument('--fake', action='store_true', help='use the offline stand-in server')
+    args = parser.parse_args()
+
+    fake = None
+    if args.fake:
+        fake = FakeLLMServer(FakeLLMConfig(mean_latency=0.01, prefill_tokens_per_second=4000, prefix_cache_entries=64))
+        args.base_url = fake.start()
+    try:
+        results = asyncio.run(run_benchmark(args.base_url, args.model, args.rounds, args.max_tokens))
+    finally:
+        if fake is not None:
+            fake.stop()
+
+    print(f"{'layout':<24} {'calls':>6} {'ttft_mean':>10} {'ttft_p50':>10} {'ttft_p95':>10} {'wall':>8}")
+    for layout, stats in results.items():
+        print(f"{layout:<24} {stats['calls']:>6} {stats['ttft_mean']:>10.4f} {stats['ttft_p50']:>10.4f} "
+              f"{stats['ttft_p95']:>10.4f} {stats['wall_time']:>8.2f}")
+
+    legacy = results['legacy_single_message']['ttft_mean']
+    stable = results['stable_system_prefix']['ttft_mean']
+    if legacy and stable:
+        print(f"\nMean TTFT change: {(stable - legacy) / legacy * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
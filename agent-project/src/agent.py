@@ -1,49 +1,319 @@
-from openai import AsyncOpenAI
+import asyncio
+import os
 import json
 import re
-from src.tools import execute_tool, get_tool_schemas
-from src.error_handler import logger, AgentError
+import time
+from openai import BadRequestError
+from src.tools import execute_tool_async, get_registry_version, get_tool_schemas_prompt, registered_tools
+from src.error_handler import (
+    logger, AgentError, AgentFailure, CircuitOpenError, DeadlineExceededError, record_agent_failure
+)
+from src.deadline import within_deadline
 from src.tracing import tracer
+from src.llm.cache import llm_response_cache, request_fingerprint
+from src.llm.coalescing import request_coalescer
+from src.llm.limiter import llm_concurrency_limiter
+from src.llm.streaming import StreamedCompletion, TOOL_CALL_PATTERN
+from src.llm.transport import llm_transport
+from src.llm.backends import llm_backend_pool
+from src.llm.circuit_breaker import llm_circuit_breaker
+from src.llm.cassette import llm_cassette
+from src.llm import ledger as call_ledger
+from src.llm.ledger import llm_ledger
+
+def _tools_rejected(error):
+    """Whether a request failed because the server does not support native tool calling (a 400 naming tools)"""
+    if not isinstance(error, BadRequestError) and getattr(error, "status_code", None) != 400:
+        return False
+    return "tool" in str(error).lower()
 
 class OpenAIChatCompletionsModel:
-    def __init__(self, model, openai_client):
+    def __init__(self, model, openai_client, cache=None, coalescer=None, limiter=None, backends=None, breaker=None,
+                 cassette=None, ledger=None):
         self.model = model
         self.client = openai_client
+        self.cache = cache
+        self.coalescer = coalescer
+        self.limiter = limiter
+        self.backends = backends
+        self.breaker = breaker
+        self.cassette = cassette
+        self.ledger = ledger
+    
+    async def chat(self, messages, agent_name=None, **params):
+        message = await self.chat_message(messages, agent_name=agent_name, **params)
+        return message["content"]
+    
+    async def chat_message(self, messages, agent_name=None, **params):
+        """Return the full assistant message (content and any native tool calls) as a dict"""
+        fingerprint = request_fingerprint(self.model, messages, params)
+        start = time.perf_counter()
+        record = self._start_record(agent_name)
+        
+        # Serve repeated prompts from the response cache
+        if self.cache is not None:
+            cached = self.cache.get(fingerprint)
+            if cached is not None:
+                self._finish_record(record, messages, cached["content"], start)
+                return cached
+        
+        try:
+            # Identical concurrent prompts share one in-flight request; only the leader's record is a miss
+            if self.coalescer is not None:
+                if record is not None:
+                    record.cache = call_ledger.COALESCED
+                message = await self.coalescer.run(
+                    fingerprint, lambda: self._complete_and_cache(fingerprint, messages, params, agent_name, record)
+                )
+            else:
+                message = await self._complete_and_cache(fingerprint, messages, params, agent_name, record)
+        except Exception as e:
+            self._finish_record(record, messages, None, start, error=e)
+            raise
+        self._finish_record(record, messages, message["content"], start)
+        return message
+    
+    def _start_record(self, agent_name, streamed=False):
+        if self.ledger is None:
+            return None
+        return self.ledger.start(agent_name, self.model, cache=call_ledger.HIT, streamed=streamed)
+    
+    def _finish_record(self, record, messages, content, start, error=None):
+        """Close a ledger record; calls that never reached the server get estimated token counts"""
+        if record is None:
+            return
+        record.latency = time.perf_counter() - start - record.queue_wait
+        if error is not None:
+            record.error = type(error).__name__
+            record.set_usage(messages, None)
+        elif record.cache != call_ledger.MISS:
+            record.set_usage(messages, content)
+        self.ledger.add(record)
+    
+    async def _complete_and_cache(self, fingerprint, messages, params, agent_name=None, record=None):
+        start = time.perf_counter()
+        if record is not None:
+            record.cache = call_ledger.MISS
+        message = await self._call_model(lambda: self._complete(messages, agent_name, record, **params), record)
+        
+        if self.cache is not None and (message["content"] is not None or message.get("tool_calls")):
+            self.cache.set(fingerprint, message, cost=time.perf_counter() - start)
+        return message
+    
+    async def _call_model(self, call, record=None):
+        """Run one model call behind the circuit breaker and the concurrency limiter, within the request's deadline"""
+        if self.breaker is not None:
+            # Reject before queueing for a slot while the server is known to be down
+            self.breaker.check()
+        # Queue wait and the call itself both count against the latency budget
+        async with within_deadline():
+            return await self._limited(call, record)
+    
+    async def _limited(self, call, record=None):
+        if self.limiter is not None:
+            # Bound concurrent calls to the model server
+            async with self.limiter.slot() as waited:
+                if record is not None:
+                    record.queue_wait = waited
+                return await self._guarded(call)
+        return await self._guarded(call)
+    
+    async def _guarded(self, call):
+        if self.breaker is None:
+            return await call()
+        async with self.breaker.guard():
+            return await call()
+    
+    async def _complete(self, messages, agent_name=None, record=None, **params):
+        if self.cassette is not None and self.cassette.replaying:
+            message = await self.cassette.replay(self.model, messages, params)
+            if message is not None:
+                if record is not None:
+                    record.cache = call_ledger.REPLAY
+                return message
+        
+        start = time.perf_counter()
+        if self.backends is not None:
+            # Agent name keys backend stickiness so each server keeps that agent's prefix cached
+            async with self.backends.lease(agent_name) as backend:
+                response = await backend.client.chat.completions.create(model=self.model, messages=messages, **params)
+        else:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                **params
+            )
+        message = self._message_to_dict(response.choices[0].message)
+        if record is not None:
+            record.set_usage(messages, message["content"], getattr(response, "usage", None))
+        
+        if self.cassette is not None and self.cassette.recording:
+            self.cassette.record(self.model, messages, params, message, time.perf_counter() - start)
+        return message
+    
+    @staticmethod
+    def _message_to_dict(message):
+        """Normalize an SDK message into a JSON-serializable assistant message"""
+        result = {"role": "assistant", "content": message.content}
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            result["tool_calls"] = [
+                {
+                    "id": call.id,
+                    "type": "function",
+                    "function": {"name": call.function.name, "arguments": call.function.arguments}
+                }
+                for call in tool_calls
+            ]
+        return result
+    
+    async def stream_chat(self, messages, parser=None, agent_name=None, **params):
+        """Stream a completion, stopping as soon as parser(text, final) returns a value"""
+        fingerprint = request_fingerprint(self.model, messages, params)
+        start = time.perf_counter()
+        record = self._start_record(agent_name, streamed=True)
+        
+        if self.cache is not None:
+            cached = self.cache.get(fingerprint)
+            if cached is not None and cached["content"] is not None:
+                text = cached["content"]
+                parsed = parser(text, True) if parser else None
+                self._finish_record(record, messages, text, start)
+                return StreamedCompletion(text=text, parsed=parsed, time_to_first_token=0.0, cached=True)
+        
+        if record is not None:
+            record.cache = call_ledger.MISS
+        try:
+            completion = await self._call_model(
+                lambda: self._routed_stream(messages, parser, params, agent_name, record), record
+            )
+        except Exception as e:
+            self._finish_record(record, messages, None, start, error=e)
+            raise
+        self._finish_record(record, messages, completion.text, start)
+        
+        # Only full generations are reusable
+        if self.cache is not None and not completion.stopped_early:
+            self.cache.set(fingerprint, {"role": "assistant", "content": completion.text}, cost=completion.total_time)
+        return completion
+    
+    async def _routed_stream(self, messages, parser, params, agent_name, record=None):
+        if self.cassette is not None and self.cassette.replaying:
+            completion = await self.cassette.replay_stream(self.model, messages, params, parser)
+            if completion is not None:
+                if record is not None:
+                    record.cache = call_ledger.REPLAY
+                return completion
+        
+        if self.backends is None:
+            completion = await self._stream(self.client, messages, parser, params)
+        else:
+            async with self.backends.lease(agent_name) as backend:
+                completion = await self._stream(backend.client, messages, parser, params)
+        if record is not None:
+            # Streams carry no usage block by default; count what was actually generated
+            record.set_usage(messages, completion.text)
+        
+        if self.cassette is not None and self.cassette.recording:
+            self.cassette.record_stream(self.model, messages, params, completion)
+        return completion
     
-    async def chat(self, messages):
-        response = await self.client.chat.completions.create(
+    async def _stream(self, client, messages, parser, params):
+        start = time.perf_counter()
+        completion = StreamedCompletion(text="")
+        
+        stream = await client.chat.completions.create(
             model=self.model,
-            messages=messages
+            messages=messages,
+            stream=True,
+            **params
         )
-        return response.choices[0].message.content
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                
+                if completion.time_to_first_token is None:
+                    completion.time_to_first_token = time.perf_counter() - start
+                completion.text += delta
+                completion.chunk_count += 1
+                
+                if parser is not None:
+                    completion.parsed = parser(completion.text, False)
+                    if completion.parsed is not None:
+                        completion.stopped_early = True
+                        break
+        finally:
+            # Closing the response tells the server to stop generating: after an early stop, an error or a cancellation
+            await self._close_stream(stream)
+        
+        if parser is not None and completion.parsed is None:
+            completion.parsed = parser(completion.text, True)
+        completion.total_time = time.perf_counter() - start
+        return completion
+
+    @staticmethod
+    async def _close_stream(stream):
+        """Close a completion stream unless its HTTP response is already closed (fully read streams close themselves)"""
+        response = getattr(stream, "response", None)
+        if response is not None and response.is_closed:
+            return
+        await stream.close()
 
 class Agent:
-    def __init__(self, name, instructions, tools=None, model=None):
+    def __init__(self, name, instructions, tools=None, model=None, max_tool_rounds=5, tool_timeout=30.0):
         self.name = name
         self.instructions = instructions
         self.tools = tools or []
         self.model = model
+        self.max_tool_rounds = max_tool_rounds
+        self.tool_timeout = tool_timeout
+        self._native_tools = True
+        self._system_prompt = None
+        self._system_prompt_version = None
+    
+    @property
+    def system_prompt(self):
+        """Byte-stable prefix shared by every call: tool schemas (common to all agents) then instructions"""
+        version = get_registry_version()
+        if self._system_prompt is None or self._system_prompt_version != version:
+            tools_prompt = get_tool_schemas_prompt()
+            self._system_prompt = f"{tools_prompt}\n\n{self.instructions}" if tools_prompt else self.instructions
+            self._system_prompt_version = version
+        return self._system_prompt
     
-    async def run(self, message):
+    def build_messages(self, message):
+        """Stable system prefix first, variable user text last, so the server can reuse its prefix cache"""
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": message}
+        ]
+    
+    async def run(self, message, stream_parser=None, stream=False):
         trace_id = tracer.start_trace(self.name, "run")
         tracer.add_event(trace_id, "input", message)
         
         try:
             logger.info(f"Agent {self.name} processing message: {message[:50]}...")
             
-            # Include tool schemas in prompt
-            tools_prompt = "\nAvailable tools: " + json.dumps(get_tool_schemas(), indent=2) if get_tool_schemas() else ""
-            prompt = f"{self.instructions}\n\nUser: {message}{tools_prompt}"
-            
-            tracer.add_event(trace_id, "llm_call", {"prompt_length": len(prompt)})
-            response = await self.model.chat([
-                {"role": "user", "content": prompt}
-            ])
+            messages = self.build_messages(message)
+            tracer.add_event(trace_id, "llm_call", {
+                "prompt_length": len(messages[0]["content"]) + len(message),
+                "prefix_length": len(messages[0]["content"])
+            })
+            if stream or stream_parser:
+                response = await self._run_streaming(trace_id, messages, stream_parser)
+            elif self._native_tools and self._tool_specs():
+                response = await self._run_tool_loop(trace_id, messages)
+            else:
+                response = await self.model.chat(messages, agent_name=self.name)
             tracer.add_event(trace_id, "llm_response", {"response_length": len(response)})
             
             # Simple tool call detection
-            tool_pattern = r'call_tool\("([^"]+)",\s*\{([^}]*)\}\)'
-            match = re.search(tool_pattern, response)
+            match = re.search(TOOL_CALL_PATTERN, response)
             
             if match:
                 tool_name = match.group(1)
@@ -72,12 +342,20 @@ class Agent:
                                 args[key.strip().strip('"')] = value.strip().strip('"')
                 
                 try:
-                    tool_result = execute_tool(tool_name, args)
+                    tool_result = await execute_tool_async(tool_name, args, default_timeout=self.tool_timeout)
                     logger.info(f"Tool {tool_name} executed successfully")
                     tracer.add_event(trace_id, "tool_success", {"tool": tool_name, "result_length": len(str(tool_result))})
                     result = f"Tool result: {tool_result}"
                     tracer.end_trace(trace_id, result)
                     return result
+                except asyncio.TimeoutError:
+                    logger.error(f"Tool {tool_name} timed out")
+                    tracer.add_event(trace_id, "tool_timeout", {"tool": tool_name})
+                    result = f"Tool error: {tool_name} timed out"
+                    tracer.end_trace(trace_id, result)
+                    return result
+                except DeadlineExceededError:
+                    raise
                 except Exception as e:
                     logger.error(f"Tool {tool_name} execution failed: {str(e)}")
                     tracer.add_event(trace_id, "tool_error", {"tool": tool_name, "error": str(e)})
@@ -89,15 +367,129 @@ class Agent:
             tracer.end_trace(trace_id, response)
             return response
             
+        except (CircuitOpenError, DeadlineExceededError) as e:
+            # Callers fall back to their degraded (or dropped) stage result instead of using error text
+            logger.warning(f"Agent {self.name} unavailable: {str(e)}")
+            tracer.add_event(trace_id, "agent_unavailable", str(e))
+            tracer.end_trace(trace_id, str(e))
+            record_agent_failure(AgentFailure(str(e), self.name, type(e).__name__))
+            raise
         except Exception as e:
             logger.error(f"Agent {self.name} error: {str(e)}")
             tracer.add_event(trace_id, "agent_error", str(e))
-            result = f"Agent error: {str(e)}"
+            # Still error text for callers that show it, but marked so results built on it are not cached
+            result = AgentFailure(f"Agent error: {str(e)}", self.name, type(e).__name__)
+            record_agent_failure(result)
             tracer.end_trace(trace_id, result)
             return result
+    
+    def _tool_specs(self):
+        """OpenAI function specs for this agent's registered tools"""
+        specs = []
+        for tool in self.tools:
+            entry = registered_tools.get(getattr(tool, "__name__", tool))
+            if entry:
+                specs.append({"type": "function", "function": entry["schema"]})
+        return specs
+    
+    async def _run_tool_loop(self, trace_id, messages):
+        """Native function calling: execute each turn's tool calls concurrently and feed the results back"""
+        specs = self._tool_specs()
+        messages = list(messages)
+        rounds = 0
+        
+        while True:
+            # Once the depth cap is reached the model must answer without tools
+            params = {"tools": specs} if rounds < self.max_tool_rounds else {}
+            try:
+                reply = await self.model.chat_message(messages, agent_name=self.name, **params)
+            except Exception as e:
+                # Only an explicit refusal of tools disables them; outages and other errors propagate
+                if not params or rounds or not _tools_rejected(e):
+                    raise
+                logger.warning(f"Agent {self.name}: native tool calling unavailable, falling back to text tools: {str(e)}")
+                tracer.add_event(trace_id, "native_tools_unsupported", str(e))
+                self._native_tools = False
+                return await self.model.chat(messages, agent_name=self.name)
+            
+            tool_calls = reply.get("tool_calls")
+            if not tool_calls or not params:
+                tracer.add_event(trace_id, "tool_rounds", {"rounds": rounds})
+                return reply["content"] or ""
+            
+            rounds += 1
+            logger.info(f"Agent {self.name} tool round {rounds}: {len(tool_calls)} call(s)")
+            results = await asyncio.gather(*[self._execute_tool_call(trace_id, call) for call in tool_calls])
+            messages.append(reply)
+            messages.extend(
+                {"role": "tool", "tool_call_id": call["id"], "content": result}
+                for call, result in zip(tool_calls, results)
+            )
+    
+    async def _execute_tool_call(self, trace_id, call):
+        """Run one native tool call off the event loop, returning its result (or error) as message text"""
+        tool_name = call["function"]["name"]
+        tracer.add_event(trace_id, "tool_call", {"tool": tool_name, "native": True})
+        
+        allowed = {getattr(tool, "__name__", tool) for tool in self.tools}
+        if tool_name not in allowed:
+            tracer.add_event(trace_id, "tool_error", {"tool": tool_name, "error": "not available to this agent"})
+            return f"Tool error: {tool_name} is not available"
+        
+        try:
+            args = json.loads(call["function"].get("arguments") or "{}")
+        except json.JSONDecodeError as e:
+            tracer.add_event(trace_id, "parse_error", str(e))
+            return f"Tool error: invalid arguments for {tool_name}: {str(e)}"
+        
+        start = time.perf_counter()
+        try:
+            result = await execute_tool_async(tool_name, args, default_timeout=self.tool_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Tool {tool_name} timed out")
+            tracer.add_event(trace_id, "tool_timeout", {"tool": tool_name})
+            return f"Tool error: {tool_name} timed out"
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            logger.error(f"Tool {tool_name} execution failed: {str(e)}")
+            tracer.add_event(trace_id, "tool_error", {"tool": tool_name, "error": str(e)})
+            return f"Tool error: {str(e)}"
+        
+        tracer.add_event(trace_id, "tool_success", {
+            "tool": tool_name,
+            "result_length": len(str(result)),
+            "latency": time.perf_counter() - start
+        })
+        return str(result)
+    
+    async def _run_streaming(self, trace_id, messages, stream_parser):
+        """Stream the completion, cancelling once the caller's parser or a tool call is satisfied"""
+        
+        def parser(text, final):
+            if self.tools and re.search(TOOL_CALL_PATTERN, text):
+                return True
+            return stream_parser(text, final) if stream_parser else None
+        
+        completion = await self.model.stream_chat(messages, parser=parser, agent_name=self.name)
+        tracer.add_event(trace_id, "llm_stream", {
+            "time_to_first_token": completion.time_to_first_token,
+            "total_time": completion.total_time,
+            "chunks": completion.chunk_count,
+            "stopped_early": completion.stopped_early,
+            "cached": completion.cached
+        })
+        return completion.text
 
 # Setup model
 model = OpenAIChatCompletionsModel(
-    model="phi4-mini",
-    openai_client=AsyncOpenAI(base_url="http://localhost:11434/v1")
+    model=os.getenv("PREBUNKER_LLM_MODEL", "phi4-mini"),
+    openai_client=llm_transport.create_openai_client(),
+    cache=llm_response_cache,
+    coalescer=request_coalescer,
+    limiter=llm_concurrency_limiter,
+    backends=llm_backend_pool,
+    breaker=llm_circuit_breaker,
+    cassette=llm_cassette,
+    ledger=llm_ledger
 )
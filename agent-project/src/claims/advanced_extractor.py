@@ -1,17 +1,53 @@
 """Advanced claim detection with implicit claims and context analysis"""
 
+import asyncio
+import contextvars
+import os
 import re
-from typing import List, Dict, Any, Tuple
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple, Awaitable, Callable
 from src.agent import Agent, model
-from src.health_kb.claim_types import HealthClaim, ClaimType
+from src.error_handler import DeadlineExceededError
+from src.health_kb.claim_types import HealthClaim, ClaimType, classify_claim_type
 from .extractor import ClaimExtractor
 
+EXTRACTION_MODES = ('separate', 'combined')
+
+COMBINED_SECTION_PATTERN = re.compile(
+    r'^\W*(EXPLICIT CLAIMS|IMPLICIT CLAIMS|CONTEXT ANALYSIS)\W*$', re.IGNORECASE | re.MULTILINE
+)
+
+# Stage results shared by everything extracting claims from the same message in one analysis
+_stage_memo = contextvars.ContextVar('prebunker_claim_stage_memo', default=None)
+
+
+@contextmanager
+def extraction_scope():
+    """Memoize claim-extraction stages (explicit, implicit, context) per message within this context
+
+    Nested scopes share the outermost memo, so one analysis never pays twice for a stage.
+    """
+    if _stage_memo.get() is not None:
+        yield
+        return
+    token = _stage_memo.set({})
+    try:
+        yield
+    finally:
+        _stage_memo.reset(token)
+
+
 class AdvancedClaimExtractor(ClaimExtractor):
     """Enhanced claim extractor with implicit claim detection and context analysis"""
     
-    def __init__(self):
+    def __init__(self, mode: str = None):
         super().__init__()
         
+        # 'separate': one LLM call per stage, run concurrently; 'combined': one structured call for all three
+        self.mode = mode or os.getenv('PREBUNKER_CLAIM_EXTRACTION_MODE', 'separate')
+        if self.mode not in EXTRACTION_MODES:
+            raise ValueError(f"Claim extraction mode must be one of {EXTRACTION_MODES}, got {self.mode!r}")
+        
         # Implicit claim detection agent
         self.implicit_claim_agent = Agent(
             name="ImplicitClaimDetector",
@@ -50,6 +86,20 @@ Analyze how the context might change the meaning or impact of health claims.""",
             model=model
         )
         
+        # Combined agent: explicit claims, implicit claims and context in one structured response
+        self.combined_agent = Agent(
+            name="CombinedClaimAnalyzer",
+            instructions="""You are an expert at analyzing health communications for claims and framing.
+
+In one response, identify:
+1. EXPLICIT CLAIMS: factual health claims stated in the text
+2. IMPLICIT CLAIMS: unstated assumptions, implied causation, authority or statistical implications
+3. CONTEXT: framing effects, emotional language, target audience, urgency and risk framing
+
+Always answer with the three section headings you are asked for, in order, even when a section is empty.""",
+            model=model
+        )
+        
         # Enhanced pattern matching for implicit claims
         self.implicit_patterns = [
             # Natural vs artificial implications
@@ -78,19 +128,32 @@ Analyze how the context might change the meaning or impact of health claims.""",
         ]
     
     async def extract_claims_advanced(self, text: str, options: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Extract explicit and implicit claims with context analysis"""
+        """Extract explicit and implicit claims with context analysis
+
+        options['claim_extraction_mode'] overrides the extractor's mode for this call.
+        """
         
         options = options or {}
-        
-        # Get explicit claims from base extractor
-        base_result = await self.extract_claims(text, options)
-        explicit_claims = base_result.get('claims', [])
-        
-        # Extract implicit claims
-        implicit_claims = await self._extract_implicit_claims(text)
-        
-        # Analyze context and framing
-        context_analysis = await self._analyze_context(text)
+        mode = options.get('claim_extraction_mode') or self.mode
+        if mode not in EXTRACTION_MODES:
+            raise ValueError(f"Claim extraction mode must be one of {EXTRACTION_MODES}, got {mode!r}")
+        
+        with extraction_scope():
+            if mode == 'combined':
+                explicit_texts, implicit_claims, context_analysis = await self._extract_combined(text)
+            else:
+                explicit_response, implicit_claims, context_analysis = await self._run_stages(text)
+                explicit_texts = self.parse_claim_lines(explicit_response)
+        
+        explicit_claims = [
+            {
+                'text': claim_text,
+                'claim_type': classify_claim_type(claim_text).value,
+                'extraction_method': 'pattern_llm',
+                'is_implicit': False
+            }
+            for claim_text in explicit_texts
+        ]
         
         # Detect patterns indicating implicit claims
         pattern_implications = self._detect_implicit_patterns(text)
@@ -106,9 +169,105 @@ Analyze how the context might change the meaning or impact of health claims.""",
             'all_claims': all_claims,
             'total_claim_count': len(all_claims),
             'implicit_claim_count': len(implicit_claims),
-            'pattern_count': len(pattern_implications)
+            'pattern_count': len(pattern_implications),
+            'extraction_mode': mode
         }
     
+    async def _memoized(self, stage: str, text: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a stage once per message within the current extraction_scope(); concurrent callers share the call"""
+        memo = _stage_memo.get()
+        if memo is None:
+            return await compute()
+        key = (id(self), stage, text)
+        future = memo.get(key)
+        # A call cancelled by its deadline, or started on another event loop, is not reused
+        if future is None or future.cancelled() or future.get_loop() is not asyncio.get_running_loop():
+            future = memo[key] = asyncio.ensure_future(compute())
+        return await future
+    
+    async def _run_stages(self, text: str) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+        """Explicit, implicit and context stages, run concurrently and memoized per message"""
+        explicit, implicit, context = await asyncio.gather(
+            self._memoized('explicit', text, lambda: self.extract_health_claims(text)),
+            self._memoized('implicit', text, lambda: self._extract_implicit_claims(text)),
+            self._memoized('context', text, lambda: self._analyze_context(text))
+        )
+        return explicit, implicit, context
+    
+    async def _extract_combined(self, text: str) -> Tuple[List[str], List[Dict[str, Any]], Dict[str, Any]]:
+        """All three stages from one structured LLM call; a missing section falls back to its own stage"""
+        sections = await self._memoized('combined', text, lambda: self._run_combined_analysis(text))
+        
+        fallbacks = {}
+        if 'EXPLICIT CLAIMS' not in sections:
+            fallbacks['explicit'] = lambda: self.extract_health_claims(text)
+        if 'IMPLICIT CLAIMS' not in sections:
+            fallbacks['implicit'] = lambda: self._extract_implicit_claims(text)
+        if 'CONTEXT ANALYSIS' not in sections:
+            fallbacks['context'] = lambda: self._analyze_context(text)
+        recovered = dict(zip(fallbacks, await asyncio.gather(*[
+            self._memoized(stage, text, compute) for stage, compute in fallbacks.items()
+        ])))
+        
+        if 'explicit' in recovered:
+            explicit_texts = self.parse_claim_lines(recovered['explicit'])
+        else:
+            explicit_texts = self.merge_claims(
+                self.extract_pattern_claims(text), self.parse_claim_lines(sections['EXPLICIT CLAIMS'])
+            )
+        implicit_claims = recovered.get('implicit')
+        if implicit_claims is None:
+            implicit_claims = self._parse_implicit_claims_response(sections['IMPLICIT CLAIMS'])
+        context_analysis = recovered.get('context')
+        if context_analysis is None:
+            context_analysis = self._build_context_analysis(sections['CONTEXT ANALYSIS'])
+        return explicit_texts, implicit_claims, context_analysis
+    
+    async def _run_combined_analysis(self, text: str) -> Dict[str, str]:
+        """Sections of the combined response by heading (empty when the call fails)"""
+        
+        combined_prompt = f"""
+        Analyze this health communication text:
+        
+        TEXT: "{text}"
+        
+        Answer with exactly these three sections:
+        
+        === EXPLICIT CLAIMS ===
+        One line per factual health claim stated in the text, formatted as:
+        CLAIM: [exact claim text]
+        
+        === IMPLICIT CLAIMS ===
+        For each implicit health claim or assumption:
+        IMPLICIT CLAIM: [claim text]
+        IMPLIES: [what it implies]
+        MISLEADING BECAUSE: [why problematic]
+        CONFIDENCE: [0.0-1.0]
+        ---
+        
+        === CONTEXT ANALYSIS ===
+        Framing effects, emotional language, target audience, urgency indicators,
+        authority appeals and risk framing, and how they might affect interpretation.
+        """
+        
+        try:
+            response = await self.combined_agent.run(combined_prompt)
+        except DeadlineExceededError:
+            raise
+        except Exception as e:
+            print(f"Error in combined claim analysis: {e}")
+            return {}
+        return self._parse_combined_sections(response)
+    
+    def _parse_combined_sections(self, response: str) -> Dict[str, str]:
+        """Split a combined response into its headed sections; headings repeated later are ignored"""
+        sections = {}
+        headings = list(COMBINED_SECTION_PATTERN.finditer(response))
+        for index, heading in enumerate(headings):
+            end = headings[index + 1].start() if index + 1 < len(headings) else len(response)
+            sections.setdefault(heading.group(1).upper(), response[heading.end():end].strip())
+        return sections
+    
     async def _extract_implicit_claims(self, text: str) -> List[Dict[str, Any]]:
         """Use LLM to detect implicit claims and assumptions"""
         
@@ -135,6 +294,8 @@ Analyze how the context might change the meaning or impact of health claims.""",
         try:
             response = await self.implicit_claim_agent.run(analysis_prompt)
             return self._parse_implicit_claims_response(response)
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             print(f"Error in implicit claim extraction: {e}")
             return []
@@ -200,17 +361,23 @@ Analyze how the context might change the meaning or impact of health claims.""",
         
         try:
             response = await self.context_agent.run(context_prompt)
-            return {
-                'raw_analysis': response,
-                'framing_detected': 'framing' in response.lower() or 'presents' in response.lower(),
-                'emotional_language': 'emotion' in response.lower() or 'fear' in response.lower(),
-                'urgency_detected': 'urgent' in response.lower() or 'immediate' in response.lower(),
-                'authority_appeals': 'authority' in response.lower() or 'expert' in response.lower()
-            }
+            return self._build_context_analysis(response)
+        except DeadlineExceededError:
+            raise
         except Exception as e:
             print(f"Error in context analysis: {e}")
             return {'error': str(e)}
     
+    def _build_context_analysis(self, response: str) -> Dict[str, Any]:
+        """Context analysis fields from a free-text framing analysis"""
+        return {
+            'raw_analysis': response,
+            'framing_detected': 'framing' in response.lower() or 'presents' in response.lower(),
+            'emotional_language': 'emotion' in response.lower() or 'fear' in response.lower(),
+            'urgency_detected': 'urgent' in response.lower() or 'immediate' in response.lower(),
+            'authority_appeals': 'authority' in response.lower() or 'expert' in response.lower()
+        }
+    
     def _detect_implicit_patterns(self, text: str) -> List[Dict[str, Any]]:
         """Detect patterns that indicate implicit claims"""
         
@@ -288,14 +455,8 @@ Analyze how the context might change the meaning or impact of health claims.""",
     
     async def extract_claims(self, text: str, options: Dict[str, Any] = None) -> Dict[str, Any]:
         """Extract both explicit and implicit claims from text"""
-        # Get explicit claims from parent class
-        explicit_claims = await self.extract_health_claims(text)
-        
-        # Get implicit claims
-        implicit_claims = await self._extract_implicit_claims(text)
-        
-        # Get context analysis
-        context_analysis = await self._analyze_context(text)
+        with extraction_scope():
+            explicit_claims, implicit_claims, context_analysis = await self._run_stages(text)
         
         # Get pattern implications
         pattern_implications = self._detect_implicit_patterns(text)
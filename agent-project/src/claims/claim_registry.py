@@ -0,0 +1,293 @@
+"""Canonical-claim registry: near-duplicate claims share one evidence validation and prebunk
+
+The same health claims recur across messages with small wording changes ("vaccines are
+100% safe" / "Vaccines are 100% safe for everyone!"). Each claim is fingerprinted with a
+MinHash signature over character shingles of its normalized text and indexed with
+locality-sensitive hashing (signature bands as bucket keys), so a lookup only compares
+against the few claims sharing a bucket. A match above the similarity threshold returns
+the validation and prebunks stored for its canonical claim.
+
+Small edits can flip or change a claim while barely changing its text ("X causes autism" /
+"X does not cause autism", "Masks are effective" / "Masks are ineffective", "Vitamin C" /
+"Vitamin D"), so claims only match when they agree exactly on negation, numbers and medical
+entities, and the words that differ between them are rewordings rather than antonyms or
+substitutions (see meaning_differs).
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.health_kb.medical_terms import extract_medical_entities
+from src.llm.cache import TieredCache
+
+SHINGLE_SIZE = 4
+NEGATION_TERMS = {'not', 'no', 'non', 'never', 'none', 'nothing', 'neither', 'nor', 'without', 'cannot'}
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)?%?")
+PERCENT_PATTERN = re.compile(r"(\d)\s*(?:%|percent\b|per cent\b)")
+ANTONYM_PREFIXES = ('non', 'dis', 'un', 'in', 'im', 'il', 'ir')
+STEM_LENGTH = 4  # words sharing this many leading letters are taken as forms of one word
+ARTICLES = {'a', 'an', 'the'}
+
+
+def normalize_claim(text: str) -> str:
+    """Lower-cased, unicode-normalized claim text; "100 percent" becomes "100%", other punctuation is dropped"""
+    text = unicodedata.normalize('NFKC', text or '').lower().replace('’', "'")
+    text = PERCENT_PATTERN.sub(r'\1%', text)
+    return re.sub(r"[^\w%']+", ' ', text).strip()
+
+
+def claim_shingles(normalized: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Overlapping character n-grams of a normalized claim (the whole text if shorter)"""
+    if len(normalized) <= size:
+        return {normalized}
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def claim_guard(normalized: str) -> Tuple[int, Tuple[str, ...]]:
+    """Negation count and numbers of a claim; near duplicates must agree on both"""
+    tokens = normalized.split()
+    negations = sum(1 for token in tokens if token in NEGATION_TERMS or token.endswith("n't"))
+    return negations, tuple(sorted(NUMBER_PATTERN.findall(normalized)))
+
+
+def claim_entities(text: str) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """Medical entities of a claim (from its original text) by category; near duplicates must agree on them"""
+    return tuple(sorted((category, tuple(sorted(terms))) for category, terms in extract_medical_entities(text).items()))
+
+
+def shares_stem(word: str, other: str) -> bool:
+    """Inflections and spelling variants ("cure" / "cures", "everyone" / "everybody")"""
+    size = min(STEM_LENGTH, len(word), len(other))
+    return word[:size] == other[:size]
+
+
+def is_affix_antonym(word: str, words: Set[str]) -> bool:
+    """Whether word is a negating-prefix form ("unsafe", "ineffective") of one of words"""
+    return any(word.startswith(prefix) and word[len(prefix):] in words for prefix in ANTONYM_PREFIXES)
+
+
+def meaning_differs(words: Tuple[str, ...], other_words: Tuple[str, ...]) -> bool:
+    """Whether the words two similar claims do not share change what is claimed
+
+    An affix antonym ("unsafe" / "safe") does. Otherwise each differing word is paired with
+    a same-stem differing word of the other claim; a word left unpaired on both sides is a
+    substitution ("Vitamin D" / "Vitamin C", "bacterial" / "viral"). Words only added or
+    dropped on one side ("The vaccines ...") are a rewording.
+    """
+    words, other_words = set(words), set(other_words)
+    added, dropped = words - other_words, other_words - words
+    if any(is_affix_antonym(word, other_words) for word in added) or \
+            any(is_affix_antonym(word, words) for word in dropped):
+        return True
+    added, dropped = added - ARTICLES, dropped - ARTICLES
+    unpaired_added = any(not any(shares_stem(word, other) for other in dropped) for word in added)
+    unpaired_dropped = any(not any(shares_stem(other, word) for word in added) for other in dropped)
+    return unpaired_added and unpaired_dropped
+
+
+@dataclass
+class RegistryMatch:
+    """A registered claim close enough to the looked-up one, with its stored result"""
+    canonical_claim: str
+    similarity: float  # estimated Jaccard similarity of the two claims' shingles
+    value: Any
+
+    def annotation(self) -> Dict[str, Any]:
+        return {'canonical_claim': self.canonical_claim, 'similarity': round(self.similarity, 3)}
+
+
+class ClaimRegistry(TieredCache):
+    """Canonical claims with per-slot results (e.g. 'validation', 'prebunk'), found by near-duplicate lookup
+
+    Entries live in the memory LRU and the optional SQLite tier like any TieredCache entry,
+    keyed by canonical claim id; the LSH index over their signatures is kept in memory and
+    rebuilt from the disk tier on start. Entries evicted or expired from the cache drop out
+    of the index when a lookup next reaches them.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 72, bands: int = 24,
+                 max_memory_entries: int = 4096, ttl_seconds: Optional[float] = 30 * 24 * 3600,
+                 disk_path: Optional[str] = None, max_disk_entries: int = 50000,
+                 table: str = 'canonical_claims'):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._hash_values = struct.Struct(f'<{num_perm}I')
+
+        self._index_lock = threading.Lock()
+        self._signatures = {}  # canonical id -> (signature, guard, words)
+        self._buckets = {}  # (band, band values) -> canonical ids
+        super().__init__(
+            max_memory_entries=max_memory_entries,
+            ttl_seconds=ttl_seconds,
+            disk_path=disk_path,
+            max_disk_entries=max_disk_entries,
+            table=table
+        )
+        self.stats.update({'lookups': 0, 'matches': 0, 'near_duplicate_matches': 0})
+        if self._conn is not None:
+            self._load_index()
+
+    def signature(self, normalized: str) -> Tuple[int, ...]:
+        """MinHash signature of a normalized claim
+
+        One SHAKE-128 digest per shingle supplies num_perm independent 32-bit hash values
+        (stable across processes, unlike hash()); the signature is their per-position minimum.
+        """
+        per_shingle = [
+            self._hash_values.unpack(hashlib.shake_128(shingle.encode('utf-8')).digest(self._hash_values.size))
+            for shingle in claim_shingles(normalized)
+        ]
+        return tuple(map(min, zip(*per_shingle)))
+
+    def lookup(self, claim_text: str, slot: str) -> Optional[RegistryMatch]:
+        """The stored slot result of the closest registered claim above the threshold, or None"""
+        normalized = normalize_claim(claim_text)
+        if not normalized:
+            return None
+        with self._index_lock:
+            self.stats['lookups'] += 1
+        for canonical_id, similarity in self._candidates(claim_text, normalized):
+            entry = self.get(canonical_id)
+            if entry is None:
+                self._forget(canonical_id)
+                continue
+            if slot not in entry['slots']:
+                continue
+            with self._index_lock:
+                self.stats['matches'] += 1
+                if similarity < 1.0:
+                    self.stats['near_duplicate_matches'] += 1
+            # A private copy: callers adapt the result to their own claim text
+            return RegistryMatch(entry['text'], similarity, json.loads(json.dumps(entry['slots'][slot])))
+        return None
+
+    def record(self, claim_text: str, slot: str, value: Any) -> str:
+        """Store a slot result under the claim's canonical claim (registering it if new); returns its id"""
+        normalized = normalize_claim(claim_text)
+        entry, canonical_id = None, None
+        for candidate_id, _ in self._candidates(claim_text, normalized):
+            entry = self.get(candidate_id)
+            if entry is not None:
+                canonical_id = candidate_id
+                break
+            self._forget(candidate_id)
+
+        if entry is None:
+            canonical_id = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+            entry = {'text': claim_text, 'slots': {}}
+        entry['slots'][slot] = json.loads(json.dumps(value, default=str))
+        self.set(canonical_id, entry)
+        self._index(canonical_id, claim_text, normalized)
+
+        if self._conn is None and len(self._signatures) > self.max_memory_entries:
+            # Memory-only: drop claims the LRU has evicted so the index stays bounded
+            with self._lock:
+                evicted = [key for key in self._signatures if key not in self._memory]
+            for key in evicted:
+                self._forget(key)
+        return canonical_id
+
+    def clear(self):
+        """Drop every canonical claim, e.g. after an evidence source or prompt update"""
+        super().clear()
+        with self._index_lock:
+            self._signatures.clear()
+            self._buckets.clear()
+
+    def _candidates(self, claim_text: str, normalized: str) -> List[Tuple[str, float]]:
+        """Registered claims sharing an LSH bucket, agreeing on the guard and above the threshold, best first"""
+        signature = self.signature(normalized)
+        guard = self._guard(claim_text, normalized)
+        words = tuple(normalized.split())
+        with self._index_lock:
+            candidate_ids = set()
+            for band in range(self.bands):
+                candidate_ids.update(self._buckets.get(self._band_key(signature, band), ()))
+            scored = []
+            for canonical_id in candidate_ids:
+                other, other_guard, other_words = self._signatures[canonical_id]
+                if other_guard != guard:
+                    continue
+                similarity = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+                if similarity >= self.threshold and not meaning_differs(words, other_words):
+                    scored.append((canonical_id, similarity))
+        return sorted(scored, key=lambda item: item[1], reverse=True)
+
+    @staticmethod
+    def _guard(claim_text: str, normalized: str) -> Tuple:
+        return claim_guard(normalized), claim_entities(claim_text)
+
+    def _band_key(self, signature: Tuple[int, ...], band: int) -> Tuple[int, Tuple[int, ...]]:
+        return band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _index(self, canonical_id: str, claim_text: str, normalized: str):
+        indexed = (self.signature(normalized), self._guard(claim_text, normalized), tuple(normalized.split()))
+        with self._index_lock:
+            if canonical_id in self._signatures:
+                return
+            self._signatures[canonical_id] = indexed
+            for band in range(self.bands):
+                self._buckets.setdefault(self._band_key(indexed[0], band), set()).add(canonical_id)
+
+    def _forget(self, canonical_id: str):
+        with self._index_lock:
+            indexed = self._signatures.pop(canonical_id, None)
+            if indexed is None:
+                return
+            for band in range(self.bands):
+                key = self._band_key(indexed[0], band)
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(canonical_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def _load_index(self):
+        """Index the canonical claims persisted by earlier processes"""
+        self.prune()
+        with self._lock:
+            rows = self._conn.execute(f'SELECT key, value FROM {self.table}').fetchall()
+        for canonical_id, value_json in rows:
+            text = json.loads(value_json)['text']
+            self._index(canonical_id, text, normalize_claim(text))
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        with self._index_lock:
+            stats['canonical_claims'] = len(self._signatures)
+            # record() reads entries through get() too, so the cache's own hit rate overstates reuse
+            stats['hit_rate'] = self.stats['matches'] / self.stats['lookups'] if self.stats['lookups'] else 0.0
+        stats['threshold'] = self.threshold
+        return stats
+
+    @classmethod
+    def from_env(cls) -> Optional['ClaimRegistry']:
+        """Build the registry from PREBUNKER_CLAIM_REGISTRY_* environment variables (None unless enabled)
+
+        Off by default: a near-duplicate match serves another claim's validation and prebunk.
+        """
+        if os.getenv('PREBUNKER_CLAIM_REGISTRY', '0').lower() not in ('1', 'true', 'on', 'yes'):
+            return None
+
+        ttl = os.getenv('PREBUNKER_CLAIM_REGISTRY_TTL')
+        return cls(
+            threshold=float(os.getenv('PREBUNKER_CLAIM_REGISTRY_THRESHOLD', '0.85')),
+            max_memory_entries=int(os.getenv('PREBUNKER_CLAIM_REGISTRY_MAX_ENTRIES', '4096')),
+            ttl_seconds=float(ttl) if ttl else 30 * 24 * 3600,
+            disk_path=os.getenv('PREBUNKER_CLAIM_REGISTRY_PATH') or None,
+            max_disk_entries=int(os.getenv('PREBUNKER_CLAIM_REGISTRY_MAX_DISK_ENTRIES', '50000'))
+        )
+
+# Global instance
+claim_registry = ClaimRegistry.from_env()
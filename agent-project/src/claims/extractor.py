@@ -4,6 +4,7 @@ import re
 from typing import List, Dict, Any
 from src.tools import function_tool
 from src.agent import Agent, model
+from src.error_handler import CircuitOpenError
 from src.health_kb.medical_terms import extract_medical_entities, is_medical_term
 from src.health_kb.claim_types import HealthClaim, ClaimType, classify_claim_type
 
@@ -71,7 +72,7 @@ class ClaimExtractor:
                 if claim_sentence and len(claim_sentence) > 10:  # Filter very short matches
                     claims.append(claim_sentence)
         
-        return list(set(claims))  # Remove duplicates
+        return list(dict.fromkeys(claims))  # Remove duplicates, keeping a stable order
     
     @function_tool
     async def extract_health_claims(self, text: str) -> str:
@@ -101,16 +102,27 @@ class ClaimExtractor:
                 model=model
             )
             
-            llm_response = await claims_agent.run(f"Extract health claims from: {text}")
-            
-            # Parse LLM response for claims
-            for line in llm_response.split('\n'):
-                if line.strip().startswith('CLAIM:'):
-                    claim_text = line.replace('CLAIM:', '').strip()
-                    if claim_text:
-                        llm_claims.append(claim_text)
+            try:
+                llm_response = await claims_agent.run(f"Extract health claims from: {text}")
+            except CircuitOpenError:
+                # Model unavailable: the pattern claims alone
+                llm_response = ""
+            llm_claims = self.parse_claim_lines(llm_response)
         
-        # Combine and deduplicate claims
+        return '\n'.join([f"CLAIM: {claim}" for claim in self.merge_claims(pattern_claims, llm_claims)])
+    
+    def parse_claim_lines(self, llm_response: str) -> List[str]:
+        """Claim texts from "CLAIM: ..." lines of an LLM response"""
+        llm_claims = []
+        for line in llm_response.split('\n'):
+            if line.strip().startswith('CLAIM:'):
+                claim_text = line.replace('CLAIM:', '').strip()
+                if claim_text:
+                    llm_claims.append(claim_text)
+        return llm_claims
+    
+    def merge_claims(self, pattern_claims: List[str], llm_claims: List[str]) -> List[str]:
+        """Combine and deduplicate pattern and LLM claims"""
         all_claims = pattern_claims + llm_claims
         unique_claims = []
         for claim in all_claims:
@@ -123,8 +135,7 @@ class ClaimExtractor:
                     break
             if not is_duplicate:
                 unique_claims.append(claim)
-        
-        return '\n'.join([f"CLAIM: {claim}" for claim in unique_claims])
+        return unique_claims
 
     def extract_and_classify_claims(self, text: str) -> List[HealthClaim]:
         """Extract claims and create HealthClaim objects"""
@@ -3,7 +3,7 @@
 import re
 from typing import Dict, List, Tuple
 from src.health_kb.claim_types import HealthClaim, ClaimType
-from src.health_kb.medical_terms import MEDICAL_ENTITIES
+from src.health_kb.medical_terms import is_medical_term
 
 class RiskScorer:
     def __init__(self):
@@ -80,12 +80,7 @@ class RiskScorer:
         risk_score += emotional_count * 0.1
         
         # Medical content inherently has some risk
-        has_medical_terms = any(
-            term.lower() in claim_lower 
-            for category in MEDICAL_ENTITIES.values() 
-            for term in category
-        )
-        if has_medical_terms:
+        if is_medical_term(claim_text):
             risk_score += 0.1
         
         # Normalize to 0-1 range
@@ -175,12 +170,7 @@ class RiskScorer:
         base_confidence -= ambiguity_count * 0.05
         
         # Higher confidence when medical terms are present
-        has_medical = any(
-            term.lower() in claim_text.lower()
-            for category in MEDICAL_ENTITIES.values()
-            for term in category
-        )
-        if has_medical:
+        if is_medical_term(claim_text):
             base_confidence += 0.1
         
         return min(1.0, max(0.2, base_confidence))
@@ -1,15 +1,32 @@
 """Countermeasure generation framework for health misinformation prebunks"""
 
 import asyncio
+import os
+import weakref
 from typing import List, Dict, Any, Optional
 from src.agent import Agent, model
+from src.error_handler import CircuitOpenError, DeadlineExceededError, is_agent_failure
 from src.health_kb.claim_types import HealthClaim, ClaimType
 from src.evidence.sources import EvidenceSource
+from src.claims.claim_registry import ClaimRegistry, claim_registry
+
+def collect_persona_concerns(persona_interpretations: List[Dict[str, Any]]) -> List[str]:
+    """Deduplicated persona concerns, in first-seen order; the same for every claim of a message"""
+    persona_concerns = []
+    for interpretation in persona_interpretations:
+        persona_concerns.extend(interpretation.get('potential_misreading', []))
+    return list(dict.fromkeys(persona_concerns))
 
 class CountermeasureGenerator:
     """Generates prebunks and clarifications for risky health claims"""
     
-    def __init__(self):
+    def __init__(self, max_concurrency: Optional[int] = None, registry: Optional[ClaimRegistry] = None):
+        # Custom prebunks generated at once across every caller of this generator
+        self.max_concurrency = max_concurrency or int(os.getenv('PREBUNKER_COUNTERMEASURE_CONCURRENCY', '4'))
+        # Custom prebunks of earlier near-duplicate claims (None: generate one per claim)
+        self.claim_registry = registry if registry is not None else claim_registry
+        self._semaphores = weakref.WeakKeyDictionary()  # asyncio semaphores bind to one event loop
+        
         # Specialized agent for generating prebunks
         self.prebunk_agent = Agent(
             name="PrebunkGenerator",
@@ -65,8 +82,12 @@ Keep prebunks concise but complete.""",
         }
     
     async def generate_countermeasures(self, claim: str, persona_concerns: List[str], 
-                                     evidence_validation: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate countermeasures for a specific claim and its concerns"""
+                                     evidence_validation: Dict[str, Any], use_llm: bool = True) -> List[Dict[str, Any]]:
+        """Generate countermeasures for a specific claim and its concerns (use_llm=False: templates only)
+
+        CircuitOpenError and DeadlineExceededError propagate, so the caller can fall back
+        to templates only or drop the claim.
+        """
         
         countermeasures = []
         
@@ -75,17 +96,21 @@ Keep prebunks concise but complete.""",
         countermeasures.extend(template_prebunks)
         
         # Generate custom LLM-based prebunk
-        try:
-            custom_prebunk = await self._generate_custom_prebunk(claim, persona_concerns, evidence_validation)
-            countermeasures.append(custom_prebunk)
-        except Exception as e:
-            # Fallback if LLM fails
-            countermeasures.append({
-                'type': 'custom_prebunk',
-                'content': f"Error generating custom prebunk: {str(e)}",
-                'confidence': 0.0,
-                'effectiveness_score': 0.0
-            })
+        if use_llm:
+            try:
+                async with self._semaphore():
+                    custom_prebunk = await self._generate_custom_prebunk(claim, persona_concerns, evidence_validation)
+                countermeasures.append(custom_prebunk)
+            except (CircuitOpenError, DeadlineExceededError):
+                raise
+            except Exception as e:
+                # Fallback if LLM fails
+                countermeasures.append({
+                    'type': 'custom_prebunk',
+                    'content': f"Error generating custom prebunk: {str(e)}",
+                    'confidence': 0.0,
+                    'effectiveness_score': 0.0
+                })
         
         # Score and rank countermeasures
         for countermeasure in countermeasures:
@@ -99,6 +124,13 @@ Keep prebunks concise but complete.""",
         
         return countermeasures
     
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+    
     def _generate_template_prebunks(self, claim: str, persona_concerns: List[str], 
                                    evidence_validation: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate prebunks using predefined templates"""
@@ -226,7 +258,14 @@ Keep prebunks concise but complete.""",
     
     async def _generate_custom_prebunk(self, claim: str, persona_concerns: List[str], 
                                      evidence_validation: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate custom prebunk using LLM"""
+        """Generate custom prebunk using LLM
+        
+        A near duplicate of a claim prebunked earlier gets that prebunk from the claim registry.
+        """
+        if self.claim_registry is not None:
+            match = self.claim_registry.lookup(claim, 'prebunk')
+            if match is not None:
+                return {**match.value, 'claim_registry': match.annotation()}
         
         # Prepare context for LLM
         context_prompt = f"""
@@ -251,7 +290,7 @@ Keep prebunks concise but complete.""",
         
         custom_prebunk_text = await self.prebunk_agent.run(context_prompt)
         
-        return {
+        custom_prebunk = {
             'type': 'custom_prebunk',
             'content': custom_prebunk_text,
             'confidence': evidence_validation.get('confidence_score', 0.5),
@@ -261,6 +300,9 @@ Keep prebunks concise but complete.""",
                 'source_count': evidence_validation.get('source_count', 0)
             }
         }
+        if self.claim_registry is not None and not is_agent_failure(custom_prebunk_text):
+            self.claim_registry.record(claim, 'prebunk', custom_prebunk)
+        return custom_prebunk
     
     def _score_countermeasure_effectiveness(self, countermeasure: Dict[str, Any], 
                                           claim: str, persona_concerns: List[str]) -> float:
@@ -305,19 +347,26 @@ Keep prebunks concise but complete.""",
         return min(1.0, max(0.0, effectiveness))
     
     async def generate_multiple_countermeasures(self, claims_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Generate countermeasures for multiple claims in parallel"""
+        """Generate countermeasures for multiple claims in parallel (LLM calls bounded by max_concurrency)"""
         
         async def process_claim_data(data):
             claim = data.get('claim', '')
             concerns = data.get('persona_concerns', [])
             evidence = data.get('evidence_validation', {})
             
-            countermeasures = await self.generate_countermeasures(claim, concerns, evidence)
+            degraded = False
+            try:
+                countermeasures = await self.generate_countermeasures(claim, concerns, evidence)
+            except CircuitOpenError:
+                # The model is unavailable: template prebunks only, as in degraded mode
+                degraded = True
+                countermeasures = await self.generate_countermeasures(claim, concerns, evidence, use_llm=False)
             
             return {
                 'claim': claim,
                 'countermeasures': countermeasures,
-                'top_countermeasure': countermeasures[0] if countermeasures else None
+                'top_countermeasure': countermeasures[0] if countermeasures else None,
+                'degraded': degraded
             }
         
         tasks = [process_claim_data(data) for data in claims_data]
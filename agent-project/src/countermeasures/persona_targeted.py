@@ -1,13 +1,19 @@
 """Persona-targeted countermeasure generation for specific audience concerns"""
 
-from typing import Dict, List, Any
+import asyncio
+import os
+import weakref
+from typing import Dict, List, Any, Optional
 from src.agent import Agent, model
 
 class PersonaTargetedGenerator:
     """Generate targeted countermeasures for specific persona concerns"""
     
-    def __init__(self):
+    def __init__(self, max_concurrency: Optional[int] = None):
         self.generators = {}
+        # (claim, persona) countermeasures generated at once across every caller of this generator
+        self.max_concurrency = max_concurrency or int(os.getenv('PREBUNKER_COUNTERMEASURE_CONCURRENCY', '4'))
+        self._semaphores = weakref.WeakKeyDictionary()  # asyncio semaphores bind to one event loop
         
         # Create specialized agents for different persona types
         self.generators['VaccineHesitant'] = Agent(
@@ -47,38 +53,48 @@ class PersonaTargetedGenerator:
         )
     
     async def generate_targeted_countermeasures(self, claim, persona_interpretations, evidence):
-        """Generate persona-specific countermeasures for a claim"""
-        countermeasures = {}
-        
-        for interpretation in persona_interpretations:
-            persona_name = interpretation['persona']
-            concerns = interpretation['potential_misreading']
-            
-            if persona_name in self.generators:
-                generator = self.generators[persona_name]
-                
-                prompt = f"""
-                Original claim: {claim}
-                Persona concerns: {concerns}
-                Evidence: {evidence}
-                
-                Generate a countermeasure that:
-                1. Addresses specific concerns of {persona_name}
-                2. Uses appropriate tone and language level
-                3. Provides actionable next steps
-                4. Maintains empathy while being factual
-                """
-                
-                countermeasure = await generator.run(prompt)
-                countermeasures[persona_name] = {
-                    'text': countermeasure,
-                    'tone': self.get_recommended_tone(persona_name),
-                    'format': self.get_recommended_format(persona_name),
-                    'concerns_addressed': concerns,
-                    'effectiveness_score': self.calculate_effectiveness_score(countermeasure, concerns)
-                }
-        
-        return countermeasures
+        """Generate persona-specific countermeasures for a claim, one concurrent (bounded) call per persona"""
+        work_items = [
+            (interpretation['persona'], interpretation['potential_misreading'])
+            for interpretation in persona_interpretations
+            if interpretation['persona'] in self.generators
+        ]
+        results = await asyncio.gather(*[
+            self._generate_for_persona(claim, persona_name, concerns, evidence)
+            for persona_name, concerns in work_items
+        ])
+        return dict(zip([persona_name for persona_name, _ in work_items], results))
+    
+    async def _generate_for_persona(self, claim, persona_name, concerns, evidence):
+        """One (claim, persona) work item"""
+        prompt = f"""
+        Original claim: {claim}
+        Persona concerns: {concerns}
+        Evidence: {evidence}
+        
+        Generate a countermeasure that:
+        1. Addresses specific concerns of {persona_name}
+        2. Uses appropriate tone and language level
+        3. Provides actionable next steps
+        4. Maintains empathy while being factual
+        """
+        
+        async with self._semaphore():
+            countermeasure = await self.generators[persona_name].run(prompt)
+        return {
+            'text': countermeasure,
+            'tone': self.get_recommended_tone(persona_name),
+            'format': self.get_recommended_format(persona_name),
+            'concerns_addressed': concerns,
+            'effectiveness_score': self.calculate_effectiveness_score(countermeasure, concerns)
+        }
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
     
     def get_recommended_tone(self, persona_name):
         """Get recommended tone for specific persona"""
@@ -153,21 +169,17 @@ class PersonaTargetedGenerator:
         return list(self.generators.keys())
     
     async def batch_generate_countermeasures(self, claims_and_interpretations):
-        """Generate countermeasures for multiple claims efficiently"""
-        all_countermeasures = {}
-        
-        for claim_data in claims_and_interpretations:
-            claim = claim_data['claim']
-            interpretations = claim_data['persona_interpretations']
-            evidence = claim_data.get('evidence', 'No specific evidence provided')
-            
-            claim_countermeasures = await self.generate_targeted_countermeasures(
-                claim, interpretations, evidence
+        """Generate countermeasures for multiple claims as one bounded fan-out over (claim, persona) items"""
+        claims = [claim_data['claim'] for claim_data in claims_and_interpretations]
+        results = await asyncio.gather(*[
+            self.generate_targeted_countermeasures(
+                claim_data['claim'],
+                claim_data['persona_interpretations'],
+                claim_data.get('evidence', 'No specific evidence provided')
             )
-            
-            all_countermeasures[claim] = claim_countermeasures
-        
-        return all_countermeasures
+            for claim_data in claims_and_interpretations
+        ])
+        return dict(zip(claims, results))
 
 # Global instance
 persona_targeted_generator = PersonaTargetedGenerator()
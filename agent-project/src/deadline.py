@@ -0,0 +1,91 @@
+"""Per-request latency budgets propagated to every stage, LLM call and tool call
+
+A budget is set once per analysis with deadline_scope(); everything awaited in
+that context (including tasks gathered from it) sees the same absolute deadline.
+"""
+
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, List, Optional
+
+from src.error_handler import CircuitOpenError, DeadlineExceededError
+
+_deadline = contextvars.ContextVar('prebunker_deadline', default=None)  # time.monotonic() value
+
+
+@contextmanager
+def deadline_scope(budget_seconds: Optional[float] = None, deadline: Optional[float] = None):
+    """Bound this context by a budget (seconds from now) and/or a wall-clock deadline (epoch seconds)
+
+    A scope never extends a deadline set by an enclosing scope.
+    """
+    candidates = [d for d in (_deadline.get(),) if d is not None]
+    now = time.monotonic()
+    if budget_seconds is not None:
+        candidates.append(now + budget_seconds)
+    if deadline is not None:
+        candidates.append(now + (deadline - time.time()))
+    token = _deadline.set(min(candidates) if candidates else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current deadline, None when unbounded"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def unbounded_context() -> contextvars.Context:
+    """A copy of the current context without a deadline, for work shared by callers with different budgets"""
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return context
+
+
+def deadline_expired() -> bool:
+    remaining = time_remaining()
+    return remaining is not None and remaining <= 0
+
+
+@asynccontextmanager
+async def within_deadline():
+    """Cancel the enclosed work when the deadline passes, raising DeadlineExceededError"""
+    remaining = time_remaining()
+    if remaining is None:
+        yield
+        return
+    if remaining <= 0:
+        raise DeadlineExceededError("Latency budget exhausted")
+    timeout = asyncio.timeout(remaining)
+    try:
+        async with timeout:
+            yield
+    except TimeoutError as e:
+        # A TimeoutError from the enclosed work itself (e.g. a tool timeout) propagates unchanged
+        if timeout.expired():
+            raise DeadlineExceededError("Latency budget exhausted") from e
+        raise
+
+
+async def run_stage(stage: str, call: Callable[[], Awaitable[Any]], fallback: Any, dropped: List[str],
+                    degraded: Optional[List[str]] = None) -> Any:
+    """Run one pipeline stage within the deadline, recording it as dropped (and returning fallback) if it cannot finish
+
+    With a degraded list, a stage the open LLM circuit rejects is recorded there and also returns fallback.
+    """
+    try:
+        async with within_deadline():
+            return await call()
+    except DeadlineExceededError:
+        dropped.append(stage)
+        return fallback
+    except CircuitOpenError:
+        if degraded is None:
+            raise
+        degraded.append(stage)
+        return fallback
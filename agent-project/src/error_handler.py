@@ -1,4 +1,6 @@
+import contextvars
 import logging
+from contextlib import contextmanager
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,6 +11,52 @@ class AgentError(Exception):
 class ToolError(Exception):
     pass
 
+class CircuitOpenError(AgentError):
+    """Raised without calling the model while the LLM circuit breaker is open"""
+    pass
+
+class DeadlineExceededError(AgentError):
+    """Raised when a request's latency budget runs out before the work could finish"""
+    pass
+
+class AgentFailure(str):
+    """The "Agent error: ..." text Agent.run returns for a failed model call, still recognizable as a failure"""
+    
+    def __new__(cls, text, agent_name=None, error_type=None):
+        failure = super().__new__(cls, text)
+        failure.agent_name = agent_name
+        failure.error_type = error_type
+        return failure
+
+def is_agent_failure(text) -> bool:
+    return isinstance(text, AgentFailure)
+
+def contains_agent_failure(value) -> bool:
+    """Whether a stage output (nested dicts and lists) holds text from a failed agent run"""
+    if isinstance(value, AgentFailure):
+        return True
+    if isinstance(value, dict):
+        return any(contains_agent_failure(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(contains_agent_failure(item) for item in value)
+    return False
+
+_failure_scopes = contextvars.ContextVar('prebunker_agent_failure_scopes', default=())
+
+@contextmanager
+def track_agent_failures():
+    """Collect the agent failures of this context (including gathered tasks), so results built on them are not reused"""
+    failures = []
+    token = _failure_scopes.set(_failure_scopes.get() + (failures,))
+    try:
+        yield failures
+    finally:
+        _failure_scopes.reset(token)
+
+def record_agent_failure(failure: AgentFailure):
+    for failures in _failure_scopes.get():
+        failures.append(failure)
+
 def safe_execute(func, *args, **kwargs):
     try:
         return func(*args, **kwargs)
@@ -57,7 +57,7 @@ class EvidenceSource:
             if keyword in claim_lower:
                 terms.append(keyword)
         
-        return list(set(terms))
+        return list(dict.fromkeys(terms))
 
 # Trusted health information sources
 TRUSTED_SOURCES = [
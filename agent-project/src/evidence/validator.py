@@ -1,16 +1,34 @@
 """Basic evidence validation for health claims"""
 
 import asyncio
-from typing import List, Dict, Any, Optional
+import os
+import re
+import weakref
+from typing import List, Dict, Any, Optional, Callable, Union
 from src.evidence.sources import EvidenceSearcher, TRUSTED_SOURCES, EvidenceSource
 from src.agent import Agent, model
+from src.claims.claim_registry import ClaimRegistry, claim_registry
+from src.deadline import within_deadline
+from src.error_handler import logger, CircuitOpenError, DeadlineExceededError, is_agent_failure
 from src.health_kb.claim_types import HealthClaim
 
+# A batched response has one "[CLAIM n]" section per claim, each with a verdict line
+BATCH_SECTION_PATTERN = re.compile(r'\[CLAIM\s+(\d+)\]')
+BATCH_VERDICT_PATTERN = re.compile(r'verdict\s*:\s*\**\s*(supported by evidence|partially supported|not supported)', re.IGNORECASE)
+
 class EvidenceValidator:
     """Validates health claims against trusted evidence sources"""
     
-    def __init__(self, searcher: EvidenceSearcher = None):
+    def __init__(self, searcher: EvidenceSearcher = None, max_concurrency: Optional[int] = None,
+                 batch_size: Optional[int] = None, registry: Optional[ClaimRegistry] = None):
         self.searcher = searcher or EvidenceSearcher(TRUSTED_SOURCES)
+        # Validations of earlier near-duplicate claims (None: validate every claim)
+        self.claim_registry = registry if registry is not None else claim_registry
+        # Claims validated at once across every caller of this validator
+        self.max_concurrency = max_concurrency or int(os.getenv('PREBUNKER_EVIDENCE_CONCURRENCY', '4'))
+        # Claims per LLM prompt in the evidence stage; 1 validates each claim with its own call
+        self.batch_size = batch_size or int(os.getenv('PREBUNKER_EVIDENCE_BATCH_SIZE', '1'))
+        self._semaphores = weakref.WeakKeyDictionary()  # asyncio semaphores bind to one event loop
         
         # Create specialized agent for evidence validation
         self.validation_agent = Agent(
@@ -33,20 +51,59 @@ Be precise and avoid speculation. Focus on what the evidence actually shows.""",
             model=model
         )
     
-    async def validate_claim(self, claim_text: str, topic_area: str = None) -> Dict[str, Any]:
-        """Validate a single claim against evidence sources"""
+    async def validate_claim(self, claim_text: str, topic_area: str = None, use_llm: bool = True) -> Dict[str, Any]:
+        """Validate a single claim against evidence sources (use_llm=False skips the LLM assessment)
+        
+        A near duplicate of a claim validated earlier gets that validation from the claim registry.
+        """
+        registered = self._registered_validation(claim_text, topic_area)
+        if registered is not None:
+            return registered
         
         # Find relevant sources
         relevant_sources = self.searcher.find_relevant_sources(claim_text, topic_area)
         
-        # Create validation context
-        validation_context = self._create_validation_context(claim_text, relevant_sources)
+        if use_llm:
+            # Create validation context
+            validation_context = self._create_validation_context(claim_text, relevant_sources)
+            
+            # Get LLM validation assessment
+            try:
+                validation_result = await self.validation_agent.run(validation_context)
+            except (CircuitOpenError, DeadlineExceededError):
+                raise
+            except Exception as e:
+                validation_result = f"Validation error: {str(e)}"
+                use_llm = False  # nothing worth registering
+        else:
+            validation_result = "LLM assessment skipped (degraded mode); status derived from source coverage"
         
-        # Get LLM validation assessment
-        try:
-            validation_result = await self.validation_agent.run(validation_context)
-        except Exception as e:
-            validation_result = f"Validation error: {str(e)}"
+        validation = self._build_validation_result(claim_text, relevant_sources, validation_result)
+        if use_llm and not is_agent_failure(validation_result):
+            self._register_validation(claim_text, topic_area, validation)
+        return validation
+    
+    def _registered_validation(self, claim_text: str, topic_area: str = None) -> Optional[Dict[str, Any]]:
+        """The validation of a registered near duplicate, adapted to this claim (None if there is none)"""
+        if self.claim_registry is None:
+            return None
+        match = self.claim_registry.lookup(claim_text, self._registry_slot(topic_area))
+        if match is None:
+            return None
+        return {**match.value, 'claim': claim_text, 'claim_registry': match.annotation()}
+    
+    def _register_validation(self, claim_text: str, topic_area: str, validation: Dict[str, Any]):
+        if self.claim_registry is not None:
+            self.claim_registry.record(claim_text, self._registry_slot(topic_area), validation)
+    
+    @staticmethod
+    def _registry_slot(topic_area: str = None) -> str:
+        # Sources depend on the topic area, so each one is a separate registry slot
+        return f"validation:{topic_area}" if topic_area else 'validation'
+    
+    def _build_validation_result(self, claim_text: str, relevant_sources: List[EvidenceSource],
+                                 validation_result: str) -> Dict[str, Any]:
+        """Validation result for one claim from its sources and the LLM assessment text"""
         
         # Calculate confidence score
         confidence_score = self._calculate_confidence_score(relevant_sources, claim_text)
@@ -66,6 +123,138 @@ Be precise and avoid speculation. Focus on what the evidence actually shows.""",
             'validation_status': self._determine_validation_status(confidence_score, len(relevant_sources))
         }
     
+    async def validate_claim_bounded(self, claim_text: str, topic_area: str = None,
+                                     use_llm: Union[bool, Callable[[], bool]] = True) -> Optional[Dict[str, Any]]:
+        """Validate one claim as part of the evidence stage
+        
+        Waits for one of max_concurrency slots and runs within the request's latency budget.
+        use_llm may be a callable, checked once the slot is acquired, so a circuit that opens
+        mid-stage stops further LLM calls (a call the open circuit rejects gets the degraded
+        validation). Errors become an 'error' result for this claim only; None means the
+        latency budget ran out first.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        
+        try:
+            async with within_deadline():
+                async with semaphore:
+                    llm = use_llm() if callable(use_llm) else use_llm
+                    try:
+                        validation = await self.validate_claim(claim_text, topic_area, use_llm=llm)
+                    except CircuitOpenError:
+                        # The circuit opened mid-stage: fall back to the degraded, source-only validation
+                        llm = False
+                        validation = await self.validate_claim(claim_text, topic_area, use_llm=False)
+            if not llm and 'claim_registry' not in validation:
+                validation['degraded'] = True
+            return validation
+        except DeadlineExceededError:
+            return None
+        except Exception as e:
+            logger.error(f"Evidence validation failed for claim '{claim_text[:50]}...': {str(e)}")
+            return {
+                'claim': claim_text,
+                'validation_status': 'error',
+                'error_message': str(e),
+                'confidence_score': 0.0
+            }
+    
+    async def validate_claims(self, claims: List[str], topic_area: str = None,
+                              use_llm: Union[bool, Callable[[], bool]] = True,
+                              batch_size: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        """Evidence stage: validate claims concurrently (bounded), results in claim order
+        
+        With batch_size > 1 (default: the validator's batch_size) claims are validated
+        batch_size at a time in one prompt each. Entries are None for claims the latency
+        budget did not reach.
+        """
+        batch_size = batch_size or self.batch_size
+        if batch_size > 1 and len(claims) > 1:
+            batches = await asyncio.gather(*[
+                self.validate_claim_batch(claims[start:start + batch_size], topic_area, use_llm=use_llm)
+                for start in range(0, len(claims), batch_size)
+            ])
+            return [validation for batch in batches for validation in batch]
+        return list(await asyncio.gather(*[
+            self.validate_claim_bounded(claim, topic_area, use_llm=use_llm) for claim in claims
+        ]))
+    
+    async def validate_claim_batch(self, claims: List[str], topic_area: str = None,
+                                   use_llm: Union[bool, Callable[[], bool]] = True) -> List[Optional[Dict[str, Any]]]:
+        """Validate several claims with one LLM call, in claim order
+        
+        Takes one evidence-stage slot for the shared prompt. Claims whose section of the
+        response is missing or has no verdict (or all of them, if the call fails) are
+        validated again with their own call; if the circuit is open, all are degraded. Near duplicates of registered claims are left
+        out of the prompt. None means the latency budget ran out first.
+        """
+        registered = {}
+        for index, claim_text in enumerate(claims):
+            validation = self._registered_validation(claim_text, topic_area)
+            if validation is not None:
+                registered[index] = validation
+        if registered:
+            pending = [index for index in range(len(claims)) if index not in registered]
+            validations = await self.validate_claim_batch(
+                [claims[index] for index in pending], topic_area, use_llm=use_llm
+            ) if pending else []
+            registered.update(zip(pending, validations))
+            return [registered[index] for index in range(len(claims))]
+        
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        
+        sources = [self.searcher.find_relevant_sources(claim_text, topic_area) for claim_text in claims]
+        llm, response = True, ""
+        try:
+            async with within_deadline():
+                async with semaphore:
+                    llm = use_llm() if callable(use_llm) else use_llm
+                    if llm:
+                        response = await self.validation_agent.run(self._create_batch_validation_context(claims, sources))
+        except DeadlineExceededError:
+            return [None] * len(claims)
+        except CircuitOpenError:
+            llm = False
+        except Exception as e:
+            logger.warning(f"Batched evidence validation failed, validating {len(claims)} claims one by one: {str(e)}")
+        
+        if not llm:
+            validations = []
+            for claim_text, claim_sources in zip(claims, sources):
+                validation = self._build_validation_result(
+                    claim_text, claim_sources,
+                    "LLM assessment skipped (degraded mode); status derived from source coverage"
+                )
+                validation['degraded'] = True
+                validations.append(validation)
+            return validations
+        
+        assessments = self._parse_batch_assessments(response, len(claims))
+        results = [
+            self._build_validation_result(claim_text, claim_sources, assessments[index])
+            if index in assessments else None
+            for index, (claim_text, claim_sources) in enumerate(zip(claims, sources))
+        ]
+        if not is_agent_failure(response):
+            for claim_text, result in zip(claims, results):
+                if result is not None:
+                    self._register_validation(claim_text, topic_area, result)
+        
+        # Fall back to per-claim calls for the sections that did not parse
+        unparsed = [index for index, result in enumerate(results) if result is None]
+        fallbacks = await asyncio.gather(*[
+            self.validate_claim_bounded(claims[index], topic_area, use_llm=use_llm) for index in unparsed
+        ])
+        for index, validation in zip(unparsed, fallbacks):
+            results[index] = validation
+        return results
+    
     async def validate_health_claim(self, health_claim: HealthClaim) -> Dict[str, Any]:
         """Validate a HealthClaim object"""
         
@@ -114,6 +303,54 @@ Please assess this claim based on what these authoritative sources would likely
 Consider the authority level and specialization of each source.
 """
     
+    def _create_batch_validation_context(self, claims: List[str], sources: List[List[EvidenceSource]]) -> str:
+        """One prompt for several claims: each relevant source is listed once and referenced by number"""
+        
+        shared_sources = []
+        for claim_sources in sources:
+            for source in claim_sources[:5]:  # Limit to top 5 sources per claim
+                if source not in shared_sources:
+                    shared_sources.append(source)
+        
+        source_lines = [
+            f"[S{number}] {source.name} (Authority: {source.authority_score}) - Specializes in: {', '.join(source.specialties[:3])}"
+            for number, source in enumerate(shared_sources, 1)
+        ]
+        
+        claim_lines = []
+        for number, (claim_text, claim_sources) in enumerate(zip(claims, sources), 1):
+            references = ', '.join(f"S{shared_sources.index(source) + 1}" for source in claim_sources[:5])
+            claim_lines.append(f'[CLAIM {number}] "{claim_text}"\nRelevant sources: {references or "none found"}')
+        
+        return f"""
+Validate each of the following {len(claims)} health claims.
+
+Relevant trusted sources available:
+{chr(10).join(source_lines) if source_lines else "No relevant trusted sources found."}
+
+Claims to validate:
+{chr(10).join(claim_lines)}
+
+Please assess each claim based on what its sources would likely say; for claims without
+sources, assess whether they are verifiable and what evidence would be needed.
+Answer with one section per claim, in order, each starting with its marker on its own line:
+[CLAIM n]
+Verdict: Supported by evidence / Partially supported / Not supported
+Assessment: confidence, additional context needed and important limitations
+"""
+    
+    def _parse_batch_assessments(self, response: str, claim_count: int) -> Dict[int, str]:
+        """Assessment text by claim index for the sections of a batched response that have a verdict"""
+        assessments = {}
+        parts = BATCH_SECTION_PATTERN.split(response or "")
+        # split() alternates text and captured claim numbers: [preamble, n, section, n, section, ...]
+        for number, section in zip(parts[1::2], parts[2::2]):
+            index = int(number) - 1
+            section = section.strip()
+            if 0 <= index < claim_count and index not in assessments and BATCH_VERDICT_PATTERN.search(section):
+                assessments[index] = section
+        return assessments
+    
     def _calculate_confidence_score(self, sources: List[EvidenceSource], claim_text: str) -> float:
         """Calculate confidence score for validation"""
         if not sources:
@@ -233,9 +470,21 @@ Consider the authority level and specialization of each source.
         }
     
     async def validate_multiple_claims(self, claims: List[str]) -> List[Dict[str, Any]]:
-        """Validate multiple claims in parallel"""
-        validation_tasks = [self.validate_claim(claim) for claim in claims]
-        return await asyncio.gather(*validation_tasks)
+        """Validate multiple claims in parallel (bounded by max_concurrency), one result per claim in claim order
+        
+        Claims the latency budget did not reach get a 'not_validated' result in their place.
+        """
+        validations = await self.validate_claims(claims)
+        return [
+            validation if validation is not None else {
+                'claim': claim_text,
+                'validation_status': 'not_validated',
+                'error_message': 'Latency budget exhausted before this claim was validated',
+                'confidence_score': 0.0,
+                'source_count': 0
+            }
+            for claim_text, validation in zip(claims, validations)
+        ]
     
     def generate_validation_summary(self, validation_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate summary of multiple validation results"""
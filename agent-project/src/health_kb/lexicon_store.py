@@ -0,0 +1,352 @@
+"""File-backed medical lexicons compiled into a memory-mapped Aho-Corasick automaton
+
+Large vocabularies (hundreds of thousands of drug, condition and procedure names with
+synonyms) are kept out of Python dicts. A lexicon source file is compiled once into a
+flat binary automaton; at startup the compiled file is memory-mapped read-only, so
+opening it costs no parsing and every worker process shares the same page-cache pages
+instead of building its own trie.
+
+Source format, one canonical term per line (UTF-8, '#' starts a comment line):
+
+    category<TAB>term[<TAB>synonym|synonym|...]
+
+Synonyms resolve to their canonical term. Matching follows TermMatcher: case-insensitive,
+whole words with an optional plural "s"/"es", all-caps acronyms only in capitals.
+
+Compiled layout: a magic number and a JSON header (categories, counts, source checksum,
+section offsets), then uint32 arrays. Nodes are numbered breadth-first, so the children
+of a node are consecutive and edge e leads to node e + 1; per node only the offset of its
+first edge, its failure link and its output link (nearest failure-chain node with output)
+are stored, about 20 bytes per trie node.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.health_kb.term_matcher import TermMatch, is_case_sensitive, is_word_char, lower_aligned, plural_end
+
+MAGIC = b'PBLX'
+FORMAT_VERSION = 1
+COMPILED_SUFFIX = '.pblx'
+_PREAMBLE = struct.Struct('<4sII')  # magic, format version, header length
+
+# Entry flags
+CASE_SENSITIVE = 1
+STARTS_WORD = 2
+ENDS_WORD = 4
+
+SECTIONS = ('edge_start', 'labels', 'fail', 'out_link', 'output_start', 'outputs',
+            'entry_size', 'entry_flags', 'entry_category', 'entry_canonical', 'entry_surface',
+            'string_offsets', 'strings')
+
+
+def read_lexicon_source(path: str) -> List[Tuple[str, str, List[str]]]:
+    """(category, canonical term, synonyms) per line of a lexicon source file"""
+    entries = []
+    with open(path, encoding='utf-8') as source:
+        for number, line in enumerate(source, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            fields = [field.strip() for field in line.split('\t')]
+            if len(fields) < 2 or not fields[0] or not fields[1]:
+                raise ValueError(f"{path}:{number}: expected 'category<TAB>term[<TAB>synonym|...]'")
+            synonyms = [synonym.strip() for synonym in fields[2].split('|')] if len(fields) > 2 else []
+            entries.append((fields[0], fields[1], [synonym for synonym in synonyms if synonym]))
+    return entries
+
+
+def write_lexicon_source(lexicon: Dict[str, List[str]], path: str, synonyms: Dict[str, List[str]] = None):
+    """Write a {category: [terms]} lexicon (e.g. MEDICAL_ENTITIES) as a source file"""
+    synonyms = synonyms or {}
+    with open(path, 'w', encoding='utf-8') as source:
+        for category, terms in lexicon.items():
+            for term in terms:
+                extra = synonyms.get(term)
+                source.write(f"{category}\t{term}" + (f"\t{'|'.join(extra)}" if extra else '') + '\n')
+
+
+def _file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compile_lexicon(source_path: str, output_path: Optional[str] = None) -> str:
+    """Compile a lexicon source file into the memory-mappable format; returns the compiled path"""
+    output_path = output_path or source_path + COMPILED_SUFFIX
+    entries = read_lexicon_source(source_path)
+
+    categories, strings = {}, {}  # name -> id, in first-seen order
+
+    def string_id(text: str) -> int:
+        return strings.setdefault(text, len(strings))
+
+    entry_size, entry_flags, entry_category, entry_canonical, entry_surface = (array('I') for _ in range(5))
+    keys = {}  # lower-cased surface form -> entry ids
+    for category, term, synonyms in entries:
+        category_id = categories.setdefault(category, len(categories))
+        canonical_id = string_id(term)
+        for surface in [term] + synonyms:
+            key = lower_aligned(surface)
+            keys.setdefault(key, []).append(len(entry_size))
+            entry_size.append(len(key))
+            entry_flags.append((CASE_SENSITIVE if is_case_sensitive(surface) else 0)
+                               | (STARTS_WORD if is_word_char(surface[0]) else 0)
+                               | (ENDS_WORD if is_word_char(surface[-1]) else 0))
+            entry_category.append(category_id)
+            entry_canonical.append(canonical_id)
+            entry_surface.append(string_id(surface))
+
+    sections = _build_automaton(sorted(keys), keys)
+    sections.update({
+        'entry_size': entry_size, 'entry_flags': entry_flags, 'entry_category': entry_category,
+        'entry_canonical': entry_canonical, 'entry_surface': entry_surface
+    })
+    string_offsets, blob = array('I', [0]), bytearray()
+    for text in strings:  # dicts keep insertion order, which is the id order
+        blob += text.encode('utf-8')
+        string_offsets.append(len(blob))
+    sections['string_offsets'] = string_offsets
+    sections['strings'] = bytes(blob)
+
+    header = {
+        'categories': list(categories),
+        'terms': len(entries),
+        'entries': len(entry_size),
+        'nodes': len(sections['fail']),
+        'source_checksum': _file_checksum(source_path),
+        'byteorder': sys.byteorder,
+        'sections': {}
+    }
+    offset = 0
+    payloads = []
+    for name in SECTIONS:
+        data = sections[name] if isinstance(sections[name], bytes) else sections[name].tobytes()
+        header['sections'][name] = [offset, len(data)]
+        payloads.append(data + b'\0' * (-len(data) % 8))
+        offset += len(payloads[-1])
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * (-(len(header_bytes) + _PREAMBLE.size) % 8)
+
+    # Written to a temporary file and renamed, so processes never map a half-written lexicon
+    temporary = f"{output_path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as compiled:
+        compiled.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        compiled.write(header_bytes)
+        for payload in payloads:
+            compiled.write(payload)
+    os.replace(temporary, output_path)
+    return output_path
+
+
+def _build_automaton(sorted_keys: List[str], key_entries: Dict[str, List[int]]) -> Dict[str, array]:
+    """Breadth-first trie over sorted keys plus failure and output links, as flat arrays
+
+    Each node is a range of sorted keys sharing a prefix; its children are found by
+    bisecting that range, so no per-node dicts are ever built.
+    """
+    edge_start, labels = array('I'), array('I')
+    output_start, outputs = array('I', [0]), array('I')
+    queue = [(0, len(sorted_keys), 0)]  # node id = position in queue: (lo, hi, depth)
+    for lo, hi, depth in queue:
+        edge_start.append(len(labels))
+        if lo < hi and len(sorted_keys[lo]) == depth:
+            outputs.extend(key_entries[sorted_keys[lo]])
+            lo += 1
+        output_start.append(len(outputs))
+        while lo < hi:
+            key = sorted_keys[lo]
+            code = ord(key[depth])
+            child_hi = bisect_left(sorted_keys, key[:depth] + chr(code + 1), lo, hi) if code < 0x10FFFF else hi
+            labels.append(code)
+            queue.append((lo, child_hi, depth + 1))
+            lo = child_hi
+    edge_start.append(len(labels))
+    node_count = len(queue)
+    del queue
+
+    fail, out_link = array('I', bytes(4 * node_count)), array('I', bytes(4 * node_count))
+    for node in range(node_count):
+        for edge in range(edge_start[node], edge_start[node + 1]):
+            child, code = edge + 1, labels[edge]
+            target = 0
+            if node:
+                fallback = fail[node]
+                while True:
+                    lo, hi = edge_start[fallback], edge_start[fallback + 1]
+                    index = bisect_left(labels, code, lo, hi)
+                    if index < hi and labels[index] == code:
+                        target = index + 1
+                        break
+                    if not fallback:
+                        break
+                    fallback = fail[fallback]
+            fail[child] = target
+            out_link[child] = target if output_start[target] < output_start[target + 1] else out_link[target]
+    return {'edge_start': edge_start, 'labels': labels, 'fail': fail, 'out_link': out_link,
+            'output_start': output_start, 'outputs': outputs}
+
+
+class CompiledLexicon:
+    """A compiled lexicon mapped read-only into memory, with the TermMatcher interface
+
+    TermMatch.term is the canonical term, also for matches of its synonyms.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as compiled:
+            self._mmap = mmap.mmap(compiled.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_length = _PREAMBLE.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a compiled lexicon (format {FORMAT_VERSION})")
+            self.header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length])
+            if self.header['byteorder'] != sys.byteorder:
+                raise ValueError(f"{path} was compiled on a {self.header['byteorder']}-endian machine")
+        except Exception:
+            self._mmap.close()
+            raise
+
+        data_start = _PREAMBLE.size + header_length
+        view = memoryview(self._mmap)
+        self._views = {}
+        for name, (offset, length) in self.header['sections'].items():
+            section = view[data_start + offset:data_start + offset + length]
+            self._views[name] = section if name == 'strings' else section.cast('I')
+        for name, section in self._views.items():
+            setattr(self, f'_{name}', section)
+        self._view = view
+        self.categories = self.header['categories']
+        self._string_cache = {}
+
+    @property
+    def version(self) -> str:
+        """Checksum of the source file the lexicon was compiled from"""
+        return self.header['source_checksum']
+
+    def __len__(self) -> int:
+        return self.header['entries']
+
+    def _string(self, string_id: int) -> str:
+        text = self._string_cache.get(string_id)
+        if text is None:
+            text = bytes(self._strings[self._string_offsets[string_id]:self._string_offsets[string_id + 1]]).decode('utf-8')
+            self._string_cache[string_id] = text
+        return text
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """(entry id, start, end) of every match that passes the case and boundary checks"""
+        if not text:
+            return
+        lowered = lower_aligned(text)
+        edge_start, labels, fail, out_link = self._edge_start, self._labels, self._fail, self._out_link
+        output_start, outputs = self._output_start, self._outputs
+        entry_size, entry_flags = self._entry_size, self._entry_flags
+        length = len(text)
+        node = 0
+        for index, char in enumerate(lowered):
+            code = ord(char)
+            while True:
+                lo, hi = edge_start[node], edge_start[node + 1]
+                if lo < hi:
+                    edge = bisect_left(labels, code, lo, hi)
+                    if edge < hi and labels[edge] == code:
+                        node = edge + 1
+                        break
+                if not node:
+                    break
+                node = fail[node]
+
+            hit = node if output_start[node] < output_start[node + 1] else out_link[node]
+            while hit:
+                for position in range(output_start[hit], output_start[hit + 1]):
+                    entry = outputs[position]
+                    start, end, flags = index + 1 - entry_size[entry], index + 1, entry_flags[entry]
+                    if flags & CASE_SENSITIVE and text[start:end] != self._string(self._entry_surface[entry]):
+                        continue
+                    if start > 0 and flags & STARTS_WORD and is_word_char(text[start - 1]):
+                        continue
+                    if end < length and flags & ENDS_WORD and is_word_char(text[end]):
+                        end = plural_end(lowered, end)
+                        if end is None:
+                            continue
+                    yield entry, start, end
+                hit = out_link[hit]
+
+    def iter_matches(self, text: str) -> Iterator[TermMatch]:
+        """Yield matches in order of their end position (overlapping terms are all reported)"""
+        for entry, start, end in self._scan(text):
+            yield TermMatch(start, end, self._string(self._entry_canonical[entry]),
+                            self.categories[self._entry_category[entry]])
+
+    def find_all(self, text: str) -> List[TermMatch]:
+        """Every match, ordered by start position (longer terms first at the same start)"""
+        return sorted(self.iter_matches(text), key=lambda match: (match.start, -match.end))
+
+    def contains_any(self, text: str) -> bool:
+        """Whether any term occurs (stops at the first match)"""
+        return next(self._scan(text), None) is not None
+
+    def categorize(self, text: str) -> Dict[str, List[str]]:
+        """Canonical terms found per category, in source order; categories without matches are left out"""
+        found = {}
+        for entry, _, _ in self._scan(text):
+            found.setdefault(self._entry_category[entry], set()).add(self._entry_canonical[entry])
+        return {
+            self.categories[category]: [self._string(string_id) for string_id in sorted(found[category])]
+            for category in sorted(found)
+        }
+
+    def close(self):
+        """Release the views and unmap the file"""
+        for name in list(self._views):
+            delattr(self, f'_{name}')
+            self._views.pop(name).release()
+        self._view.release()
+        self._mmap.close()
+
+
+def load_lexicon(path: str) -> CompiledLexicon:
+    """Open a compiled lexicon, or a source file, compiling it next to the source when needed
+
+    A source is recompiled when its compiled file is missing or older than the source.
+    """
+    with open(path, 'rb') as candidate:
+        compiled = candidate.read(len(MAGIC)) == MAGIC
+    if not compiled:
+        compiled_path = path + COMPILED_SUFFIX
+        if not os.path.exists(compiled_path) or os.path.getmtime(compiled_path) < os.path.getmtime(path):
+            compile_lexicon(path, compiled_path)
+        path = compiled_path
+    return CompiledLexicon(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a medical lexicon source file for memory-mapped loading")
+    parser.add_argument('source', help="category<TAB>term[<TAB>synonym|...] per line")
+    parser.add_argument('-o', '--output', default=None, help=f"compiled file (default: source + {COMPILED_SUFFIX})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    output = compile_lexicon(args.source, args.output)
+    lexicon = CompiledLexicon(output)
+    print(f"Compiled {lexicon.header['terms']} terms ({len(lexicon)} with synonyms, {lexicon.header['nodes']} nodes) "
+          f"into {output}: {os.path.getsize(output) / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s")
+    lexicon.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 """Medical terminology and entities for health communications analysis"""
 
+import os
+from typing import Optional
+
+from src.health_kb.term_matcher import TermMatcher
+from src.health_kb.lexicon_store import CompiledLexicon, load_lexicon
+
 MEDICAL_ENTITIES = {
     'conditions': ['RSV', 'naloxone', 'COVID-19', 'influenza', 'diabetes', 'hypertension', 'asthma', 'arthritis'],
     'treatments': ['vaccination', 'medication', 'therapy', 'surgery', 'immunization', 'antibiotic', 'insulin'],
@@ -16,24 +22,51 @@ MEDICAL_SPECIALTIES = {
     'pediatrics': ['children', 'infant', 'adolescent', 'growth', 'development']
 }
 
+_entity_matcher = None
+_entity_matcher_shape = None
+
+def medical_entity_matcher() -> TermMatcher:
+    """Compiled matcher over MEDICAL_ENTITIES, rebuilt when terms are added or removed
+    
+    Call reset_medical_entity_matcher() after replacing terms in place.
+    """
+    global _entity_matcher, _entity_matcher_shape
+    shape = [(category, len(terms)) for category, terms in MEDICAL_ENTITIES.items()]
+    if _entity_matcher is None or shape != _entity_matcher_shape:
+        _entity_matcher, _entity_matcher_shape = TermMatcher(MEDICAL_ENTITIES), shape
+    return _entity_matcher
+
+def reset_medical_entity_matcher():
+    global _entity_matcher
+    _entity_matcher = None
+
+# Large file-backed vocabulary matched alongside MEDICAL_ENTITIES (PREBUNKER_MEDICAL_LEXICON:
+# a lexicon source or compiled file, see src.health_kb.lexicon_store)
+medical_lexicon = load_lexicon(os.environ['PREBUNKER_MEDICAL_LEXICON']) if os.getenv('PREBUNKER_MEDICAL_LEXICON') else None
+
+def set_medical_lexicon(lexicon: Optional[CompiledLexicon]):
+    """Match a compiled lexicon alongside MEDICAL_ENTITIES (None: the built-in terms only)"""
+    global medical_lexicon
+    medical_lexicon = lexicon
+
 def is_medical_term(text: str) -> bool:
     """Check if text contains medical terminology"""
-    text_lower = text.lower()
-    for category, terms in MEDICAL_ENTITIES.items():
-        for term in terms:
-            if term.lower() in text_lower:
-                return True
-    return False
+    if medical_entity_matcher().contains_any(text):
+        return True
+    return medical_lexicon is not None and medical_lexicon.contains_any(text)
 
 def extract_medical_entities(text: str) -> dict:
     """Extract medical entities from text"""
-    text_lower = text.lower()
-    found_entities = {}
-    
-    for category, terms in MEDICAL_ENTITIES.items():
-        found_entities[category] = []
-        for term in terms:
-            if term.lower() in text_lower:
-                found_entities[category].append(term)
-    
-    return {k: v for k, v in found_entities.items() if v}
+    entities = medical_entity_matcher().categorize(text)
+    if medical_lexicon is not None:
+        for category, terms in medical_lexicon.categorize(text).items():
+            found = entities.setdefault(category, [])
+            found.extend(term for term in terms if term not in found)
+    return entities
+
+def find_medical_entities(text: str) -> list:
+    """Categorized spans (TermMatch) of the medical entities in text, in text order"""
+    matches = medical_entity_matcher().find_all(text)
+    if medical_lexicon is not None:
+        matches = sorted(matches + medical_lexicon.find_all(text), key=lambda match: (match.start, -match.end))
+    return matches
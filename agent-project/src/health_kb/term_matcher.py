@@ -0,0 +1,154 @@
+"""Compiled multi-pattern term matcher (Aho-Corasick) for health lexicons
+
+All terms of a categorized lexicon are compiled into one automaton, so a text is scanned
+once regardless of vocabulary size (O(text + matches) instead of O(terms x text)).
+Matches respect word boundaries: "may" does not match inside "Mayo", but a plural
+"s"/"es" is allowed ("antibiotics" matches "antibiotic"). All-caps acronyms such as
+"WHO" only match in capitals, so "who" in running text is not an organization.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+PLURAL_SUFFIXES = ('es', 's')
+
+
+@dataclass(frozen=True)
+class TermMatch:
+    """One occurrence of a lexicon term in a text"""
+    start: int
+    end: int  # exclusive; covers a plural suffix when there is one
+    term: str  # the term as written in the lexicon
+    category: str
+
+
+def is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def plural_end(lowered: str, end: int):
+    """End of a plural suffix at end that is followed by a word boundary, or None"""
+    for suffix in PLURAL_SUFFIXES:
+        stop = end + len(suffix)
+        if lowered.startswith(suffix, end) and (stop == len(lowered) or not is_word_char(lowered[stop])):
+            return stop
+    return None
+
+
+def is_case_sensitive(term: str) -> bool:
+    """All-caps acronyms (WHO, CDC) only match in capitals"""
+    return term.isupper() and term.isalpha()
+
+
+def lower_aligned(text: str) -> str:
+    """Lower-cased text with the same length as the original, so match offsets map back"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters lower-case to several ("İ"); keep those as they are
+    return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over a {category: [terms]} lexicon returning categorized spans"""
+
+    def __init__(self, lexicon: Dict[str, Iterable[str]]):
+        # (term, category, position of the term in its category, case-sensitive) per pattern id
+        self.patterns: List[Tuple[str, str, int, bool]] = []
+        self.categories = list(lexicon)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int]]] = [[]]  # node -> (pattern id, pattern length)
+
+        for category, terms in lexicon.items():
+            for position, term in enumerate(terms):
+                if term:
+                    self._add(term, category, position)
+        self._link()
+
+    def _add(self, term: str, category: str, position: int):
+        pattern_id = len(self.patterns)
+        case_sensitive = is_case_sensitive(term)
+        self.patterns.append((term, category, position, case_sensitive))
+        node = 0
+        key = lower_aligned(term)
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((pattern_id, len(key)))
+
+    def _link(self):
+        """Breadth-first failure links; each node also reports the outputs of its failure chain"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def iter_matches(self, text: str):
+        """Yield matches in order of their end position (overlapping terms are all reported)"""
+        for pattern_id, start, end in self._scan(text):
+            term, category, _, _ = self.patterns[pattern_id]
+            yield TermMatch(start, end, term, category)
+
+    def _scan(self, text: str):
+        """(pattern id, start, end) of every match that passes the case and boundary checks"""
+        if not text:
+            return
+        lowered = lower_aligned(text)
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self.patterns
+        length = len(text)
+        node = 0
+        for index, char in enumerate(lowered):
+            next_node = goto[node].get(char)
+            while next_node is None and node:
+                node = fail[node]
+                next_node = goto[node].get(char)
+            node = next_node or 0
+            if not output[node]:
+                continue
+            for pattern_id, size in output[node]:
+                start, end = index + 1 - size, index + 1
+                term, _, _, case_sensitive = patterns[pattern_id]
+                if case_sensitive and text[start:end] != term:
+                    continue
+                # Word boundaries, checked only where the term itself starts/ends with a word character
+                if start > 0 and is_word_char(term[0]) and is_word_char(text[start - 1]):
+                    continue
+                if end < length and is_word_char(term[-1]) and is_word_char(text[end]):
+                    end = plural_end(lowered, end)
+                    if end is None:
+                        continue
+                yield pattern_id, start, end
+
+    def find_all(self, text: str) -> List[TermMatch]:
+        """Every match, ordered by start position (longer terms first at the same start)"""
+        return sorted(self.iter_matches(text), key=lambda match: (match.start, -match.end))
+
+    def contains_any(self, text: str) -> bool:
+        """Whether any term occurs (stops at the first match)"""
+        return next(self._scan(text), None) is not None
+
+    def categorize(self, text: str) -> Dict[str, List[str]]:
+        """Terms found per category, in lexicon order; categories without matches are left out"""
+        found = {}
+        for pattern_id, _, _ in self._scan(text):
+            term, category, position, _ = self.patterns[pattern_id]
+            found.setdefault(category, {})[position] = term
+        return {
+            category: [found[category][position] for position in sorted(found[category])]
+            for category in self.categories if category in found
+        }
@@ -1,28 +1,44 @@
 """Complete PRE-BUNKER system integration for v2.0"""
 
 import asyncio
+import os
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 # Import all components
 from src.orchestration.pipeline import PrebunkerPipeline
 from src.orchestration.risk_reporter import RiskReporter
-from src.claims.advanced_extractor import AdvancedClaimExtractor
+from src.orchestration.analysis_cache import AnalysisCache, component_versions, default_lexicons, persona_fingerprint
+from src.claims.advanced_extractor import AdvancedClaimExtractor, extraction_scope
 from src.evidence.enhanced_sources import EnhancedEvidenceSearcher
 from src.personas.interpreter import PersonaInterpreter
 from src.evidence.validator import EvidenceValidator
-from src.countermeasures.generator import CountermeasureGenerator
+from src.countermeasures.generator import CountermeasureGenerator, collect_persona_concerns
 from src.countermeasures.persona_targeted import PersonaTargetedGenerator
 from src.orchestration.ab_testing import ABTestingFramework
 from src.metrics.evaluation import HealthCommMetrics
 from src.ops.dashboard import MessageReviewQueue, WorkflowManager
 from src.learning.feedback_learner import FeedbackLearner
+from src.llm.cache import llm_response_cache
+from src.llm.limiter import llm_concurrency_limiter
+from src.llm.transport import llm_transport
+from src.llm.backends import llm_backend_pool
+from src.llm.circuit_breaker import llm_circuit_breaker
+from src.llm.cassette import llm_cassette
+from src.llm.ledger import llm_ledger, llm_stage
+from src.deadline import deadline_scope, run_stage
+from src.error_handler import track_agent_failures
 
 class CompletePrebunkerSystem:
     """Complete integrated PRE-BUNKER system for production use"""
     
-    def __init__(self):
+    def __init__(self, analysis_cache: Optional[AnalysisCache] = None):
         self.version = "2.0.0"
+        # Default latency budget per analysis (seconds); callers can override it with options['budget_seconds']
+        budget = os.getenv('PREBUNKER_ANALYSIS_BUDGET')
+        self.default_budget_seconds = float(budget) if budget else None
+        # Completed analyses of re-submitted messages (None: always rerun); options['use_analysis_cache'] opts out
+        self.analysis_cache = analysis_cache
         
         # Core pipeline components
         self.pipeline = PrebunkerPipeline()
@@ -77,29 +93,88 @@ class CompletePrebunkerSystem:
         print(f"✅ PRE-BUNKER v{self.version} system initialized with {len(self.capabilities)} capabilities")
     
     async def analyze_health_communication(self, message: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Complete health communication analysis pipeline"""
+        """Complete health communication analysis pipeline
+
+        options['budget_seconds'] (or an absolute options['deadline'] in epoch seconds) bounds the
+        whole analysis; stages that cannot finish in time are dropped and listed in 'dropped_stages'.
+        """
+        budget_seconds = (options or {}).get('budget_seconds', self.default_budget_seconds)
+        cache_key = self._analysis_cache_key(message, options or {})
+        with llm_ledger.capture() as llm_calls, deadline_scope(budget_seconds, (options or {}).get('deadline')), \
+                extraction_scope(), track_agent_failures() as agent_failures:
+            result = self.analysis_cache.lookup(cache_key) if cache_key else None
+            if result is None:
+                result = await self._run_analysis(message, options)
+                # Only complete analyses are reused: one cut short by the budget, degraded, or built
+                # on a failed model call should be retried
+                if cache_key and result['status'] == 'completed' and not result['partial'] \
+                        and not result['degraded'] and not agent_failures:
+                    self.analysis_cache.store(cache_key, result, cost=result['processing_time'])
+        # Model calls of this analysis by agent and stage
+        result['llm_usage'] = llm_calls.summary()
+        return result
+    
+    def _analysis_cache_key(self, message: str, options: Dict[str, Any]) -> Optional[str]:
+        """Analysis cache key for this request (None when caching is off); invalidates on component changes"""
+        if self.analysis_cache is None or not options.get('use_analysis_cache', True):
+            return None
+        components = [self.advanced_extractor, self.evidence_validator, self.persona_interpreter, self.risk_reporter,
+                      self.countermeasure_generator, self.persona_targeted_generator]
+        lexicons = {
+            **default_lexicons(),
+            'claim_patterns_extractor': getattr(self.advanced_extractor, 'claim_patterns', None),
+            'implicit_patterns': getattr(self.advanced_extractor, 'implicit_patterns', None)
+        }
+        sources = [getattr(getattr(self.evidence_validator, 'searcher', None), 'sources', None),
+                   getattr(self.enhanced_evidence_searcher, 'sources', None)]
+        versions = component_versions(lexicons, sources, components)
+        self.analysis_cache.sync_versions(versions)
+        personas = persona_fingerprint(getattr(self.persona_interpreter, 'personas', []))
+        return self.analysis_cache.make_key('complete', message, options, personas, versions)
+    
+    async def _run_analysis(self, message: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         start_time = datetime.now()
         analysis_id = f"analysis_{int(start_time.timestamp())}"
         
         if options is None:
             options = {}
+        budget_seconds = options.get('budget_seconds', self.default_budget_seconds)
+        dropped_stages = []
+        degraded_stages = []  # stages that fell back to their LLM-free result while the circuit was open
         
         try:
             # Step 1: Advanced claim extraction
-            claim_extraction_result = await self.advanced_extractor.extract_claims_advanced(message, options)
+            with llm_stage('claim_extraction'):
+                claim_extraction_result = await run_stage(
+                    'claim_extraction',
+                    lambda: self.advanced_extractor.extract_claims_advanced(message, options),
+                    {}, dropped_stages, degraded_stages
+                )
             explicit_claims = claim_extraction_result.get('explicit_claims', [])
             implicit_claims = claim_extraction_result.get('implicit_claims', [])
             all_claims = explicit_claims + implicit_claims
             context_analysis = claim_extraction_result.get('context_analysis', {})
             
             # Step 2: Enhanced evidence validation
-            evidence_validations = []
-            for claim in all_claims:
-                evidence_result = await self.evidence_validator.validate_claim_evidence(str(claim))
-                evidence_validations.append(evidence_result)
+            with llm_stage('evidence_validation'):
+                evidence_results = await self.evidence_validator.validate_claims([
+                    claim.get('text', str(claim)) if isinstance(claim, dict) else str(claim) for claim in all_claims
+                ], batch_size=options.get('evidence_batch_size'))
+            # Keep the claims validated before the budget ran out
+            evidence_validations = [validation for validation in evidence_results if validation is not None]
+            if len(evidence_validations) < len(all_claims):
+                dropped_stages.append('evidence_validation')
+            if any(validation.get('degraded') for validation in evidence_validations):
+                degraded_stages.append('evidence_validation')
             
-            # Step 3: Persona interpretation analysis
-            persona_interpretations = await self.persona_interpreter.interpret_message(message)
+            # Step 3: Persona interpretation analysis (one call per persona, or one panel call)
+            persona_options = {'mode': options['persona_mode']} if options.get('persona_mode') else {}
+            with llm_stage('persona_interpretation'):
+                persona_interpretations = await run_stage(
+                    'persona_interpretations',
+                    lambda: self.persona_interpreter.interpret_message(message, **persona_options),
+                    [], dropped_stages, degraded_stages
+                )
             
             # Step 4: Risk assessment and reporting
             pipeline_result = {
@@ -107,16 +182,19 @@ class CompletePrebunkerSystem:
                 'persona_interpretations': persona_interpretations,
                 'evidence_validations': evidence_validations
             }
-            risk_report = self.risk_reporter.compile_risk_report(pipeline_result)
-            
-            # Step 5: Persona-targeted countermeasure generation
-            persona_countermeasures = await self.persona_targeted_generator.generate_targeted_countermeasures(
-                message, persona_interpretations, evidence_validations
-            )
+            with llm_stage('risk_report'):
+                risk_report = await run_stage(
+                    'risk_report',
+                    lambda: self.risk_reporter.compile_risk_report(pipeline_result),
+                    {}, dropped_stages, degraded_stages
+                )
             
-            # Step 6: General countermeasure generation
-            general_countermeasures = await self.countermeasure_generator.generate_countermeasures(
-                all_claims, risk_report, evidence_validations
+            # Steps 5 and 6: persona-targeted and per-claim countermeasures, one bounded fan-out each
+            persona_countermeasures, general_countermeasures = await asyncio.gather(
+                self._generate_persona_countermeasures(message, persona_interpretations, evidence_validations,
+                                                       dropped_stages, degraded_stages),
+                self._generate_claim_countermeasures(all_claims, persona_interpretations, evidence_validations,
+                                                     dropped_stages, degraded_stages)
             )
             
             # Combine countermeasures
@@ -129,7 +207,9 @@ class CompletePrebunkerSystem:
                 'evidence_validations': evidence_validations,
                 'risk_report': risk_report,
                 'countermeasures': all_countermeasures,
-                'context_analysis': context_analysis
+                'context_analysis': context_analysis,
+                'processing_time': (datetime.now() - start_time).total_seconds(),
+                'budget_seconds': budget_seconds
             }
             
             evaluation_metrics = self.health_comm_metrics.generate_evaluation_report(complete_result)
@@ -162,6 +242,15 @@ class CompletePrebunkerSystem:
                 'evaluation_metrics': evaluation_metrics,
                 'workflow_recommendation': workflow_recommendation,
                 
+                # Latency budget
+                'budget_seconds': budget_seconds,
+                'dropped_stages': dropped_stages,
+                'partial': bool(dropped_stages),
+                
+                # LLM circuit open
+                'degraded_stages': degraded_stages,
+                'degraded': bool(degraded_stages),
+                
                 # System metadata
                 'system_version': self.version,
                 'components_used': list(self.components.keys()),
@@ -182,20 +271,80 @@ class CompletePrebunkerSystem:
             }
             return error_result
     
-    async def analyze_with_ab_testing(self, message: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Analyze message with A/B testing of variants"""
-        # Get base analysis
-        base_analysis = await self.analyze_health_communication(message, options)
+    async def _generate_persona_countermeasures(self, message: str, persona_interpretations: List[Dict[str, Any]],
+                                                evidence_validations: List[Dict[str, Any]],
+                                                dropped_stages: List[str], degraded_stages: List[str]) -> Dict[str, Any]:
+        """Persona-targeted countermeasures for the message, keyed by persona"""
+        with llm_stage('persona_countermeasures'):
+            return await run_stage(
+                'persona_countermeasures',
+                lambda: self.persona_targeted_generator.generate_targeted_countermeasures(
+                    message, persona_interpretations, evidence_validations
+                ),
+                {}, dropped_stages, degraded_stages
+            )
+    
+    async def _generate_claim_countermeasures(self, claims: List[Any], persona_interpretations: List[Dict[str, Any]],
+                                              evidence_validations: List[Dict[str, Any]],
+                                              dropped_stages: List[str], degraded_stages: List[str]) -> Dict[str, Any]:
+        """General countermeasures for every claim, keyed by claim text"""
+        # Same concerns for every claim of the message: collected once
+        persona_concerns = collect_persona_concerns(persona_interpretations)
+        evidence_by_claim = {validation.get('claim'): validation for validation in evidence_validations}
+        claim_texts = [claim.get('text', str(claim)) if isinstance(claim, dict) else str(claim) for claim in claims]
         
-        if base_analysis.get('status') == 'error':
-            return base_analysis
+        with llm_stage('countermeasures'):
+            results = await run_stage(
+                'countermeasures',
+                lambda: self.countermeasure_generator.generate_multiple_countermeasures([
+                    {
+                        'claim': claim_text,
+                        'persona_concerns': persona_concerns,
+                        'evidence_validation': evidence_by_claim.get(claim_text, {})
+                    }
+                    for claim_text in claim_texts
+                ]),
+                [], dropped_stages, degraded_stages
+            )
+        if any(result.get('degraded') for result in results):
+            degraded_stages.append('countermeasures')
         
-        # Run A/B testing
-        ab_test_results = await self.ab_testing_framework.run_ab_test(
-            message, 
-            base_analysis['risk_report'], 
-            base_analysis['countermeasures']
-        )
+        return {
+            result['claim']: {
+                'text': result['top_countermeasure'].get('content', ''),
+                'type': result['top_countermeasure'].get('type'),
+                'effectiveness_score': result['top_countermeasure'].get('effectiveness_score', 0.0),
+                'countermeasures': result['countermeasures']
+            }
+            for result in results if result['top_countermeasure']
+        }
+    
+    async def analyze_with_ab_testing(self, message: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze message with A/B testing of variants (the latency budget covers both)"""
+        options = options or {}
+        budget_seconds = options.get('budget_seconds', self.default_budget_seconds)
+        with llm_ledger.capture() as llm_calls, deadline_scope(budget_seconds, options.get('deadline')), \
+                extraction_scope():
+            # Get base analysis
+            base_analysis = await self.analyze_health_communication(message, options)
+            
+            if base_analysis.get('status') == 'error':
+                return base_analysis
+            
+            # Run A/B testing
+            with llm_stage('ab_testing'):
+                ab_test_results = await run_stage(
+                    'ab_testing',
+                    lambda: self.ab_testing_framework.run_ab_test(
+                        message, 
+                        base_analysis['risk_report'], 
+                        base_analysis['countermeasures']
+                    ),
+                    {}, base_analysis['dropped_stages'], base_analysis.setdefault('degraded_stages', [])
+                )
+            base_analysis['partial'] = bool(base_analysis['dropped_stages'])
+            base_analysis['degraded'] = bool(base_analysis['degraded_stages'])
+        base_analysis['llm_usage'] = llm_calls.summary()
         
         # Combine results
         base_analysis['ab_test_results'] = ab_test_results
@@ -238,6 +387,15 @@ class CompletePrebunkerSystem:
                 'patterns': learning_patterns,
                 'recommendations': learning_recommendations
             },
+            'llm_cache': llm_response_cache.get_stats() if llm_response_cache else {'enabled': False},
+            'analysis_cache': self.analysis_cache.get_stats() if self.analysis_cache else {'enabled': False},
+            'claim_registry': self.evidence_validator.claim_registry.get_stats() if self.evidence_validator.claim_registry else {'enabled': False},
+            'llm_concurrency': llm_concurrency_limiter.get_stats(),
+            'llm_transport': llm_transport.get_stats(),
+            'llm_backends': llm_backend_pool.get_stats() if llm_backend_pool else {'enabled': False},
+            'llm_circuit_breaker': llm_circuit_breaker.get_stats() if llm_circuit_breaker else {'enabled': False},
+            'llm_cassette': llm_cassette.get_report() if llm_cassette else {'enabled': False},
+            'llm_ledger': llm_ledger.get_stats(recent=0),
             'system_health': 'operational',
             'features_implemented': [
                 'Advanced claim extraction (explicit + implicit)',
@@ -269,4 +427,4 @@ class CompletePrebunkerSystem:
         }
 
 # Global system instance
-complete_prebunker_system = CompletePrebunkerSystem()
+complete_prebunker_system = CompletePrebunkerSystem(analysis_cache=AnalysisCache.from_env(table='complete_analyses'))
@@ -0,0 +1 @@
+"""LLM client infrastructure: response caching, concurrency control and transport"""
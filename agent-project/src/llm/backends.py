@@ -0,0 +1,224 @@
+"""Pool of OpenAI-compatible model servers with least-outstanding routing, agent stickiness and ejection"""
+
+import asyncio
+import hashlib
+import math
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from src.error_handler import logger
+from src.llm.transport import llm_transport
+
+
+@dataclass
+class Backend:
+    """One model server and its live routing state"""
+    name: str
+    base_url: str
+    client: Any  # AsyncOpenAI
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    latency_ewma: Optional[float] = None
+    samples: int = 0
+    ejected_until: float = 0.0
+    ejections: int = 0
+    healthy: bool = True  # result of the last active health check
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+
+class BackendPool:
+    """Spreads LLM calls over several endpoints
+
+    Calls for the same agent stick to one backend (rendezvous hashing) so its prefix
+    cache stays warm, unless that backend carries more than sticky_load_factor times
+    the average load, in which case the least-outstanding backend is used instead.
+    Backends are ejected for eject_seconds after repeated failures or when their
+    latency is far above their peers', and re-probed by periodic health checks.
+    """
+
+    def __init__(self, backends: List[Backend], sticky_load_factor: float = 1.5,
+                 max_consecutive_failures: int = 3, slow_latency_factor: float = 3.0,
+                 min_latency_samples: int = 5, eject_seconds: float = 30.0,
+                 health_check_interval: float = 15.0, health_check_timeout: float = 2.0):
+        if not backends:
+            raise ValueError("BackendPool needs at least one backend")
+        self.backends = backends
+        self.sticky_load_factor = sticky_load_factor
+        self.max_consecutive_failures = max_consecutive_failures
+        self.slow_latency_factor = slow_latency_factor
+        self.min_latency_samples = min_latency_samples
+        self.eject_seconds = eject_seconds
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+
+        self._last_health_check = time.monotonic()
+        self._health_task = None
+        self._round_robin = 0
+        self.stats = {'sticky_routes': 0, 'overflow_routes': 0, 'unkeyed_routes': 0, 'ejections': 0}
+
+    @classmethod
+    def from_urls(cls, urls: List[str], transport=None, **kwargs) -> 'BackendPool':
+        """Build one client per URL, all sharing the pooled HTTP transport"""
+        transport = transport or llm_transport
+        backends = [
+            Backend(name=f"backend-{index}", base_url=url, client=transport.create_openai_client(base_url=url))
+            for index, url in enumerate(urls)
+        ]
+        return cls(backends, **kwargs)
+
+    @classmethod
+    def from_env(cls) -> Optional['BackendPool']:
+        """Pool from comma-separated PREBUNKER_LLM_BACKENDS (None when unset: single-endpoint mode)"""
+        urls = [url.strip() for url in os.getenv('PREBUNKER_LLM_BACKENDS', '').split(',') if url.strip()]
+        if not urls:
+            return None
+        return cls.from_urls(
+            urls,
+            sticky_load_factor=float(os.getenv('PREBUNKER_LLM_STICKY_LOAD_FACTOR', '1.5')),
+            eject_seconds=float(os.getenv('PREBUNKER_LLM_EJECT_SECONDS', '30')),
+            health_check_interval=float(os.getenv('PREBUNKER_LLM_HEALTH_INTERVAL', '15'))
+        )
+
+    def _rendezvous(self, key: str, candidates: List[Backend]) -> Backend:
+        """Highest-random-weight choice: stable per key, and only keys of a removed backend move"""
+        return max(candidates, key=lambda b: hashlib.sha1(f"{key}|{b.base_url}".encode()).digest())
+
+    def _least_outstanding(self, candidates: List[Backend]) -> Backend:
+        fewest = min(b.outstanding for b in candidates)
+        tied = [b for b in candidates if b.outstanding == fewest]
+        self._round_robin += 1
+        return tied[self._round_robin % len(tied)]
+
+    def choose(self, agent_key: Optional[str] = None) -> Backend:
+        """Pick a backend for one call"""
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b.available(now)]
+        if not candidates:
+            # Everything is ejected: degrade to the full set rather than failing outright
+            candidates = self.backends
+
+        if agent_key is None:
+            self.stats['unkeyed_routes'] += 1
+            return self._least_outstanding(candidates)
+
+        preferred = self._rendezvous(agent_key, candidates)
+        total = sum(b.outstanding for b in candidates) + 1
+        capacity = math.ceil(self.sticky_load_factor * total / len(candidates))
+        if preferred.outstanding + 1 <= capacity:
+            self.stats['sticky_routes'] += 1
+            return preferred
+        self.stats['overflow_routes'] += 1
+        return self._least_outstanding(candidates)
+
+    @asynccontextmanager
+    async def lease(self, agent_key: Optional[str] = None):
+        """Route one call, tracking outstanding requests, latency and failures"""
+        self._maybe_schedule_health_check()
+        backend = self.choose(agent_key)
+        backend.outstanding += 1
+        backend.requests += 1
+        start = time.perf_counter()
+        try:
+            yield backend
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record_failure(backend)
+            raise
+        else:
+            self._record_success(backend, time.perf_counter() - start)
+        finally:
+            backend.outstanding -= 1
+
+    def _record_success(self, backend: Backend, latency: float):
+        backend.consecutive_failures = 0
+        backend.samples += 1
+        backend.latency_ewma = latency if backend.latency_ewma is None else 0.8 * backend.latency_ewma + 0.2 * latency
+
+        peers = [b.latency_ewma for b in self.backends
+                 if b is not backend and b.latency_ewma is not None and b.samples >= self.min_latency_samples]
+        if backend.samples >= self.min_latency_samples and peers:
+            baseline = statistics.median(peers)
+            if backend.latency_ewma > self.slow_latency_factor * baseline:
+                self._eject(backend, f"latency {backend.latency_ewma:.3f}s vs peer median {baseline:.3f}s")
+
+    def _record_failure(self, backend: Backend):
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.max_consecutive_failures:
+            self._eject(backend, f"{backend.consecutive_failures} consecutive failures")
+
+    def _eject(self, backend: Backend, reason: str):
+        now = time.monotonic()
+        others = [b for b in self.backends if b is not backend and b.available(now)]
+        if not others:
+            return  # never eject the last usable backend
+        backend.ejected_until = now + self.eject_seconds
+        backend.ejections += 1
+        # Start fresh after re-admission so one slow spell is not held against it forever
+        backend.consecutive_failures = 0
+        backend.latency_ewma = None
+        backend.samples = 0
+        self.stats['ejections'] += 1
+        logger.warning(f"Ejecting LLM backend {backend.base_url} for {self.eject_seconds}s: {reason}")
+
+    def _maybe_schedule_health_check(self):
+        now = time.monotonic()
+        if now - self._last_health_check < self.health_check_interval:
+            return
+        if self._health_task is not None and not self._health_task.done():
+            return
+        self._last_health_check = now
+        self._health_task = asyncio.get_running_loop().create_task(self.health_check())
+
+    async def health_check(self) -> Dict[str, bool]:
+        """Probe every backend's /models endpoint"""
+
+        async def probe(backend: Backend) -> bool:
+            try:
+                await asyncio.wait_for(backend.client.models.list(), timeout=self.health_check_timeout)
+                return True
+            except Exception as e:
+                logger.warning(f"LLM backend {backend.base_url} failed health check: {str(e)}")
+                return False
+
+        results = await asyncio.gather(*[probe(b) for b in self.backends])
+        for backend, healthy in zip(self.backends, results):
+            backend.healthy = healthy
+        if not any(results):
+            # Keep routing somewhere; the caller's own error handling applies
+            for backend in self.backends:
+                backend.healthy = True
+        return {b.base_url: healthy for b, healthy in zip(self.backends, results)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            **self.stats,
+            'backends': [
+                {
+                    'name': b.name,
+                    'base_url': b.base_url,
+                    'outstanding': b.outstanding,
+                    'requests': b.requests,
+                    'failures': b.failures,
+                    'latency_ewma': b.latency_ewma,
+                    'healthy': b.healthy,
+                    'ejected': now < b.ejected_until,
+                    'ejections': b.ejections
+                }
+                for b in self.backends
+            ]
+        }
+
+
+# Global instance
+llm_backend_pool = BackendPool.from_env()
@@ -0,0 +1,259 @@
+"""Content-addressed response cache with an in-process LRU tier and a SQLite disk tier"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+def request_fingerprint(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any] = None) -> str:
+    """Stable content hash of a chat request (model, full message list, generation params)"""
+    payload = {
+        'model': model,
+        'messages': messages,
+        'params': params or {}
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CacheHit:
+    """A cache lookup result with the tier it was served from"""
+    value: Any
+    tier: str  # memory, disk
+    cost: float = 0.0  # seconds the original computation took
+
+
+class TieredCache:
+    """Two-tier key/value cache: memory LRU in front of an optional SQLite file, with TTL and size eviction"""
+
+    def __init__(self, max_memory_entries: int = 512, ttl_seconds: Optional[float] = None,
+                 disk_path: Optional[str] = None, max_disk_entries: int = 10000,
+                 table: str = 'cache_entries'):
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self.table = table
+
+        self._memory = OrderedDict()  # key -> (value, created_at, cost)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_prune = 0
+
+        self.stats = {
+            'hits': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+            'expirations': 0,
+            'saved_seconds': 0.0
+        }
+
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, path: str):
+        """Open (and create if needed) the SQLite tier"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, cost REAL NOT NULL, '
+            'created_at REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._conn.execute(
+            f'CREATE INDEX IF NOT EXISTS {self.table}_last_access ON {self.table} (last_access)'
+        )
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get_entry(self, key: str) -> Optional[CacheHit]:
+        """Look up a key in memory, then on disk; returns None on miss"""
+        now = time.time()
+
+        with self._lock:
+            # Tier 1: in-process LRU
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at, cost = entry
+                if self._is_expired(created_at, now):
+                    del self._memory[key]
+                    self.stats['expirations'] += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self._record_hit('memory', cost)
+                    return CacheHit(value, 'memory', cost)
+
+            # Tier 2: SQLite
+            if self._conn is not None:
+                row = self._conn.execute(
+                    f'SELECT value, cost, created_at FROM {self.table} WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    value_json, cost, created_at = row
+                    if self._is_expired(created_at, now):
+                        self._conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                        self.stats['expirations'] += 1
+                    else:
+                        self._conn.execute(
+                            f'UPDATE {self.table} SET last_access = ? WHERE key = ?', (now, key)
+                        )
+                        value = json.loads(value_json)
+                        self._put_memory(key, value, created_at, cost)
+                        self._record_hit('disk', cost)
+                        return CacheHit(value, 'disk', cost)
+
+            self.stats['misses'] += 1
+            return None
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for key, or None"""
+        hit = self.get_entry(key)
+        return hit.value if hit else None
+
+    def set(self, key: str, value: Any, cost: float = 0.0):
+        """Store a JSON-serializable value in both tiers"""
+        now = time.time()
+
+        with self._lock:
+            self._put_memory(key, value, now, cost)
+            self.stats['sets'] += 1
+
+            if self._conn is not None:
+                self._conn.execute(
+                    f'INSERT OR REPLACE INTO {self.table} (key, value, cost, created_at, last_access) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (key, json.dumps(value), cost, now, now)
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 64:
+                    self._prune_disk(now)
+
+    def delete(self, key: str):
+        """Remove a key from both tiers"""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute(f'DELETE FROM {self.table}')
+
+    def prune(self):
+        """Remove expired entries and enforce the disk size limit"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, created_at, _) in self._memory.items() if self._is_expired(created_at, now)]
+            for key in expired:
+                del self._memory[key]
+            self.stats['expirations'] += len(expired)
+            if self._conn is not None:
+                self._prune_disk(now)
+
+    def _put_memory(self, key: str, value: Any, created_at: float, cost: float):
+        self._memory[key] = (value, created_at, cost)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats['memory_evictions'] += 1
+
+    def _prune_disk(self, now: float):
+        self._writes_since_prune = 0
+
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute(
+                f'DELETE FROM {self.table} WHERE created_at < ?', (now - self.ttl_seconds,)
+            )
+            self.stats['expirations'] += max(0, cursor.rowcount)
+
+        count = self._conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            # Least recently used rows go first
+            self._conn.execute(
+                f'DELETE FROM {self.table} WHERE key IN '
+                f'(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)',
+                (overflow,)
+            )
+            self.stats['disk_evictions'] += overflow
+
+    def _record_hit(self, tier: str, cost: float):
+        self.stats['hits'] += 1
+        self.stats[f'{tier}_hits'] += 1
+        self.stats['saved_seconds'] += cost
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters plus current sizes"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            disk_entries = 0
+            if self._conn is not None:
+                disk_entries = self._conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+            return {
+                **self.stats,
+                'saved_seconds': round(self.stats['saved_seconds'], 3),
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_entries': disk_entries,
+                'disk_enabled': self._conn is not None
+            }
+
+
+class LLMResponseCache(TieredCache):
+    """Response cache for chat completions keyed on (model, messages, generation params)"""
+
+    def __init__(self, max_memory_entries: int = 1024, ttl_seconds: Optional[float] = 7 * 24 * 3600,
+                 disk_path: Optional[str] = None, max_disk_entries: int = 50000):
+        super().__init__(
+            max_memory_entries=max_memory_entries,
+            ttl_seconds=ttl_seconds,
+            disk_path=disk_path,
+            max_disk_entries=max_disk_entries,
+            table='llm_responses'
+        )
+
+    def make_key(self, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any] = None) -> str:
+        return request_fingerprint(model, messages, params)
+
+    @classmethod
+    def from_env(cls) -> Optional['LLMResponseCache']:
+        """Build the cache from PREBUNKER_LLM_CACHE_* environment variables (None unless enabled)
+
+        Off by default: with PREBUNKER_LLM_CACHE=1 a repeated request is answered with the stored
+        response, sampled (temperature > 0) ones included. PREBUNKER_LLM_CACHE_TTL (seconds,
+        default 7 days), _MAX_ENTRIES and _MAX_DISK_ENTRIES bound it; PREBUNKER_LLM_CACHE_PATH
+        adds the SQLite tier.
+        """
+        if os.getenv('PREBUNKER_LLM_CACHE', '0').lower() not in ('1', 'true', 'on', 'yes'):
+            return None
+
+        ttl = os.getenv('PREBUNKER_LLM_CACHE_TTL')
+        return cls(
+            max_memory_entries=int(os.getenv('PREBUNKER_LLM_CACHE_MAX_ENTRIES', '1024')),
+            ttl_seconds=float(ttl) if ttl else 7 * 24 * 3600,
+            disk_path=os.getenv('PREBUNKER_LLM_CACHE_PATH') or None,
+            max_disk_entries=int(os.getenv('PREBUNKER_LLM_CACHE_MAX_DISK_ENTRIES', '50000'))
+        )
+
+# Global instance
+llm_response_cache = LLMResponseCache.from_env()
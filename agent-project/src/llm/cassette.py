@@ -0,0 +1,198 @@
+"""Record/replay cassettes of LLM interactions for reproducible performance runs
+
+A cassette is a gzip-compressed JSONL file with one record per model call:
+the request fingerprint, the prompt, the assistant message (or streamed text)
+and the observed latency. Replay serves recorded responses by fingerprint,
+either instantly or after the recorded latency, and keeps a report of prompts
+that were not on the cassette.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from src.error_handler import AgentError
+from src.llm.cache import request_fingerprint
+from src.llm.streaming import StreamedCompletion
+
+OFF = 'off'
+RECORD = 'record'
+REPLAY = 'replay'
+
+
+class CassetteMissError(AgentError):
+    """A replayed request is not on the cassette"""
+    pass
+
+
+class Cassette:
+    """Records real model calls to a file, or replays them without a model server"""
+
+    def __init__(self, path: str, mode: str = REPLAY, latency: str = 'instant', passthrough: bool = False):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Cassette mode must be '{RECORD}' or '{REPLAY}', got {mode!r}")
+        if latency not in ('instant', 'recorded'):
+            raise ValueError(f"Cassette latency must be 'instant' or 'recorded', got {latency!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.passthrough = passthrough  # replay misses go to the live model instead of failing
+
+        self._lock = threading.Lock()
+        self._records = defaultdict(list)  # fingerprint -> recorded calls, in recording order
+        self._positions = defaultdict(int)
+        self._file = None
+        self.unmatched = []
+        self.stats = {'recorded': 0, 'replayed': 0, 'misses': 0, 'recorded_latency_seconds': 0.0}
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    @classmethod
+    def from_env(cls) -> Optional['Cassette']:
+        """Cassette from PREBUNKER_LLM_CASSETTE (path) and _MODE / _LATENCY (None when unset)"""
+        path = os.getenv('PREBUNKER_LLM_CASSETTE')
+        mode = os.getenv('PREBUNKER_LLM_CASSETTE_MODE', REPLAY).lower()
+        if not path or mode == OFF:
+            return None
+        return cls(
+            path,
+            mode=mode,
+            latency=os.getenv('PREBUNKER_LLM_CASSETTE_LATENCY', 'instant').lower(),
+            passthrough=os.getenv('PREBUNKER_LLM_CASSETTE_PASSTHROUGH', '0').lower() in ('1', 'true', 'yes', 'on')
+        )
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records[record['key']].append(record)
+
+    def _write(self, record: Dict[str, Any]):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self._file.flush()
+            self.stats['recorded'] += 1
+            self.stats['recorded_latency_seconds'] += record['latency']
+
+    def record(self, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any],
+               message: Dict[str, Any], latency: float):
+        """Store one completed non-streaming call"""
+        self._write({
+            'key': request_fingerprint(model, messages, params),
+            'model': model,
+            'messages': messages,
+            'params': params,
+            'response': message,
+            'latency': latency
+        })
+
+    def record_stream(self, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any],
+                      completion: StreamedCompletion):
+        """Store one streamed call as the text actually received"""
+        self._write({
+            'key': request_fingerprint(model, messages, {**params, 'stream': True}),
+            'model': model,
+            'messages': messages,
+            'params': params,
+            'stream': {
+                'text': completion.text,
+                'time_to_first_token': completion.time_to_first_token,
+                'stopped_early': completion.stopped_early
+            },
+            'latency': completion.total_time
+        })
+
+    def _next(self, key: str, model: str, messages: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Next recording for a fingerprint; repeated prompts replay in order, then repeat the last one"""
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                self.stats['misses'] += 1
+                self.unmatched.append({
+                    'key': key,
+                    'model': model,
+                    'prompt': messages[-1].get('content', '')[:200] if messages else ''
+                })
+                return None
+            position = self._positions[key]
+            self._positions[key] = position + 1
+            self.stats['replayed'] += 1
+            return records[min(position, len(records) - 1)]
+
+    async def _wait(self, record: Dict[str, Any]):
+        if self.latency == 'recorded':
+            await asyncio.sleep(record['latency'])
+
+    async def replay(self, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Recorded assistant message, None on a passthrough miss; raises CassetteMissError otherwise"""
+        record = self._next(request_fingerprint(model, messages, params), model, messages)
+        if record is None or 'response' not in record:
+            if self.passthrough:
+                return None
+            raise CassetteMissError(f"No cassette recording for prompt: {messages[-1].get('content', '')[:80] if messages else ''}")
+        await self._wait(record)
+        return record['response']
+
+    async def replay_stream(self, model: str, messages: List[Dict[str, Any]], params: Dict[str, Any],
+                            parser=None) -> Optional[StreamedCompletion]:
+        """Recorded streamed text, re-run through the caller's parser"""
+        record = self._next(request_fingerprint(model, messages, {**params, 'stream': True}), model, messages)
+        if record is None or 'stream' not in record:
+            if self.passthrough:
+                return None
+            raise CassetteMissError(f"No cassette recording for streamed prompt: {messages[-1].get('content', '')[:80] if messages else ''}")
+        await self._wait(record)
+        text = record['stream']['text']
+        return StreamedCompletion(
+            text=text,
+            parsed=parser(text, True) if parser else None,
+            stopped_early=record['stream']['stopped_early'],
+            time_to_first_token=record['stream']['time_to_first_token'] if self.latency == 'recorded' else 0.0,
+            total_time=record['latency'] if self.latency == 'recorded' else 0.0,
+            chunk_count=1
+        )
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get_report(self) -> Dict[str, Any]:
+        """Counts plus every prompt replay could not match"""
+        return {
+            **self.stats,
+            'mode': self.mode,
+            'latency': self.latency,
+            'path': self.path,
+            'recordings': sum(len(records) for records in self._records.values()),
+            'unmatched': list(self.unmatched)
+        }
+
+    def __enter__(self) -> 'Cassette':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Global instance
+llm_cassette = Cassette.from_env()
@@ -0,0 +1,175 @@
+"""Circuit breaker that fails LLM calls fast while the model server is down or degraded"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import APIConnectionError
+
+from src.error_handler import logger, CircuitOpenError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_server_failure(error: BaseException) -> bool:
+    """Whether a failed call says the model server is down or overloaded
+
+    Transport errors, timeouts, 429 and 5xx responses count; other errors (e.g. a 400 or
+    422 for a request the caller built badly) say nothing about the server's health.
+    """
+    status = getattr(error, 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, (APIConnectionError, httpx.TransportError, TimeoutError, ConnectionError))
+
+
+class CircuitBreaker:
+    """Closed -> open after failure_threshold consecutive failed (or too slow) calls
+
+    Only server failures (see is_server_failure) count; calls rejected for their own
+    content leave the failure count unchanged.
+
+    While open every call raises CircuitOpenError immediately. After reset_timeout
+    one probe call is let through (half-open); its success closes the circuit and
+    its failure re-opens it for another reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 5, latency_threshold: Optional[float] = None,
+                 reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'calls': 0,
+            'failures': 0,
+            'slow_calls': 0,
+            'rejected': 0,
+            'client_errors': 0,
+            'trips': 0
+        }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected (a due half-open probe counts as closed)"""
+        return self.state == OPEN
+
+    def check(self):
+        """Fail fast (without claiming the half-open probe) when the circuit is open"""
+        if self.is_open:
+            with self._lock:
+                self.stats['rejected'] += 1
+            raise CircuitOpenError("LLM circuit open")
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        state = self.state
+        with self._lock:
+            if state == OPEN or (state == HALF_OPEN and self._probe_in_flight):
+                self.stats['rejected'] += 1
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+                raise CircuitOpenError(f"LLM circuit open; retrying in {retry_in:.1f}s")
+            if state == HALF_OPEN:
+                self._probe_in_flight = True
+            self.stats['calls'] += 1
+
+    def record_success(self, latency: float):
+        if self.latency_threshold is not None and latency > self.latency_threshold:
+            self.stats['slow_calls'] += 1
+            self._record_failure(f"slow call ({latency:.2f}s > {self.latency_threshold}s)")
+            return
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("LLM circuit closed after successful probe")
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        self._record_failure("call failed")
+
+    def _record_failure(self, reason: str):
+        with self._lock:
+            self.stats['failures'] += 1
+            self._consecutive_failures += 1
+            probe_failed = self._state == HALF_OPEN
+            self._probe_in_flight = False
+            if probe_failed or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.stats['trips'] += 1
+                logger.warning(f"LLM circuit opened for {self.reset_timeout}s: {reason}")
+
+    @asynccontextmanager
+    async def guard(self):
+        """Wrap one model call: reject fast while open, otherwise record its outcome"""
+        self.before_call()
+        start = time.perf_counter()
+        try:
+            yield
+        except asyncio.CancelledError:
+            with self._lock:
+                self._probe_in_flight = False
+            raise
+        except Exception as e:
+            if is_server_failure(e):
+                self.record_failure()
+            else:
+                with self._lock:
+                    self.stats['client_errors'] += 1
+                    # The server answered; let the next call probe it
+                    self._probe_in_flight = False
+            raise
+        else:
+            self.record_success(time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    @classmethod
+    def from_env(cls) -> Optional['CircuitBreaker']:
+        """Build the breaker from PREBUNKER_LLM_BREAKER_* environment variables (None if disabled)"""
+        if os.getenv('PREBUNKER_LLM_BREAKER', '1').lower() in ('0', 'false', 'off', 'no'):
+            return None
+        latency = os.getenv('PREBUNKER_LLM_BREAKER_LATENCY')
+        return cls(
+            failure_threshold=int(os.getenv('PREBUNKER_LLM_BREAKER_FAILURES', '5')),
+            latency_threshold=float(latency) if latency else None,
+            reset_timeout=float(os.getenv('PREBUNKER_LLM_BREAKER_RESET_SECONDS', '30'))
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'state': self.state,
+            'consecutive_failures': self._consecutive_failures,
+            'failure_threshold': self.failure_threshold,
+            'latency_threshold': self.latency_threshold,
+            'reset_timeout': self.reset_timeout
+        }
+
+
+# Global instance
+llm_circuit_breaker = CircuitBreaker.from_env()
@@ -0,0 +1,77 @@
+"""Single-flight coalescing of identical in-flight LLM requests"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from src.deadline import unbounded_context, within_deadline
+from src.tracing import tracer
+
+
+class RequestCoalescer:
+    """Lets concurrent callers with the same fingerprint share one in-flight request
+
+    The shared request runs without any caller's latency budget; each caller waits for it
+    within its own deadline, and the request is cancelled once no caller is waiting.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.stats = {
+            'leaders': 0,
+            'coalesced': 0
+        }
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await the shared request for key, starting it with factory() if none is running"""
+        loop = asyncio.get_running_loop()
+        task = self._in_flight.get(key)
+
+        # Tasks are bound to their loop; never share across loops
+        if task is not None and not task.done() and task.get_loop() is loop:
+            self.stats['coalesced'] += 1
+            tracer.increment_counter('llm_coalesced_calls')
+            return await self._wait(task)
+
+        # Not bound by the leader's deadline, which a follower with a longer budget would inherit
+        task = loop.create_task(factory(), context=unbounded_context())
+        self._in_flight[key] = task
+        self.stats['leaders'] += 1
+        task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return await self._wait(task)
+
+    async def _wait(self, task: asyncio.Task) -> Any:
+        """Await the shared request within this caller's own deadline"""
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            async with within_deadline():
+                # Shield so a caller that gives up or is cancelled does not cancel the others' shared result
+                return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Nobody is waiting for the result any more
+                    task.cancel()
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Retrieve the exception so an abandoned task does not log "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight_count(self) -> int:
+        return len(self._in_flight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.stats['leaders'] + self.stats['coalesced']
+        return {
+            **self.stats,
+            'in_flight': len(self._in_flight),
+            'coalesced_rate': self.stats['coalesced'] / total if total else 0.0
+        }
+
+# Global instance
+request_coalescer = RequestCoalescer()
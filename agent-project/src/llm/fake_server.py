@@ -0,0 +1,415 @@
+"""Offline OpenAI-compatible stand-in server for benchmarks and load tests
+
+Serves /v1/chat/completions (plain and SSE streaming) with deterministic,
+prompt-aware responses for each agent type in this project, plus configurable
+latency distributions, token rates, prefix caching and fault injection.
+
+Usage (from agent-project/):
+    uv run python -m src.llm.fake_server --port 11435 --latency lognormal --mean-latency 0.4 --error-rate 0.02
+    PREBUNKER_LLM_BASE_URL=http://127.0.0.1:11435/v1 uv run python -m src.web.enhanced_app
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.llm.ledger import estimate_tokens
+
+HEALTH_TERMS = [
+    'vaccine', 'vaccination', 'covid', 'flu', 'rsv', 'measles', 'medication', 'medicine', 'drug',
+    'treatment', 'therapy', 'antibiotic', 'ibuprofen', 'acetaminophen', 'aspirin', 'insulin',
+    'supplement', 'vitamin', 'remedy', 'dose', 'dosage', 'side effect', 'safe', 'effective', 'cure'
+]
+
+PERSONA_REACTIONS = [
+    "I'm worried about side effects, especially for my family. {claim} sounds like it might be overstated.",
+    "This seems like the kind of thing I should ask my doctor about. I'm concerned about long term safety.",
+    "I doubt anything is completely safe for everyone. I don't trust claims that sound absolute.",
+    "It sounds like good news, but I'm unsure how the evidence applies to someone like me.",
+    "I'm confused about the timing and dosage. Is this recommendation for all ages?",
+    "That sounds reassuring and the message is clear, but I'd want to see the research."
+]
+
+PREBUNKS = [
+    "{topic} is considered safe and effective for most people, but no treatment works the same for everyone. "
+    "Research from the CDC and WHO shows side effects are usually mild. Talk to your doctor about your situation.",
+    "Evidence from clinical studies supports {topic} for most people, with rare serious side effects. "
+    "Individual results vary, so consult your healthcare provider before making decisions.",
+    "Health authorities recommend {topic} based on ongoing research and safety monitoring. "
+    "If you have specific health conditions, discuss your options with a clinician."
+]
+
+EVIDENCE_VERDICTS = [
+    "Supported by evidence. High confidence.",
+    "Partially supported. Medium confidence.",
+    "Not supported as stated. Low confidence."
+]
+
+EVIDENCE_CAVEAT = "Additional context needed: effects vary between individuals. Important limitation: absolute wording."
+
+
+def _stable_index(text: str, modulo: int) -> int:
+    return int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16) % modulo
+
+
+def _extract_quoted(text: str) -> str:
+    """The message under analysis is usually quoted in the prompt; fall back to the whole text"""
+    match = re.search(r'"([^"]{10,})"', text)
+    return match.group(1) if match else text
+
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+
+
+def _topic(text: str) -> str:
+    lowered = text.lower()
+    for term in HEALTH_TERMS:
+        if term in lowered:
+            return term
+    return "this treatment"
+
+
+def _persona_reaction(name: str, subject: str) -> str:
+    first = _stable_index(name + subject, len(PERSONA_REACTIONS))
+    second = (first + 1 + _stable_index(subject + name, len(PERSONA_REACTIONS) - 1)) % len(PERSONA_REACTIONS)
+    reaction, follow_up = PERSONA_REACTIONS[first], PERSONA_REACTIONS[second]
+    claim = _sentences(subject)[0][:60] if _sentences(subject) else "This"
+    return f"As {name}: {reaction.format(claim=claim)} {follow_up.format(claim=claim)}"
+
+
+def _explicit_claims(subject: str) -> str:
+    claims = [s for s in _sentences(subject) if any(term in s.lower() for term in HEALTH_TERMS)]
+    return "\n".join(f"CLAIM: {claim}" for claim in claims) or "No specific health claims found."
+
+
+def _context_answer(subject: str) -> str:
+    return f"Implied claim: {_topic(subject)} is appropriate for everyone. Missing context: eligibility and known risks."
+
+
+def fake_completion_text(messages: List[Dict[str, Any]]) -> str:
+    """Deterministic response shaped like what each agent in the pipeline expects"""
+    system = " ".join(m.get('content') or '' for m in messages if m.get('role') == 'system')
+    user = " ".join(m.get('content') or '' for m in messages if m.get('role') == 'user')
+    if system.startswith("Available tools: ") and "\n\n" in system:
+        # Tool schemas are a shared prefix; only the agent instructions identify the agent
+        system = system.split("\n\n", 1)[1]
+    lowered = f"{system}\n{user}".lower()
+    subject = _extract_quoted(user)
+
+    persona = re.search(r'You are (\w+) with the following characteristics', system)
+    if persona:
+        return _persona_reaction(persona.group(1), subject)
+
+    # Persona panel: one section per panelist, each the reaction that panelist gives alone
+    panelists = re.findall(r'^Panelist (\w+):', system, re.MULTILINE)
+    if panelists:
+        return "\n\n".join(f"### {name}\n{_persona_reaction(name, subject)}" for name in panelists)
+
+    if '=== explicit claims ===' in lowered:
+        # Combined claim analysis: the explicit, implicit and context answers under one heading each
+        return "\n\n".join([
+            f"=== EXPLICIT CLAIMS ===\n{_explicit_claims(subject)}",
+            f"=== IMPLICIT CLAIMS ===\nIMPLICIT CLAIM: {_topic(subject).capitalize()} is appropriate for everyone\n"
+            "IMPLIES: Eligibility and known risks do not matter\n"
+            "MISLEADING BECAUSE: Missing context on who should not use it\nCONFIDENCE: 0.6\n---",
+            f"=== CONTEXT ANALYSIS ===\n{_context_answer(subject)}"
+        ])
+
+    if 'claim:' in lowered and 'extract' in lowered:
+        return _explicit_claims(subject)
+
+    if 'clarity' in lowered and 'scale 0-1' in lowered:
+        score = 0.55 + _stable_index(user, 40) / 100
+        return f"{score:.2f}\nThe message is mostly clear but could add context about who it applies to."
+
+    if 'prebunk' in lowered:
+        return PREBUNKS[_stable_index(user, len(PREBUNKS))].format(topic=_topic(subject).capitalize())
+
+    if 'evidence validation' in lowered or 'supported by evidence' in lowered:
+        # Batched prompts list claims as [CLAIM n] "text" and get one section per claim
+        batch = re.findall(r'\[CLAIM (\d+)\] "([^"]+)"', user)
+        if batch:
+            return "\n\n".join(
+                f"[CLAIM {number}]\nVerdict: {EVIDENCE_VERDICTS[_stable_index(claim, len(EVIDENCE_VERDICTS))]}\n"
+                f"Assessment: {EVIDENCE_CAVEAT}"
+                for number, claim in batch
+            )
+        verdict = EVIDENCE_VERDICTS[_stable_index(subject, len(EVIDENCE_VERDICTS))]
+        return f"{verdict} {EVIDENCE_CAVEAT}"
+
+    if 'implicit health claims' in lowered or 'context and framing' in lowered:
+        return _context_answer(subject)
+
+    return f"Here is a concise response about {_topic(subject)}: follow current guidance and consult a healthcare provider."
+
+
+@dataclass
+class FakeLLMConfig:
+    """Timing and fault model of the stand-in server"""
+    latency_distribution: str = 'fixed'  # fixed, uniform, exponential, lognormal
+    mean_latency: float = 0.05  # time before the first token, seconds
+    latency_spread: float = 0.5  # uniform: +/- fraction of mean; lognormal: sigma
+    tokens_per_second: Optional[float] = 200.0  # generation rate (None: instant)
+    prefill_tokens_per_second: Optional[float] = None  # prompt processing rate (None: free)
+    prefix_cache_entries: int = 0  # >0 simulates a server prefix cache over system prompts
+    error_rate: float = 0.0
+    error_status: int = 500
+    max_concurrency: Optional[int] = None  # requests beyond this queue, like a single-GPU server
+    seed: Optional[int] = 0
+    model: str = 'phi4-mini'
+
+
+class FakeLLMServer:
+    """FastAPI app implementing the OpenAI chat completions surface used by this project"""
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None):
+        self.config = config or FakeLLMConfig()
+        self._random = random.Random(self.config.seed)
+        self._prefix_cache = OrderedDict()
+        self._slots = None
+        self._thread = None
+        self._server = None
+        self.port = None
+        self.stats = {
+            'requests': 0,
+            'streamed': 0,
+            'errors_injected': 0,
+            'cancelled_streams': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'prefix_cache_hits': 0,
+            'max_in_flight': 0
+        }
+        self._in_flight = 0
+        self.app = self._build_app()
+
+    def _first_token_delay(self) -> float:
+        config = self.config
+        mean = config.mean_latency
+        if config.latency_distribution == 'uniform':
+            return max(0.0, self._random.uniform(mean * (1 - config.latency_spread), mean * (1 + config.latency_spread)))
+        if config.latency_distribution == 'exponential':
+            return self._random.expovariate(1 / mean) if mean > 0 else 0.0
+        if config.latency_distribution == 'lognormal':
+            sigma = config.latency_spread
+            # Parameterized so the distribution's mean equals mean_latency
+            return self._random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean > 0 else 0.0
+        return mean
+
+    def _prefill_delay(self, messages: List[Dict[str, Any]]) -> float:
+        """Prompt processing time, skipping a system prefix the simulated cache has already seen"""
+        rate = self.config.prefill_tokens_per_second
+        if not rate:
+            return 0.0
+        system = messages[0].get('content') or '' if messages and messages[0].get('role') == 'system' else ''
+        total = sum(estimate_tokens(m.get('content') or '') for m in messages)
+        cached = 0
+        if system and self.config.prefix_cache_entries > 0:
+            key = hashlib.sha256(system.encode('utf-8')).hexdigest()
+            if key in self._prefix_cache:
+                self._prefix_cache.move_to_end(key)
+                self.stats['prefix_cache_hits'] += 1
+                cached = estimate_tokens(system)
+            else:
+                self._prefix_cache[key] = True
+                if len(self._prefix_cache) > self.config.prefix_cache_entries:
+                    self._prefix_cache.popitem(last=False)
+        return (total - cached) / rate
+
+    def _token_delay(self) -> float:
+        rate = self.config.tokens_per_second
+        return 1.0 / rate if rate else 0.0
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="PRE-BUNKER fake LLM server")
+
+        @app.get("/v1/models")
+        async def list_models():
+            return {"object": "list", "data": [{"id": self.config.model, "object": "model", "owned_by": "fake"}]}
+
+        @app.get("/v1/fake/stats")
+        async def fake_stats():
+            return {**self.stats, 'config': asdict(self.config)}
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            return await self._handle(body)
+
+        return app
+
+    async def _handle(self, body: Dict[str, Any]):
+        messages = body.get('messages', [])
+        stream = body.get('stream', False)
+        self.stats['requests'] += 1
+
+        if self._slots is None and self.config.max_concurrency:
+            self._slots = asyncio.Semaphore(self.config.max_concurrency)
+
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            self.stats['errors_injected'] += 1
+            await asyncio.sleep(self._first_token_delay())
+            return JSONResponse(
+                status_code=self.config.error_status,
+                content={"error": {"message": "injected failure", "type": "server_error", "code": self.config.error_status}}
+            )
+
+        text = fake_completion_text(messages)
+        max_tokens = body.get('max_tokens') or body.get('max_completion_tokens')
+        pieces = re.findall(r'\S+\s*', text)
+        if max_tokens:
+            pieces = pieces[:max_tokens]
+            text = "".join(pieces)
+
+        prompt_tokens = sum(estimate_tokens(m.get('content') or '') for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(pieces),
+            "total_tokens": prompt_tokens + len(pieces)
+        }
+        self.stats['prompt_tokens'] += prompt_tokens
+
+        if stream:
+            self.stats['streamed'] += 1
+            return StreamingResponse(self._stream(body, messages, pieces), media_type="text/event-stream")
+
+        await self._occupy(self._generate_delay(messages, len(pieces)))
+        self.stats['completion_tokens'] += len(pieces)
+        return {
+            "id": f"chatcmpl-fake-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get('model', self.config.model),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+            "usage": usage
+        }
+
+    def _generate_delay(self, messages, completion_tokens: int) -> float:
+        return self._first_token_delay() + self._prefill_delay(messages) + completion_tokens * self._token_delay()
+
+    async def _occupy(self, seconds: float):
+        """Hold a model slot for the duration of one generation"""
+        async with self._generation():
+            await asyncio.sleep(seconds)
+
+    @asynccontextmanager
+    async def _generation(self):
+        """One model slot (queued beyond max_concurrency), held and counted in flight until the generation ends"""
+        if self._slots is not None:
+            await self._slots.acquire()
+        self._in_flight += 1
+        self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self._in_flight)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    async def _stream(self, body, messages, pieces):
+        chunk_id = f"chatcmpl-fake-{self.stats['requests']}"
+        model = body.get('model', self.config.model)
+
+        def event(delta, finish_reason=None):
+            payload = {
+                "id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        sent = 0
+        try:
+            # Like the non-streaming path, the slot is held until the last chunk has been sent
+            async with self._generation():
+                await asyncio.sleep(self._first_token_delay() + self._prefill_delay(messages))
+                yield event({"role": "assistant", "content": ""})
+                for piece in pieces:
+                    yield event({"content": piece})
+                    sent += 1
+                    await asyncio.sleep(self._token_delay())
+                yield event({}, "stop")
+                yield "data: [DONE]\n\n"
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client closed the stream early (e.g. a parser was satisfied)
+            self.stats['cancelled_streams'] += 1
+            raise
+        finally:
+            self.stats['completion_tokens'] += sent
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Run the server in a background thread and return its /v1 base URL"""
+        if not port:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+                probe.bind((host, 0))
+                port = probe.getsockname()[1]
+        self.port = port
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"Fake LLM server failed to start on {host}:{port}")
+            time.sleep(0.01)
+        return f"http://{host}:{port}/v1"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+            self._server = None
+
+    def __enter__(self) -> 'FakeLLMServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def base_url(self) -> Optional[str]:
+        return f"http://127.0.0.1:{self.port}/v1" if self.port else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible stand-in LLM server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--latency', dest='latency_distribution', default='lognormal',
+                        choices=['fixed', 'uniform', 'exponential', 'lognormal'])
+    parser.add_argument('--mean-latency', type=float, default=0.3)
+    parser.add_argument('--latency-spread', type=float, default=0.5)
+    parser.add_argument('--tokens-per-second', type=float, default=40.0)
+    parser.add_argument('--prefill-tokens-per-second', type=float, default=None)
+    parser.add_argument('--prefix-cache-entries', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--max-concurrency', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    options = {k: v for k, v in vars(args).items() if k not in ('host', 'port')}
+    server = FakeLLMServer(FakeLLMConfig(**options))
+    print(f"Fake LLM server on http://{args.host}:{args.port}/v1 ({options})")
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
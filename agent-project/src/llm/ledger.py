@@ -0,0 +1,219 @@
+"""Per-call LLM ledger: tokens, queue wait, latency, cache status and cost by agent and pipeline stage
+
+Every model call made through OpenAIChatCompletionsModel is recorded with the
+calling agent and the pipeline stage active in its context (see llm_stage).
+Records roll up process-wide in the ledger, and per analysis through capture().
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+HIT = 'hit'
+COALESCED = 'coalesced'
+MISS = 'miss'
+REPLAY = 'replay'
+
+UNATTRIBUTED = 'unattributed'
+
+_current_stage = contextvars.ContextVar('prebunker_llm_stage', default=None)
+_active_sessions = contextvars.ContextVar('prebunker_llm_ledger_sessions', default=())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def estimate_prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(estimate_tokens(m.get('content') or '') for m in messages)
+
+
+@contextmanager
+def llm_stage(name: str):
+    """Attribute LLM calls made in this context (and tasks started from it) to a pipeline stage"""
+    token = _current_stage.set(name)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+def current_stage() -> Optional[str]:
+    return _current_stage.get()
+
+
+@dataclass
+class LLMCallRecord:
+    """One model call as seen by the calling agent"""
+    agent: str
+    stage: str
+    model: str
+    cache: str = MISS
+    streamed: bool = False
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tokens_estimated: bool = False
+    queue_wait: float = 0.0  # seconds waiting for a concurrency slot
+    latency: float = 0.0  # seconds in the call itself, excluding queue_wait
+    cost: float = 0.0
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    def set_usage(self, messages: List[Dict[str, Any]], completion_text: Optional[str], usage=None):
+        """Token counts from the server's usage block, estimated from the text when it has none"""
+        prompt_tokens = getattr(usage, 'prompt_tokens', None) if usage is not None else None
+        completion_tokens = getattr(usage, 'completion_tokens', None) if usage is not None else None
+        if prompt_tokens is None or completion_tokens is None:
+            self.prompt_tokens = estimate_prompt_tokens(messages)
+            self.completion_tokens = estimate_tokens(completion_text or '')
+            self.tokens_estimated = True
+        else:
+            self.prompt_tokens = prompt_tokens
+            self.completion_tokens = completion_tokens
+            self.tokens_estimated = False
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        'calls': 0,
+        'errors': 0,
+        'cache': {HIT: 0, COALESCED: 0, MISS: 0, REPLAY: 0},
+        'prompt_tokens': 0,
+        'completion_tokens': 0,
+        'estimated_token_calls': 0,
+        'latency_seconds': 0.0,
+        'queue_wait_seconds': 0.0,
+        'cost': 0.0
+    }
+
+
+def _add(totals: Dict[str, Any], record: LLMCallRecord):
+    totals['calls'] += 1
+    totals['errors'] += 1 if record.error else 0
+    totals['cache'][record.cache] = totals['cache'].get(record.cache, 0) + 1
+    totals['prompt_tokens'] += record.prompt_tokens
+    totals['completion_tokens'] += record.completion_tokens
+    totals['estimated_token_calls'] += 1 if record.tokens_estimated else 0
+    totals['latency_seconds'] += record.latency
+    totals['queue_wait_seconds'] += record.queue_wait
+    totals['cost'] += record.cost
+
+
+def summarize(records: List[LLMCallRecord]) -> Dict[str, Any]:
+    """Totals plus per-agent and per-stage breakdowns, agents ordered by model time"""
+    totals = _empty_totals()
+    by_agent = defaultdict(_empty_totals)
+    by_stage = defaultdict(_empty_totals)
+    for record in records:
+        _add(totals, record)
+        _add(by_agent[record.agent], record)
+        _add(by_stage[record.stage], record)
+    return {
+        **totals,
+        'by_agent': dict(sorted(by_agent.items(), key=lambda item: -item[1]['latency_seconds'])),
+        'by_stage': dict(sorted(by_stage.items(), key=lambda item: -item[1]['latency_seconds']))
+    }
+
+
+class LedgerSession:
+    """Calls recorded while one analysis was running"""
+
+    def __init__(self):
+        self.records: List[LLMCallRecord] = []
+
+    def summary(self) -> Dict[str, Any]:
+        return summarize(self.records)
+
+
+class CallLedger:
+    """Process-wide roll-up of LLM calls, keeping the most recent ones for inspection"""
+
+    def __init__(self, max_recent: int = 200, prompt_cost_per_1k: float = 0.0,
+                 completion_cost_per_1k: float = 0.0, enabled: bool = True):
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.completion_cost_per_1k = completion_cost_per_1k
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=max_recent)
+        self._totals = _empty_totals()
+        self._by_agent = defaultdict(_empty_totals)
+        self._by_stage = defaultdict(_empty_totals)
+        self._started = time.time()
+
+    @classmethod
+    def from_env(cls) -> 'CallLedger':
+        """Ledger from PREBUNKER_LLM_LEDGER* and PREBUNKER_LLM_*_COST_PER_1K environment variables"""
+        return cls(
+            max_recent=int(os.getenv('PREBUNKER_LLM_LEDGER_RECENT', '200')),
+            prompt_cost_per_1k=float(os.getenv('PREBUNKER_LLM_PROMPT_COST_PER_1K', '0')),
+            completion_cost_per_1k=float(os.getenv('PREBUNKER_LLM_COMPLETION_COST_PER_1K', '0')),
+            enabled=os.getenv('PREBUNKER_LLM_LEDGER', 'on').lower() not in ('0', 'off', 'false', 'no')
+        )
+
+    def start(self, agent: Optional[str], model: str, cache: str = MISS, streamed: bool = False) -> LLMCallRecord:
+        """New record attributed to the agent and the stage active in the caller's context"""
+        return LLMCallRecord(
+            agent=agent or UNATTRIBUTED,
+            stage=current_stage() or UNATTRIBUTED,
+            model=model,
+            cache=cache,
+            streamed=streamed
+        )
+
+    def add(self, record: LLMCallRecord):
+        if not self.enabled:
+            return
+        # Only calls that reached a model server are billed
+        if record.cache == MISS:
+            record.cost = (record.prompt_tokens * self.prompt_cost_per_1k
+                           + record.completion_tokens * self.completion_cost_per_1k) / 1000
+        with self._lock:
+            self._recent.append(record)
+            _add(self._totals, record)
+            _add(self._by_agent[record.agent], record)
+            _add(self._by_stage[record.stage], record)
+        for session in _active_sessions.get():
+            session.records.append(record)
+
+    @contextmanager
+    def capture(self):
+        """Collect the calls made in this context (including gathered tasks) for a per-analysis summary"""
+        session = LedgerSession()
+        token = _active_sessions.set(_active_sessions.get() + (session,))
+        try:
+            yield session
+        finally:
+            _active_sessions.reset(token)
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._totals = _empty_totals()
+            self._by_agent.clear()
+            self._by_stage.clear()
+            self._started = time.time()
+
+    def get_stats(self, recent: int = 20) -> Dict[str, Any]:
+        """Process-wide totals with per-agent and per-stage breakdowns"""
+        with self._lock:
+            recent_records = list(self._recent)[-recent:] if recent else []
+            return {
+                'enabled': self.enabled,
+                'since': self._started,
+                **{key: (dict(value) if isinstance(value, dict) else value) for key, value in self._totals.items()},
+                'by_agent': {agent: {**totals, 'cache': dict(totals['cache'])} for agent, totals in
+                             sorted(self._by_agent.items(), key=lambda item: -item[1]['latency_seconds'])},
+                'by_stage': {stage: {**totals, 'cache': dict(totals['cache'])} for stage, totals in
+                             sorted(self._by_stage.items(), key=lambda item: -item[1]['latency_seconds'])},
+                'recent': [asdict(record) for record in recent_records]
+            }
+
+
+# Global instance
+llm_ledger = CallLedger.from_env()
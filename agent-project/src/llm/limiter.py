@@ -0,0 +1,185 @@
+"""Adaptive (AIMD) global concurrency limiter for LLM calls"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+
+class AdaptiveConcurrencyLimiter:
+    """Process-wide concurrency window that grows additively and shrinks multiplicatively
+
+    The window grows by 1/limit per healthy call and is multiplied by backoff_ratio
+    when a call fails or the short-term latency average rises well above the
+    long-term one (or above latency_threshold when one is configured).
+    """
+
+    def __init__(self, initial_limit: float = 4, min_limit: int = 1, max_limit: int = 32,
+                 backoff_ratio: float = 0.7, latency_tolerance: float = 2.0,
+                 latency_threshold: Optional[float] = None, cooldown_seconds: float = 1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.latency_threshold = latency_threshold
+        self.cooldown_seconds = cooldown_seconds
+
+        self._limit = float(max(min_limit, min(max_limit, initial_limit)))
+        self._in_flight = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+        self._short_latency = None
+        self._long_latency = None
+
+        self.stats = {
+            'acquired': 0,
+            'queued': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'max_queue_depth': 0,
+            'increases': 0,
+            'decreases': 0,
+            'errors': 0
+        }
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the seconds spent queued"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                self.stats['acquired'] += 1
+                return 0.0
+
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            self.stats['queued'] += 1
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self._waiters))
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # A slot was handed over just before cancellation; give it back
+                    self._in_flight -= 1
+                    self._wake_waiters()
+            raise
+
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.stats['acquired'] += 1
+            self.stats['total_wait_seconds'] += waited
+            self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+        return waited
+
+    def release(self, latency: Optional[float] = None, error: bool = False):
+        """Free a slot and feed the call outcome into the AIMD window"""
+        with self._lock:
+            self._in_flight -= 1
+            if latency is not None or error:
+                self._adjust(latency, error)
+            self._wake_waiters()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a slot for the duration of one LLM call, recording its latency and outcome
+
+        Yields the seconds spent queued for the slot.
+        """
+        waited = await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield waited
+        except asyncio.CancelledError:
+            # Cancellation says nothing about backend health
+            self.release()
+            raise
+        except Exception:
+            self.release(time.perf_counter() - start, error=True)
+            raise
+        else:
+            self.release(time.perf_counter() - start)
+
+    def _adjust(self, latency: Optional[float], error: bool):
+        congested = error
+        if error:
+            self.stats['errors'] += 1
+
+        if latency is not None:
+            if self._short_latency is None:
+                self._short_latency = self._long_latency = latency
+            else:
+                self._short_latency += 0.3 * (latency - self._short_latency)
+                self._long_latency += 0.05 * (latency - self._long_latency)
+
+            if self.latency_threshold is not None and latency > self.latency_threshold:
+                congested = True
+            elif self._short_latency > self._long_latency * self.latency_tolerance:
+                congested = True
+
+        now = time.monotonic()
+        if congested:
+            if now - self._last_decrease >= self.cooldown_seconds:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                self._last_decrease = now
+                self.stats['decreases'] += 1
+        elif self._limit < self.max_limit:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            self.stats['increases'] += 1
+
+    def _wake_waiters(self):
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done() or waiter.get_loop().is_closed():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Current window, queue depth and wait-time metrics"""
+        with self._lock:
+            acquired = self.stats['acquired']
+            return {
+                **self.stats,
+                'limit': self.limit,
+                'in_flight': self._in_flight,
+                'queue_depth': self.queue_depth,
+                'average_wait_seconds': self.stats['total_wait_seconds'] / acquired if acquired else 0.0,
+                'short_latency_ewma': self._short_latency,
+                'long_latency_ewma': self._long_latency
+            }
+
+    @classmethod
+    def from_env(cls) -> 'AdaptiveConcurrencyLimiter':
+        """Build the limiter from PREBUNKER_LLM_CONCURRENCY_* environment variables"""
+        threshold = os.getenv('PREBUNKER_LLM_LATENCY_THRESHOLD')
+        return cls(
+            initial_limit=float(os.getenv('PREBUNKER_LLM_CONCURRENCY_INITIAL', '4')),
+            min_limit=int(os.getenv('PREBUNKER_LLM_CONCURRENCY_MIN', '1')),
+            max_limit=int(os.getenv('PREBUNKER_LLM_CONCURRENCY_MAX', '16')),
+            latency_threshold=float(threshold) if threshold else None
+        )
+
+# Global instance
+llm_concurrency_limiter = AdaptiveConcurrencyLimiter.from_env()
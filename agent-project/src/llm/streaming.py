@@ -0,0 +1,37 @@
+"""Streaming completion results and incremental parsers for early termination"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+# Parsers are called with the text streamed so far and whether the stream has ended.
+# Returning anything other than None stops generation.
+StreamParser = Callable[[str, bool], Optional[Any]]
+
+TOOL_CALL_PATTERN = r'call_tool\("([^"]+)",\s*\{([^}]*)\}\)'
+
+_COMPLETE_NUMBER = re.compile(r'(?<![\d.])(\d+(?:\.\d+)?|\.\d+)(?=[^\d.])')
+_ANY_NUMBER = re.compile(r'(?<![\d.])(\d+(?:\.\d+)?|\.\d+)')
+
+
+@dataclass
+class StreamedCompletion:
+    """Outcome of a streamed chat completion"""
+    text: str
+    parsed: Any = None
+    stopped_early: bool = False
+    time_to_first_token: Optional[float] = None
+    total_time: float = 0.0
+    chunk_count: int = 0
+    cached: bool = False
+
+
+def first_number_parser(text: str, final: bool = False) -> Optional[float]:
+    """Stop at the first complete number (e.g. a clarity score)"""
+    match = (_ANY_NUMBER if final else _COMPLETE_NUMBER).search(text)
+    return float(match.group(1)) if match else None
+
+
+def tool_call_parser(text: str, final: bool = False) -> Optional[re.Match]:
+    """Stop as soon as a complete call_tool("name", {...}) has been generated"""
+    return re.search(TOOL_CALL_PATTERN, text)
@@ -0,0 +1,175 @@
+"""Shared pooled HTTP transport for OpenAI-compatible LLM clients, with connection-reuse metrics"""
+
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+DEFAULT_BASE_URL = "http://localhost:11434/v1"
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """One connection pool per event loop: pooled sockets cannot be reused across loops (e.g. repeated asyncio.run)"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._transports = weakref.WeakKeyDictionary()
+
+    def _current(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = self._factory()
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._current().handle_async_request(request)
+
+    async def aclose(self):
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+@dataclass
+class TransportConfig:
+    """Pool limits, timeouts and endpoint for the LLM HTTP client"""
+    base_url: str = DEFAULT_BASE_URL
+    api_key: Optional[str] = None
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 120.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 30.0
+    http2: bool = True
+    uds: Optional[str] = None  # Unix socket of a co-located server (e.g. ollama behind socat)
+
+    @classmethod
+    def from_env(cls) -> 'TransportConfig':
+        """Build the config from PREBUNKER_LLM_* environment variables"""
+        return cls(
+            base_url=os.getenv('PREBUNKER_LLM_BASE_URL', DEFAULT_BASE_URL),
+            api_key=os.getenv('PREBUNKER_LLM_API_KEY') or None,
+            max_connections=int(os.getenv('PREBUNKER_LLM_MAX_CONNECTIONS', '32')),
+            max_keepalive_connections=int(os.getenv('PREBUNKER_LLM_MAX_KEEPALIVE', '16')),
+            keepalive_expiry=_env_float('PREBUNKER_LLM_KEEPALIVE_EXPIRY', 60.0),
+            connect_timeout=_env_float('PREBUNKER_LLM_CONNECT_TIMEOUT', 5.0),
+            read_timeout=_env_float('PREBUNKER_LLM_READ_TIMEOUT', 120.0),
+            write_timeout=_env_float('PREBUNKER_LLM_WRITE_TIMEOUT', 30.0),
+            pool_timeout=_env_float('PREBUNKER_LLM_POOL_TIMEOUT', 30.0),
+            http2=os.getenv('PREBUNKER_LLM_HTTP2', '1').lower() not in ('0', 'false', 'off', 'no'),
+            uds=os.getenv('PREBUNKER_LLM_UDS') or None
+        )
+
+
+class LLMTransport:
+    """Owns one pooled httpx.AsyncClient shared by every LLM client built from it"""
+
+    def __init__(self, config: Optional[TransportConfig] = None):
+        self.config = config or TransportConfig()
+        # HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+        self.http2 = self.config.http2 and importlib.util.find_spec('h2') is not None
+        self._lock = threading.Lock()
+        self._http_client = None
+        self.stats = {
+            'requests': 0,
+            'new_connections': 0,
+            'tls_handshakes': 0,
+            'connection_failures': 0,
+            'http2_requests': 0
+        }
+
+    @classmethod
+    def from_env(cls) -> 'LLMTransport':
+        return cls(TransportConfig.from_env())
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """The shared client, created lazily (httpx clients are not bound to an event loop until used)"""
+        with self._lock:
+            if self._http_client is None or self._http_client.is_closed:
+                self._http_client = self._build_http_client()
+            return self._http_client
+
+    def _build_http_client(self) -> httpx.AsyncClient:
+        config = self.config
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry
+        )
+        timeout = httpx.Timeout(
+            connect=config.connect_timeout,
+            read=config.read_timeout,
+            write=config.write_timeout,
+            pool=config.pool_timeout
+        )
+        transport = _LoopLocalTransport(
+            lambda: httpx.AsyncHTTPTransport(limits=limits, http2=self.http2, uds=config.uds)
+        )
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=timeout,
+            event_hooks={'request': [self._on_request]}
+        )
+
+    async def _on_request(self, request: httpx.Request):
+        self.stats['requests'] += 1
+        request.extensions['trace'] = self._on_trace
+
+    async def _on_trace(self, event_name: str, info: Dict[str, Any]):
+        """httpcore trace callback: connection setup only happens when the pool has nothing to reuse"""
+        if event_name in ('connection.connect_tcp.complete', 'connection.connect_unix_socket.complete'):
+            self.stats['new_connections'] += 1
+        elif event_name == 'connection.start_tls.complete':
+            self.stats['tls_handshakes'] += 1
+        elif event_name in ('connection.connect_tcp.failed', 'connection.connect_unix_socket.failed'):
+            self.stats['connection_failures'] += 1
+        elif event_name == 'http2.send_request_headers.started':
+            self.stats['http2_requests'] += 1
+
+    def create_openai_client(self, base_url: Optional[str] = None, **kwargs) -> AsyncOpenAI:
+        """AsyncOpenAI client that sends through the shared pool"""
+        return AsyncOpenAI(
+            base_url=base_url or self.config.base_url,
+            api_key=self.config.api_key or os.getenv('OPENAI_API_KEY') or 'sk-no-key-required',
+            http_client=self.http_client,
+            **kwargs
+        )
+
+    async def aclose(self):
+        with self._lock:
+            client, self._http_client = self._http_client, None
+        if client is not None:
+            await client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        requests = self.stats['requests']
+        reused = max(0, requests - self.stats['new_connections'])
+        return {
+            **self.stats,
+            'reused_connections': reused,
+            'reuse_rate': reused / requests if requests else 0.0,
+            'http2_enabled': self.http2,
+            'uds': self.config.uds,
+            'base_url': self.config.base_url,
+            'max_connections': self.config.max_connections,
+            'max_keepalive_connections': self.config.max_keepalive_connections
+        }
+
+
+# Global instance
+llm_transport = LLMTransport.from_env()
@@ -118,10 +118,10 @@ class HealthCommMetrics:
             original_result.get('countermeasures', {})
         )
         
-        # Processing time if available
+        # Processing time if available, scored against the analysis' latency budget when it had one
         if 'processing_time' in original_result:
             metrics['response_time_score_original'] = self.response_time_score(
-                original_result['processing_time']
+                original_result['processing_time'], original_result.get('budget_seconds') or 30.0
             )
         
         # If improved result is provided, calculate comparison metrics
@@ -3,7 +3,9 @@
 import asyncio
 from typing import Dict, List, Any, Optional
 from src.agent import Agent, model
+from src.error_handler import DeadlineExceededError, is_agent_failure
 from src.personas.interpreter import PersonaInterpreter
+from src.llm.streaming import first_number_parser
 
 class MessageVariantGenerator:
     """Generate alternative versions of health messages for testing"""
@@ -113,11 +115,17 @@ class ABTestSimulator:
         """
         
         try:
-            score_response = await self.clarity_agent.run(clarity_prompt)
+            # Only the score is needed, so stop generating once it has been streamed
+            score_response = await self.clarity_agent.run(clarity_prompt, stream_parser=first_number_parser)
             
-            # Extract numeric score (basic parsing)
-            score = float(score_response.strip())
+            if is_agent_failure(score_response):
+                raise ValueError(score_response)
+            
+            # Extract numeric score
+            score = first_number_parser(score_response, True)
             return max(0.0, min(1.0, score))
+        except DeadlineExceededError:
+            raise
         except:
             # Fallback to heuristic scoring
             return self.calculate_readability_score(message_text)
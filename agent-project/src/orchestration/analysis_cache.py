@@ -0,0 +1,231 @@
+"""Whole-analysis result cache keyed by normalized message, options, persona set and component versions
+
+Re-submitting the same draft returns the stored analysis instead of rerunning every
+stage. Component versions (lexicons, evidence sources, prompts) are fingerprinted on
+each lookup; when any of them changes the cache is invalidated, so stale analyses are
+never served after a lexicon, source or prompt update.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import unicodedata
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.agent import Agent
+from src.error_handler import logger
+from src.health_kb.claim_types import CLAIM_PATTERNS
+from src.health_kb import medical_terms
+from src.health_kb.medical_terms import MEDICAL_ENTITIES, MEDICAL_SPECIALTIES
+from src.llm.cache import TieredCache
+from src.personas.base_personas import PANEL_GUIDANCE, AudiencePersona
+
+# Options that bound or log an analysis without changing a complete result
+UNKEYED_OPTIONS = ('budget_seconds', 'deadline', 'detailed_logging', 'use_analysis_cache')
+
+
+def normalize_message(text: str) -> str:
+    """Unicode-normalized message with runs of whitespace collapsed (case is kept: it can change meaning)"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text or '')).strip()
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-ready form of lexicon, source and option values (enums by value, objects by their fields)"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {str(_canonical(k)): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_canonical(v) for v in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if hasattr(value, '__dict__'):
+        return {k: _canonical(v) for k, v in vars(value).items() if not k.startswith('_') and not isinstance(v, Agent)}
+    return str(value)
+
+
+def fingerprint(value: Any) -> str:
+    canonical = json.dumps(_canonical(value), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def default_lexicons() -> Dict[str, Any]:
+    """Shared health lexicons every analysis depends on"""
+    lexicons = {
+        'medical_entities': MEDICAL_ENTITIES,
+        'medical_specialties': MEDICAL_SPECIALTIES,
+        'claim_patterns': CLAIM_PATTERNS
+    }
+    if medical_terms.medical_lexicon is not None:
+        # The compiled lexicon is versioned by its source checksum, not fingerprinted term by term
+        lexicons['medical_lexicon'] = medical_terms.medical_lexicon.version
+    return lexicons
+
+
+def collect_agent_instructions(components: Iterable[Any], depth: int = 3) -> List[List[str]]:
+    """(name, instructions) of every Agent reachable from the components' public attributes, in attribute order
+
+    Persona agents are left out: they belong to the persona set, which is keyed separately.
+    Private attributes are skipped like in fingerprints: they hold internal state, such as
+    the persona panel agent built on the first panel request, which would otherwise change
+    the prompt version (and clear the cache) partway through a process.
+    """
+    seen, found = set(), []
+
+    def walk(obj: Any, remaining: int):
+        if obj is None or id(obj) in seen or isinstance(obj, AudiencePersona):
+            return
+        seen.add(id(obj))
+        if isinstance(obj, Agent):
+            found.append([obj.name, obj.instructions])
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                walk(value, remaining)
+        elif isinstance(obj, (list, tuple)):
+            for value in obj:
+                walk(value, remaining)
+        elif remaining > 0 and type(obj).__module__.startswith('src.'):
+            for name, value in vars(obj).items():
+                if not name.startswith('_'):
+                    walk(value, remaining - 1)
+
+    for component in components:
+        walk(component, depth)
+    return found
+
+
+@lru_cache(maxsize=None)
+def _template_version(cls: type) -> str:
+    """Hash of a component class's source, covering the prompt templates built in its methods"""
+    try:
+        source = inspect.getsource(cls)
+    except (OSError, TypeError):
+        source = f"{cls.__module__}.{cls.__qualname__}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def component_versions(lexicons: Dict[str, Any], sources: Any, components: Iterable[Any]) -> Dict[str, str]:
+    """Version fingerprint per component kind: lexicons, evidence sources and prompts"""
+    components = list(components)
+    return {
+        'lexicons': fingerprint(lexicons),
+        'sources': fingerprint(sources),
+        'prompts': fingerprint({
+            'agents': collect_agent_instructions(components),
+            'templates': [_template_version(type(component)) for component in components]
+        })
+    }
+
+
+def persona_fingerprint(personas: Iterable[Any]) -> str:
+    """Persona set fingerprint, including each persona's prompt and the panel prompt's guidance"""
+    return fingerprint({
+        'personas': [
+            {**persona.get_persona_summary(),
+             'instructions': persona.interpretation_agent.instructions if persona.interpretation_agent else None}
+            if isinstance(persona, AudiencePersona) else persona
+            for persona in personas
+        ],
+        'panel_guidance': PANEL_GUIDANCE
+    })
+
+
+class AnalysisCache(TieredCache):
+    """Completed analyses keyed on (kind, normalized message, options, personas, component versions)"""
+
+    def __init__(self, max_memory_entries: int = 256, ttl_seconds: Optional[float] = 24 * 3600,
+                 disk_path: Optional[str] = None, max_disk_entries: int = 5000,
+                 table: str = 'analysis_results'):
+        super().__init__(
+            max_memory_entries=max_memory_entries,
+            ttl_seconds=ttl_seconds,
+            disk_path=disk_path,
+            max_disk_entries=max_disk_entries,
+            table=table
+        )
+        self.stats['invalidations'] = 0
+        self._versions = None  # component versions the stored entries were computed with
+        if self._conn is not None:
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table}_versions (component TEXT PRIMARY KEY, version TEXT NOT NULL)'
+            )
+
+    def make_key(self, kind: str, message: str, options: Dict[str, Any], personas: str,
+                 versions: Dict[str, str]) -> str:
+        return fingerprint({
+            'kind': kind,
+            'message': normalize_message(message),
+            'options': {k: v for k, v in (options or {}).items() if k not in UNKEYED_OPTIONS},
+            'personas': personas,
+            'versions': versions
+        })
+
+    def sync_versions(self, versions: Dict[str, str]) -> List[str]:
+        """Invalidate the cache if any component changed since the stored entries were computed
+
+        Returns the names of the changed components (empty when nothing changed).
+        """
+        with self._lock:
+            if self._versions is None:
+                self._versions = self._load_versions()
+            previous = self._versions
+        if previous == versions:
+            return []
+
+        changed = sorted(k for k in set(previous) | set(versions) if previous.get(k) != versions.get(k))
+        if previous:
+            self.invalidate(changed)
+        with self._lock:
+            self._versions = dict(versions)
+            if self._conn is not None:
+                self._conn.executemany(
+                    f'INSERT OR REPLACE INTO {self.table}_versions (component, version) VALUES (?, ?)',
+                    list(versions.items())
+                )
+        return changed if previous else []
+
+    def invalidate(self, components: Optional[List[str]] = None):
+        """Drop every stored analysis, e.g. after a lexicon, source or prompt update"""
+        self.clear()
+        with self._lock:
+            self.stats['invalidations'] += 1
+        if components:
+            logger.info(f"Analysis cache invalidated: {', '.join(components)} changed")
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """A private copy of the cached analysis, annotated with where it came from"""
+        hit = self.get_entry(key)
+        if hit is None:
+            return None
+        result = json.loads(json.dumps(hit.value))
+        result['analysis_cache'] = {'hit': True, 'tier': hit.tier, 'saved_seconds': round(hit.cost, 3)}
+        return result
+
+    def store(self, key: str, result: Dict[str, Any], cost: float = 0.0):
+        # Stored as JSON so later changes to the caller's result never leak into the cache
+        self.set(key, json.loads(json.dumps(result, default=str)), cost=cost)
+
+    def _load_versions(self) -> Dict[str, str]:
+        if self._conn is None:
+            return {}
+        return dict(self._conn.execute(f'SELECT component, version FROM {self.table}_versions').fetchall())
+
+    @classmethod
+    def from_env(cls, table: str = 'analysis_results') -> Optional['AnalysisCache']:
+        """Build the cache from PREBUNKER_ANALYSIS_CACHE_* environment variables (None if disabled)"""
+        if os.getenv('PREBUNKER_ANALYSIS_CACHE', '1').lower() in ('0', 'false', 'off', 'no'):
+            return None
+
+        ttl = os.getenv('PREBUNKER_ANALYSIS_CACHE_TTL')
+        return cls(
+            max_memory_entries=int(os.getenv('PREBUNKER_ANALYSIS_CACHE_MAX_ENTRIES', '256')),
+            ttl_seconds=float(ttl) if ttl else 24 * 3600,
+            disk_path=os.getenv('PREBUNKER_ANALYSIS_CACHE_PATH') or None,
+            max_disk_entries=int(os.getenv('PREBUNKER_ANALYSIS_CACHE_MAX_DISK_ENTRIES', '5000')),
+            table=table
+        )
@@ -0,0 +1,130 @@
+"""Incremental sentence-level re-analysis for edited drafts
+
+A message is segmented into sentences and each sentence is hashed. Per-claim results
+(risk, evidence validation, countermeasures) are stored under the claim text and the
+hashes of the sentences it spans, so when a writer edits one sentence only the claims
+in changed sentences are recomputed; message-level stages (persona reactions, concerns,
+the risk report) always run on the whole new draft.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.orchestration.analysis_cache import AnalysisCache, fingerprint, normalize_message
+
+SENTENCE_PATTERN = re.compile(r'[^.!?]+(?:[.!?]+|$)')
+
+# Message-level stages that run on every draft, even when every claim is reused
+MESSAGE_LEVEL_STAGES = ['claims', 'personas', 'persona_concerns', 'risk_report']
+
+
+def segment_sentences(text: str) -> List[Tuple[int, int, str]]:
+    """(start, end, sentence) spans of the non-empty sentences of a message"""
+    spans = []
+    for match in SENTENCE_PATTERN.finditer(text or ''):
+        sentence = match.group().strip()
+        if sentence:
+            start = match.start() + (len(match.group()) - len(match.group().lstrip()))
+            spans.append((start, start + len(sentence), sentence))
+    return spans
+
+
+def sentence_hash(sentence: str) -> str:
+    return hashlib.sha256(normalize_message(sentence).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class IncrementalPlan:
+    """Which claims of a draft can reuse stored results"""
+    sentence_hashes: List[str]
+    claim_keys: List[str]
+    claim_sentences: List[List[int]]  # per claim, the sentences it spans
+    options: Dict[str, Any]  # options the stored results depend on
+    versions: Dict[str, str]  # component versions the stored results were computed with
+    reused: Dict[int, Dict[str, Any]] = field(default_factory=dict)  # claim index -> stored results
+    changed_sentences: List[int] = field(default_factory=list)
+
+
+class ClaimResultStore(AnalysisCache):
+    """Per-claim results of earlier drafts, keyed by claim text and the hashes of its sentences"""
+
+    def __init__(self, max_memory_entries: int = 4096, ttl_seconds: Optional[float] = 24 * 3600,
+                 disk_path: Optional[str] = None, max_disk_entries: int = 50000,
+                 table: str = 'claim_results'):
+        super().__init__(
+            max_memory_entries=max_memory_entries,
+            ttl_seconds=ttl_seconds,
+            disk_path=disk_path,
+            max_disk_entries=max_disk_entries,
+            table=table
+        )
+
+    def plan(self, message: str, claims: List[Dict[str, Any]], options: Dict[str, Any],
+             versions: Dict[str, str]) -> IncrementalPlan:
+        """Match the draft's claims to its sentences and look up results for unchanged ones"""
+        self.sync_versions(versions)
+        sentences = segment_sentences(message)
+        hashes = [sentence_hash(sentence) for _, _, sentence in sentences]
+        plan = IncrementalPlan(sentence_hashes=hashes, claim_keys=[], claim_sentences=[],
+                               options=options, versions=versions)
+
+        for claim in claims:
+            position = message.find(claim['text'])
+            spanned = [] if position < 0 else [
+                index for index, (start, end, _) in enumerate(sentences)
+                if start < position + len(claim['text']) and end > position
+            ]
+            plan.claim_sentences.append(spanned)
+            # A claim that cannot be placed in the draft gets no key and is always recomputed
+            plan.claim_keys.append(self._claim_key(claim['text'], [hashes[i] for i in spanned], options, versions)
+                                   if spanned else None)
+
+        for index, key in enumerate(plan.claim_keys):
+            stored = self.get(key) if key else None
+            if stored is not None:
+                # A private copy: the draft's result may be changed by its caller
+                plan.reused[index] = json.loads(json.dumps(stored))
+        plan.changed_sentences = [
+            index for index, digest in enumerate(hashes)
+            if self.get(self._sentence_key(digest, options, versions)) is None
+        ]
+        return plan
+
+    def record(self, plan: IncrementalPlan, claim_results: Dict[int, Dict[str, Any]]):
+        """Store freshly computed, complete claim results and mark fully analyzed sentences as seen"""
+        complete = set(plan.reused)
+        for index, results in claim_results.items():
+            if plan.claim_keys[index] is not None:
+                self.store(plan.claim_keys[index], results)
+                complete.add(index)
+
+        for sentence_index, digest in enumerate(plan.sentence_hashes):
+            claims_here = [index for index, spanned in enumerate(plan.claim_sentences) if sentence_index in spanned]
+            if all(index in complete for index in claims_here):
+                self.set(self._sentence_key(digest, plan.options, plan.versions), True)
+
+    def report(self, plan: IncrementalPlan, claims: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """What this draft reused from earlier ones"""
+        reused = [plan.reused[index] for index in sorted(plan.reused)]
+        return {
+            'sentences': len(plan.sentence_hashes),
+            'changed_sentences': plan.changed_sentences,
+            'reused_claims': [claims[index]['text'] for index in sorted(plan.reused)],
+            'recomputed_claims': [claim['text'] for index, claim in enumerate(claims) if index not in plan.reused],
+            'reused_results': {
+                'risk': len(reused),
+                'evidence': sum(1 for results in reused if results.get('evidence') is not None),
+                'countermeasures': sum(1 for results in reused if results.get('countermeasures') is not None)
+            },
+            'recomputed_stages': list(MESSAGE_LEVEL_STAGES)
+        }
+
+    def _claim_key(self, claim_text: str, hashes: List[str], options: Dict[str, Any], versions: Dict[str, str]) -> str:
+        return fingerprint({'kind': 'claim', 'claim': claim_text, 'sentences': hashes,
+                            'options': options, 'versions': versions})
+
+    def _sentence_key(self, digest: str, options: Dict[str, Any], versions: Dict[str, str]) -> str:
+        return fingerprint({'kind': 'sentence', 'sentence': digest, 'options': options, 'versions': versions})
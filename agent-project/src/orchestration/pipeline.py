@@ -9,20 +9,32 @@ from src.claims.risk_scorer import RiskScorer
 from src.personas.interpreter import PersonaInterpreter
 from src.personas.base_personas import STANDARD_PERSONAS
 from src.evidence.validator import EvidenceValidator
-from src.countermeasures.generator import CountermeasureGenerator
+from src.countermeasures.generator import CountermeasureGenerator, collect_persona_concerns
 from src.health_kb.claim_types import HealthClaim, ClaimType, classify_claim_type
 from src.health_kb.medical_terms import extract_medical_entities
+from src.llm.circuit_breaker import llm_circuit_breaker
+from src.llm.ledger import llm_ledger, llm_stage
+from src.deadline import deadline_scope, within_deadline, run_stage
+from src.error_handler import CircuitOpenError, DeadlineExceededError, contains_agent_failure, track_agent_failures
+from src.orchestration.stage_graph import StageGraph
+from src.orchestration.analysis_cache import AnalysisCache, component_versions, default_lexicons, persona_fingerprint
+from src.orchestration.incremental import ClaimResultStore, IncrementalPlan
 
 class PrebunkerPipeline:
     """Main pipeline orchestrating the complete PRE-BUNKER analysis workflow"""
     
-    def __init__(self, personas: List = None):
+    def __init__(self, personas: List = None, circuit_breaker=None, analysis_cache: Optional[AnalysisCache] = None):
         # Initialize all components
         self.claim_extractor = ClaimExtractor()
         self.risk_scorer = RiskScorer()
         self.persona_interpreter = PersonaInterpreter(personas or STANDARD_PERSONAS)
         self.evidence_validator = EvidenceValidator()
         self.countermeasure_generator = CountermeasureGenerator()
+        self.circuit_breaker = circuit_breaker or llm_circuit_breaker
+        # Completed analyses of re-submitted messages (None: always run the pipeline)
+        self.analysis_cache = analysis_cache
+        # Per-claim results of earlier drafts, reused for unchanged sentences in incremental mode
+        self.claim_result_store = ClaimResultStore()
         
         # Pipeline configuration
         self.config = {
@@ -30,12 +42,55 @@ class PrebunkerPipeline:
             'min_risk_score_for_countermeasures': 0.3,
             'parallel_processing': True,
             'include_countermeasures': True,
-            'detailed_logging': True
+            'detailed_logging': True,
+            'degraded_mode': False,  # Force the deterministic (no-LLM) path
+            'evidence_batch_size': None,  # Claims per evidence prompt; None uses the validator's setting
+            'persona_mode': None,  # 'individual' or 'panel'; None uses the interpreter's setting
+            'use_analysis_cache': True,  # Serve and store completed analyses when an analysis cache is set
+            'incremental': False,  # Reuse per-claim results for sentences unchanged since an earlier draft
+            'budget_seconds': None,  # Latency budget for the whole analysis; stages that cannot finish are dropped
+            'deadline': None  # Alternatively an absolute deadline (epoch seconds)
         }
     
     async def process_message(self, message_text: str, options: Dict[str, Any] = None) -> Dict[str, Any]:
         """Process a health message through the complete PRE-BUNKER pipeline"""
-        
+        opts = {**self.config, **(options or {})}
+        cache_key = self._analysis_cache_key(message_text, opts)
+        with llm_ledger.capture() as llm_calls, deadline_scope(opts['budget_seconds'], opts['deadline']), \
+                track_agent_failures() as agent_failures:
+            pipeline_result = self.analysis_cache.lookup(cache_key) if cache_key else None
+            if pipeline_result is None:
+                pipeline_result = await self._run_pipeline(message_text, opts)
+                # Only complete analyses are reused: a partial or degraded one, or one with a failed
+                # model call behind any stage output, should be retried
+                if cache_key and pipeline_result['pipeline_status'] in ('completed_success', 'completed_no_claims') \
+                        and not pipeline_result.get('partial') and not pipeline_result['degraded'] \
+                        and not agent_failures:
+                    self.analysis_cache.store(cache_key, pipeline_result, cost=pipeline_result['processing_time'])
+        # Model calls of this analysis by agent and stage
+        pipeline_result['llm_usage'] = llm_calls.summary()
+        pipeline_result['budget_seconds'] = opts['budget_seconds']
+        return pipeline_result
+    
+    def _analysis_cache_key(self, message_text: str, opts: Dict[str, Any]) -> Optional[str]:
+        """Analysis cache key for this request (None when caching is off); invalidates on component changes"""
+        if self.analysis_cache is None or not opts['use_analysis_cache']:
+            return None
+        versions = self._component_versions()
+        self.analysis_cache.sync_versions(versions)
+        personas = persona_fingerprint(getattr(self.persona_interpreter, 'personas', []))
+        options = {k: v for k, v in opts.items() if k in self.config}
+        return self.analysis_cache.make_key('pipeline', message_text, options, personas, versions)
+    
+    def _component_versions(self) -> Dict[str, str]:
+        """Lexicon, source and prompt fingerprints of this pipeline's components"""
+        components = [self.claim_extractor, self.risk_scorer, self.persona_interpreter,
+                      self.evidence_validator, self.countermeasure_generator]
+        lexicons = {**default_lexicons(), 'claim_patterns_extractor': getattr(self.claim_extractor, 'claim_patterns', None)}
+        sources = getattr(getattr(self.evidence_validator, 'searcher', None), 'sources', None)
+        return component_versions(lexicons, sources, components)
+    
+    async def _run_pipeline(self, message_text: str, options: Dict[str, Any] = None) -> Dict[str, Any]:
         # Merge options with defaults
         opts = {**self.config, **(options or {})}
         
@@ -51,18 +106,26 @@ class PrebunkerPipeline:
             'countermeasures': [],
             'risk_report': {},
             'processing_time': 0.0,
-            'pipeline_status': 'processing'
+            'pipeline_status': 'processing',
+            'degraded': False,
+            'degraded_stages': [],
+            'dropped_stages': []  # stages cut short by the latency budget
         }
         
         start_time = asyncio.get_event_loop().time()
+        dropped_stages = pipeline_result['dropped_stages']
+        incremental = {}  # holds the draft's IncrementalPlan once claims are known (incremental mode)
+        graph = self._build_stage_graph(message_text, opts, pipeline_result, incremental)
         
         try:
-            # Step 1: Extract claims from the message
-            if opts['detailed_logging']:
-                print(f"[Pipeline] Step 1: Extracting claims from message...")
+            results = await graph.run()
+            pipeline_result['stage_timings'] = graph.get_timings()
             
-            extracted_claims = await self._extract_claims(message_text, opts)
+            extracted_claims = results['claims']
             pipeline_result['claims'] = extracted_claims
+            plan = incremental.get('plan')
+            if plan is not None:
+                pipeline_result['incremental'] = self.claim_result_store.report(plan, extracted_claims)
             
             if not extracted_claims:
                 pipeline_result.update({
@@ -71,48 +134,38 @@ class PrebunkerPipeline:
                 })
                 return pipeline_result
             
-            # Step 2: Risk analysis
-            if opts['detailed_logging']:
-                print(f"[Pipeline] Step 2: Analyzing risk for {len(extracted_claims)} claims...")
-            
-            risk_analysis = await self._analyze_risk(extracted_claims, opts)
+            risk_analysis = results['risk']
+            persona_interpretations = results['personas']
             pipeline_result['risk_analysis'] = risk_analysis
-            
-            # Step 3: Persona interpretations (in parallel with evidence validation)
-            if opts['detailed_logging']:
-                print(f"[Pipeline] Step 3: Getting persona interpretations...")
-            
-            # Step 4: Evidence validation (in parallel with persona interpretations)
-            if opts['detailed_logging']:
-                print(f"[Pipeline] Step 4: Validating evidence...")
-            
-            if opts['parallel_processing']:
-                # Run persona interpretation and evidence validation in parallel
-                persona_task = self._get_persona_interpretations(message_text, opts)
-                evidence_task = self._validate_evidence(extracted_claims, opts)
-                
-                persona_interpretations, evidence_validations = await asyncio.gather(
-                    persona_task, evidence_task
-                )
-            else:
-                # Run sequentially
-                persona_interpretations = await self._get_persona_interpretations(message_text, opts)
-                evidence_validations = await self._validate_evidence(extracted_claims, opts)
-            
             pipeline_result['persona_interpretations'] = persona_interpretations
+            
+            # Evidence keeps the claims validated before the budget ran out
+            evidence_results = [results[f'evidence:{index}'] for index in range(len(extracted_claims))]
+            evidence_validations = [validation for validation in evidence_results if validation is not None]
             pipeline_result['evidence_validations'] = evidence_validations
+            if len(evidence_validations) < len(extracted_claims):
+                dropped_stages.append('evidence_validation')
+            
+            if any(v.get('degraded') for v in evidence_validations):
+                pipeline_result['degraded_stages'].append('evidence_validation')
             
-            # Step 5: Generate countermeasures for high-risk claims
             if opts['include_countermeasures']:
-                if opts['detailed_logging']:
-                    print(f"[Pipeline] Step 5: Generating countermeasures...")
-                
-                countermeasures = await self._generate_countermeasures(
-                    extracted_claims, persona_interpretations, evidence_validations, risk_analysis, opts
-                )
+                # High-risk claims first, then medium; low-risk claims get none
+                risky = [index for index, claim_risk in enumerate(risk_analysis['claim_risk_scores'])
+                         if claim_risk['risk_level'] != 'low']
+                risky.sort(key=lambda index: risk_analysis['claim_risk_scores'][index]['risk_level'] != 'high')
+                countermeasure_results = [results[f'countermeasures:{index}'] for index in risky]
+                countermeasures = [entry for entry in countermeasure_results if entry is not None]
                 pipeline_result['countermeasures'] = countermeasures
+                if any(c.get('degraded') for c in countermeasures):
+                    pipeline_result['degraded_stages'].append('countermeasures')
+                if len(countermeasures) < len(risky):
+                    dropped_stages.append('countermeasures')
+            
+            if plan is not None:
+                self._record_claim_results(plan, risk_analysis, results, opts)
             
-            # Step 6: Compile comprehensive risk report
+            # Compile comprehensive risk report
             if opts['detailed_logging']:
                 print(f"[Pipeline] Step 6: Compiling risk report...")
             
@@ -122,6 +175,8 @@ class PrebunkerPipeline:
             # Finalize
             pipeline_result.update({
                 'pipeline_status': 'completed_success',
+                'degraded': bool(pipeline_result['degraded_stages']),
+                'partial': bool(dropped_stages),
                 'processing_time': asyncio.get_event_loop().time() - start_time
             })
             
@@ -129,6 +184,7 @@ class PrebunkerPipeline:
             pipeline_result.update({
                 'pipeline_status': 'error',
                 'error_message': str(e),
+                'stage_timings': graph.get_timings(),
                 'processing_time': asyncio.get_event_loop().time() - start_time
             })
             
@@ -137,6 +193,116 @@ class PrebunkerPipeline:
         
         return pipeline_result
     
+    def _build_stage_graph(self, message_text: str, opts: Dict[str, Any], pipeline_result: Dict[str, Any],
+                           incremental: Dict[str, IncrementalPlan]) -> StageGraph:
+        """Stages with their real inputs, so each starts as soon as those exist
+
+        Personas need only the raw message. Once claims are extracted, every claim gets
+        its own evidence node, and its own countermeasure node that waits only for that
+        claim's evidence, the risk analysis and the persona concerns (collected once per message).
+        In batched evidence mode the evidence nodes read from one shared node per batch.
+        In incremental mode, claims whose sentences are unchanged since an earlier draft
+        get nodes that return their stored evidence and countermeasures.
+        """
+        graph = StageGraph(concurrent=opts['parallel_processing'])
+        
+        async def extract(inputs):
+            if opts['detailed_logging']:
+                print(f"[Pipeline] Step 1: Extracting claims from message...")
+            claims = await self._extract_claims(message_text, opts)
+            reused = {}
+            if opts['incremental']:
+                incremental['plan'] = self.claim_result_store.plan(
+                    message_text, claims, self._incremental_options(opts), self._component_versions()
+                )
+                reused = incremental['plan'].reused
+            if not claims:
+                # Nothing to analyze: stop persona interpretation before it reaches the model
+                graph.cancel()
+                return claims
+            
+            if opts['detailed_logging']:
+                print(f"[Pipeline] Step 4: Validating evidence for {len(claims)} claims...")
+            fresh = [index for index in range(len(claims)) if index not in reused]
+            for index in reused:
+                graph.add(f'evidence:{index}', stored(reused[index]['evidence']), depends_on=['claims'])
+            batch_size = opts['evidence_batch_size'] or self.evidence_validator.batch_size
+            if batch_size > 1 and len(fresh) > 1:
+                # One prompt per batch; each claim's evidence node picks its entry from the batch
+                for batch_index, start in enumerate(range(0, len(fresh), batch_size)):
+                    batch = fresh[start:start + batch_size]
+                    graph.add(f'evidence_batch:{batch_index}',
+                              lambda inputs, batch=batch: self._validate_claim_batch_evidence(
+                                  [claims[index] for index in batch], opts),
+                              depends_on=['claims'])
+                    for offset, index in enumerate(batch):
+                        graph.add(f'evidence:{index}', batch_entry(f'evidence_batch:{batch_index}', offset),
+                                  depends_on=[f'evidence_batch:{batch_index}'])
+            else:
+                for index in fresh:
+                    graph.add(f'evidence:{index}',
+                              lambda inputs, claim=claims[index]: self._validate_claim_evidence(claim, opts),
+                              depends_on=['claims'])
+            
+            if opts['include_countermeasures']:
+                for index in range(len(claims)):
+                    if index in reused:
+                        graph.add(f'countermeasures:{index}', stored(reused[index]['countermeasures']),
+                                  depends_on=['claims'])
+                        continue
+                    graph.add(f'countermeasures:{index}',
+                              lambda inputs, index=index: self._generate_claim_countermeasures(
+                                  inputs['risk']['claim_risk_scores'][index], inputs['persona_concerns'],
+                                  inputs[f'evidence:{index}'], opts),
+                              depends_on=['risk', 'persona_concerns', f'evidence:{index}'])
+            return claims
+        
+        def batch_entry(batch_name, offset):
+            async def entry(inputs):
+                return inputs[batch_name][offset]
+            return entry
+        
+        def stored(value):
+            async def entry(inputs):
+                return value
+            return entry
+        
+        async def interpret(inputs):
+            if opts['detailed_logging']:
+                print(f"[Pipeline] Step 3: Getting persona interpretations...")
+            if self._llm_degraded(opts):
+                # Persona interpretations are LLM-only; in degraded mode they are skipped
+                pipeline_result['degraded_stages'].append('persona_interpretations')
+                return []
+            try:
+                return await self._get_persona_interpretations_within_budget(
+                    message_text, opts, pipeline_result['dropped_stages']
+                )
+            except CircuitOpenError:
+                # The circuit opened while personas were being interpreted: skipped as in degraded mode
+                pipeline_result['degraded_stages'].append('persona_interpretations')
+                return []
+        
+        async def concerns(inputs):
+            return collect_persona_concerns(inputs['personas'])
+        
+        async def analyze_risk(inputs):
+            if opts['detailed_logging']:
+                print(f"[Pipeline] Step 2: Analyzing risk for {len(inputs['claims'])} claims...")
+            reused = incremental['plan'].reused if 'plan' in incremental else {}
+            return await self._analyze_risk(inputs['claims'], opts,
+                                            {index: results['risk'] for index, results in reused.items()})
+        
+        graph.add('claims', extract)
+        graph.add('personas', interpret)
+        graph.add('risk', analyze_risk, depends_on=['claims'])
+        graph.add('persona_concerns', concerns, depends_on=['personas'])
+        return graph
+    
+    def _llm_degraded(self, opts: Dict[str, Any]) -> bool:
+        """True when LLM stages should be skipped: forced by option or the LLM circuit is open"""
+        return opts.get('degraded_mode', False) or (self.circuit_breaker is not None and self.circuit_breaker.is_open)
+    
     async def _extract_claims(self, message_text: str, opts: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract and classify health claims"""
         
@@ -162,8 +328,9 @@ class PrebunkerPipeline:
         
         return extracted_claims
     
-    async def _analyze_risk(self, claims: List[Dict[str, Any]], opts: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze risk for all claims"""
+    async def _analyze_risk(self, claims: List[Dict[str, Any]], opts: Dict[str, Any],
+                            reused_risk: Optional[Dict[int, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Analyze risk for all claims (reused_risk: stored claim risk by claim index, incremental mode)"""
         
         risk_analysis = {
             'claim_risk_scores': [],
@@ -177,24 +344,27 @@ class PrebunkerPipeline:
         
         total_risk = 0.0
         
-        for claim in claims:
-            # Score the claim text
-            text_risk_score = self.risk_scorer.score_claim(claim['text'])
-            
-            # Combine with base risk score
-            combined_risk = (claim['base_risk_score'] * 0.6) + (text_risk_score * 0.4)
-            
-            # Analyze risk factors
-            risk_factors = self.risk_scorer.analyze_risk_factors(claim['text'])
-            
-            claim_risk = {
-                'claim_text': claim['text'],
-                'base_risk_score': claim['base_risk_score'],
-                'text_risk_score': text_risk_score,
-                'combined_risk_score': combined_risk,
-                'risk_factors': risk_factors,
-                'risk_level': self._categorize_risk_level(combined_risk)
-            }
+        for index, claim in enumerate(claims):
+            claim_risk = (reused_risk or {}).get(index)
+            if claim_risk is None:
+                # Score the claim text
+                text_risk_score = self.risk_scorer.score_claim(claim['text'])
+                
+                # Combine with base risk score
+                combined_risk = (claim['base_risk_score'] * 0.6) + (text_risk_score * 0.4)
+                
+                # Analyze risk factors
+                risk_factors = self.risk_scorer.analyze_risk_factors(claim['text'])
+                
+                claim_risk = {
+                    'claim_text': claim['text'],
+                    'base_risk_score': claim['base_risk_score'],
+                    'text_risk_score': text_risk_score,
+                    'combined_risk_score': combined_risk,
+                    'risk_factors': risk_factors,
+                    'risk_level': self._categorize_risk_level(combined_risk)
+                }
+            combined_risk = claim_risk['combined_risk_score']
             
             risk_analysis['claim_risk_scores'].append(claim_risk)
             
@@ -222,6 +392,30 @@ class PrebunkerPipeline:
         
         return risk_analysis
     
+    def _incremental_options(self, opts: Dict[str, Any]) -> Dict[str, Any]:
+        """Options that change stored per-claim results (persona concerns are recomputed per draft, not keyed)"""
+        return {'include_countermeasures': opts['include_countermeasures']}
+    
+    def _record_claim_results(self, plan: IncrementalPlan, risk_analysis: Dict[str, Any],
+                              results: Dict[str, Any], opts: Dict[str, Any]):
+        """Store the complete results of freshly analyzed claims for later drafts"""
+        claim_results = {}
+        for index, claim_risk in enumerate(risk_analysis['claim_risk_scores']):
+            if index in plan.reused:
+                continue
+            evidence = results.get(f'evidence:{index}')
+            countermeasures = results.get(f'countermeasures:{index}')
+            # Out-of-budget, degraded or failed results (including output of a failed model call) are recomputed next time
+            if evidence is None or evidence.get('degraded') or 'error_message' in evidence \
+                    or contains_agent_failure(evidence):
+                continue
+            if opts['include_countermeasures'] and claim_risk['risk_level'] != 'low' and (
+                    countermeasures is None or countermeasures.get('degraded') or 'error_message' in countermeasures
+                    or contains_agent_failure(countermeasures)):
+                continue
+            claim_results[index] = {'risk': claim_risk, 'evidence': evidence, 'countermeasures': countermeasures}
+        self.claim_result_store.record(plan, claim_results)
+    
     def _categorize_risk_level(self, risk_score: float) -> str:
         """Categorize risk score into level"""
         if risk_score >= 0.7:
@@ -234,94 +428,92 @@ class PrebunkerPipeline:
     async def _get_persona_interpretations(self, message_text: str, opts: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Get interpretations from all personas"""
         
+        if self._llm_degraded(opts):
+            return []
+        
         try:
-            interpretations = await self.persona_interpreter.interpret_message(message_text)
+            with llm_stage('persona_interpretation'):
+                persona_options = {'mode': opts['persona_mode']} if opts['persona_mode'] else {}
+                interpretations = await self.persona_interpreter.interpret_message(message_text, **persona_options)
             return interpretations
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
         except Exception as e:
             if opts['detailed_logging']:
                 print(f"[Pipeline] Persona interpretation error: {str(e)}")
             return []
     
-    async def _validate_evidence(self, claims: List[Dict[str, Any]], opts: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Validate evidence for all claims"""
-        
-        evidence_validations = []
-        
-        for claim in claims:
-            try:
-                validation = await self.evidence_validator.validate_claim(claim['text'])
-                evidence_validations.append(validation)
-            except Exception as e:
-                if opts['detailed_logging']:
-                    print(f"[Pipeline] Evidence validation error for claim '{claim['text'][:50]}...': {str(e)}")
-                
-                # Add placeholder validation
-                evidence_validations.append({
-                    'claim': claim['text'],
-                    'validation_status': 'error',
-                    'error_message': str(e),
-                    'confidence_score': 0.0
-                })
-        
-        return evidence_validations
+    async def _get_persona_interpretations_within_budget(self, message_text: str, opts: Dict[str, Any],
+                                                          dropped_stages: List[str]) -> List[Dict[str, Any]]:
+        """Persona interpretations run as one unit: all of them, or none if the budget runs out first"""
+        return await run_stage(
+            'persona_interpretations',
+            lambda: self._get_persona_interpretations(message_text, opts),
+            [], dropped_stages
+        )
     
-    async def _generate_countermeasures(self, claims: List[Dict[str, Any]], 
-                                      persona_interpretations: List[Dict[str, Any]],
-                                      evidence_validations: List[Dict[str, Any]],
-                                      risk_analysis: Dict[str, Any],
-                                      opts: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate countermeasures for risky claims"""
-        
-        countermeasures = []
-        
-        # Focus on high and medium risk claims
-        risky_claims = (risk_analysis['high_risk_claims'] + 
-                       risk_analysis['medium_risk_claims'])
+    async def _validate_claim_evidence(self, claim: Dict[str, Any], opts: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Validate evidence for one claim through the shared, bounded evidence stage; None when out of budget"""
+        with llm_stage('evidence_validation'):
+            # Checked per claim so a circuit that opens mid-stage stops further LLM calls
+            return await self.evidence_validator.validate_claim_bounded(
+                claim['text'], use_llm=lambda: not self._llm_degraded(opts)
+            )
+    
+    async def _validate_claim_batch_evidence(self, claims: List[Dict[str, Any]],
+                                             opts: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+        """Validate evidence for several claims with one prompt; entries are None when out of budget"""
+        with llm_stage('evidence_validation'):
+            return await self.evidence_validator.validate_claim_batch(
+                [claim['text'] for claim in claims], use_llm=lambda: not self._llm_degraded(opts)
+            )
+    
+    async def _generate_claim_countermeasures(self, risk_claim: Dict[str, Any],
+                                              persona_concerns: List[str],
+                                              evidence: Optional[Dict[str, Any]],
+                                              opts: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Generate countermeasures for one claim; None for low-risk claims or when the latency budget ran out"""
+        if risk_claim['risk_level'] == 'low':
+            return None
+        claim_text = risk_claim['claim_text']
         
-        for risk_claim in risky_claims:
-            claim_text = risk_claim['claim_text']
-            
-            # Find corresponding evidence validation
-            evidence = {}
-            for ev in evidence_validations:
-                if ev['claim'] == claim_text:
-                    evidence = ev
-                    break
+        try:
+            degraded = self._llm_degraded(opts)
+            async with within_deadline():
+                with llm_stage('countermeasures'):
+                    try:
+                        claim_countermeasures = await self.countermeasure_generator.generate_countermeasures(
+                            claim_text, persona_concerns, evidence or {}, use_llm=not degraded
+                        )
+                    except CircuitOpenError:
+                        # The circuit opened mid-stage: template prebunks only
+                        degraded = True
+                        claim_countermeasures = await self.countermeasure_generator.generate_countermeasures(
+                            claim_text, persona_concerns, evidence or {}, use_llm=False
+                        )
             
-            # Extract persona concerns for this claim
-            persona_concerns = []
-            for interpretation in persona_interpretations:
-                persona_concerns.extend(interpretation.get('potential_misreading', []))
+            return {
+                'claim': claim_text,
+                'risk_level': risk_claim['risk_level'],
+                'risk_score': risk_claim['combined_risk_score'],
+                'countermeasures': claim_countermeasures,
+                'top_countermeasure': claim_countermeasures[0] if claim_countermeasures else None,
+                'degraded': degraded
+            }
             
-            # Remove duplicates
-            persona_concerns = list(set(persona_concerns))
+        except DeadlineExceededError:
+            return None
+        except Exception as e:
+            if opts['detailed_logging']:
+                print(f"[Pipeline] Countermeasure generation error for '{claim_text[:50]}...': {str(e)}")
             
-            try:
-                claim_countermeasures = await self.countermeasure_generator.generate_countermeasures(
-                    claim_text, persona_concerns, evidence
-                )
-                
-                countermeasures.append({
-                    'claim': claim_text,
-                    'risk_level': risk_claim['risk_level'],
-                    'risk_score': risk_claim['combined_risk_score'],
-                    'countermeasures': claim_countermeasures,
-                    'top_countermeasure': claim_countermeasures[0] if claim_countermeasures else None
-                })
-                
-            except Exception as e:
-                if opts['detailed_logging']:
-                    print(f"[Pipeline] Countermeasure generation error for '{claim_text[:50]}...': {str(e)}")
-                
-                countermeasures.append({
-                    'claim': claim_text,
-                    'risk_level': risk_claim['risk_level'],
-                    'risk_score': risk_claim['combined_risk_score'],
-                    'countermeasures': [],
-                    'error_message': str(e)
-                })
-        
-        return countermeasures
+            return {
+                'claim': claim_text,
+                'risk_level': risk_claim['risk_level'],
+                'risk_score': risk_claim['combined_risk_score'],
+                'countermeasures': [],
+                'error_message': str(e)
+            }
     
     def _compile_risk_report(self, pipeline_result: Dict[str, Any]) -> Dict[str, Any]:
         """Compile comprehensive risk report from all pipeline results"""
@@ -423,6 +615,13 @@ class PrebunkerPipeline:
             summary += f"📚 Evidence: {stats.get('evidence_coverage', 0)} claims validated\n"
             summary += f"🛡️ Countermeasures: {stats.get('countermeasures_generated', 0)} generated\n"
             summary += f"⏱️ Processed in {processing_time:.2f} seconds"
+            timings = pipeline_result.get('stage_timings', {})
+            if timings.get('critical_path'):
+                summary += f"\n🧭 Critical path: {' → '.join(timings['critical_path'])} ({timings['critical_path_seconds']:.2f}s)"
+            if pipeline_result.get('degraded'):
+                summary += f"\n⚠️ Degraded mode (LLM unavailable): {', '.join(pipeline_result.get('degraded_stages', []))}"
+            if pipeline_result.get('partial'):
+                summary += f"\n⏳ Latency budget exhausted, dropped: {', '.join(pipeline_result.get('dropped_stages', []))}"
             
             return summary
         
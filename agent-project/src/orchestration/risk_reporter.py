@@ -2,6 +2,8 @@
 
 from typing import Dict, List, Any
 from src.agent import Agent, model
+from src.deadline import within_deadline
+from src.error_handler import DeadlineExceededError
 
 class RiskReporter:
     """Generates comprehensive risk reports with actionable recommendations"""
@@ -133,8 +135,12 @@ Provide specific, implementable recommendations.""",
         """
         
         try:
-            enhanced_analysis = await self.report_agent.run(analysis_prompt)
+            async with within_deadline():
+                enhanced_analysis = await self.report_agent.run(analysis_prompt)
             return enhanced_analysis
+        except DeadlineExceededError:
+            # Out of budget: propagates so the caller's run_stage records the report as dropped
+            raise
         except Exception as e:
             return f"Enhanced analysis unavailable: {str(e)}"
     
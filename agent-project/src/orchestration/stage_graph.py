@@ -0,0 +1,138 @@
+"""Declarative stage graph: each stage starts as soon as the stages it depends on have finished"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+# A stage receives the results of its dependencies, keyed by stage name
+StageFunction = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    name: str
+    run: StageFunction
+    depends_on: Tuple[str, ...] = ()
+
+
+class StageGraph:
+    """Runs stages as a dependency graph, recording when each became ready, started and finished
+
+    Dependencies must be added before the stages that use them, so the graph is
+    acyclic by construction. Stages may add further stages while the graph runs
+    (e.g. one node per extracted claim). With concurrent=False stages run one at
+    a time in the order they were added.
+    """
+
+    def __init__(self, concurrent: bool = True):
+        self.concurrent = concurrent
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._running = False
+        self._cancelled = False
+        self._start = None
+        self._end = None
+
+    def add(self, name: str, run: StageFunction, depends_on: List[str] = ()) -> 'StageGraph':
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} already exists")
+        missing = [dependency for dependency in depends_on if dependency not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name!r} depends on unknown stages: {missing}")
+        if self._cancelled:
+            return self
+        self.stages[name] = Stage(name, run, tuple(depends_on))
+        if self._running and self.concurrent:
+            self._schedule(name)
+        return self
+
+    def cancel(self):
+        """Stop every stage that has not finished, except the one calling cancel()"""
+        self._cancelled = True
+        current = asyncio.current_task()
+        for task in self._tasks.values():
+            if task is not current and not task.done():
+                task.cancel()
+
+    def _schedule(self, name: str):
+        self._tasks[name] = asyncio.get_running_loop().create_task(self._execute(name))
+
+    async def _execute(self, name: str):
+        stage = self.stages[name]
+        if self.concurrent:
+            for dependency in stage.depends_on:
+                await self._tasks[dependency]
+        ready = time.perf_counter()
+        result = await stage.run({dependency: self.results[dependency] for dependency in stage.depends_on})
+        end = time.perf_counter()
+        self.results[name] = result
+        self.timings[name] = {
+            'ready': ready - self._start,  # when its last input arrived
+            'end': end - self._start,
+            'duration': end - ready,
+            'depends_on': list(stage.depends_on)
+        }
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage (including ones added along the way); the first stage error cancels the rest and is raised"""
+        self._start = time.perf_counter()
+        self._running = True
+        try:
+            if self.concurrent:
+                for name in list(self.stages):
+                    self._schedule(name)
+                await self._wait_all()
+            else:
+                index = 0
+                while index < len(self.stages) and not self._cancelled:
+                    await self._execute(list(self.stages)[index])
+                    index += 1
+        finally:
+            self._running = False
+            self._end = time.perf_counter()
+        return self.results
+
+    async def _wait_all(self):
+        while True:
+            pending = [task for task in self._tasks.values() if not task.done()]
+            if not pending:
+                return
+            try:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            except asyncio.CancelledError:
+                self.cancel()
+                raise
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    self.cancel()
+                    # Let the cancelled stages unwind before reporting the failure
+                    await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+                    raise task.exception()
+
+    def critical_path(self) -> List[str]:
+        """Chain of stages that determined the total time: from the last stage to finish, back through its latest input"""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda stage: self.timings[stage]['end'])
+        path = [name]
+        while True:
+            inputs = [dependency for dependency in self.timings[name]['depends_on'] if dependency in self.timings]
+            if not inputs:
+                break
+            name = max(inputs, key=lambda stage: self.timings[stage]['end'])
+            path.append(name)
+        return path[::-1]
+
+    def get_timings(self) -> Dict[str, Any]:
+        """Per-stage ready/end times (seconds from graph start) and the critical path"""
+        path = self.critical_path()
+        return {
+            'total_seconds': (self._end - self._start) if self._start is not None and self._end is not None else 0.0,
+            'critical_path': path,
+            'critical_path_seconds': self.timings[path[-1]]['end'] if path else 0.0,
+            'stages': {name: dict(timing) for name, timing in self.timings.items()}
+        }
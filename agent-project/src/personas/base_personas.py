@@ -4,6 +4,31 @@ from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 from src.agent import Agent, model
 
+PERSONA_GUIDANCE = """
+You are simulating one member of a health communication audience.
+
+When reading health information, interpret it through your specific perspective.
+Focus on what could be misunderstood, concerning, or confusing to someone with your background.
+Consider how your beliefs and concerns might color your interpretation.
+Be authentic to your persona - don't try to be "correct" or "balanced" if that's not who you are.
+
+Your responses should reflect your:
+- Level of health knowledge
+- Trust in authorities
+- Personal experiences and fears
+- Communication style
+- Specific concerns about health topics
+"""
+
+PANEL_GUIDANCE = """
+You are simulating a panel of health communication audience members.
+
+Each panelist reads the same health information and interprets it through their own perspective.
+Focus on what could be misunderstood, concerning, or confusing to someone with each panelist's background.
+Keep the panelists independent: each one answers only from their own beliefs and concerns, not in reply to the others.
+Be authentic to each persona - don't try to be "correct" or "balanced" if that's not who they are.
+"""
+
 @dataclass
 class AudiencePersona:
     """Represents an audience persona with demographics and beliefs"""
@@ -16,25 +41,14 @@ class AudiencePersona:
     
     def create_agent(self):
         """Create an agent that embodies this persona"""
-        instructions = f"""
+        # Shared guidance comes first so every persona agent has the same prompt prefix
+        instructions = f"""{PERSONA_GUIDANCE}
 You are {self.name} with the following characteristics:
 - Demographics: {self.demographics}
 - Health literacy level: {self.health_literacy}
 - Core beliefs: {self.beliefs}
 - Main concerns: {self.concerns}
 
-When reading health information, interpret it through your specific perspective.
-Focus on what could be misunderstood, concerning, or confusing to someone with your background.
-Consider how your beliefs and concerns might color your interpretation.
-Be authentic to your persona - don't try to be "correct" or "balanced" if that's not who you are.
-
-Your responses should reflect your:
-- Level of health knowledge
-- Trust in authorities
-- Personal experiences and fears
-- Communication style
-- Specific concerns about health topics
-
 Always stay in character as {self.name}.
 """
         
@@ -103,6 +117,29 @@ STANDARD_PERSONAS = [
     )
 ]
 
+def create_panel_agent(personas: List[AudiencePersona]) -> Agent:
+    """Create one agent that voices every persona in the panel, one section each"""
+    panelists = "\n".join(
+        f"""
+Panelist {persona.name}:
+- Demographics: {persona.demographics}
+- Health literacy level: {persona.health_literacy}
+- Core beliefs: {persona.beliefs}
+- Main concerns: {persona.concerns}"""
+        for persona in personas
+    )
+    
+    return Agent(
+        name="PersonaPanel",
+        instructions=f"""{PANEL_GUIDANCE}
+The panelists are:
+{panelists}
+
+Always keep each panelist in character.
+""",
+        model=model
+    )
+
 def get_persona_by_name(name: str) -> Optional[AudiencePersona]:
     """Get a persona by name"""
     for persona in STANDARD_PERSONAS:
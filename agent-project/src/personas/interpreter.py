@@ -1,16 +1,24 @@
 """Persona interpretation engine for analyzing health communications"""
 
 import asyncio
+import os
 import re
 from typing import List, Dict, Any, Optional
-from src.personas.base_personas import AudiencePersona, STANDARD_PERSONAS
+from src.personas.base_personas import AudiencePersona, STANDARD_PERSONAS, create_panel_agent
 from src.personas.health_specific import get_all_personas, get_personas_by_topic
 from src.health_kb.medical_terms import is_medical_term
+from src.error_handler import logger, CircuitOpenError, DeadlineExceededError
+
+PERSONA_MODES = ('individual', 'panel')
+
+# Panel responses have one "### PersonaName" section per persona
+PANEL_HEADING_PATTERN = re.compile(r'^[ \t]*#{1,4}[ \t]*\**[ \t]*([A-Za-z][\w ]*?)[ \t]*\**[ \t]*:?[ \t]*$', re.MULTILINE)
 
 class PersonaInterpreter:
     """Orchestrates multiple personas to interpret health communications"""
     
-    def __init__(self, personas: List[AudiencePersona] = None, topic_based: bool = False, health_topic: str = None):
+    def __init__(self, personas: List[AudiencePersona] = None, topic_based: bool = False, health_topic: str = None,
+                 mode: Optional[str] = None):
         if topic_based and health_topic:
             self.personas = get_personas_by_topic(health_topic)
         elif personas is None:
@@ -23,57 +31,129 @@ class PersonaInterpreter:
             'risky', 'harmful', 'misleading', 'false', 'wrong'
         ]
         
+        # 'individual': one LLM call per persona; 'panel': one call for every persona
+        self.mode = mode or os.getenv('PREBUNKER_PERSONA_MODE', 'individual')
+        self._panel_agent = None
+        
         # Ensure all personas have agents created
         for persona in self.personas:
             if not persona.interpretation_agent:
                 persona.create_agent()
     
-    async def interpret_message(self, message_text: str) -> List[Dict[str, Any]]:
-        """Have all personas interpret a health message"""
+    async def interpret_message(self, message_text: str, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Have all personas interpret a health message
+        
+        mode overrides the interpreter's mode for this request: 'individual' asks each
+        persona separately, 'panel' asks for every persona's reaction in one response.
+        """
+        mode = mode or self.mode
+        if mode not in PERSONA_MODES:
+            raise ValueError(f"Unknown persona mode: {mode} (expected one of {PERSONA_MODES})")
         
         # Skip non-medical content to save LLM calls
         if not is_medical_term(message_text):
             return []
         
-        interpretations = []
-        
-        # Use asyncio.gather for parallel execution
-        async def get_persona_interpretation(persona):
-            try:
-                response = await persona.interpret_message(message_text)
-                concerns = self.extract_concerns(response)
-                misreadings = self.extract_misreadings(response)
-                emotional_reactions = self.extract_emotional_reactions(response)
-                
-                return {
-                    'persona': persona.name,
-                    'demographics': persona.demographics,
-                    'health_literacy': persona.health_literacy,
-                    'interpretation': response,
-                    'potential_misreading': concerns + misreadings,
-                    'emotional_reaction': emotional_reactions,
-                    'concern_level': self.assess_concern_level(response),
-                    'key_issues': self.extract_key_issues(response)
-                }
-            except Exception as e:
-                # Return error info but don't fail the whole operation
-                return {
-                    'persona': persona.name,
-                    'demographics': persona.demographics,
-                    'health_literacy': persona.health_literacy,
-                    'interpretation': f"Error in interpretation: {str(e)}",
-                    'potential_misreading': ['interpretation_error'],
-                    'emotional_reaction': ['error'],
-                    'concern_level': 'unknown',
-                    'key_issues': ['failed_to_process']
-                }
+        if mode == 'panel' and len(self.personas) > 1:
+            return await self._interpret_as_panel(message_text)
         
         # Execute all persona interpretations in parallel
-        interpretation_tasks = [get_persona_interpretation(persona) for persona in self.personas]
+        interpretation_tasks = [self._interpret_individually(persona, message_text) for persona in self.personas]
         interpretations = await asyncio.gather(*interpretation_tasks)
         
         return interpretations
     
+    async def _interpret_individually(self, persona: AudiencePersona, message_text: str) -> Dict[str, Any]:
+        """One persona, one LLM call"""
+        try:
+            response = await persona.interpret_message(message_text)
+            return self._build_interpretation(persona, response)
+        except (CircuitOpenError, DeadlineExceededError):
+            # The whole stage degrades or is dropped, not just this persona
+            raise
+        except Exception as e:
+            # Return error info but don't fail the whole operation
+            return {
+                'persona': persona.name,
+                'demographics': persona.demographics,
+                'health_literacy': persona.health_literacy,
+                'interpretation': f"Error in interpretation: {str(e)}",
+                'potential_misreading': ['interpretation_error'],
+                'emotional_reaction': ['error'],
+                'concern_level': 'unknown',
+                'key_issues': ['failed_to_process']
+            }
+    
+    async def _interpret_as_panel(self, message_text: str) -> List[Dict[str, Any]]:
+        """Every persona in one LLM call; personas whose section is missing are asked individually"""
+        if self._panel_agent is None:
+            self._panel_agent = create_panel_agent(self.personas)
+        
+        names = "\n".join(f"### {persona.name}" for persona in self.personas)
+        prompt = f"""
+Read this health message and respond as each panelist:
+
+"{message_text}"
+
+For each panelist: how would they interpret this message? What would they think, feel, or be concerned about?
+What questions would they have? What might they misunderstand or find unclear?
+Write one section per panelist, in the first person, each starting with its heading line, in this order:
+{names}
+"""
+        try:
+            sections = self._parse_panel_sections(await self._panel_agent.run(prompt))
+        except (CircuitOpenError, DeadlineExceededError):
+            raise
+        except Exception as e:
+            logger.warning(f"Persona panel failed, asking {len(self.personas)} personas individually: {str(e)}")
+            sections = {}
+        
+        interpretations = [
+            self._build_interpretation(persona, sections[persona.name]) if persona.name in sections else None
+            for persona in self.personas
+        ]
+        missing = [index for index, interpretation in enumerate(interpretations) if interpretation is None]
+        fallbacks = await asyncio.gather(*[
+            self._interpret_individually(self.personas[index], message_text) for index in missing
+        ])
+        for index, interpretation in zip(missing, fallbacks):
+            interpretations[index] = interpretation
+        return interpretations
+    
+    def _parse_panel_sections(self, response: str) -> Dict[str, str]:
+        """Non-empty section text by persona name; headings are matched ignoring case and spacing"""
+        by_key = {re.sub(r'[^a-z0-9]', '', persona.name.lower()): persona.name for persona in self.personas}
+        response = response or ""
+        # Only headings naming a panelist start a section, so a panelist's own sub-headings stay in their text
+        headings = [
+            (match, by_key[key]) for match in PANEL_HEADING_PATTERN.finditer(response)
+            if (key := re.sub(r'[^a-z0-9]', '', match.group(1).lower())) in by_key
+        ]
+        sections = {}
+        for position, (match, name) in enumerate(headings):
+            end = headings[position + 1][0].start() if position + 1 < len(headings) else len(response)
+            section = response[match.end():end].strip()
+            if section and name not in sections:
+                sections[name] = section
+        return sections
+    
+    def _build_interpretation(self, persona: AudiencePersona, response: str) -> Dict[str, Any]:
+        """Post-process one persona's reaction, whichever mode produced it"""
+        concerns = self.extract_concerns(response)
+        misreadings = self.extract_misreadings(response)
+        emotional_reactions = self.extract_emotional_reactions(response)
+        
+        return {
+            'persona': persona.name,
+            'demographics': persona.demographics,
+            'health_literacy': persona.health_literacy,
+            'interpretation': response,
+            'potential_misreading': concerns + misreadings,
+            'emotional_reaction': emotional_reactions,
+            'concern_level': self.assess_concern_level(response),
+            'key_issues': self.extract_key_issues(response)
+        }
+    
     def extract_concerns(self, interpretation_text: str) -> List[str]:
         """Extract specific concerns or worries from interpretation"""
         concerns = []
@@ -97,7 +177,7 @@ class PersonaInterpreter:
                 if len(match.strip()) > 3:  # Avoid very short matches
                     concerns.append(f"concern_about_{match.strip()[:30]}")
         
-        return list(set(concerns))  # Remove duplicates
+        return list(dict.fromkeys(concerns))  # Remove duplicates, keeping a stable order
     
     def extract_misreadings(self, interpretation_text: str) -> List[str]:
         """Extract potential misreadings or misunderstandings"""
@@ -199,7 +279,7 @@ class PersonaInterpreter:
             if topic in text_lower:
                 issues.append(topic.replace(' ', '_'))
         
-        return list(set(issues))
+        return list(dict.fromkeys(issues))
     
     def analyze_interpretation_patterns(self, interpretations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze patterns across all persona interpretations"""
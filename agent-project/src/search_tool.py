@@ -1,7 +1,7 @@
 from src.tools import function_tool
 from duckduckgo_search import DDGS
 
-@function_tool
+@function_tool(timeout=15.0, max_concurrency=4, cache_ttl=300)
 def get_news_articles(topic: str) -> str:
     """Search for news articles on given topic"""
     try:
@@ -1,11 +1,51 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
 import inspect
 import json
-from typing import Dict, Any, Callable
+import os
+import re
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+from src.deadline import time_remaining
+from src.error_handler import DeadlineExceededError
+from src.llm.cache import TieredCache
+from src.tracing import tracer
 
 registered_tools = {}
+_registry_version = 0
+_schemas_prompt_cache = {"version": -1, "prompt": ""}
+
+# Sync tools run here instead of on the event loop; bounded so a burst of searches cannot spawn unbounded threads
+_tool_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('PREBUNKER_TOOL_WORKERS', '8')),
+    thread_name_prefix='prebunker-tool'
+)
+# asyncio semaphores bind to one loop, so per-tool caps are kept per event loop
+_loop_semaphores = weakref.WeakKeyDictionary()
+# Tools report failures as text ("Search error: ..."); such results are never cached
+ERROR_RESULT_PATTERN = re.compile(r'^\w+(?: \w+)? error: ', re.IGNORECASE)
+
+def function_tool(func: Callable = None, *, mode: Optional[str] = None, max_concurrency: Optional[int] = None,
+                  timeout: Optional[float] = None, cache_ttl: Optional[float] = None) -> Callable:
+    """Decorator to register function as tool
+
+    Usable bare (@function_tool) or with options (@function_tool(timeout=10, cache_ttl=300)).
+    mode is "sync" or "async" (detected from the function if omitted).
+    """
+    if func is None:
+        return functools.partial(function_tool, mode=mode, max_concurrency=max_concurrency,
+                                 timeout=timeout, cache_ttl=cache_ttl)
+
+    if mode is None:
+        mode = "async" if inspect.iscoroutinefunction(func) else "sync"
+    if mode not in ("sync", "async"):
+        raise ValueError(f"Tool mode must be 'sync' or 'async', got {mode!r}")
 
-def function_tool(func: Callable) -> Callable:
-    """Decorator to register function as tool"""
     sig = inspect.signature(func)
     schema = {
         "name": func.__name__,
@@ -16,23 +56,155 @@ def function_tool(func: Callable) -> Callable:
             "required": list(sig.parameters.keys())
         }
     }
-    
+
     for param_name, param in sig.parameters.items():
         schema["parameters"]["properties"][param_name] = {
             "type": "string",  # Simplified for now
             "description": f"Parameter {param_name}"
         }
-    
+
+    global _registry_version
     registered_tools[func.__name__] = {
         "function": func,
-        "schema": schema
+        "schema": schema,
+        "mode": mode,
+        "max_concurrency": max_concurrency,
+        "timeout": timeout,
+        "cache": TieredCache(max_memory_entries=256, ttl_seconds=cache_ttl) if cache_ttl else None,
+        "stats": {"calls": 0, "errors": 0, "timeouts": 0, "cache_hits": 0}
     }
+    _registry_version += 1
     return func
 
 def get_tool_schemas():
     return [tool["schema"] for tool in registered_tools.values()]
 
+def get_registry_version():
+    """Incremented whenever a tool is registered"""
+    return _registry_version
+
+def get_tool_schemas_prompt():
+    """Serialized tool schemas, rebuilt only when the registry changes so the text stays byte-stable"""
+    if _schemas_prompt_cache["version"] != _registry_version:
+        schemas = sorted(get_tool_schemas(), key=lambda schema: schema["name"])
+        _schemas_prompt_cache["prompt"] = (
+            "Available tools: " + json.dumps(schemas, indent=2, sort_keys=True) if schemas else ""
+        )
+        _schemas_prompt_cache["version"] = _registry_version
+    return _schemas_prompt_cache["prompt"]
+
 def execute_tool(name: str, args: Dict[str, Any]):
-    if name in registered_tools:
-        return registered_tools[name]["function"](**args)
-    raise ValueError(f"Tool {name} not found")
+    """Run a tool from synchronous code; async tools go through execute_tool_async on their own event loop
+
+    Called from inside a running event loop (which asyncio.run cannot re-enter), the async tool
+    runs on a separate thread with the caller's context, so its deadline still applies.
+    """
+    if name not in registered_tools:
+        raise ValueError(f"Tool {name} not found")
+    tool = registered_tools[name]
+    if tool["mode"] == "sync":
+        return tool["function"](**args)
+
+    run = functools.partial(contextvars.copy_context().run, lambda: asyncio.run(execute_tool_async(name, args)))
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return run()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='prebunker-tool-loop') as executor:
+        return executor.submit(run).result()
+
+def _args_key(args: Dict[str, Any]) -> str:
+    canonical = json.dumps(args, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def is_error_result(result: Any) -> bool:
+    """Whether a tool result is an error reported as text"""
+    return isinstance(result, str) and ERROR_RESULT_PATTERN.match(result) is not None
+
+def _release_from_thread(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore):
+    """Release a loop's semaphore from a tool thread (nothing to release once the loop has closed)"""
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        pass
+
+def _tool_semaphore(name: str, limit: int) -> asyncio.Semaphore:
+    semaphores = _loop_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if name not in semaphores:
+        semaphores[name] = asyncio.Semaphore(limit)
+    return semaphores[name]
+
+async def execute_tool_async(name: str, args: Dict[str, Any], default_timeout: Optional[float] = None):
+    """Run a tool without blocking the event loop, honouring its concurrency cap, timeout and result cache"""
+    if name not in registered_tools:
+        raise ValueError(f"Tool {name} not found")
+
+    tool = registered_tools[name]
+    stats = tool["stats"]
+    cache = tool["cache"]
+    key = _args_key(args) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            stats["cache_hits"] += 1
+            return cached
+
+    tool_timeout = tool["timeout"] if tool["timeout"] is not None else default_timeout
+    timeout = tool_timeout
+    remaining = time_remaining()
+    if remaining is not None:
+        # Never outlive the request's latency budget
+        if remaining <= 0:
+            raise DeadlineExceededError(f"No latency budget left for tool {name}")
+        timeout = min(timeout, remaining) if timeout else remaining
+    semaphore = _tool_semaphore(name, tool["max_concurrency"]) if tool["max_concurrency"] else None
+
+    if semaphore is not None:
+        await semaphore.acquire()
+    release_on_exit = semaphore
+    start = time.perf_counter()
+    stats["calls"] += 1
+    try:
+        if tool["mode"] == "async":
+            call = tool["function"](**args)
+        else:
+            future = _tool_executor.submit(functools.partial(tool["function"], **args))
+            if semaphore is not None:
+                # A timed-out thread keeps running, so its slot is freed only when the thread finishes
+                loop = asyncio.get_running_loop()
+                future.add_done_callback(lambda _: _release_from_thread(loop, semaphore))
+                release_on_exit = None
+            call = asyncio.wrap_future(future)
+        result = await asyncio.wait_for(call, timeout) if timeout else await call
+    except asyncio.TimeoutError as e:
+        if timeout != tool_timeout:
+            # Cut short by the request's latency budget, not the tool's own timeout
+            raise DeadlineExceededError(f"Latency budget exhausted while running tool {name}") from e
+        stats["timeouts"] += 1
+        raise
+    except Exception:
+        stats["errors"] += 1
+        raise
+    finally:
+        if release_on_exit is not None:
+            release_on_exit.release()
+        tracer.record_latency(f"tool:{name}", time.perf_counter() - start)
+
+    if is_error_result(result):
+        # Failures (e.g. a search outage) are retried by the next call instead of served for cache_ttl
+        stats["errors"] += 1
+    elif cache is not None:
+        cache.set(key, result, cost=time.perf_counter() - start)
+    return result
+
+def get_tool_stats() -> Dict[str, Any]:
+    """Per-tool call counts, cache hits and latency histograms"""
+    histograms = tracer.get_histograms()
+    return {
+        name: {
+            **tool["stats"],
+            "mode": tool["mode"],
+            "latency": histograms.get(f"tool:{name}")
+        }
+        for name, tool in registered_tools.items()
+    }
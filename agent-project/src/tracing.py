@@ -2,9 +2,14 @@ import time
 import json
 from datetime import datetime
 
+# Upper bounds (seconds) of latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
 class Tracer:
     def __init__(self):
         self.traces = []
+        self.counters = {}
+        self.histograms = {}
     
     def start_trace(self, agent_name, operation):
         trace_id = f"{agent_name}_{int(time.time())}"
@@ -33,6 +38,43 @@ class Tracer:
                 trace["end_time"] = datetime.now().isoformat()
                 trace["result"] = result
     
+    def increment_counter(self, name, amount=1):
+        """Increment a process-wide counter (e.g. coalesced LLM calls)"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def get_counters(self):
+        return dict(self.counters)
+    
+    def record_latency(self, name, seconds):
+        """Add an observation to a named latency histogram (e.g. per-tool execution time)"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+            self.histograms[name] = histogram
+        
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        histogram["max"] = max(histogram["max"], seconds)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][index] += 1
+                break
+        else:
+            histogram["buckets"][-1] += 1
+    
+    def get_histograms(self):
+        """Histograms keyed by name, with bucket labels and the mean"""
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return {
+            name: {
+                "count": h["count"],
+                "mean": h["sum"] / h["count"] if h["count"] else 0.0,
+                "max": h["max"],
+                "buckets": dict(zip(labels, h["buckets"]))
+            }
+            for name, h in self.histograms.items()
+        }
+    
     def get_traces(self):
         return self.traces
     
@@ -42,6 +84,8 @@ class Tracer:
             "total_traces": len(self.traces),
             "agents": list(set(trace["agent"] for trace in self.traces)),
             "recent_traces": self.traces[-5:] if self.traces else [],
+            "counters": self.get_counters(),
+            "histograms": self.get_histograms(),
             "trace_summary": []
         }
         
@@ -2,6 +2,7 @@
 
 import os
 import time
+from typing import Optional
 from fastapi import FastAPI, Form, Request, HTTPException
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
@@ -14,12 +15,16 @@ if not os.getenv("OPENAI_API_KEY"):
 
 from src.orchestration.pipeline import PrebunkerPipeline
 from src.orchestration.risk_reporter import RiskReporter
+from src.orchestration.analysis_cache import AnalysisCache
+from src.llm.ledger import llm_ledger
+from src.deadline import deadline_scope, run_stage
+from src.personas.interpreter import PERSONA_MODES
 
 app = FastAPI(title="PRE-BUNKER Health Communications", version="1.11.0")
 templates = Jinja2Templates(directory="templates")
 
 # Global instances
-pipeline = PrebunkerPipeline()
+pipeline = PrebunkerPipeline(analysis_cache=AnalysisCache.from_env(table='pipeline_analyses'))
 risk_reporter = RiskReporter()
 
 @app.get("/", response_class=HTMLResponse)
@@ -63,20 +68,37 @@ async def analyze_message(request: Request, message: str = Form(...)):
         })
 
 @app.get("/api/analyze")
-async def api_analyze(message: str):
-    """API endpoint for programmatic access"""
+async def api_analyze(message: str, budget_seconds: Optional[float] = None, persona_mode: Optional[str] = None,
+                      incremental: bool = False):
+    """API endpoint for programmatic access; budget_seconds bounds the pipeline's latency
+
+    persona_mode ('individual' or 'panel') chooses one LLM call per persona or one for the whole panel.
+    incremental reuses per-claim results for sentences unchanged since an earlier draft.
+    """
     
     if not message.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty")
+    if persona_mode is not None and persona_mode not in PERSONA_MODES:
+        raise HTTPException(status_code=400, detail=f"persona_mode must be one of {list(PERSONA_MODES)}")
     
     try:
         start_time = time.time()
         
         # Process message through pipeline
-        pipeline_result = await pipeline.process_message(message, {'detailed_logging': False})
-        
-        # Generate enhanced risk report
-        risk_report = await risk_reporter.compile_risk_report(pipeline_result)
+        # One budget covers the pipeline and the LLM-enhanced report
+        with deadline_scope(budget_seconds):
+            pipeline_result = await pipeline.process_message(message, {
+                'detailed_logging': False, 'persona_mode': persona_mode, 'incremental': incremental,
+                'budget_seconds': budget_seconds
+            })
+            
+            # Generate enhanced risk report; dropped like any pipeline stage when the budget runs out
+            risk_report = await run_stage(
+                'risk_report', lambda: risk_reporter.compile_risk_report(pipeline_result), {},
+                pipeline_result['dropped_stages'], pipeline_result['degraded_stages']
+            )
+            pipeline_result['partial'] = bool(pipeline_result['dropped_stages'])
+            pipeline_result['degraded'] = bool(pipeline_result['degraded_stages'])
         
         processing_time = time.time() - start_time
         
@@ -85,12 +107,18 @@ async def api_analyze(message: str):
             "processing_time": round(processing_time, 2),
             "pipeline_result": pipeline_result,
             "risk_report": risk_report,
+            "partial": pipeline_result['partial'],
             "status": "success"
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@app.get("/api/llm/ledger")
+async def api_llm_ledger(recent: int = 20):
+    """Process-wide LLM calls, tokens, latency and cost by agent and pipeline stage"""
+    return llm_ledger.get_stats(recent=recent)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
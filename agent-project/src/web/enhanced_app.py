@@ -9,6 +9,8 @@ import uuid
 
 from src.integration.complete_pipeline import complete_prebunker_system
 from src.web.ops_routes import setup_ops_routes
+from src.llm.ledger import llm_ledger
+from src.personas.interpreter import PERSONA_MODES
 
 # Create FastAPI app
 app = FastAPI(
@@ -43,6 +45,7 @@ class AnalysisResponse(BaseModel):
     countermeasures_generated: int
     processing_time: float
     recommendations: list
+    dropped_stages: list = []
 
 # Setup operations routes
 setup_ops_routes(app)
@@ -95,15 +98,29 @@ async def analyze_message_api(
     message: str,
     include_ab_testing: bool = False,
     submit_for_review: bool = False,
-    priority: str = "medium"
+    priority: str = "medium",
+    budget_seconds: Optional[float] = None,
+    persona_mode: Optional[str] = None
 ):
-    """Enhanced API endpoint for message analysis"""
+    """Enhanced API endpoint for message analysis
+
+    budget_seconds bounds the analysis latency; stages that cannot finish in time are listed in dropped_stages.
+    persona_mode ('individual' or 'panel') chooses one LLM call per persona or one for the whole panel.
+    """
+    if persona_mode is not None and persona_mode not in PERSONA_MODES:
+        raise HTTPException(status_code=400, detail=f"persona_mode must be one of {list(PERSONA_MODES)}")
+    
     try:
+        options = {
+            key: value for key, value in (('budget_seconds', budget_seconds), ('persona_mode', persona_mode))
+            if value is not None
+        } or None
+        
         # Choose analysis method
         if include_ab_testing:
-            result = await complete_prebunker_system.analyze_with_ab_testing(message)
+            result = await complete_prebunker_system.analyze_with_ab_testing(message, options)
         else:
-            result = await complete_prebunker_system.analyze_health_communication(message)
+            result = await complete_prebunker_system.analyze_health_communication(message, options)
         
         if result.get('status') == 'error':
             raise HTTPException(status_code=500, detail=result.get('error', 'Analysis failed'))
@@ -122,7 +139,8 @@ async def analyze_message_api(
             persona_concerns=sum(len(p.get('potential_misreading', [])) for p in result['persona_interpretations']),
             countermeasures_generated=len(result['countermeasures']),
             processing_time=result['processing_time'],
-            recommendations=result['evaluation_metrics'].get('recommendations', [])
+            recommendations=result['evaluation_metrics'].get('recommendations', []),
+            dropped_stages=result.get('dropped_stages', [])
         )
         
         return response
@@ -136,6 +154,11 @@ async def get_system_status():
     status = complete_prebunker_system.get_system_status()
     return JSONResponse(status)
 
+@app.get("/api/llm/ledger")
+async def get_llm_ledger(recent: int = 20):
+    """Process-wide LLM calls, tokens, latency and cost by agent and pipeline stage"""
+    return JSONResponse(llm_ledger.get_stats(recent=recent))
+
 @app.get("/api/capabilities")
 async def get_system_capabilities():
     """Get system capabilities overview"""
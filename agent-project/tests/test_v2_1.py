@@ -0,0 +1,171 @@
+"""Test v2.1: Persistent LLM Response Cache"""
+
+import asyncio
+import os
+import time
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import OpenAIChatCompletionsModel
+from src.llm.cache import TieredCache, LLMResponseCache, request_fingerprint
+
+# Configure logging for v2.1 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class CountingClient:
+    """Stand-in for AsyncOpenAI that counts completion requests"""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, **params):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        content = f"response #{self.calls} to {messages[-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def test_fingerprint_is_content_addressed():
+    """Test that the cache key covers model, messages and params"""
+    print("=== Testing Request Fingerprint ===")
+
+    messages = [{"role": "user", "content": "Vaccines are safe"}]
+    base = request_fingerprint("phi4-mini", messages, {"temperature": 0})
+
+    assert base == request_fingerprint("phi4-mini", [dict(m) for m in messages], {"temperature": 0})
+    assert base != request_fingerprint("other-model", messages, {"temperature": 0})
+    assert base != request_fingerprint("phi4-mini", messages, {"temperature": 0.7})
+    assert base != request_fingerprint("phi4-mini", [{"role": "user", "content": "Vaccines are unsafe"}], {"temperature": 0})
+    print("✅ Fingerprint distinguishes model, messages and params")
+
+def test_memory_lru_eviction():
+    """Test LRU ordering and eviction counters in the memory tier"""
+    print("=== Testing Memory LRU Tier ===")
+
+    cache = TieredCache(max_memory_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"  # a becomes most recent
+    cache.set("c", "C")  # evicts b
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+    stats = cache.get_stats()
+    assert stats['memory_evictions'] == 1
+    assert stats['hits'] == 3
+    assert stats['misses'] == 1
+    print(f"✅ LRU stats: {stats}")
+
+def test_ttl_expiration():
+    """Test entries expire after the TTL"""
+    print("=== Testing TTL Expiration ===")
+
+    cache = TieredCache(ttl_seconds=0.05)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.get_stats()['expirations'] == 1
+    print("✅ Expired entries are dropped")
+
+def test_disk_tier_persistence(tmp_path):
+    """Test that the SQLite tier survives a new cache instance and enforces its size limit"""
+    print("=== Testing Disk Tier ===")
+
+    path = str(tmp_path / "llm_cache.sqlite")
+    first = LLMResponseCache(disk_path=path, max_disk_entries=3)
+    for i in range(5):
+        first.set(f"key{i}", {"content": f"value{i}"}, cost=0.5)
+    first.prune()
+
+    second = LLMResponseCache(disk_path=path)
+    hit = second.get_entry("key4")
+    assert hit is not None and hit.tier == 'disk'
+    assert hit.value == {"content": "value4"}
+    assert second.get("key0") is None  # evicted by size limit
+
+    # Promoted into memory after the disk hit
+    assert second.get_entry("key4").tier == 'memory'
+    assert first.get_stats()['disk_evictions'] == 2
+    assert second.get_stats()['saved_seconds'] == 1.0
+    print(f"✅ Disk stats: {second.get_stats()}")
+
+def test_model_chat_uses_cache():
+    """Test OpenAIChatCompletionsModel serves repeated prompts from cache"""
+    print("=== Testing Model Integration ===")
+
+    client = CountingClient(delay=0.01)
+    cache = LLMResponseCache()
+    model = OpenAIChatCompletionsModel(model="phi4-mini", openai_client=client, cache=cache)
+    messages = [{"role": "user", "content": "Is RSV dangerous?"}]
+
+    async def run():
+        first = await model.chat(messages)
+        second = await model.chat(messages)
+        different_params = await model.chat(messages, temperature=0.2)
+        return first, second, different_params
+
+    first, second, different_params = asyncio.run(run())
+
+    assert first == second
+    assert different_params != first
+    assert client.calls == 2
+
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['saved_seconds'] > 0
+    logger.info(f"[CACHE] {stats}")
+    print(f"✅ Model cache stats: {stats}")
+
+def test_model_without_cache():
+    """Test the model still works with caching disabled"""
+    print("=== Testing Model Without Cache ===")
+
+    client = CountingClient()
+    model = OpenAIChatCompletionsModel(model="phi4-mini", openai_client=client)
+    messages = [{"role": "user", "content": "hello"}]
+
+    asyncio.run(model.chat(messages))
+    asyncio.run(model.chat(messages))
+    assert client.calls == 2
+    print("✅ Uncached model issues every request")
+
+def test_cache_is_opt_in():
+    """The shared response cache is only built when PREBUNKER_LLM_CACHE enables it"""
+    print("=== Testing Cache Opt-In ===")
+
+    saved = os.environ.pop("PREBUNKER_LLM_CACHE", None)
+    try:
+        assert LLMResponseCache.from_env() is None
+        os.environ["PREBUNKER_LLM_CACHE"] = "off"
+        assert LLMResponseCache.from_env() is None
+        os.environ["PREBUNKER_LLM_CACHE"] = "1"
+        assert isinstance(LLMResponseCache.from_env(), LLMResponseCache)
+    finally:
+        os.environ.pop("PREBUNKER_LLM_CACHE", None)
+        if saved is not None:
+            os.environ["PREBUNKER_LLM_CACHE"] = saved
+    print("✅ Cache disabled unless PREBUNKER_LLM_CACHE=1")
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("🧪 Running v2.1 LLM Response Cache Tests\n")
+    test_fingerprint_is_content_addressed()
+    test_memory_lru_eviction()
+    test_ttl_expiration()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_disk_tier_persistence(Path(tmp))
+    test_model_chat_uses_cache()
+    test_model_without_cache()
+    test_cache_is_opt_in()
+    print("\n✅ All v2.1 tests completed!")
@@ -0,0 +1,248 @@
+"""Test v2.10: LLM Circuit Breaker and Degraded Mode"""
+
+import asyncio
+import copy
+import os
+import logging
+import time
+from types import SimpleNamespace
+
+import httpx
+from openai import APIStatusError
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.error_handler import CircuitOpenError
+from src.deadline import run_stage
+from src.llm.circuit_breaker import CircuitBreaker
+from src.orchestration.pipeline import PrebunkerPipeline
+from src.personas.base_personas import STANDARD_PERSONAS
+
+# Configure logging for v2.10 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RISKY_MESSAGE = "The new COVID-19 vaccine is 100% safe and completely effective for everyone. It never causes side effects."
+
+class FlakyClient:
+    """Stand-in for AsyncOpenAI that fails or stalls on demand"""
+
+    def __init__(self, fail=True, delay=0.0):
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, **params):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("model server unavailable")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+def test_breaker_trips_and_recovers():
+    """Test closed -> open -> half-open -> closed transitions"""
+    print("=== Testing Breaker State Machine ===")
+
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    trip(breaker)
+    assert breaker.state == 'open'
+    try:
+        breaker.before_call()
+        assert False, "open breaker must reject"
+    except CircuitOpenError:
+        pass
+
+    time.sleep(0.06)
+    assert breaker.state == 'half_open'
+    breaker.before_call()  # the single probe
+    try:
+        breaker.before_call()
+        assert False, "only one probe while half-open"
+    except CircuitOpenError:
+        pass
+    breaker.record_success(0.01)
+    assert breaker.state == 'closed'
+    stats = breaker.get_stats()
+    assert stats['trips'] == 1 and stats['rejected'] == 2
+    print(f"✅ Breaker stats: {stats}")
+
+def test_failed_probe_reopens():
+    """Test that a failing half-open probe re-opens the circuit"""
+    print("=== Testing Failed Probe ===")
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    trip(breaker)
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert breaker.get_stats()['trips'] == 2
+    print("✅ Circuit re-opened after failed probe")
+
+def test_slow_calls_trip_breaker():
+    """Test the latency threshold counts slow calls as failures"""
+    print("=== Testing Latency Trip ===")
+
+    breaker = CircuitBreaker(failure_threshold=2, latency_threshold=0.01)
+    model = OpenAIChatCompletionsModel("phi4-mini", FlakyClient(fail=False, delay=0.03), breaker=breaker)
+
+    async def run():
+        for i in range(2):
+            await model.chat([{"role": "user", "content": f"slow {i}"}])
+
+    asyncio.run(run())
+    assert breaker.state == 'open'
+    assert breaker.get_stats()['slow_calls'] == 2
+    print("✅ Slow calls opened the circuit")
+
+def status_error(status):
+    response = httpx.Response(status, request=httpx.Request("POST", "http://localhost/v1/chat/completions"))
+    return APIStatusError(f"status {status}", response=response, body=None)
+
+def test_client_errors_do_not_trip():
+    """Test that bad requests (400/422) leave the circuit closed while 429/5xx and timeouts count"""
+    print("=== Testing Failure Classification ===")
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    async def call(error):
+        try:
+            async with breaker.guard():
+                raise error
+        except type(error):
+            pass
+
+    async def run():
+        for _ in range(5):
+            await call(status_error(400))
+            await call(status_error(422))
+            await call(ValueError("malformed prompt"))
+        assert breaker.state == 'closed' and breaker.get_stats()['failures'] == 0
+        await call(status_error(429))
+        await call(status_error(503))
+        assert breaker.state == 'open'
+
+        for error in (TimeoutError(), httpx.ConnectError("refused")):
+            other = CircuitBreaker(failure_threshold=1)
+            try:
+                async with other.guard():
+                    raise error
+            except type(error):
+                pass
+            assert other.state == 'open', error
+
+    asyncio.run(run())
+    assert breaker.get_stats()['client_errors'] == 15
+    print(f"✅ Breaker stats: {breaker.get_stats()}")
+
+def test_open_circuit_fails_fast():
+    """Test that agents stop waiting on a dead model once the circuit opens"""
+    print("=== Testing Fast Failure ===")
+
+    client = FlakyClient(fail=True)
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    agent = Agent("BreakerAgent", "Answer.", model=OpenAIChatCompletionsModel("phi4-mini", client, breaker=breaker))
+
+    async def run():
+        responses = []
+        for i in range(10):
+            try:
+                responses.append(await agent.run(f"question {i}"))
+            except CircuitOpenError as e:
+                responses.append(e)
+        return responses
+
+    responses = asyncio.run(run())
+    assert client.calls == 3
+    assert all(r.startswith("Agent error") for r in responses[:3])
+    # Rejections are raised, so callers can fall back instead of using error text
+    assert all(isinstance(r, CircuitOpenError) for r in responses[3:])
+    print(f"✅ {client.calls} model calls for 10 agent runs")
+
+def test_circuit_opening_mid_analysis_degrades():
+    """Test that LLM stages rejected by a circuit that opened mid-analysis fall back to degraded results"""
+    print("=== Testing Mid-Analysis Circuit Open ===")
+
+    open_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    trip(open_breaker)
+    dead_model = OpenAIChatCompletionsModel("phi4-mini", FlakyClient(fail=True), breaker=open_breaker)
+    personas = [copy.copy(persona) for persona in STANDARD_PERSONAS]
+    for persona in personas:
+        persona.interpretation_agent = Agent(persona.name, "Answer.", model=dead_model)
+    # The pipeline's own breaker is closed, so every stage still tries the model
+    pipeline = PrebunkerPipeline(personas=personas, circuit_breaker=CircuitBreaker())
+    pipeline.evidence_validator.validation_agent.model = dead_model
+    pipeline.countermeasure_generator.prebunk_agent.model = dead_model
+
+    result = asyncio.run(pipeline.process_message(RISKY_MESSAGE, {'detailed_logging': False}))
+    assert result['pipeline_status'] == 'completed_success'
+    assert result['degraded']
+    assert set(result['degraded_stages']) == {'persona_interpretations', 'evidence_validation', 'countermeasures'}
+    assert all(not v['validation_assessment'].startswith("Validation error") for v in result['evidence_validations'])
+    countermeasures = [cm for entry in result['countermeasures'] for cm in entry['countermeasures']]
+    assert countermeasures and all(cm['type'] == 'template_prebunk' for cm in countermeasures)
+
+    async def rejected():
+        raise CircuitOpenError("LLM circuit open")
+
+    dropped, degraded = [], []
+    assert asyncio.run(run_stage('risk_report', rejected, {}, dropped, degraded)) == {}
+    assert dropped == [] and degraded == ['risk_report']
+    print(f"✅ Degraded stages: {result['degraded_stages']}")
+
+def test_pipeline_degraded_mode():
+    """Test that the pipeline returns deterministic results immediately while the circuit is open"""
+    print("=== Testing Degraded Pipeline ===")
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    trip(breaker)
+    pipeline = PrebunkerPipeline(circuit_breaker=breaker)
+
+    start = time.perf_counter()
+    result = asyncio.run(pipeline.process_message(RISKY_MESSAGE, {'detailed_logging': False}))
+    elapsed = time.perf_counter() - start
+
+    assert result['pipeline_status'] == 'completed_success'
+    assert result['degraded']
+    assert set(result['degraded_stages']) == {'persona_interpretations', 'evidence_validation', 'countermeasures'}
+    assert result['claims'] and result['risk_analysis']['claim_risk_scores']
+    assert result['persona_interpretations'] == []
+
+    countermeasures = [cm for entry in result['countermeasures'] for cm in entry['countermeasures']]
+    assert countermeasures and all(cm['type'] == 'template_prebunk' for cm in countermeasures)
+    assert elapsed < 1.0
+    assert "Degraded mode" in pipeline.get_pipeline_summary(result)
+    print(f"✅ Degraded analysis in {elapsed:.3f}s with {len(countermeasures)} template prebunks")
+
+def test_pipeline_not_degraded_when_closed():
+    """Test the degraded flag stays off with a closed circuit and forced mode still works"""
+    print("=== Testing Degraded Flag ===")
+
+    pipeline = PrebunkerPipeline(circuit_breaker=CircuitBreaker())
+    result = asyncio.run(pipeline.process_message(
+        RISKY_MESSAGE, {'detailed_logging': False, 'degraded_mode': True}
+    ))
+    assert result['degraded']
+    assert pipeline.circuit_breaker.state == 'closed'
+    print("✅ degraded_mode option forces the deterministic path")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.10 Circuit Breaker Tests\n")
+    test_breaker_trips_and_recovers()
+    test_failed_probe_reopens()
+    test_slow_calls_trip_breaker()
+    test_client_errors_do_not_trip()
+    test_open_circuit_fails_fast()
+    test_circuit_opening_mid_analysis_degrades()
+    test_pipeline_degraded_mode()
+    test_pipeline_not_degraded_when_closed()
+    print("\n✅ All v2.10 tests completed!")
@@ -0,0 +1,193 @@
+"""Test v2.11: Offline Fake LLM Server"""
+
+import asyncio
+import os
+import logging
+import statistics
+import time
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import OpenAIChatCompletionsModel
+from src.claims.extractor import ClaimExtractor
+from src.countermeasures.generator import CountermeasureGenerator
+from src.evidence.validator import EvidenceValidator
+from src.llm.fake_server import FakeLLMServer, FakeLLMConfig, fake_completion_text
+from src.llm.streaming import first_number_parser
+from src.llm.transport import LLMTransport, TransportConfig
+from src.orchestration.ab_testing import ABTestSimulator
+from src.personas.base_personas import STANDARD_PERSONAS
+from src.personas.interpreter import PersonaInterpreter
+
+# Configure logging for v2.11 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MESSAGE = "The new COVID-19 vaccine is 100% safe and completely effective for everyone. Take 2 tablets of ibuprofen daily."
+
+def model_for(base_url):
+    transport = LLMTransport(TransportConfig(base_url=base_url))
+    return OpenAIChatCompletionsModel("phi4-mini", transport.create_openai_client(max_retries=0))
+
+def test_agent_shaped_responses():
+    """Test that each agent type gets a response its parser understands"""
+    print("=== Testing Prompt-Aware Responses ===")
+
+    persona = STANDARD_PERSONAS[0]
+    persona.create_agent()
+    interpretation = fake_completion_text(persona.interpretation_agent.build_messages(f'"{MESSAGE}"'))
+    interpreter = PersonaInterpreter(STANDARD_PERSONAS)
+    assert interpreter.assess_concern_level(interpretation) in ('high', 'medium')
+    assert "SkepticalParent" in interpretation
+
+    claims_prompt = [{"role": "system", "content": "Extract factual health claims. Format each claim as: CLAIM: [text]"},
+                     {"role": "user", "content": f'Text: "{MESSAGE}"'}]
+    claims = fake_completion_text(claims_prompt)
+    assert claims.startswith("CLAIM: The new COVID-19 vaccine")
+    assert len(claims.splitlines()) == 2
+
+    simulator = ABTestSimulator(personas=[])
+    clarity = fake_completion_text(simulator.clarity_agent.build_messages(f"Rate clarity: {MESSAGE}"))
+    assert 0.0 <= first_number_parser(clarity, True) <= 1.0
+
+    prebunk = fake_completion_text(CountermeasureGenerator().prebunk_agent.build_messages(f'Original claim: "{MESSAGE}"'))
+    assert "doctor" in prebunk or "healthcare provider" in prebunk or "clinician" in prebunk
+
+    validation = fake_completion_text(EvidenceValidator().validation_agent.build_messages(f'Claim: "{MESSAGE}"'))
+    assert "confidence" in validation.lower()
+
+    # Deterministic for identical prompts
+    assert fake_completion_text(claims_prompt) == claims
+    print(f"✅ Persona: {interpretation[:60]}... | Clarity: {clarity.splitlines()[0]}")
+
+def test_chat_and_usage():
+    """Test the OpenAI client works against the server and usage is reported"""
+    print("=== Testing Chat Completions ===")
+
+    with FakeLLMServer(FakeLLMConfig(mean_latency=0.0, tokens_per_second=None)) as server:
+        model = model_for(server.base_url)
+        response = asyncio.run(model.client.chat.completions.create(
+            model="phi4-mini", messages=[{"role": "user", "content": "Is the flu vaccine safe?"}]
+        ))
+        stats = dict(server.stats)
+
+    assert "vaccine" in response.choices[0].message.content
+    assert response.usage.completion_tokens > 0
+    assert stats['requests'] == 1 and stats['completion_tokens'] == response.usage.completion_tokens
+    print(f"✅ Usage: {response.usage}")
+
+def test_streaming_and_cancellation():
+    """Test SSE streaming and that early termination is seen by the server"""
+    print("=== Testing Streaming ===")
+
+    with FakeLLMServer(FakeLLMConfig(mean_latency=0.0, tokens_per_second=50)) as server:
+        model = model_for(server.base_url)
+        scorer = ABTestSimulator(personas=[]).clarity_agent
+        messages = scorer.build_messages("Rate clarity: Vaccines are safe for most people.")
+
+        full = asyncio.run(model.stream_chat(messages))
+        early = asyncio.run(model.stream_chat(messages + [{"role": "user", "content": "again"}], parser=first_number_parser))
+        time.sleep(0.2)
+        stats = dict(server.stats)
+
+    assert full.text.startswith("0.") and not full.stopped_early
+    assert early.stopped_early and early.parsed is not None
+    assert early.chunk_count < full.chunk_count
+    assert stats['streamed'] == 2 and stats['cancelled_streams'] == 1
+    print(f"✅ Full stream {full.chunk_count} chunks, early stop after {early.chunk_count}")
+
+def test_latency_distribution_and_token_rate():
+    """Test configured latency and generation rate shape response times"""
+    print("=== Testing Latency Model ===")
+
+    config = FakeLLMConfig(latency_distribution='lognormal', mean_latency=0.03, latency_spread=0.5,
+                           tokens_per_second=1000, seed=7)
+    server = FakeLLMServer(config)
+    delays = [server._first_token_delay() for _ in range(2000)]
+    assert abs(statistics.mean(delays) - 0.03) < 0.005
+    assert max(delays) > 2 * min(delays)
+
+    with server:
+        model = model_for(server.base_url)
+
+        async def timed():
+            start = time.perf_counter()
+            await model.chat([{"role": "user", "content": "Explain RSV immunization options."}])
+            return time.perf_counter() - start
+
+        elapsed = [asyncio.run(timed()) for _ in range(5)]
+    assert min(elapsed) > 0.005
+    print(f"✅ Mean simulated latency {statistics.mean(delays):.4f}s; observed {statistics.median(elapsed):.4f}s")
+
+def test_error_injection_and_concurrency_cap():
+    """Test injected failures and the single-server concurrency model"""
+    print("=== Testing Fault Injection ===")
+
+    with FakeLLMServer(FakeLLMConfig(mean_latency=0.0, error_rate=1.0, error_status=503)) as server:
+        model = model_for(server.base_url)
+        try:
+            asyncio.run(model.chat([{"role": "user", "content": "hello"}]))
+            assert False, "expected injected failure"
+        except Exception as e:
+            assert "503" in str(e) or "injected" in str(e)
+        assert server.stats['errors_injected'] == 1
+
+    with FakeLLMServer(FakeLLMConfig(mean_latency=0.05, tokens_per_second=None, max_concurrency=2)) as server:
+        model = model_for(server.base_url)
+
+        async def burst():
+            start = time.perf_counter()
+            await asyncio.gather(*[model.chat([{"role": "user", "content": f"q{i}"}]) for i in range(6)])
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(burst())
+        assert server.stats['max_in_flight'] == 2
+    assert elapsed >= 0.15
+    print(f"✅ 6 requests through 2 slots took {elapsed:.2f}s")
+
+def test_streams_hold_slot_until_done():
+    """Test that a streamed generation keeps its slot until the last chunk, like a plain one"""
+    print("=== Testing Streaming Concurrency Cap ===")
+
+    with FakeLLMServer(FakeLLMConfig(mean_latency=0.0, tokens_per_second=200, max_concurrency=1)) as server:
+        model = model_for(server.base_url)
+        messages = [{"role": "user", "content": "Is the flu vaccine safe?"}]
+
+        async def streams():
+            start = time.perf_counter()
+            completions = await asyncio.gather(*[
+                model.stream_chat(messages + [{"role": "user", "content": f"q{i}"}]) for i in range(3)
+            ])
+            return completions, time.perf_counter() - start
+
+        completions, elapsed = asyncio.run(streams())
+        assert server.stats['max_in_flight'] == 1
+    generation = min(completion.chunk_count for completion in completions) / 200
+    assert elapsed >= 3 * generation
+    print(f"✅ 3 streams through 1 slot took {elapsed:.2f}s")
+
+def test_prefix_cache_simulation():
+    """Test the simulated server prefix cache makes repeated system prompts cheaper"""
+    print("=== Testing Prefix Cache Simulation ===")
+
+    config = FakeLLMConfig(mean_latency=0.0, tokens_per_second=None,
+                           prefill_tokens_per_second=2000, prefix_cache_entries=8)
+    server = FakeLLMServer(config)
+    messages = [{"role": "system", "content": "x" * 4000}, {"role": "user", "content": "short"}]
+    cold = server._prefill_delay(messages)
+    warm = server._prefill_delay(messages)
+    assert warm < cold / 10
+    assert server.stats['prefix_cache_hits'] == 1
+    print(f"✅ Prefill {cold:.3f}s cold vs {warm:.4f}s warm")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.11 Fake LLM Server Tests\n")
+    test_agent_shaped_responses()
+    test_chat_and_usage()
+    test_streaming_and_cancellation()
+    test_latency_distribution_and_token_rate()
+    test_error_injection_and_concurrency_cap()
+    test_streams_hold_slot_until_done()
+    test_prefix_cache_simulation()
+    print("\n✅ All v2.11 tests completed!")
@@ -0,0 +1,168 @@
+"""Test v2.12: LLM Record/Replay Cassettes"""
+
+import asyncio
+import gzip
+import json
+import os
+import logging
+import tempfile
+import time
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.llm.cassette import Cassette, CassetteMissError
+from src.llm.streaming import first_number_parser
+
+# Configure logging for v2.12 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SlowClient:
+    """Stand-in for AsyncOpenAI with a fixed latency and numbered responses"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, stream=False, **params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        content = f"response {self.calls} to {messages[-1]['content']}"
+        if stream:
+            return StreamOf(["0.8", "1\n", "because..."])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class StreamOf:
+    def __init__(self, pieces):
+        self.pieces = list(pieces)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.pieces:
+            raise StopAsyncIteration
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.pieces.pop(0)))])
+
+    async def close(self):
+        pass
+
+def cassette_path():
+    return os.path.join(tempfile.mkdtemp(), "run.jsonl.gz")
+
+def record_session(path):
+    client = SlowClient()
+    with Cassette(path, mode='record') as cassette:
+        model = OpenAIChatCompletionsModel("phi4-mini", client, cassette=cassette)
+        agent = Agent("CassetteAgent", "Answer briefly.", model=model)
+
+        async def run():
+            first = await agent.run("What is RSV?")
+            second = await agent.run("What is RSV?")
+            score = await agent.run("Rate clarity", stream_parser=first_number_parser)
+            return [first, second, score]
+
+        return asyncio.run(run()), client
+
+def test_record_writes_compact_cassette():
+    """Test that every call is written with its prompt, response and latency"""
+    print("=== Testing Recording ===")
+
+    path = cassette_path()
+    responses, client = record_session(path)
+
+    with gzip.open(path, 'rt') as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == client.calls == 3
+    assert records[0]['response']['content'] == responses[0]
+    assert records[0]['latency'] >= 0.05
+    assert records[2]['stream']['stopped_early']
+    print(f"✅ {len(records)} records, {os.path.getsize(path)} bytes")
+
+def test_replay_is_identical_and_instant():
+    """Test that replay returns the recorded outputs, in order, without a model"""
+    print("=== Testing Instant Replay ===")
+
+    path = cassette_path()
+    recorded, _ = record_session(path)
+
+    cassette = Cassette(path, mode='replay')
+    model = OpenAIChatCompletionsModel("phi4-mini", None, cassette=cassette)
+    agent = Agent("CassetteAgent", "Answer briefly.", model=model)
+
+    async def run():
+        return [await agent.run("What is RSV?"), await agent.run("What is RSV?"),
+                await agent.run("Rate clarity", stream_parser=first_number_parser)]
+
+    start = time.perf_counter()
+    replayed = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    assert replayed == recorded
+    assert recorded[0] != recorded[1]  # repeated prompts replay in recording order
+    assert elapsed < 0.1
+    assert cassette.get_report()['replayed'] == 3
+    print(f"✅ Replayed {len(replayed)} calls in {elapsed:.4f}s")
+
+def test_replay_recorded_latency():
+    """Test that replay can reproduce the recorded latencies"""
+    print("=== Testing Latency Replay ===")
+
+    path = cassette_path()
+    record_session(path)
+    model = OpenAIChatCompletionsModel("phi4-mini", None, cassette=Cassette(path, mode='replay', latency='recorded'))
+
+    start = time.perf_counter()
+    agent = Agent("CassetteAgent", "Answer briefly.", model=model)
+    assert not asyncio.run(agent.run("What is RSV?")).startswith("Agent error")
+    assert time.perf_counter() - start >= 0.05
+    print("✅ Recorded latency reproduced")
+
+def test_unmatched_prompts_reported():
+    """Test that prompts missing from the cassette fail and are reported"""
+    print("=== Testing Unmatched Prompts ===")
+
+    path = cassette_path()
+    record_session(path)
+    cassette = Cassette(path, mode='replay')
+    model = OpenAIChatCompletionsModel("phi4-mini", None, cassette=cassette)
+
+    try:
+        asyncio.run(model.chat([{"role": "user", "content": "A prompt nobody recorded"}]))
+        assert False, "expected a cassette miss"
+    except CassetteMissError:
+        pass
+
+    agent = Agent("OtherAgent", "Different instructions.", model=model)
+    assert asyncio.run(agent.run("What is RSV?")).startswith("Agent error")
+
+    report = cassette.get_report()
+    assert report['misses'] == 2
+    assert report['unmatched'][0]['prompt'] == "A prompt nobody recorded"
+    print(f"✅ Unmatched: {[u['prompt'] for u in report['unmatched']]}")
+
+def test_passthrough_uses_live_model():
+    """Test that passthrough replay falls back to the live client on a miss"""
+    print("=== Testing Passthrough ===")
+
+    path = cassette_path()
+    record_session(path)
+    client = SlowClient(delay=0)
+    model = OpenAIChatCompletionsModel("phi4-mini", client, cassette=Cassette(path, mode='replay', passthrough=True))
+
+    response = asyncio.run(model.chat([{"role": "user", "content": "new prompt"}]))
+    assert response == "response 1 to new prompt" and client.calls == 1
+    print("✅ Miss served live")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.12 Cassette Tests\n")
+    test_record_writes_compact_cassette()
+    test_replay_is_identical_and_instant()
+    test_replay_recorded_latency()
+    test_unmatched_prompts_reported()
+    test_passthrough_uses_live_model()
+    print("\n✅ All v2.12 tests completed!")
@@ -0,0 +1,192 @@
+"""Test v2.13: LLM Call Ledger"""
+
+import asyncio
+import os
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.llm.cache import TieredCache
+from src.llm.coalescing import RequestCoalescer
+from src.llm.limiter import AdaptiveConcurrencyLimiter
+from src.llm.ledger import CallLedger, llm_stage, estimate_tokens
+from src.llm.streaming import first_number_parser
+
+# Configure logging for v2.13 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class UsageClient:
+    """Stand-in for AsyncOpenAI that optionally reports token usage"""
+
+    def __init__(self, delay=0.02, usage=True):
+        self.delay = delay
+        self.usage = usage
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, stream=False, **params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if stream:
+            return StreamOf(["0.7", "5 because", " it is clear"])
+        usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30) if self.usage else None
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer to {messages[-1]['content']}"))],
+            usage=usage
+        )
+
+class StreamOf:
+    def __init__(self, pieces):
+        self.pieces = list(pieces)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.pieces:
+            raise StopAsyncIteration
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.pieces.pop(0)))])
+
+    async def close(self):
+        pass
+
+def test_records_agent_stage_and_tokens():
+    """Calls are attributed to agent and stage, with server usage or an offline estimate"""
+    print("=== Testing Agent, Stage and Token Attribution ===")
+
+    async def run():
+        ledger = CallLedger()
+        reported = OpenAIChatCompletionsModel("phi4-mini", UsageClient(), ledger=ledger)
+        estimated = OpenAIChatCompletionsModel("phi4-mini", UsageClient(usage=False), ledger=ledger)
+
+        with ledger.capture() as session:
+            with llm_stage("persona_interpretation"):
+                await asyncio.gather(
+                    Agent("Persona_Skeptic", "Interpret.", model=reported).run("Vaccines are safe"),
+                    Agent("Persona_Parent", "Interpret.", model=estimated).run("Vaccines are safe")
+                )
+            with llm_stage("countermeasures"):
+                await Agent("PrebunkGenerator", "Prebunk.", model=reported).run("Vaccines are safe")
+        await reported.chat([{"role": "user", "content": "outside any analysis"}])
+        return ledger, session
+
+    ledger, session = asyncio.run(run())
+    summary = session.summary()
+    assert summary["calls"] == 3
+    assert set(summary["by_agent"]) == {"Persona_Skeptic", "Persona_Parent", "PrebunkGenerator"}
+    assert summary["by_stage"]["persona_interpretation"]["calls"] == 2
+    assert summary["by_stage"]["countermeasures"]["calls"] == 1
+
+    skeptic = summary["by_agent"]["Persona_Skeptic"]
+    assert skeptic["prompt_tokens"] == 120 and skeptic["completion_tokens"] == 30
+    assert skeptic["estimated_token_calls"] == 0
+    parent = summary["by_agent"]["Persona_Parent"]
+    assert parent["estimated_token_calls"] == 1
+    assert parent["completion_tokens"] == estimate_tokens("answer to Vaccines are safe")
+    assert summary["latency_seconds"] > 0
+
+    stats = ledger.get_stats()
+    assert stats["calls"] == 4
+    assert stats["by_agent"]["unattributed"]["calls"] == 1
+    assert stats["recent"][-1]["stage"] == "unattributed"
+    print("✅ Agent, stage and token attribution working")
+
+def test_cache_status_and_queue_wait():
+    """Cache hits, coalesced followers and queued calls are told apart"""
+    print("=== Testing Cache Status and Queue Wait ===")
+
+    async def run():
+        ledger = CallLedger()
+        client = UsageClient(delay=0.05)
+        model = OpenAIChatCompletionsModel(
+            "phi4-mini", client,
+            cache=TieredCache(max_memory_entries=16),
+            coalescer=RequestCoalescer(),
+            limiter=AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1),
+            ledger=ledger
+        )
+        same = [{"role": "user", "content": "same prompt"}]
+        await asyncio.gather(model.chat(same, agent_name="A"), model.chat(same, agent_name="B"))
+        await model.chat(same, agent_name="C")
+        await asyncio.gather(*[
+            model.chat([{"role": "user", "content": f"prompt {i}"}], agent_name="Queued") for i in range(3)
+        ])
+        return ledger, client
+
+    ledger, client = asyncio.run(run())
+    stats = ledger.get_stats()
+    assert client.calls == 4
+    assert stats["cache"]["miss"] == 4
+    assert stats["cache"]["coalesced"] == 1
+    assert stats["cache"]["hit"] == 1
+    assert stats["by_agent"]["C"]["cache"]["hit"] == 1
+    # With one slot, the second and third distinct prompts wait for the first
+    assert stats["by_agent"]["Queued"]["queue_wait_seconds"] >= 0.05
+    print(f"✅ Cache statuses {stats['cache']}, queue wait {stats['queue_wait_seconds']:.3f}s")
+
+def test_stream_errors_and_cost():
+    """Streamed calls are estimated, failures are counted and only misses are billed"""
+    print("=== Testing Streams, Errors and Cost ===")
+
+    class FailingClient(UsageClient):
+        async def create(self, model, messages, stream=False, **params):
+            raise RuntimeError("server down")
+
+    async def run():
+        ledger = CallLedger(prompt_cost_per_1k=1.0, completion_cost_per_1k=2.0)
+        model = OpenAIChatCompletionsModel("phi4-mini", UsageClient(), cache=TieredCache(max_memory_entries=16),
+                                           ledger=ledger)
+        messages = [{"role": "user", "content": "rate clarity"}]
+        await model.chat(messages, agent_name="ClarityScorer")
+        await model.chat(messages, agent_name="ClarityScorer")
+        completion = await model.stream_chat([{"role": "user", "content": "score"}], parser=first_number_parser,
+                                             agent_name="ClarityScorer")
+        failing = OpenAIChatCompletionsModel("phi4-mini", FailingClient(), ledger=ledger)
+        try:
+            await failing.chat(messages, agent_name="EvidenceValidator")
+        except RuntimeError:
+            pass
+        return ledger, completion
+
+    ledger, completion = asyncio.run(run())
+    stats = ledger.get_stats()
+    recent = stats["recent"]
+    assert completion.parsed == 0.75
+    assert recent[0]["cost"] == (120 * 1.0 + 30 * 2.0) / 1000
+    assert recent[1]["cache"] == "hit" and recent[1]["cost"] == 0.0
+    assert recent[2]["streamed"] and recent[2]["tokens_estimated"]
+    assert recent[3]["error"] == "RuntimeError"
+    assert stats["errors"] == 1
+    assert stats["by_agent"]["EvidenceValidator"]["errors"] == 1
+    print(f"✅ Total cost {stats['cost']:.3f}, errors {stats['errors']}")
+
+def test_pipeline_result_and_endpoint():
+    """Each analysis carries its own usage summary; the process-wide ledger is served over HTTP"""
+    print("=== Testing Pipeline Summary and API Endpoint ===")
+    from fastapi.testclient import TestClient
+    from src.orchestration.pipeline import PrebunkerPipeline
+    from src.web.app import app
+
+    pipeline = PrebunkerPipeline()
+    result = asyncio.run(pipeline.process_message(
+        "Vaccines are 100% safe for everyone.", {'degraded_mode': True, 'detailed_logging': False}
+    ))
+    assert result["llm_usage"]["calls"] == 0
+    assert "by_agent" in result["llm_usage"] and "by_stage" in result["llm_usage"]
+
+    response = TestClient(app).get("/api/llm/ledger", params={"recent": 5})
+    assert response.status_code == 200
+    body = response.json()
+    assert {"calls", "by_agent", "by_stage", "recent", "cache"} <= set(body)
+    print("✅ Per-analysis summary and /api/llm/ledger working")
+
+if __name__ == "__main__":
+    test_records_agent_stage_and_tokens()
+    test_cache_status_and_queue_wait()
+    test_stream_errors_and_cost()
+    test_pipeline_result_and_endpoint()
+    print("\n🎉 All v2.13 tests passed!")
@@ -0,0 +1,158 @@
+"""Test v2.15: DAG-Based Stage Scheduler"""
+
+import asyncio
+import os
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.orchestration.stage_graph import StageGraph
+from src.orchestration.pipeline import PrebunkerPipeline
+
+# Configure logging for v2.15 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def sleeper(seconds, value=None):
+    async def run(inputs):
+        await asyncio.sleep(seconds)
+        return value if value is not None else sorted(inputs)
+    return run
+
+def test_stages_start_when_inputs_exist():
+    """A stage waits only for its own dependencies, and stages added mid-run are scheduled"""
+    print("=== Testing Stage Graph Scheduling ===")
+
+    async def run():
+        graph = StageGraph()
+
+        async def expand(inputs):
+            await asyncio.sleep(0.05)
+            graph.add("late", sleeper(0.05), depends_on=["fast"])
+            return "expanded"
+
+        graph.add("fast", expand)
+        graph.add("slow", sleeper(0.3, "slow"))
+        graph.add("after_fast", sleeper(0.05), depends_on=["fast"])
+        graph.add("join", sleeper(0.01), depends_on=["slow", "after_fast"])
+        results = await graph.run()
+        return graph, results
+
+    graph, results = asyncio.run(run())
+    stages = graph.get_timings()["stages"]
+    assert results["after_fast"] == ["fast"]
+    assert results["join"] == ["after_fast", "slow"]
+    assert "late" in results
+    assert stages["after_fast"]["ready"] < 0.15  # did not wait for "slow"
+    assert stages["join"]["ready"] >= 0.3
+    assert graph.critical_path() == ["slow", "join"]
+    assert abs(graph.get_timings()["critical_path_seconds"] - stages["join"]["end"]) < 1e-9
+    print(f"✅ Critical path {graph.critical_path()}")
+
+def test_sequential_mode_errors_and_cancel():
+    """Sequential mode keeps insertion order; a failing stage cancels the rest; cancel() stops the graph"""
+    print("=== Testing Sequential Mode, Errors and Cancel ===")
+    order = []
+
+    def recorder(name, fail=False):
+        async def run(inputs):
+            order.append(name)
+            await asyncio.sleep(0.01)
+            if fail:
+                raise RuntimeError(f"{name} failed")
+            return name
+        return run
+
+    async def run():
+        graph = StageGraph(concurrent=False)
+        graph.add("a", recorder("a")).add("b", recorder("b")).add("c", recorder("c"), depends_on=["a"])
+        await graph.run()
+        assert order == ["a", "b", "c"]
+
+        graph = StageGraph()
+        graph.add("boom", recorder("boom", fail=True))
+        graph.add("never", sleeper(5))
+        try:
+            await asyncio.wait_for(graph.run(), 1)
+            raise AssertionError("stage error not raised")
+        except RuntimeError as e:
+            assert "boom failed" in str(e)
+        assert "never" not in graph.results
+
+        graph = StageGraph()
+
+        async def stop(inputs):
+            graph.cancel()
+            return []
+
+        graph.add("first", stop)
+        graph.add("expensive", sleeper(5))
+        results = await asyncio.wait_for(graph.run(), 1)
+        assert results == {"first": []}
+
+        try:
+            graph.add("bad", sleeper(0), depends_on=["missing"])
+            raise AssertionError("unknown dependency accepted")
+        except ValueError:
+            pass
+
+    asyncio.run(run())
+    print("✅ Sequential order, error propagation and cancel working")
+
+def test_pipeline_per_claim_edges():
+    """Personas start at once; each claim's countermeasures wait only for that claim's evidence"""
+    print("=== Testing Pipeline Stage Graph ===")
+    persona_calls = []
+
+    async def personas(message_text):
+        persona_calls.append(message_text)
+        await asyncio.sleep(0.1)
+        return [{"persona": "Skeptic", "potential_misreading": ["distrust"]}]
+
+    async def validate(claim_text, topic_area=None, use_llm=True):
+        await asyncio.sleep(0.5 if "cancer" in claim_text else 0.02)
+        return {"claim": claim_text, "validation_status": "supported", "confidence_score": 0.8}
+
+    async def countermeasures(claim_text, persona_concerns, evidence, use_llm=True):
+        await asyncio.sleep(0.02)
+        return [{"type": "prebunk", "text": f"Context for {claim_text[:20]}", "concerns": persona_concerns}]
+
+    pipeline = PrebunkerPipeline()
+    pipeline.persona_interpreter = SimpleNamespace(interpret_message=personas)
+    pipeline.evidence_validator.validate_claim = validate
+    pipeline.countermeasure_generator = SimpleNamespace(generate_countermeasures=countermeasures)
+
+    message = ("Vaccines are 100% safe for everyone. This supplement cures cancer completely. "
+               "Antibiotics always treat viral infections.")
+    result = asyncio.run(pipeline.process_message(message, {'detailed_logging': False}))
+    assert result['pipeline_status'] == 'completed_success'
+
+    timings = result['stage_timings']
+    stages = timings['stages']
+    claims = result['claims']
+    slow = next(i for i, claim in enumerate(claims) if "cancer" in claim['text'])
+    assert stages['personas']['ready'] < 0.05
+
+    fast_countermeasures = [name for name in stages if name.startswith('countermeasures:') and name != f'countermeasures:{slow}']
+    for name in fast_countermeasures:
+        assert stages[name]['end'] < stages[f'evidence:{slow}']['end']
+    if f'countermeasures:{slow}' in stages:
+        assert timings['critical_path'][-2:] == [f'evidence:{slow}', f'countermeasures:{slow}']
+    assert len(result['evidence_validations']) == len(claims)
+    assert all(c['countermeasures'][0]['concerns'] == ['distrust'] for c in result['countermeasures'])
+    levels = [c['risk_level'] for c in result['countermeasures']]
+    assert levels == sorted(levels, key=lambda level: level != 'high')
+
+    persona_calls.clear()
+    empty = asyncio.run(pipeline.process_message("Have a nice day.", {'detailed_logging': False}))
+    assert empty['pipeline_status'] == 'completed_no_claims'
+    assert persona_calls == []
+    print(f"✅ Critical path {timings['critical_path']} ({timings['critical_path_seconds']:.2f}s)")
+
+if __name__ == "__main__":
+    test_stages_start_when_inputs_exist()
+    test_sequential_mode_errors_and_cancel()
+    test_pipeline_per_claim_edges()
+    print("\n🎉 All v2.15 tests passed!")
@@ -0,0 +1,167 @@
+"""Test v2.17: Concurrent, Bounded Countermeasure Generation"""
+
+import asyncio
+import os
+import logging
+import time
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.countermeasures.generator import CountermeasureGenerator, collect_persona_concerns
+from src.countermeasures.persona_targeted import PersonaTargetedGenerator
+from src.orchestration.pipeline import PrebunkerPipeline
+
+# Configure logging for v2.17 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ConcurrencyProbe:
+    """Timed stand-in for an LLM-backed call that records peak concurrency"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+
+    async def run(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.calls.append(prompt)
+        try:
+            await asyncio.sleep(self.delay)
+            return f"Evidence shows this is safe; talk to your doctor. ({len(self.calls)})"
+        finally:
+            self.active -= 1
+
+def test_persona_fan_out_is_bounded():
+    """Every (claim, persona) item runs concurrently up to the bound, results keyed as before"""
+    print("=== Testing Persona-Targeted Fan-Out ===")
+    probe = ConcurrencyProbe()
+    generator = PersonaTargetedGenerator(max_concurrency=3)
+    generator.generators = {name: SimpleNamespace(run=probe.run) for name in ['VaccineHesitant', 'HealthAnxious', 'SkepticalParent']}
+
+    interpretations = [
+        {'persona': 'VaccineHesitant', 'potential_misreading': ['safety concerns']},
+        {'persona': 'HealthAnxious', 'potential_misreading': ['side effects']},
+        {'persona': 'SkepticalParent', 'potential_misreading': ['child safety']},
+        {'persona': 'UnknownPersona', 'potential_misreading': ['ignored']}
+    ]
+    batch = [{'claim': f"claim {i}", 'persona_interpretations': interpretations} for i in range(4)]
+
+    start = time.perf_counter()
+    results = asyncio.run(generator.batch_generate_countermeasures(batch))
+    elapsed = time.perf_counter() - start
+
+    assert list(results) == [f"claim {i}" for i in range(4)]
+    for claim_results in results.values():
+        assert list(claim_results) == ['VaccineHesitant', 'HealthAnxious', 'SkepticalParent']
+        assert claim_results['HealthAnxious']['concerns_addressed'] == ['side effects']
+    assert len(probe.calls) == 12
+    assert probe.peak == 3
+    assert elapsed < 12 * probe.delay * 0.6
+    print(f"✅ 12 work items, peak concurrency {probe.peak}, {elapsed:.2f}s")
+
+def test_general_countermeasures_are_bounded():
+    """Custom prebunks for many claims share one concurrency bound; templates are unaffected"""
+    print("=== Testing General Countermeasure Bound ===")
+    probe = ConcurrencyProbe()
+    generator = CountermeasureGenerator(max_concurrency=2)
+
+    async def custom_prebunk(claim, persona_concerns, evidence_validation):
+        content = await probe.run(claim)
+        return {'type': 'custom_prebunk', 'content': content, 'confidence': 0.7}
+
+    generator._generate_custom_prebunk = custom_prebunk
+    claims = [{'claim': f"Vaccine claim {i}", 'persona_concerns': ['safety'], 'evidence_validation': {}} for i in range(6)]
+    results = asyncio.run(generator.generate_multiple_countermeasures(claims))
+
+    assert [r['claim'] for r in results] == [c['claim'] for c in claims]
+    assert probe.peak == 2
+    assert all(r['top_countermeasure'] for r in results)
+    print(f"✅ Peak custom prebunk concurrency {probe.peak}")
+
+def test_pipeline_collects_concerns_once():
+    """PrebunkerPipeline collects persona concerns once per message and shares them across claims"""
+    print("=== Testing Per-Message Persona Concerns ===")
+    received = []
+
+    async def personas(message_text):
+        return [
+            {"persona": "Skeptic", "potential_misreading": ["distrust", "hidden risks"]},
+            {"persona": "Parent", "potential_misreading": ["hidden risks", "child safety"]}
+        ]
+
+    async def validate(claim_text, topic_area=None, use_llm=True):
+        return {"claim": claim_text, "validation_status": "supported", "confidence_score": 0.8}
+
+    async def countermeasures(claim_text, persona_concerns, evidence, use_llm=True):
+        received.append(persona_concerns)
+        return [{"type": "prebunk", "content": f"Context for {claim_text[:20]}"}]
+
+    pipeline = PrebunkerPipeline()
+    pipeline.persona_interpreter = SimpleNamespace(interpret_message=personas)
+    pipeline.evidence_validator.validate_claim = validate
+    pipeline.countermeasure_generator = SimpleNamespace(generate_countermeasures=countermeasures)
+    pipeline.circuit_breaker = None  # earlier tests may have opened the shared LLM circuit
+
+    message = ("Vaccines are 100% safe for everyone. This supplement cures cancer completely. "
+               "Antibiotics always treat viral infections.")
+    result = asyncio.run(pipeline.process_message(message, {'detailed_logging': False}))
+
+    assert result['pipeline_status'] == 'completed_success'
+    assert 'persona_concerns' in result['stage_timings']['stages']
+    assert received and received[0] == ["distrust", "hidden risks", "child safety"]
+    assert all(concerns is received[0] for concerns in received)
+    assert collect_persona_concerns([]) == []
+    print(f"✅ {len(received)} claims shared one concern list")
+
+def test_complete_system_countermeasures():
+    """CompletePrebunkerSystem awaits its risk report and generates per-claim countermeasures"""
+    print("=== Testing Complete System Countermeasures ===")
+    from src.integration.complete_pipeline import CompletePrebunkerSystem
+
+    probe = ConcurrencyProbe(delay=0.01)
+    system = CompletePrebunkerSystem()
+
+    async def extract(message, options):
+        return {'explicit_claims': [{'text': "Vaccines are 100% safe for everyone"}],
+                'implicit_claims': [{'text': "Natural immunity is always better"}]}
+
+    async def validate(claim_text, topic_area=None, use_llm=True):
+        return {"claim": claim_text, "validation_status": "supported", "confidence_score": 0.8}
+
+    async def personas(message):
+        return [{'persona': 'VaccineHesitant', 'potential_misreading': ['safety concerns']}]
+
+    async def risk_report(pipeline_result):
+        return {'overall_risk_assessment': 'medium_risk', 'claims_seen': len(pipeline_result['claims'])}
+
+    async def custom_prebunk(claim, persona_concerns, evidence_validation):
+        return {'type': 'custom_prebunk', 'content': await probe.run(claim), 'confidence': 0.7}
+
+    system.advanced_extractor = SimpleNamespace(extract_claims_advanced=extract)
+    system.evidence_validator.validate_claim = validate
+    system.persona_interpreter = SimpleNamespace(interpret_message=personas)
+    system.risk_reporter = SimpleNamespace(compile_risk_report=risk_report)
+    system.persona_targeted_generator.generators = {'VaccineHesitant': SimpleNamespace(run=probe.run)}
+    system.countermeasure_generator._generate_custom_prebunk = custom_prebunk
+
+    result = asyncio.run(system.analyze_health_communication("Vaccines are 100% safe.", {'budget_seconds': 5}))
+    assert result['status'] == 'completed', result.get('error')
+    assert result['risk_report']['claims_seen'] == 2
+    countermeasures = result['countermeasures']
+    assert 'VaccineHesitant' in countermeasures
+    assert "Vaccines are 100% safe for everyone" in countermeasures
+    assert "Natural immunity is always better" in countermeasures
+    assert all('effectiveness_score' in entry for entry in countermeasures.values())
+    print(f"✅ Complete system countermeasures: {list(countermeasures)}")
+
+if __name__ == "__main__":
+    test_persona_fan_out_is_bounded()
+    test_general_countermeasures_are_bounded()
+    test_pipeline_collects_concerns_once()
+    test_complete_system_countermeasures()
+    print("\n🎉 All v2.17 tests passed!")
@@ -0,0 +1,124 @@
+"""Test v2.19: Single-Prompt Persona Panel Mode"""
+
+import asyncio
+import dataclasses
+import os
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.llm.fake_server import fake_completion_text
+from src.personas.base_personas import STANDARD_PERSONAS, create_panel_agent
+from src.personas.interpreter import PersonaInterpreter
+from src.orchestration.pipeline import PrebunkerPipeline
+
+# Configure logging for v2.19 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MESSAGE = "The new COVID-19 vaccine is 100% safe and completely effective for everyone."
+
+def offline_interpreter(panel_response=None, mode=None):
+    """PersonaInterpreter whose persona and panel agents answer like the offline stand-in server"""
+    personas = [dataclasses.replace(persona) for persona in STANDARD_PERSONAS[:4]]
+    interpreter = PersonaInterpreter(personas, mode=mode)
+    calls = {"individual": [], "panel": 0}
+
+    def stand_in(agent, record):
+        async def run(prompt):
+            record(agent)
+            return fake_completion_text(agent.build_messages(prompt))
+        return run
+
+    for persona in personas:
+        agent = persona.interpretation_agent
+        agent.run = stand_in(agent, lambda agent: calls["individual"].append(agent.name))
+
+    def count_panel(agent):
+        calls["panel"] += 1
+
+    # Built up front (normally on first panel call) so it can be stubbed
+    interpreter._panel_agent = create_panel_agent(personas)
+    if panel_response is None:
+        interpreter._panel_agent.run = stand_in(interpreter._panel_agent, count_panel)
+    else:
+        async def run(prompt):
+            count_panel(None)
+            if isinstance(panel_response, Exception):
+                raise panel_response
+            return panel_response
+        interpreter._panel_agent.run = run
+    return interpreter, personas, calls
+
+def test_panel_matches_individual_post_processing():
+    """One panel call yields the same post-processed fields as one call per persona"""
+    print("=== Testing Panel vs Individual Mode ===")
+    interpreter, personas, calls = offline_interpreter()
+
+    individual = asyncio.run(interpreter.interpret_message(MESSAGE))
+    assert len(calls["individual"]) == len(personas) and calls["panel"] == 0
+
+    calls["individual"].clear()
+    panel = asyncio.run(interpreter.interpret_message(MESSAGE, mode="panel"))
+    assert calls["panel"] == 1 and calls["individual"] == []
+
+    assert [p['persona'] for p in panel] == [p.name for p in personas]
+    for left, right in zip(individual, panel):
+        for field in ('interpretation', 'potential_misreading', 'emotional_reaction', 'concern_level', 'key_issues'):
+            assert left[field] == right[field], field
+    print(f"✅ {len(personas)} personas from 1 panel call, identical post-processing")
+
+def test_missing_sections_and_failures_fall_back():
+    """Personas missing from the panel response are asked individually; a failed panel asks everyone"""
+    print("=== Testing Panel Fallback ===")
+    names = [persona.name for persona in STANDARD_PERSONAS[:4]]
+    response = (f"Here is the panel.\n### {names[0]}\nI'm worried about side effects.\n#### My questions\nIs it tested?\n"
+                f"## **{names[2]}**:\nThis sounds dangerous.\n### {names[3]}\n\n")
+    interpreter, personas, calls = offline_interpreter(panel_response=response, mode="panel")
+
+    panel = asyncio.run(interpreter.interpret_message(MESSAGE))
+    assert calls["panel"] == 1
+    assert sorted(calls["individual"]) == sorted(f"Persona_{name}" for name in (names[1], names[3]))
+    assert "Is it tested?" in panel[0]['interpretation']
+    assert panel[2]['concern_level'] == 'high'
+    assert [p['persona'] for p in panel] == names
+
+    interpreter, personas, calls = offline_interpreter(panel_response=RuntimeError("panel down"), mode="panel")
+    panel = asyncio.run(interpreter.interpret_message(MESSAGE))
+    assert len(calls["individual"]) == len(personas)
+    assert all(p['concern_level'] != 'unknown' for p in panel)
+
+    try:
+        asyncio.run(interpreter.interpret_message(MESSAGE, mode="committee"))
+        raise AssertionError("unknown mode accepted")
+    except ValueError:
+        pass
+    print("✅ Missing sections and panel failures fall back to individual calls")
+
+def test_pipeline_selects_mode_per_request():
+    """PrebunkerPipeline passes persona_mode through to the interpreter only when requested"""
+    print("=== Testing Per-Request Persona Mode ===")
+    modes = []
+
+    async def interpret(message_text, mode=None):
+        modes.append(mode)
+        return [{"persona": "Skeptic", "potential_misreading": ["distrust"]}]
+
+    pipeline = PrebunkerPipeline()
+    pipeline.persona_interpreter = SimpleNamespace(interpret_message=interpret)
+    pipeline.circuit_breaker = None  # earlier tests may have opened the shared LLM circuit
+    options = {'detailed_logging': False, 'include_countermeasures': False, 'degraded_mode': False}
+
+    message = "Vaccines are 100% safe for everyone."
+    asyncio.run(pipeline.process_message(message, {**options, 'persona_mode': 'panel'}))
+    asyncio.run(pipeline.process_message(message, options))
+    assert modes == ['panel', None]
+    print("✅ persona_mode selectable per request")
+
+if __name__ == "__main__":
+    test_panel_matches_individual_post_processing()
+    test_missing_sections_and_failures_fall_back()
+    test_pipeline_selects_mode_per_request()
+    print("\n🎉 All v2.19 tests passed!")
@@ -0,0 +1,156 @@
+"""Test v2.2: Single-Flight Coalescing of LLM Requests"""
+
+import asyncio
+import os
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import OpenAIChatCompletionsModel
+from src.deadline import deadline_scope
+from src.error_handler import DeadlineExceededError
+from src.llm.coalescing import RequestCoalescer
+from src.tracing import tracer
+
+# Configure logging for v2.2 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SlowClient:
+    """Stand-in for AsyncOpenAI with a fixed response delay"""
+
+    def __init__(self, delay=0.05, fail=False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, **params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        content = f"interpretation of {messages[-1]['content']}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def test_concurrent_identical_prompts_share_one_call():
+    """Test that identical concurrent prompts issue a single request"""
+    print("=== Testing Identical Concurrent Prompts ===")
+
+    client = SlowClient()
+    coalescer = RequestCoalescer()
+    model = OpenAIChatCompletionsModel("phi4-mini", client, coalescer=coalescer)
+    messages = [{"role": "user", "content": "Vaccines are 100% safe"}]
+    counter_before = tracer.get_counters().get('llm_coalesced_calls', 0)
+
+    async def run():
+        return await asyncio.gather(*[model.chat(messages) for _ in range(5)])
+
+    results = asyncio.run(run())
+
+    assert client.calls == 1
+    assert len(set(results)) == 1
+    assert coalescer.get_stats()['coalesced'] == 4
+    assert coalescer.in_flight_count() == 0
+    assert tracer.get_counters()['llm_coalesced_calls'] - counter_before == 4
+    print(f"✅ Coalescer stats: {coalescer.get_stats()}")
+
+def test_different_prompts_not_coalesced():
+    """Test that different prompts still run independently"""
+    print("=== Testing Different Prompts ===")
+
+    client = SlowClient()
+    model = OpenAIChatCompletionsModel("phi4-mini", client, coalescer=RequestCoalescer())
+
+    async def run():
+        return await asyncio.gather(
+            model.chat([{"role": "user", "content": "claim A"}]),
+            model.chat([{"role": "user", "content": "claim B"}])
+        )
+
+    first, second = asyncio.run(run())
+    assert client.calls == 2
+    assert first != second
+    print("✅ Distinct prompts issue distinct requests")
+
+def test_errors_propagate_to_all_waiters():
+    """Test that a failed shared request fails every waiter and is not retained"""
+    print("=== Testing Error Propagation ===")
+
+    client = SlowClient(fail=True)
+    coalescer = RequestCoalescer()
+    model = OpenAIChatCompletionsModel("phi4-mini", client, coalescer=coalescer)
+    messages = [{"role": "user", "content": "fail me"}]
+
+    async def run():
+        return await asyncio.gather(*[model.chat(messages) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert client.calls == 1
+    assert coalescer.in_flight_count() == 0
+    print("✅ Errors shared and in-flight table cleaned up")
+
+def test_cancelled_leader_does_not_cancel_followers():
+    """Test that cancelling the first caller leaves the shared request running"""
+    print("=== Testing Leader Cancellation ===")
+
+    client = SlowClient(delay=0.05)
+    coalescer = RequestCoalescer()
+    model = OpenAIChatCompletionsModel("phi4-mini", client, coalescer=coalescer)
+    messages = [{"role": "user", "content": "shared"}]
+
+    async def run():
+        leader = asyncio.create_task(model.chat(messages))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(model.chat(messages))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    result = asyncio.run(run())
+    assert result == "interpretation of shared"
+    assert client.calls == 1
+    print("✅ Follower received result after leader cancellation")
+
+def test_each_caller_keeps_its_own_deadline():
+    """Test that a follower outlives a leader's short budget and abandoned requests are cancelled"""
+    print("=== Testing Per-Caller Deadlines ===")
+
+    client = SlowClient(delay=0.1)
+    coalescer = RequestCoalescer()
+    model = OpenAIChatCompletionsModel("phi4-mini", client, coalescer=coalescer)
+    messages = [{"role": "user", "content": "budgets"}]
+
+    async def call(budget):
+        with deadline_scope(budget):
+            return await model.chat(messages)
+
+    async def run():
+        return await asyncio.gather(call(0.02), call(1.0), return_exceptions=True)
+
+    leader, follower = asyncio.run(run())
+    assert isinstance(leader, DeadlineExceededError)
+    assert follower == "interpretation of budgets"
+    assert client.calls == 1
+
+    async def abandon():
+        results = await asyncio.gather(call(0.02), call(0.03), return_exceptions=True)
+        await asyncio.sleep(0)
+        return results
+
+    results = asyncio.run(abandon())
+    assert all(isinstance(r, DeadlineExceededError) for r in results)
+    assert coalescer.in_flight_count() == 0
+    print("✅ Follower got the shared result after the leader's deadline passed")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.2 Request Coalescing Tests\n")
+    test_concurrent_identical_prompts_share_one_call()
+    test_different_prompts_not_coalesced()
+    test_errors_propagate_to_all_waiters()
+    test_cancelled_leader_does_not_cancel_followers()
+    test_each_caller_keeps_its_own_deadline()
+    print("\n✅ All v2.2 tests completed!")
@@ -0,0 +1,124 @@
+"""Test v2.20: Memoized, Concurrent and Combined Claim Extraction Stages"""
+
+import asyncio
+import os
+import logging
+import time
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.claims.advanced_extractor import AdvancedClaimExtractor, extraction_scope
+from src.llm.fake_server import fake_completion_text
+
+# Configure logging for v2.20 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MESSAGE = "The new COVID-19 vaccine is 100% safe for everyone. Natural immunity is better than any vaccine."
+
+def offline_extractor(mode=None, combined_response=None, delay=0.05):
+    """AdvancedClaimExtractor whose stage agents answer like the offline stand-in server, counting calls"""
+    extractor = AdvancedClaimExtractor(mode=mode)
+    calls = {"explicit": 0, "implicit": 0, "context": 0, "combined": 0}
+
+    def stand_in(stage, agent, response=None):
+        async def run(prompt):
+            calls[stage] += 1
+            await asyncio.sleep(delay)
+            if isinstance(response, Exception):
+                raise response
+            return response if response is not None else fake_completion_text(agent.build_messages(prompt))
+        return run
+
+    async def extract_health_claims(text):
+        calls["explicit"] += 1
+        await asyncio.sleep(delay)
+        response = fake_completion_text([{'role': 'user', 'content': f'Extract health claims from: "{text}" CLAIM:'}])
+        claims = extractor.parse_claim_lines(response)
+        return '\n'.join(f"CLAIM: {claim}" for claim in extractor.merge_claims(extractor.extract_pattern_claims(text), claims))
+
+    extractor.extract_health_claims = extract_health_claims
+    extractor.implicit_claim_agent.run = stand_in("implicit", extractor.implicit_claim_agent)
+    extractor.context_agent.run = stand_in("context", extractor.context_agent)
+    extractor.combined_agent.run = stand_in("combined", extractor.combined_agent, combined_response)
+    return extractor, calls
+
+def test_stages_memoized_and_concurrent():
+    """Each stage runs once per message within an analysis, and the three stages overlap"""
+    print("=== Testing Memoized Concurrent Stages ===")
+    extractor, calls = offline_extractor(delay=0.1)
+
+    async def analysis():
+        with extraction_scope():
+            start = time.perf_counter()
+            base, advanced = await asyncio.gather(extractor.extract_claims(MESSAGE),
+                                                  extractor.extract_claims_advanced(MESSAGE))
+            again = await extractor.extract_claims_advanced(MESSAGE)
+            return base, advanced, again, time.perf_counter() - start
+
+    base, advanced, again, elapsed = asyncio.run(analysis())
+    assert calls == {"explicit": 1, "implicit": 1, "context": 1, "combined": 0}, calls
+    assert elapsed < 0.25, elapsed
+    assert advanced == again
+
+    # Explicit claims are returned as claim dicts, the same ones the base result lists
+    assert advanced['explicit_claims'], "explicit claims missing"
+    assert all(isinstance(claim, dict) and claim['text'] and not claim['is_implicit'] for claim in advanced['explicit_claims'])
+    assert [claim['text'] for claim in advanced['explicit_claims']] == extractor.parse_claim_lines(base['explicit_claims'])
+    assert advanced['context_analysis'] == base['context_analysis']
+
+    # Without a surrounding scope each call is its own analysis
+    asyncio.run(extractor.extract_claims_advanced(MESSAGE))
+    assert calls["implicit"] == 2
+    print(f"✅ One call per stage, {elapsed:.2f}s for three overlapping stages")
+
+def test_combined_mode_single_call():
+    """Combined mode gets explicit claims, implicit claims and context from one LLM call"""
+    print("=== Testing Combined Mode ===")
+    separate_extractor, _ = offline_extractor()
+    separate = asyncio.run(separate_extractor.extract_claims_advanced(MESSAGE))
+
+    extractor, calls = offline_extractor(mode="combined")
+    combined = asyncio.run(extractor.extract_claims_advanced(MESSAGE))
+    assert calls == {"explicit": 0, "implicit": 0, "context": 0, "combined": 1}, calls
+    assert combined['extraction_mode'] == 'combined'
+    assert [c['text'] for c in combined['explicit_claims']] == [c['text'] for c in separate['explicit_claims']]
+    assert combined['implicit_claims'] and combined['implicit_claims'][0]['is_implicit']
+    assert combined['context_analysis']['raw_analysis'] == separate['context_analysis']['raw_analysis']
+
+    # Per-call override back to separate stages
+    asyncio.run(extractor.extract_claims_advanced(MESSAGE, {'claim_extraction_mode': 'separate'}))
+    assert calls["implicit"] == 1 and calls["combined"] == 1
+    print("✅ Combined mode: 1 call for all three stages")
+
+def test_missing_sections_fall_back():
+    """Sections missing from the combined response, or a failed call, fall back to the separate stages"""
+    print("=== Testing Combined Mode Fallback ===")
+    response = ("=== EXPLICIT CLAIMS ===\nCLAIM: Booster doses stop transmission\n\n"
+                "=== CONTEXT ANALYSIS ===\nUses fear and urgent framing aimed at parents.")
+    extractor, calls = offline_extractor(mode="combined", combined_response=response)
+    result = asyncio.run(extractor.extract_claims_advanced(MESSAGE))
+    assert calls == {"explicit": 0, "implicit": 1, "context": 0, "combined": 1}, calls
+    assert "Booster doses stop transmission" in [c['text'] for c in result['explicit_claims']]
+    assert result['context_analysis']['urgency_detected'] and result['context_analysis']['emotional_language']
+
+    extractor, calls = offline_extractor(mode="combined", combined_response=RuntimeError("model down"))
+    result = asyncio.run(extractor.extract_claims_advanced(MESSAGE))
+    assert calls == {"explicit": 1, "implicit": 1, "context": 1, "combined": 1}, calls
+    assert result['explicit_claims']
+
+    for bad in (lambda: AdvancedClaimExtractor(mode="single"),
+                lambda: asyncio.run(extractor.extract_claims_advanced(MESSAGE, {'claim_extraction_mode': 'single'}))):
+        try:
+            bad()
+            raise AssertionError("unknown mode accepted")
+        except ValueError:
+            pass
+    print("✅ Missing sections and failed combined calls fall back per stage")
+
+if __name__ == "__main__":
+    test_stages_memoized_and_concurrent()
+    test_combined_mode_single_call()
+    test_missing_sections_fall_back()
+    print("\n🎉 All v2.20 tests passed!")
@@ -0,0 +1,251 @@
+"""Test v2.21: Whole-Analysis Result Cache"""
+
+import asyncio
+import os
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.error_handler import CircuitOpenError, is_agent_failure
+from src.orchestration.analysis_cache import AnalysisCache, normalize_message
+from src.orchestration.pipeline import PrebunkerPipeline
+from src.personas import interpreter as interpreter_module
+from src.personas.base_personas import STANDARD_PERSONAS
+
+# Configure logging for v2.21 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MESSAGE = "Vaccines are 100% safe for everyone. This supplement cures cancer completely."
+OPTIONS = {'detailed_logging': False, 'include_countermeasures': False}
+
+class DownClient:
+    """Stand-in for AsyncOpenAI whose server is unreachable"""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, **params):
+        raise ConnectionError("server down")
+
+def down_agent():
+    return Agent("DownAgent", "Answer.", model=OpenAIChatCompletionsModel("phi4-mini", DownClient()))
+
+def cached_pipeline(cache=None):
+    """PrebunkerPipeline with an analysis cache and stand-in LLM stages that count calls"""
+    pipeline = PrebunkerPipeline(personas=STANDARD_PERSONAS[:2], analysis_cache=cache or AnalysisCache())
+    pipeline.circuit_breaker = None  # earlier tests may have opened the shared LLM circuit
+    calls = {"personas": 0, "evidence": 0}
+
+    async def personas(message_text, mode=None):
+        calls["personas"] += 1
+        return [{"persona": "Skeptic", "potential_misreading": ["distrust"]}]
+
+    async def validate(claim_text, topic_area=None, use_llm=True):
+        calls["evidence"] += 1
+        return {"claim": claim_text, "validation_status": "supported", "confidence_score": 0.8}
+
+    pipeline.persona_interpreter.interpret_message = personas
+    pipeline.evidence_validator.validate_claim = validate
+    return pipeline, calls
+
+def test_repeat_submissions_served_from_cache():
+    """The same draft (up to whitespace) is analyzed once; result-changing options miss"""
+    print("=== Testing Repeat Submissions ===")
+    pipeline, calls = cached_pipeline()
+
+    first = asyncio.run(pipeline.process_message(MESSAGE, OPTIONS))
+    assert first['pipeline_status'] == 'completed_success' and 'analysis_cache' not in first
+    first_calls = dict(calls)
+
+    again = asyncio.run(pipeline.process_message(f"  {MESSAGE.replace(' ', '  ')}\n", {**OPTIONS, 'budget_seconds': 30}))
+    assert calls == first_calls
+    assert again['analysis_cache']['hit'] and again['analysis_cache']['tier'] == 'memory'
+    assert again['claims'] == first['claims'] and again['risk_report'] == first['risk_report']
+    assert again['llm_usage']['calls'] == 0
+
+    # Callers mutating a result do not change the cached copy
+    again['claims'].clear()
+    assert asyncio.run(pipeline.process_message(MESSAGE, OPTIONS))['claims'] == first['claims']
+
+    asyncio.run(pipeline.process_message(MESSAGE, {**OPTIONS, 'persona_mode': 'panel'}))
+    asyncio.run(pipeline.process_message(MESSAGE, {**OPTIONS, 'use_analysis_cache': False}))
+    assert calls["personas"] == 3
+    assert normalize_message("a  b\n") == "a b"
+    print(f"✅ Cache stats: {pipeline.analysis_cache.get_stats()}")
+
+def test_failed_model_calls_not_cached():
+    """An analysis whose stage output came from a failed model call is returned but never stored"""
+    print("=== Testing Failed Calls Not Cached ===")
+    pipeline, calls = cached_pipeline()
+    agent = down_agent()
+
+    async def personas(message_text, mode=None):
+        calls["personas"] += 1
+        interpretation = await agent.run(message_text)
+        return [{"persona": "Skeptic", "interpretation": interpretation, "potential_misreading": []}]
+
+    pipeline.persona_interpreter.interpret_message = personas
+    for _ in range(2):
+        result = asyncio.run(pipeline.process_message(MESSAGE, OPTIONS))
+        assert result['pipeline_status'] == 'completed_success' and 'analysis_cache' not in result
+        assert is_agent_failure(result['persona_interpretations'][0]['interpretation'])
+    assert calls["personas"] == 2
+    assert pipeline.analysis_cache.get_stats()['sets'] == 0
+    print("✅ Analyses with failed model calls rerun")
+
+def test_component_changes_invalidate():
+    """Lexicon, source, prompt and persona changes never serve an analysis computed before them"""
+    print("=== Testing Component Invalidation ===")
+    pipeline, calls = cached_pipeline()
+    asyncio.run(pipeline.process_message(MESSAGE, OPTIONS))
+
+    def changed(update):
+        before = calls["personas"]
+        update()
+        result = asyncio.run(pipeline.process_message(MESSAGE, OPTIONS))
+        assert 'analysis_cache' not in result
+        assert calls["personas"] == before + 1
+        assert 'analysis_cache' in asyncio.run(pipeline.process_message(MESSAGE, OPTIONS))
+
+    changed(lambda: pipeline.claim_extractor.claim_patterns.append(r'miracle (\w+)'))
+    changed(lambda: setattr(pipeline.evidence_validator.searcher, 'sources', pipeline.evidence_validator.searcher.sources[:-1]))
+    agent = pipeline.evidence_validator.validation_agent
+    changed(lambda: setattr(agent, 'instructions', agent.instructions + "\nCite the source name."))
+    assert pipeline.analysis_cache.get_stats()['invalidations'] == 3
+
+    # A different persona set is a different key, not a component change
+    changed(lambda: setattr(pipeline.persona_interpreter, 'personas', STANDARD_PERSONAS[:3]))
+    assert pipeline.analysis_cache.get_stats()['invalidations'] == 3
+
+    pipeline.analysis_cache.invalidate()
+    assert 'analysis_cache' not in asyncio.run(pipeline.process_message(MESSAGE, OPTIONS))
+    print("✅ Lexicon, source, prompt and persona changes miss")
+
+def test_panel_request_keeps_cache():
+    """Building the persona panel agent on the first panel request does not change the prompt version"""
+    print("=== Testing Panel Agent and Prompt Version ===")
+    pipeline, calls = cached_pipeline()
+    message = "Vaccination is always safe for children."
+    asyncio.run(pipeline.process_message(message, OPTIONS))
+    versions = pipeline._component_versions()
+
+    # The real panel path, with a stand-in panel agent response
+    create_panel_agent = interpreter_module.create_panel_agent
+
+    def stand_in_panel(personas):
+        agent = create_panel_agent(personas)
+
+        async def run(prompt):
+            return "\n".join(f"### {persona.name}\nI have questions about this." for persona in personas)
+        agent.run = run
+        return agent
+
+    del pipeline.persona_interpreter.interpret_message
+    interpreter_module.create_panel_agent = stand_in_panel
+    try:
+        panel = asyncio.run(pipeline.process_message(message, {**OPTIONS, 'persona_mode': 'panel'}))
+    finally:
+        interpreter_module.create_panel_agent = create_panel_agent
+    assert pipeline.persona_interpreter._panel_agent is not None
+    assert len(panel['persona_interpretations']) == 2
+
+    assert pipeline._component_versions() == versions
+    assert 'analysis_cache' in asyncio.run(pipeline.process_message(message, OPTIONS))
+    assert pipeline.analysis_cache.get_stats()['invalidations'] == 0
+    print("✅ Cached analyses survive the first panel request")
+
+def test_persistent_tier(tmp_path):
+    """Analyses survive a restart; stored component versions invalidate them after an update"""
+    print("=== Testing Persistent Tier ===")
+    path = str(tmp_path / "analyses.sqlite")
+    pipeline, calls = cached_pipeline(AnalysisCache(disk_path=path))
+    asyncio.run(pipeline.process_message(MESSAGE, OPTIONS))
+
+    restarted, restarted_calls = cached_pipeline(AnalysisCache(disk_path=path))
+    result = asyncio.run(restarted.process_message(MESSAGE, OPTIONS))
+    assert result['analysis_cache']['tier'] == 'disk'
+    assert restarted_calls["personas"] == 0
+
+    updated, _ = cached_pipeline(AnalysisCache(disk_path=path))
+    updated.claim_extractor.claim_patterns.append(r'miracle (\w+)')
+    asyncio.run(updated.process_message("Another message about vaccines being 100% safe.", OPTIONS))
+    stats = updated.analysis_cache.get_stats()
+    assert stats['invalidations'] == 1 and stats['disk_entries'] == 1
+    print(f"✅ Disk tier: {stats['disk_entries']} entry after invalidation")
+
+def test_complete_system_cache():
+    """CompletePrebunkerSystem serves completed analyses and never stores partial ones"""
+    print("=== Testing Complete System Cache ===")
+    from src.integration.complete_pipeline import CompletePrebunkerSystem
+
+    system = CompletePrebunkerSystem(analysis_cache=AnalysisCache())
+    calls = []
+
+    async def extract(message, options):
+        calls.append(message)
+        if options.get('slow'):
+            await asyncio.sleep(1)
+        return {'explicit_claims': [{'text': "Vaccines are 100% safe for everyone"}], 'implicit_claims': []}
+
+    async def personas(message):
+        return []
+
+    async def validate(claim_text, topic_area=None, use_llm=True):
+        return {"claim": claim_text, "validation_status": "supported", "confidence_score": 0.8}
+
+    async def risk_report(pipeline_result):
+        return {'overall_risk_assessment': 'low_risk', 'overall_risk_score': 0.2}
+
+    async def custom_prebunk(claim, persona_concerns, evidence_validation):
+        return {'type': 'custom_prebunk', 'content': "Talk to your doctor about vaccine safety.", 'confidence': 0.7}
+
+    system.advanced_extractor = SimpleNamespace(extract_claims_advanced=extract)
+    system.persona_interpreter = SimpleNamespace(interpret_message=personas, personas=[])
+    system.evidence_validator.validate_claim = validate
+    system.risk_reporter = SimpleNamespace(compile_risk_report=risk_report)
+    system.countermeasure_generator._generate_custom_prebunk = custom_prebunk
+
+    first = asyncio.run(system.analyze_health_communication(MESSAGE))
+    second = asyncio.run(system.analyze_health_communication(MESSAGE))
+    assert first['status'] == 'completed' and len(calls) == 1
+    assert second['analysis_cache']['hit'] and second['analysis_id'] == first['analysis_id']
+
+    partial = asyncio.run(system.analyze_health_communication(MESSAGE, {'slow': True, 'budget_seconds': 0.1}))
+    assert partial['partial']
+    asyncio.run(system.analyze_health_communication(MESSAGE, {'slow': True, 'budget_seconds': 0.1}))
+    assert len(calls) == 3
+    assert system.get_system_status()['analysis_cache']['hits'] == 1
+
+    # Failed or circuit-rejected model calls behind a stage: returned, never stored
+    agent = down_agent()
+
+    async def failed_risk_report(pipeline_result):
+        return {'overall_risk_assessment': 'low_risk', 'enhanced_analysis': await agent.run("report")}
+
+    async def rejected_personas(message):
+        raise CircuitOpenError("LLM circuit open")
+
+    system.risk_reporter = SimpleNamespace(compile_risk_report=failed_risk_report)
+    failed = asyncio.run(system.analyze_health_communication(MESSAGE, {'report': 'failed'}))
+    assert failed['status'] == 'completed' and not failed['degraded']
+    system.risk_reporter = SimpleNamespace(compile_risk_report=risk_report)
+    system.persona_interpreter = SimpleNamespace(interpret_message=rejected_personas, personas=[])
+    degraded = asyncio.run(system.analyze_health_communication(MESSAGE, {'report': 'degraded'}))
+    assert degraded['degraded'] and degraded['degraded_stages'] == ['persona_interpretations']
+    assert system.analysis_cache.get_stats()['sets'] == 1
+    print("✅ Complete system: repeats served; partial, degraded and failed analyses rerun")
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_repeat_submissions_served_from_cache()
+    test_failed_model_calls_not_cached()
+    test_component_changes_invalidate()
+    test_panel_request_keeps_cache()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_persistent_tier(pathlib.Path(tmp))
+    test_complete_system_cache()
+    print("\n🎉 All v2.21 tests passed!")
@@ -0,0 +1,136 @@
+"""Test v2.22: Incremental Sentence-Level Re-Analysis"""
+
+import asyncio
+import os
+import logging
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.error_handler import AgentFailure
+from src.orchestration.incremental import segment_sentences, sentence_hash
+from src.orchestration.pipeline import PrebunkerPipeline
+from src.personas.base_personas import STANDARD_PERSONAS
+
+# Configure logging for v2.22 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DRAFT = ("Vaccines are 100% safe for everyone. This supplement cures cancer completely. "
+         "Antibiotics always treat viral infections. Wash your hands often.")
+EDITED = DRAFT.replace("This supplement cures cancer completely.", "This supplement never helps anyone at all.")
+OPTIONS = {'detailed_logging': False, 'incremental': True}
+
+def counting_pipeline():
+    """PrebunkerPipeline with stand-in LLM stages that record the claims they were asked about"""
+    pipeline = PrebunkerPipeline(personas=STANDARD_PERSONAS[:2])
+    pipeline.circuit_breaker = None  # earlier tests may have opened the shared LLM circuit
+    calls = {"personas": 0, "evidence": [], "countermeasures": []}
+
+    async def personas(message_text, mode=None):
+        calls["personas"] += 1
+        return [{"persona": "Skeptic", "potential_misreading": ["distrust"]}]
+
+    async def validate(claim_text, topic_area=None, use_llm=True):
+        calls["evidence"].append(claim_text)
+        return {"claim": claim_text, "validation_status": "limited_support", "confidence_score": 0.5}
+
+    async def countermeasures(claim_text, persona_concerns, evidence, use_llm=True):
+        calls["countermeasures"].append(claim_text)
+        return [{"type": "prebunk", "content": f"Context for {claim_text[:20]}", "effectiveness_score": 0.7}]
+
+    pipeline.persona_interpreter.interpret_message = personas
+    pipeline.evidence_validator.validate_claim = validate
+    pipeline.countermeasure_generator.generate_countermeasures = countermeasures
+    return pipeline, calls
+
+def test_segmentation():
+    """Sentences are split on terminators with their positions; hashes ignore whitespace differences"""
+    print("=== Testing Sentence Segmentation ===")
+    spans = segment_sentences("  First claim here.  Second one!\nThird without end")
+    assert [sentence for _, _, sentence in spans] == ["First claim here.", "Second one!", "Third without end"]
+    text = "  First claim here.  Second one!\nThird without end"
+    assert all(text[start:end] == sentence for start, end, sentence in spans)
+    assert sentence_hash("Second  one!") == sentence_hash(" Second one! ")
+    print("✅ Sentences segmented and hashed")
+
+def test_edited_sentence_recomputed_only():
+    """After one sentence changes, only its claims go back to the evidence and countermeasure stages"""
+    print("=== Testing Incremental Re-Analysis ===")
+    pipeline, calls = counting_pipeline()
+
+    first = asyncio.run(pipeline.process_message(DRAFT, OPTIONS))
+    assert first['pipeline_status'] == 'completed_success'
+    assert first['incremental']['reused_claims'] == []
+    assert first['incremental']['changed_sentences'] == [0, 1, 2, 3]
+    first_evidence = len(calls["evidence"])
+
+    second = asyncio.run(pipeline.process_message(EDITED, OPTIONS))
+    report = second['incremental']
+    assert report['changed_sentences'] == [1]
+    assert report['recomputed_claims'] == ["This supplement never helps anyone at all"]
+    assert len(report['reused_claims']) == len(second['claims']) - 1
+    assert report['reused_results']['evidence'] == len(report['reused_claims'])
+    assert 'personas' in report['recomputed_stages']
+
+    # Only the edited claim reached the evidence and countermeasure stages; personas ran again
+    assert calls["evidence"][first_evidence:] == ["This supplement never helps anyone at all"]
+    assert calls["countermeasures"].count("Vaccines are 100% safe for everyone") == 1
+    assert calls["personas"] == 2
+
+    # Reused per-claim results match the first analysis
+    def by_claim(result, section, key):
+        return {entry[key]: entry for entry in result[section]}
+    for claim_text in report['reused_claims']:
+        for section, key in (('evidence_validations', 'claim'), ('countermeasures', 'claim')):
+            assert by_claim(second, section, key).get(claim_text) == by_claim(first, section, key).get(claim_text)
+        assert by_claim(second['risk_analysis'], 'claim_risk_scores', 'claim_text')[claim_text] == \
+            by_claim(first['risk_analysis'], 'claim_risk_scores', 'claim_text')[claim_text]
+    print(f"✅ Reused {len(report['reused_claims'])} claims, recomputed {report['recomputed_claims']}")
+
+def test_incomplete_results_not_reused():
+    """Results computed without countermeasures are not reused for a full analysis"""
+    print("=== Testing Incremental Storage Rules ===")
+    pipeline, calls = counting_pipeline()
+
+    asyncio.run(pipeline.process_message(DRAFT, {**OPTIONS, 'include_countermeasures': False}))
+    result = asyncio.run(pipeline.process_message(DRAFT, OPTIONS))
+    assert result['incremental']['reused_claims'] == []
+
+    again = asyncio.run(pipeline.process_message(DRAFT, OPTIONS))
+    assert len(again['incremental']['reused_claims']) == len(again['claims'])
+    assert again['incremental']['changed_sentences'] == []
+
+    # Without the option nothing is reused or reported
+    plain = asyncio.run(pipeline.process_message(DRAFT, {'detailed_logging': False}))
+    assert 'incremental' not in plain
+    print("✅ Only complete per-claim results are reused")
+
+def test_failed_model_output_not_reused():
+    """Claims whose evidence or countermeasures came from a failed model call are analyzed again"""
+    print("=== Testing Failed Output Not Reused ===")
+    pipeline, calls = counting_pipeline()
+    failing = {"Vaccines are 100% safe for everyone"}
+
+    async def validate(claim_text, topic_area=None, use_llm=True):
+        calls["evidence"].append(claim_text)
+        assessment = AgentFailure("Agent error: server down") if claim_text in failing else "Supported by evidence"
+        return {"claim": claim_text, "validation_status": "limited_support", "confidence_score": 0.5,
+                "validation_assessment": assessment}
+
+    pipeline.evidence_validator.validate_claim = validate
+    first = asyncio.run(pipeline.process_message(DRAFT, OPTIONS))
+    assert first['pipeline_status'] == 'completed_success'
+
+    failing.clear()
+    again = asyncio.run(pipeline.process_message(DRAFT, OPTIONS))
+    assert again['incremental']['recomputed_claims'] == ["Vaccines are 100% safe for everyone"]
+    assert len(again['incremental']['reused_claims']) == len(again['claims']) - 1
+    print("✅ Failed model output recomputed")
+
+if __name__ == "__main__":
+    test_segmentation()
+    test_edited_sentence_recomputed_only()
+    test_incomplete_results_not_reused()
+    test_failed_model_output_not_reused()
+    print("\n🎉 All v2.22 tests passed!")
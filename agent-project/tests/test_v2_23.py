@@ -0,0 +1,170 @@
+"""Test v2.23: Canonical-Claim Registry for Near-Duplicate Claims"""
+
+import asyncio
+import os
+import logging
+import random
+import time
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.claims.claim_registry import ClaimRegistry, claim_guard, normalize_claim
+from src.error_handler import AgentFailure
+from src.evidence.validator import EvidenceValidator
+from src.countermeasures.generator import CountermeasureGenerator
+
+# Configure logging for v2.23 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLAIM = "Vaccines are 100% safe for everyone"
+VARIANTS = ["vaccines are 100 percent safe for everyone!!", "The vaccines are 100% safe for everyone"]
+OPPOSITES = [
+    ("Masks are effective at stopping the spread of flu", "Masks are ineffective at stopping the spread of flu"),
+    ("Vitamin C cures the common cold", "Vitamin D cures the common cold"),
+    ("Vaccines are safe for pregnant women", "Vaccines are unsafe for pregnant women"),
+    ("Antibiotics treat bacterial infections", "Antibiotics treat viral infections"),
+    ("Insulin therapy controls diabetes", "Insulin therapy controls asthma")
+]
+NEGATED = "Vaccines are not 100% safe for everyone"
+
+def counting_agent(agent, prompts):
+    """Replace an agent's LLM call with one that records its prompts"""
+    async def run(prompt):
+        prompts.append(prompt)
+        if "[CLAIM 1]" in prompt:
+            return "\n".join(f"[CLAIM {n}]\nVerdict: Partially supported\nAssessment: Medium confidence"
+                             for n in range(1, prompt.count('"') // 2 + 1))
+        return "Partially supported. Medium confidence."
+    agent.run = run
+
+def test_near_duplicate_lookup():
+    """Reworded claims match their canonical claim; negation, numbers and unrelated claims do not"""
+    print("=== Testing Near-Duplicate Lookup ===")
+    registry = ClaimRegistry()
+    registry.record(CLAIM, 'validation', {'validation_status': 'limited_support'})
+
+    for variant in [CLAIM] + VARIANTS:
+        match = registry.lookup(variant, 'validation')
+        assert match is not None and match.canonical_claim == CLAIM, variant
+        assert match.value == {'validation_status': 'limited_support'}
+    assert registry.lookup(CLAIM, 'prebunk') is None
+    for other in (NEGATED, "Vaccines are 90% safe for everyone", "Vitamin C cures the common cold"):
+        assert registry.lookup(other, 'validation') is None, other
+    assert claim_guard(normalize_claim("It doesn't cause autism"))[0] == 1
+
+    # Recording a variant adds to the canonical claim instead of registering a new one
+    registry.record(VARIANTS[1], 'prebunk', {'content': "Talk to your doctor."})
+    assert registry.get_stats()['canonical_claims'] == 1
+    assert registry.lookup(VARIANTS[0], 'prebunk').value == {'content': "Talk to your doctor."}
+
+    stats = registry.get_stats()
+    assert stats['lookups'] == 8 and stats['matches'] == 4 and stats['hit_rate'] == 0.5, stats
+    assert ClaimRegistry().get_stats()['hit_rate'] == 0.0
+
+    # Lookups stay sub-millisecond with thousands of registered claims
+    rng = random.Random(23)
+    words = ("vaccine vaccines flu covid measles autism cancer cure cures supplement vitamin daily "
+             "dose safe causes prevents heart children adults immune natural herbal detox").split()
+    for n in range(3000):
+        registry.record(" ".join(rng.choice(words) for _ in range(6)) + f" study {n}", 'validation', {'n': n})
+    queries = [" ".join(rng.choice(words) for _ in range(6)) for _ in range(300)]
+    start = time.perf_counter()
+    for query in queries:
+        registry.lookup(query, 'validation')
+    per_lookup = (time.perf_counter() - start) / len(queries)
+    assert per_lookup < 0.005, per_lookup
+    print(f"✅ {per_lookup * 1000:.3f} ms per lookup over {registry.get_stats()['canonical_claims']} claims")
+
+def test_opposite_claims_never_match():
+    """Antonyms, swapped entities and different medical terms are rejected however similar the text"""
+    print("=== Testing Opposite Claims ===")
+    for claim, opposite in OPPOSITES:
+        registry = ClaimRegistry(threshold=0.0)
+        registry.record(claim, 'validation', {'validation_status': 'supported'})
+        assert registry.lookup(opposite, 'validation') is None, opposite
+        assert registry.lookup(claim.upper() + "!", 'validation') is not None, claim
+    assert ClaimRegistry().threshold == 0.85
+    print(f"✅ {len(OPPOSITES)} opposite claims kept apart")
+
+def test_validator_and_generator_reuse():
+    """Near-duplicate claims reuse the registered validation and custom prebunk instead of calling the LLM"""
+    print("=== Testing Validation and Prebunk Reuse ===")
+    registry = ClaimRegistry()
+    validator = EvidenceValidator(registry=registry)
+    generator = CountermeasureGenerator(registry=registry)
+    validations, prebunks = [], []
+    counting_agent(validator.validation_agent, validations)
+    counting_agent(generator.prebunk_agent, prebunks)
+
+    first = asyncio.run(validator.validate_claim(CLAIM))
+    reused = asyncio.run(validator.validate_claim(VARIANTS[0]))
+    assert len(validations) == 1
+    assert reused['claim'] == VARIANTS[0] and reused['claim_registry']['canonical_claim'] == CLAIM
+    assert reused['validation_status'] == first['validation_status']
+    asyncio.run(validator.validate_claim(NEGATED))
+    assert len(validations) == 2
+
+    # Batched validation leaves registered near duplicates out of the prompt
+    batch = asyncio.run(validator.validate_claims([VARIANTS[1], "Fluoride in water lowers IQ"], batch_size=2))
+    assert len(validations) == 3 and VARIANTS[1] not in validations[-1]
+    assert 'claim_registry' in batch[0] and 'claim_registry' not in batch[1]
+    assert 'claim_registry' in asyncio.run(validator.validate_claim("fluoride in water lowers IQ!"))
+
+    prebunk = asyncio.run(generator._generate_custom_prebunk(CLAIM, ["distrust"], first))
+    again = asyncio.run(generator._generate_custom_prebunk(VARIANTS[1], ["fear"], reused))
+    assert len(prebunks) == 1
+    assert again['content'] == prebunk['content'] and again['claim_registry']['canonical_claim'] == CLAIM
+
+    # Failed LLM calls are never registered
+    async def failing(prompt):
+        raise RuntimeError("model down")
+    validator.validation_agent.run = failing
+    asyncio.run(validator.validate_claim("Garlic cures high blood pressure"))
+    assert registry.lookup("Garlic cures high blood pressure", 'validation') is None
+
+    # Neither are the "Agent error: ..." outputs Agent.run returns for a failed call
+    async def agent_error(prompt):
+        return AgentFailure("Agent error: model down", "test", "RuntimeError")
+    validator.validation_agent.run = agent_error
+    generator.prebunk_agent.run = agent_error
+    claims = ["Onions cure the flu", "Bleach cures measles"]
+    asyncio.run(validator.validate_claim(claims[0]))
+    asyncio.run(validator.validate_claims(claims[1:] + ["Sugar causes hyperactivity"], batch_size=2))
+    asyncio.run(generator._generate_custom_prebunk(claims[0], ["fear"], first))
+    for claim in claims:
+        assert registry.lookup(claim, 'validation') is None and registry.lookup(claim, 'prebunk') is None, claim
+
+    print(f"✅ {registry.get_stats()['matches']} registry matches replaced LLM calls")
+
+def test_persistence_and_eviction(tmp_path):
+    """Canonical claims survive a restart; expired and evicted claims are dropped from the index"""
+    print("=== Testing Persistence and Eviction ===")
+    path = str(tmp_path / "claims.sqlite")
+    ClaimRegistry(disk_path=path).record(CLAIM, 'validation', {'validation_status': 'supported'})
+
+    restarted = ClaimRegistry(disk_path=path)
+    match = restarted.lookup(VARIANTS[0], 'validation')
+    assert match is not None and match.value == {'validation_status': 'supported'}
+    assert restarted.get_stats()['disk_hits'] == 1
+
+    expired = ClaimRegistry(disk_path=path, ttl_seconds=0)
+    assert expired.lookup(CLAIM, 'validation') is None
+    assert expired.get_stats()['canonical_claims'] == 0
+
+    small = ClaimRegistry(max_memory_entries=2)
+    for claim in (CLAIM, "Vitamin C cures the common cold", "Fluoride in water lowers IQ"):
+        small.record(claim, 'validation', {'claim': claim})
+    assert small.lookup(CLAIM, 'validation') is None
+    assert small.get_stats()['canonical_claims'] == 2
+    print("✅ Disk tier reloaded, TTL and LRU eviction applied")
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_near_duplicate_lookup()
+    test_opposite_claims_never_match()
+    test_validator_and_generator_reuse()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_persistence_and_eviction(pathlib.Path(tmp))
+    print("\n🎉 All v2.23 tests passed!")
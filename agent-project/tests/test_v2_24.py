@@ -0,0 +1,115 @@
+"""Test v2.24: Compiled Aho-Corasick Medical Term Matcher"""
+
+import logging
+import random
+import re
+import time
+
+from src.health_kb.medical_terms import (
+    MEDICAL_ENTITIES, extract_medical_entities, find_medical_entities, is_medical_term, medical_entity_matcher
+)
+from src.health_kb.term_matcher import TermMatcher
+from src.claims.risk_scorer import RiskScorer
+
+# Configure logging for v2.24 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def synthetic_lexicon(size, rng):
+    """MEDICAL_ENTITIES grown with made-up single- and two-word terms"""
+    syllables = ['ab', 'car', 'di', 'en', 'gen', 'hy', 'lo', 'ma', 'ne', 'pro', 'ra', 'ta', 'tox', 'vi', 'zo']
+    lexicon = {category: list(terms) for category, terms in MEDICAL_ENTITIES.items()}
+    seen = {term.lower() for terms in lexicon.values() for term in terms}
+    while len(seen) < size:
+        term = ' '.join(''.join(rng.choice(syllables) for _ in range(rng.randint(3, 5)))
+                        for _ in range(rng.choice([1, 1, 1, 2])))
+        if term not in seen:
+            seen.add(term)
+            lexicon[rng.choice(list(lexicon))].append(term)
+    return lexicon
+
+def boundary_patterns(lexicon):
+    """Reference matcher: one word-boundary regex per term"""
+    patterns = []
+    for category, terms in lexicon.items():
+        for term in terms:
+            flags = 0 if term.isupper() and term.isalpha() else re.IGNORECASE
+            start = r'(?<!\w)' if re.match(r'\w', term) else ''
+            end = r'(?:es|s)?(?!\w)' if re.search(r'\w$', term) else ''
+            patterns.append((category, term, re.compile(start + re.escape(term) + end, flags)))
+    return patterns
+
+def regex_categorize(patterns, text):
+    found = {}
+    for category, term, pattern in patterns:
+        if pattern.search(text):
+            found.setdefault(category, []).append(term)
+    return found
+
+def test_word_boundaries_and_spans():
+    """Terms match whole words (plurals allowed) and come back as categorized spans"""
+    print("=== Testing Word Boundaries and Spans ===")
+    text = "Ask the Mayo Clinic about Antibiotics; people who may worry can read the WHO guidance."
+    spans = [(match.term, match.category, text[match.start:match.end]) for match in find_medical_entities(text)]
+    assert spans == [
+        ('Mayo Clinic', 'organizations', 'Mayo Clinic'),
+        ('antibiotic', 'treatments', 'Antibiotics'),
+        ('may', 'uncertainty_markers', 'may'),
+        ('WHO', 'organizations', 'WHO')
+    ], spans
+
+    # Substrings of longer words no longer match
+    assert extract_medical_entities("Mayonnaise is a wholesome condiment") == {}
+    assert not is_medical_term("Mayonnaise is a wholesome condiment")
+    assert extract_medical_entities("COVID-19 vaccination is 100% effective") == {
+        'conditions': ['COVID-19'], 'treatments': ['vaccination'], 'risk_phrases': ['100% effective']
+    }
+
+    # Overlapping terms are all reported
+    matcher = TermMatcher({'a': ['blood', 'blood pressure', 'pressure']})
+    assert [m.term for m in matcher.find_all("High blood pressure")] == ['blood pressure', 'blood', 'pressure']
+    assert RiskScorer().calculate_confidence_score("Wholesome mayonnaise") < \
+        RiskScorer().calculate_confidence_score("Insulin therapy")
+    print(f"✅ Spans: {spans}")
+
+def test_lexicon_updates_recompile():
+    """Adding a term to MEDICAL_ENTITIES is picked up by the shared matcher"""
+    print("=== Testing Lexicon Updates ===")
+    before = medical_entity_matcher()
+    MEDICAL_ENTITIES['treatments'].append('statin')
+    try:
+        assert extract_medical_entities("Statins lower cholesterol")['treatments'] == ['statin']
+        assert medical_entity_matcher() is not before
+    finally:
+        MEDICAL_ENTITIES['treatments'].remove('statin')
+    assert 'treatments' not in extract_medical_entities("Statins lower cholesterol")
+    print("✅ Matcher rebuilt after a lexicon change")
+
+def test_large_lexicon_agrees_with_reference():
+    """At 10k+ terms the matcher agrees with a per-term boundary regex scan and scans in one pass"""
+    print("=== Testing 10k-Term Lexicon ===")
+    rng = random.Random(24)
+    lexicon = synthetic_lexicon(10000, rng)
+    terms = [term for category in lexicon.values() for term in category]
+    base = "Antibiotics may help most people with diabetes, says the CDC, but who knows"
+    messages = [' '.join([base] + [rng.choice(terms) + rng.choice(['', 's', 'x', '.']) for _ in range(4)])
+                for _ in range(40)]
+    matcher = TermMatcher(lexicon)
+    assert len(matcher) >= 10000
+
+    patterns = boundary_patterns(lexicon)
+    for text in messages[:10]:
+        assert matcher.categorize(text) == regex_categorize(patterns, text), text
+
+    start = time.perf_counter()
+    for text in messages:
+        matcher.categorize(text)
+    per_message = (time.perf_counter() - start) / len(messages)
+    assert per_message < 0.005, per_message
+    print(f"✅ {len(matcher)} terms, {per_message * 1e6:.0f} us per message")
+
+if __name__ == "__main__":
+    test_word_boundaries_and_spans()
+    test_lexicon_updates_recompile()
+    test_large_lexicon_agrees_with_reference()
+    print("\n🎉 All v2.24 tests passed!")
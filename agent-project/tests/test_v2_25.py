@@ -0,0 +1,113 @@
+"""Test v2.25: File-Backed Medical Lexicon with a Memory-Mapped Automaton"""
+
+import logging
+import os
+import random
+
+from src.health_kb import medical_terms
+from src.health_kb.lexicon_store import CompiledLexicon, compile_lexicon, load_lexicon, write_lexicon_source
+from src.health_kb.medical_terms import MEDICAL_ENTITIES, extract_medical_entities, is_medical_term, set_medical_lexicon
+from src.health_kb.term_matcher import TermMatcher
+from src.orchestration.analysis_cache import default_lexicons
+
+# Configure logging for v2.25 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TEXTS = [
+    "Ask the Mayo Clinic about Antibiotics; people who may worry can read the WHO guidance.",
+    "COVID-19 vaccinations are 100% effective and completely safe for anyone with asthma",
+    "Mayonnaise is a wholesome condiment",
+    "Insulin therapy might help; the CDC says diabetes medication usually works."
+]
+
+def test_compiled_matches_term_matcher(tmp_path):
+    """The compiled lexicon finds the same terms and spans as TermMatcher, and resolves synonyms"""
+    print("=== Testing Compiled Lexicon ===")
+    source = str(tmp_path / "entities.tsv")
+    write_lexicon_source(MEDICAL_ENTITIES, source, synonyms={'influenza': ['flu', 'the grippe'],
+                                                            'WHO': ['World Health Organization']})
+    lexicon = CompiledLexicon(compile_lexicon(source))
+    matcher = TermMatcher(MEDICAL_ENTITIES)
+    for text in TEXTS:
+        assert lexicon.categorize(text) == matcher.categorize(text), text
+        assert lexicon.find_all(text) == matcher.find_all(text), text
+
+    text = "The flu shot, says the World Health Organization, helps"
+    assert lexicon.categorize(text) == {'conditions': ['influenza'], 'organizations': ['WHO']}
+    assert [text[m.start:m.end] for m in lexicon.find_all(text)] == ['flu', 'World Health Organization']
+    assert len(lexicon) == sum(len(terms) for terms in MEDICAL_ENTITIES.values()) + 3
+
+    # A larger random lexicon exercises deep failure links
+    rng = random.Random(25)
+    letters = "abcde"
+    random_lexicon = {'a': list({''.join(rng.choice(letters) for _ in range(rng.randint(1, 6))) for _ in range(400)}),
+                      'b': list({''.join(rng.choice(letters) for _ in range(rng.randint(1, 4))) for _ in range(100)})}
+    random_source = str(tmp_path / "random.tsv")
+    write_lexicon_source(random_lexicon, random_source)
+    random_compiled = CompiledLexicon(compile_lexicon(random_source))
+    random_matcher = TermMatcher(random_lexicon)
+    for _ in range(50):
+        text = ' '.join(''.join(rng.choice(letters + ' ') for _ in range(rng.randint(1, 8))) for _ in range(6))
+        assert sorted(random_compiled.find_all(text), key=repr) == sorted(random_matcher.find_all(text), key=repr), text
+    lexicon.close()
+    random_compiled.close()
+    print(f"✅ {lexicon.header['nodes']} nodes; compiled and dict matchers agree")
+
+def test_loading_and_recompilation(tmp_path):
+    """Sources compile next to themselves and recompile only when changed; bad input is rejected"""
+    print("=== Testing Loading ===")
+    source = tmp_path / "drugs.tsv"
+    source.write_text("# drug names\ndrugs\tibuprofen\tadvil|motrin\ndrugs\tparacetamol\tacetaminophen\n", encoding='utf-8')
+    lexicon = load_lexicon(str(source))
+    compiled = str(source) + '.pblx'
+    assert lexicon.path == compiled and lexicon.header['terms'] == 2
+    assert lexicon.categorize("Take Advil or acetaminophen") == {'drugs': ['ibuprofen', 'paracetamol']}
+    version = lexicon.version
+    lexicon.close()
+
+    assert load_lexicon(compiled).version == version
+    mtime = os.path.getmtime(compiled)
+    assert load_lexicon(str(source)).version == version and os.path.getmtime(compiled) == mtime
+
+    source.write_text("drugs\tnaproxen\taleve\n", encoding='utf-8')
+    os.utime(source, (mtime + 10, mtime + 10))
+    updated = load_lexicon(str(source))
+    assert updated.version != version and updated.categorize("Aleve") == {'drugs': ['naproxen']}
+
+    for bad_source, bad_text in (("bad.tsv", "drugs only\n"), ("bad.pblx", "PBLX garbage")):
+        path = tmp_path / bad_source
+        path.write_text(bad_text, encoding='utf-8')
+        try:
+            load_lexicon(str(path))
+            raise AssertionError(f"{bad_source} accepted")
+        except ValueError:
+            pass
+    print("✅ Compiled once, recompiled after a source change, bad files rejected")
+
+def test_medical_terms_use_lexicon(tmp_path):
+    """A configured lexicon is matched alongside MEDICAL_ENTITIES and versions the analysis cache"""
+    print("=== Testing Medical Terms Integration ===")
+    source = tmp_path / "lexicon.tsv"
+    source.write_text("drugs\tibuprofen\tadvil\nconditions\tasthma\n", encoding='utf-8')
+    text = "Advil is always safe for asthma"
+    assert not is_medical_term("Advil helps") and 'medical_lexicon' not in default_lexicons()
+
+    set_medical_lexicon(load_lexicon(str(source)))
+    try:
+        assert is_medical_term("Advil helps")
+        assert extract_medical_entities(text) == {
+            'conditions': ['asthma'], 'risk_phrases': ['always'], 'drugs': ['ibuprofen']
+        }
+        assert default_lexicons()['medical_lexicon'] == medical_terms.medical_lexicon.version
+    finally:
+        set_medical_lexicon(None)
+    assert extract_medical_entities(text) == {'conditions': ['asthma'], 'risk_phrases': ['always']}
+    print("✅ Lexicon terms extracted with the built-in entities")
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    for test in (test_compiled_matches_term_matcher, test_loading_and_recompilation, test_medical_terms_use_lexicon):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("\n🎉 All v2.25 tests passed!")
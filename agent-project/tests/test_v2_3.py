@@ -0,0 +1,140 @@
+"""Test v2.3: Adaptive Global Concurrency Limiter"""
+
+import asyncio
+import os
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import OpenAIChatCompletionsModel
+from src.llm.limiter import AdaptiveConcurrencyLimiter
+
+# Configure logging for v2.3 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class TrackingClient:
+    """Stand-in for AsyncOpenAI that tracks peak concurrency"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, **params):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+def test_limiter_bounds_model_concurrency():
+    """Test that fan-out beyond the window is queued"""
+    print("=== Testing Concurrency Bound ===")
+
+    client = TrackingClient()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+    model = OpenAIChatCompletionsModel("phi4-mini", client, limiter=limiter)
+
+    async def run():
+        await asyncio.gather(*[model.chat([{"role": "user", "content": f"persona {i}"}]) for i in range(13)])
+
+    asyncio.run(run())
+
+    stats = limiter.get_stats()
+    assert client.peak == 3
+    assert stats['acquired'] == 13
+    assert stats['queued'] == 10
+    assert stats['max_queue_depth'] >= 3
+    assert stats['in_flight'] == 0 and stats['queue_depth'] == 0
+    assert stats['average_wait_seconds'] > 0
+    print(f"✅ Limiter stats: {stats}")
+
+def test_additive_increase():
+    """Test that healthy calls grow the window"""
+    print("=== Testing Additive Increase ===")
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10)
+
+    async def run():
+        for _ in range(20):
+            await limiter.acquire()
+            limiter.release(latency=0.1)
+
+    asyncio.run(run())
+    assert limiter.limit > 2
+    assert limiter.get_stats()['increases'] == 20
+    print(f"✅ Window grew to {limiter.limit}")
+
+def test_multiplicative_decrease_on_errors_and_latency():
+    """Test that errors and latency spikes shrink the window"""
+    print("=== Testing Multiplicative Decrease ===")
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, cooldown_seconds=0)
+
+    async def run():
+        await limiter.acquire()
+        limiter.release(latency=0.1, error=True)
+        for _ in range(10):
+            await limiter.acquire()
+            limiter.release(latency=0.1)
+        # Sudden latency spike relative to the long-term average
+        for _ in range(3):
+            await limiter.acquire()
+            limiter.release(latency=5.0)
+
+    asyncio.run(run())
+    stats = limiter.get_stats()
+    assert stats['errors'] == 1
+    assert stats['decreases'] >= 2
+    assert limiter.limit < 8
+    print(f"✅ Window shrank to {limiter.limit} after {stats['decreases']} decreases")
+
+def test_latency_threshold():
+    """Test the absolute latency threshold"""
+    print("=== Testing Latency Threshold ===")
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, latency_threshold=1.0)
+
+    async def run():
+        await limiter.acquire()
+        limiter.release(latency=2.0)
+
+    asyncio.run(run())
+    assert limiter.limit == 2
+    print(f"✅ Slow call above threshold shrank the window to {limiter.limit}")
+
+def test_cancelled_waiter_releases_queue_position():
+    """Test that cancelled waiters do not leak slots"""
+    print("=== Testing Waiter Cancellation ===")
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+
+    async def run():
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+        # Slot must be available again
+        await asyncio.wait_for(limiter.acquire(), timeout=0.5)
+        limiter.release()
+
+    asyncio.run(run())
+    assert limiter.in_flight == 0
+    print("✅ No leaked slots")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.3 Concurrency Limiter Tests\n")
+    test_limiter_bounds_model_concurrency()
+    test_additive_increase()
+    test_multiplicative_decrease_on_errors_and_latency()
+    test_latency_threshold()
+    test_cancelled_waiter_releases_queue_position()
+    print("\n✅ All v2.3 tests completed!")
@@ -0,0 +1,200 @@
+"""Test v2.4: Streaming LLM Responses with Early Termination"""
+
+import asyncio
+import os
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.llm.cache import LLMResponseCache
+from src.llm.streaming import first_number_parser, tool_call_parser
+from src.orchestration.ab_testing import ABTestSimulator
+from src.tracing import tracer
+
+# Configure logging for v2.4 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FakeStream:
+    """Async iterator over completion chunks, mimicking openai.AsyncStream"""
+
+    def __init__(self, pieces, delay=0.0):
+        self.pieces = pieces
+        self.delay = delay
+        self.sent = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent >= len(self.pieces):
+            raise StopAsyncIteration
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        piece = self.pieces[self.sent]
+        self.sent += 1
+        if isinstance(piece, Exception):
+            raise piece
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    async def close(self):
+        self.closed = True
+
+class StreamingClient:
+    """Stand-in for AsyncOpenAI that streams a scripted response"""
+
+    def __init__(self, pieces, delay=0.0):
+        self.pieces = pieces
+        self.delay = delay
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, stream=False, **params):
+        assert stream, "expected a streaming request"
+        fake_stream = FakeStream(self.pieces, self.delay)
+        self.streams.append(fake_stream)
+        return fake_stream
+
+def test_number_parser():
+    """Test the clarity score parser only fires on complete numbers"""
+    print("=== Testing Number Parser ===")
+
+    assert first_number_parser("0.") is None
+    assert first_number_parser("0.8") is None  # more digits may follow
+    assert first_number_parser("0.85\n") == 0.85
+    assert first_number_parser("Score: 0.7 because") == 0.7
+    assert first_number_parser("0.9", True) == 0.9
+    assert first_number_parser("no score", True) is None
+    print("✅ Number parser handles partial streams")
+
+def test_stream_stops_early():
+    """Test that generation is cancelled once the parser is satisfied"""
+    print("=== Testing Early Termination ===")
+
+    client = StreamingClient(["0", ".", "8", "5", "\n", "The message", " is mostly", " clear", " but..."])
+    model = OpenAIChatCompletionsModel("phi4-mini", client)
+
+    completion = asyncio.run(model.stream_chat([{"role": "user", "content": "score"}], parser=first_number_parser))
+
+    assert completion.parsed == 0.85
+    assert completion.stopped_early
+    assert completion.text == "0.85\n"
+    assert completion.time_to_first_token is not None
+    assert client.streams[0].closed
+    assert client.streams[0].sent == 5
+    print(f"✅ Stopped after {completion.chunk_count} chunks (TTFT {completion.time_to_first_token:.4f}s)")
+
+def test_partial_streams_not_cached():
+    """Test that only complete generations are cached"""
+    print("=== Testing Streaming Cache Policy ===")
+
+    cache = LLMResponseCache()
+    client = StreamingClient(["Hello", " world"])
+    model = OpenAIChatCompletionsModel("phi4-mini", client, cache=cache)
+    messages = [{"role": "user", "content": "greet"}]
+
+    asyncio.run(model.stream_chat(messages, parser=lambda text, final: text if "Hello" in text else None))
+    assert cache.get_stats()['sets'] == 0
+
+    full = asyncio.run(model.stream_chat(messages))
+    assert full.text == "Hello world" and not full.stopped_early
+    cached = asyncio.run(model.stream_chat(messages))
+    assert cached.cached and cached.text == "Hello world"
+    assert len(client.streams) == 2
+    print("✅ Partial generations skipped, full generations cached")
+
+def test_stream_always_closed():
+    """Test that the stream is closed after a full read, a mid-stream error and a cancellation"""
+    print("=== Testing Stream Close ===")
+
+    messages = [{"role": "user", "content": "explain"}]
+    client = StreamingClient(["Hello", " world"])
+    asyncio.run(OpenAIChatCompletionsModel("phi4-mini", client).stream_chat(messages))
+    assert client.streams[0].closed
+
+    client = StreamingClient(["Hello", ConnectionError("connection reset")])
+    try:
+        asyncio.run(OpenAIChatCompletionsModel("phi4-mini", client).stream_chat(messages))
+        assert False, "stream error must propagate"
+    except ConnectionError:
+        pass
+    assert client.streams[0].closed
+
+    client = StreamingClient(["Hello"] * 100, delay=0.01)
+
+    async def cancel_midway():
+        task = asyncio.create_task(OpenAIChatCompletionsModel("phi4-mini", client).stream_chat(messages))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancel_midway())
+    assert 0 < client.streams[0].sent < 100 and client.streams[0].closed
+    print("✅ Streams closed on completion, error and cancellation")
+
+def test_agent_streaming_records_ttft():
+    """Test Agent.run streaming mode records time-to-first-token in traces"""
+    print("=== Testing Agent Streaming Trace ===")
+
+    client = StreamingClient(["0.6", "5 overall"])
+    agent = Agent("StreamingClarity", "Score clarity.", model=OpenAIChatCompletionsModel("phi4-mini", client))
+
+    response = asyncio.run(agent.run("Is this clear?", stream_parser=first_number_parser))
+    assert response == "0.65 overall"
+
+    trace = [t for t in tracer.get_traces() if t['agent'] == "StreamingClarity"][-1]
+    stream_events = [e for e in trace['events'] if e['type'] == 'llm_stream']
+    assert stream_events and stream_events[0]['data']['time_to_first_token'] is not None
+    assert stream_events[0]['data']['stopped_early']
+    print(f"✅ Stream event: {stream_events[0]['data']}")
+
+def test_tool_call_prefix_stops_stream():
+    """Test that agents with tools stop streaming once the tool call is complete"""
+    print("=== Testing Tool Call Early Stop ===")
+
+    pieces = ['call_tool("lookup", ', '{"topic": "flu"}', ')', ' and then a long explanation', ' that is never needed']
+    client = StreamingClient(pieces)
+
+    def lookup(topic: str) -> str:
+        return f"results for {topic}"
+
+    agent = Agent("ToolStreamer", "Use tools.", tools=[lookup], model=OpenAIChatCompletionsModel("phi4-mini", client))
+    response = asyncio.run(agent.run("find flu news", stream=True))
+
+    assert client.streams[0].sent == 3
+    assert client.streams[0].closed
+    assert tool_call_parser('call_tool("lookup", {"topic": "flu"})') is not None
+    # lookup is not a registered tool, so execution reports an error rather than hanging
+    assert response.startswith("Tool")
+    print(f"✅ Tool call detected after {client.streams[0].sent} chunks")
+
+def test_clarity_score_uses_stream():
+    """Test ABTestSimulator.score_clarity reads the score from a truncated stream"""
+    print("=== Testing Clarity Scoring ===")
+
+    simulator = ABTestSimulator(personas=[])
+    client = StreamingClient(["0.7", "2", "\n", "Explanation: " * 20])
+    simulator.clarity_agent.model = OpenAIChatCompletionsModel("phi4-mini", client)
+
+    score = asyncio.run(simulator.score_clarity("Vaccines are generally safe."))
+    assert score == 0.72
+    assert client.streams[0].sent == 3
+    print(f"✅ Clarity score {score} from {client.streams[0].sent} chunks")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.4 Streaming Tests\n")
+    test_number_parser()
+    test_stream_stops_early()
+    test_partial_streams_not_cached()
+    test_stream_always_closed()
+    test_agent_streaming_records_ttft()
+    test_tool_call_prefix_stops_stream()
+    test_clarity_score_uses_stream()
+    print("\n✅ All v2.4 tests completed!")
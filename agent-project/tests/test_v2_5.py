@@ -0,0 +1,98 @@
+"""Test v2.5: Stable System Prefix for Prompt Caching"""
+
+import asyncio
+import os
+import logging
+from types import SimpleNamespace
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.personas.base_personas import STANDARD_PERSONAS, PERSONA_GUIDANCE
+from src.tools import function_tool, get_registry_version, get_tool_schemas_prompt
+import src.search_tool  # registers get_news_articles
+
+# Configure logging for v2.5 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RecordingClient:
+    """Stand-in for AsyncOpenAI that records the messages it receives"""
+
+    def __init__(self):
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, **params):
+        self.requests.append(messages)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+def common_prefix_length(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+def test_system_prefix_is_byte_stable():
+    """Test that repeated calls send an identical system message and the user text last"""
+    print("=== Testing Byte-Stable Prefix ===")
+
+    client = RecordingClient()
+    agent = Agent("EvidenceValidator", "Validate claims.", model=OpenAIChatCompletionsModel("phi4-mini", client))
+
+    asyncio.run(agent.run("Claim one"))
+    asyncio.run(agent.run("Claim two"))
+
+    first, second = client.requests
+    assert [m['role'] for m in first] == ['system', 'user']
+    assert first[0]['content'] == second[0]['content']
+    assert first[1]['content'] == "Claim one"
+    assert second[1]['content'] == "Claim two"
+    assert "Available tools" in first[0]['content']
+    print(f"✅ System prefix of {len(first[0]['content'])} chars reused across calls")
+
+def test_prefix_computed_once_per_registry_version():
+    """Test the prefix is cached until the tool registry changes"""
+    print("=== Testing Prefix Precomputation ===")
+
+    agent = Agent("Cached", "Instructions.")
+    prefix = agent.system_prompt
+    assert agent.system_prompt is prefix
+    assert get_tool_schemas_prompt() is get_tool_schemas_prompt()
+
+    version = get_registry_version()
+
+    @function_tool
+    def v2_5_probe_tool(query: str) -> str:
+        """Probe tool registered during the test"""
+        return query
+
+    assert get_registry_version() == version + 1
+    assert "v2_5_probe_tool" in agent.system_prompt
+    print("✅ Prefix rebuilt only after registry change")
+
+def test_persona_agents_share_prefix():
+    """Test that persona agents share the tool schemas and guidance as a common prefix"""
+    print("=== Testing Cross-Persona Prefix Sharing ===")
+
+    for persona in STANDARD_PERSONAS:
+        if not persona.interpretation_agent:
+            persona.create_agent()
+    prompts = [p.interpretation_agent.system_prompt for p in STANDARD_PERSONAS]
+
+    shared = min(common_prefix_length(prompts[0], other) for other in prompts[1:])
+    expected_shared = len(get_tool_schemas_prompt()) + len(PERSONA_GUIDANCE)
+    assert shared >= expected_shared
+    assert all(p.name in prompt for p, prompt in zip(STANDARD_PERSONAS, prompts))
+    logger.info(f"[PREFIX] {shared} shared chars across {len(prompts)} persona agents")
+    print(f"✅ {shared} shared prefix chars across persona agents")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.5 Stable Prefix Tests\n")
+    test_system_prefix_is_byte_stable()
+    test_prefix_computed_once_per_registry_version()
+    test_persona_agents_share_prefix()
+    print("\n✅ All v2.5 tests completed!")
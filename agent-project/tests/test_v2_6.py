@@ -0,0 +1,195 @@
+"""Test v2.6: Native Multi-Step Function Calling"""
+
+import asyncio
+import json
+import os
+import logging
+import time
+from types import SimpleNamespace
+
+import httpx
+from openai import BadRequestError
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.deadline import deadline_scope
+from src.error_handler import DeadlineExceededError
+from src.tools import function_tool
+from src.tracing import tracer
+
+# Configure logging for v2.6 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@function_tool
+def v2_6_slow_search(query: str) -> str:
+    """Search tool that takes a fixed amount of time"""
+    time.sleep(0.2)
+    return f"articles about {query}"
+
+@function_tool
+def v2_6_hanging_tool(query: str) -> str:
+    """Tool that never finishes in time"""
+    time.sleep(1.0)
+    return "too late"
+
+def tool_call(call_id, name, **args):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(args)))
+
+def reply(content=None, tool_calls=None):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content, tool_calls=tool_calls))])
+
+class ScriptedToolClient:
+    """Stand-in for AsyncOpenAI that replays scripted assistant turns"""
+
+    def __init__(self, turns, reject_tools=False, failures=0):
+        self.turns = list(turns)
+        self.reject_tools = reject_tools
+        self.failures = failures
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, **params):
+        self.requests.append({"messages": list(messages), "params": params})
+        if self.reject_tools and "tools" in params:
+            response = httpx.Response(400, request=httpx.Request("POST", "http://localhost/v1/chat/completions"))
+            raise BadRequestError("model does not support tools", response=response, body=None)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("model server unavailable")
+        return self.turns.pop(0) if self.turns else reply("done")
+
+def test_concurrent_tool_calls_in_one_turn():
+    """Test that several tool calls from one turn run concurrently and results are fed back"""
+    print("=== Testing Concurrent Tool Calls ===")
+
+    client = ScriptedToolClient([
+        reply(tool_calls=[tool_call(f"call_{i}", "v2_6_slow_search", query=f"topic {i}") for i in range(3)]),
+        reply("Summary of three searches")
+    ])
+    agent = Agent("NativeSearcher", "Search.", tools=[v2_6_slow_search],
+                  model=OpenAIChatCompletionsModel("phi4-mini", client))
+
+    start = time.perf_counter()
+    response = asyncio.run(agent.run("search three topics"))
+    elapsed = time.perf_counter() - start
+
+    assert response == "Summary of three searches"
+    assert elapsed < 0.5, f"tool calls ran sequentially ({elapsed:.2f}s)"
+    assert client.requests[0]["params"]["tools"][0]["function"]["name"] == "v2_6_slow_search"
+
+    followup = client.requests[1]["messages"]
+    tool_messages = [m for m in followup if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["call_0", "call_1", "call_2"]
+    assert tool_messages[2]["content"] == "articles about topic 2"
+    assert followup[2]["tool_calls"][0]["function"]["name"] == "v2_6_slow_search"
+    print(f"✅ 3 tool calls completed in {elapsed:.2f}s")
+
+def test_tool_timeout_reported_to_model():
+    """Test that a slow tool times out and the error is returned as the tool result"""
+    print("=== Testing Per-Tool Timeout ===")
+
+    client = ScriptedToolClient([
+        reply(tool_calls=[tool_call("call_a", "v2_6_hanging_tool", query="x")]),
+        reply("Answered without the tool")
+    ])
+    agent = Agent("TimeoutAgent", "Search.", tools=[v2_6_hanging_tool],
+                  model=OpenAIChatCompletionsModel("phi4-mini", client), tool_timeout=0.1)
+
+    response = asyncio.run(agent.run("look it up"))
+    assert response == "Answered without the tool"
+    tool_message = [m for m in client.requests[1]["messages"] if m["role"] == "tool"][0]
+    assert "timed out" in tool_message["content"]
+
+    trace = [t for t in tracer.get_traces() if t['agent'] == "TimeoutAgent"][-1]
+    assert any(e['type'] == 'tool_timeout' for e in trace['events'])
+
+    # A call ended by the request's deadline is not a tool timeout the model could work around
+    client = ScriptedToolClient([reply(tool_calls=[tool_call("call_b", "v2_6_hanging_tool", query="x")])])
+    agent = Agent("DeadlineAgent", "Search.", tools=[v2_6_hanging_tool],
+                  model=OpenAIChatCompletionsModel("phi4-mini", client), tool_timeout=5)
+
+    async def run():
+        with deadline_scope(0.1):
+            return await agent.run("look it up")
+
+    try:
+        asyncio.run(run())
+        raise AssertionError("deadline reported as a tool result")
+    except DeadlineExceededError:
+        pass
+    assert len(client.requests) == 1
+    print(f"✅ Timeout surfaced: {tool_message['content']}")
+
+def test_tool_round_cap():
+    """Test that a model that keeps calling tools is forced to answer after max_tool_rounds"""
+    print("=== Testing Loop Depth Cap ===")
+
+    looping = [reply(tool_calls=[tool_call(f"call_{i}", "v2_6_slow_search", query="again")]) for i in range(2)]
+    client = ScriptedToolClient(looping + [reply("Final answer")])
+    agent = Agent("LoopingAgent", "Search.", tools=[v2_6_slow_search],
+                  model=OpenAIChatCompletionsModel("phi4-mini", client), max_tool_rounds=2)
+
+    response = asyncio.run(agent.run("keep searching"))
+    assert response == "Final answer"
+    assert len(client.requests) == 3
+    assert "tools" not in client.requests[-1]["params"]
+    print(f"✅ Loop stopped after {agent.max_tool_rounds} tool rounds")
+
+def test_fallback_when_server_rejects_tools():
+    """Test that servers without native tool support fall back to plain chat"""
+    print("=== Testing Native Tool Fallback ===")
+
+    client = ScriptedToolClient([reply("Plain answer"), reply("Second plain answer")], reject_tools=True)
+    agent = Agent("FallbackAgent", "Search.", tools=[v2_6_slow_search],
+                  model=OpenAIChatCompletionsModel("phi4-mini", client))
+
+    assert asyncio.run(agent.run("question")) == "Plain answer"
+    assert asyncio.run(agent.run("another question")) == "Second plain answer"
+    # The rejected request is only attempted once per agent
+    assert sum(1 for r in client.requests if "tools" in r["params"]) == 1
+    print("✅ Fell back to plain chat")
+
+def test_transient_error_keeps_native_tools():
+    """Test that an outage on the first tool request does not switch the agent to text tools"""
+    print("=== Testing Transient Error ===")
+
+    client = ScriptedToolClient([reply("Answer with tools available")], failures=1)
+    agent = Agent("TransientAgent", "Search.", tools=[v2_6_slow_search],
+                  model=OpenAIChatCompletionsModel("phi4-mini", client))
+
+    assert asyncio.run(agent.run("question")).startswith("Agent error")
+    assert len(client.requests) == 1  # not re-issued without tools
+    assert asyncio.run(agent.run("question again")) == "Answer with tools available"
+    assert "tools" in client.requests[-1]["params"]
+    print("✅ Native tools kept after a connection error")
+
+def test_unknown_tool_not_executed():
+    """Test that tool calls outside the agent's tool list are refused"""
+    print("=== Testing Tool Allow-List ===")
+
+    client = ScriptedToolClient([
+        reply(tool_calls=[tool_call("call_x", "v2_6_hanging_tool", query="x")]),
+        reply("ok")
+    ])
+    agent = Agent("RestrictedAgent", "Search.", tools=[v2_6_slow_search],
+                  model=OpenAIChatCompletionsModel("phi4-mini", client))
+
+    start = time.perf_counter()
+    assert asyncio.run(agent.run("question")) == "ok"
+    assert time.perf_counter() - start < 0.5
+    tool_message = [m for m in client.requests[1]["messages"] if m["role"] == "tool"][0]
+    assert "not available" in tool_message["content"]
+    print("✅ Unlisted tool refused")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.6 Native Tool Calling Tests\n")
+    test_concurrent_tool_calls_in_one_turn()
+    test_tool_timeout_reported_to_model()
+    test_tool_round_cap()
+    test_fallback_when_server_rejects_tools()
+    test_transient_error_keeps_native_tools()
+    test_unknown_tool_not_executed()
+    print("\n✅ All v2.6 tests completed!")
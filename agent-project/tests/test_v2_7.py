@@ -0,0 +1,236 @@
+"""Test v2.7: Async-Aware Tool Registry"""
+
+import asyncio
+import os
+import logging
+import threading
+import time
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.deadline import deadline_scope
+from src.error_handler import DeadlineExceededError
+from src.tools import function_tool, execute_tool, execute_tool_async, get_tool_stats, registered_tools
+from src.tracing import tracer
+
+# Configure logging for v2.7 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+calls = {"lookup": 0, "active": 0, "peak": 0}
+calls_lock = threading.Lock()
+
+@function_tool(cache_ttl=60)
+def v2_7_cached_lookup(topic: str) -> str:
+    """Lookup whose results may be cached"""
+    calls["lookup"] += 1
+    return f"facts about {topic}"
+
+@function_tool(max_concurrency=2)
+def v2_7_capped_search(topic: str) -> str:
+    """Blocking search with a concurrency cap"""
+    with calls_lock:
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+    time.sleep(0.05)
+    with calls_lock:
+        calls["active"] -= 1
+    return topic
+
+@function_tool(timeout=0.05)
+def v2_7_slow_tool(topic: str) -> str:
+    """Tool slower than its declared timeout"""
+    time.sleep(0.3)
+    return topic
+
+@function_tool(max_concurrency=1, timeout=0.05)
+def v2_7_capped_slow_tool(topic: str) -> str:
+    """Capped tool that outlives its timeout"""
+    with calls_lock:
+        calls["active"] += 1
+        calls["peak"] = max(calls["peak"], calls["active"])
+    time.sleep(0.15)
+    with calls_lock:
+        calls["active"] -= 1
+    return topic
+
+@function_tool(cache_ttl=60)
+def v2_7_flaky_search(topic: str) -> str:
+    """Search that reports its first failure as text"""
+    calls["flaky"] = calls.get("flaky", 0) + 1
+    return "Search error: rate limited" if calls["flaky"] == 1 else f"articles about {topic}"
+
+@function_tool
+async def v2_7_async_tool(topic: str) -> str:
+    """Native coroutine tool"""
+    await asyncio.sleep(0.01)
+    return topic.upper()
+
+@function_tool(timeout=5)
+async def v2_7_slow_async_tool(topic: str) -> str:
+    """Coroutine tool with a generous timeout"""
+    await asyncio.sleep(0.3)
+    return topic
+
+def test_modes_detected():
+    """Test that sync and async tools are registered with the right mode"""
+    print("=== Testing Tool Modes ===")
+
+    assert registered_tools["v2_7_cached_lookup"]["mode"] == "sync"
+    assert registered_tools["v2_7_async_tool"]["mode"] == "async"
+    assert asyncio.run(execute_tool_async("v2_7_async_tool", {"topic": "flu"})) == "FLU"
+    assert execute_tool("v2_7_async_tool", {"topic": "rsv"}) == "RSV"
+
+    async def from_running_loop():
+        return execute_tool("v2_7_async_tool", {"topic": "hpv"})
+
+    assert asyncio.run(from_running_loop()) == "HPV"
+    print("✅ Sync and async tools both executable")
+
+def test_sync_tools_do_not_block_loop():
+    """Test that blocking tools run off the event loop"""
+    print("=== Testing Thread Offload ===")
+
+    async def run():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+        task = asyncio.create_task(ticker())
+        await execute_tool_async("v2_7_capped_search", {"topic": "x"})
+        task.cancel()
+        return ticks
+
+    ticks = asyncio.run(run())
+    assert ticks >= 3, f"event loop stalled during tool call ({ticks} ticks)"
+    print(f"✅ Event loop ticked {ticks} times during a blocking tool call")
+
+def test_concurrency_cap():
+    """Test the per-tool concurrency cap"""
+    print("=== Testing Concurrency Cap ===")
+
+    calls["peak"] = 0
+
+    async def run():
+        await asyncio.gather(*[execute_tool_async("v2_7_capped_search", {"topic": str(i)}) for i in range(6)])
+
+    asyncio.run(run())
+    assert calls["peak"] == 2
+    print(f"✅ Peak concurrency {calls['peak']}")
+
+def test_timeout():
+    """Test that declared timeouts raise and are counted"""
+    print("=== Testing Tool Timeout ===")
+
+    async def run():
+        try:
+            await execute_tool_async("v2_7_slow_tool", {"topic": "x"})
+        except asyncio.TimeoutError:
+            return True
+        return False
+
+    assert asyncio.run(run())
+    assert get_tool_stats()["v2_7_slow_tool"]["timeouts"] == 1
+    print("✅ Slow tool timed out")
+
+def test_deadline_cut_is_not_a_tool_timeout():
+    """Test that a call ended by the request deadline raises DeadlineExceededError, not a tool timeout"""
+    print("=== Testing Deadline vs Tool Timeout ===")
+
+    timeouts = registered_tools["v2_7_slow_async_tool"]["stats"]["timeouts"]
+
+    async def run():
+        with deadline_scope(0.05):
+            return await execute_tool_async("v2_7_slow_async_tool", {"topic": "x"})
+
+    try:
+        asyncio.run(run())
+        raise AssertionError("deadline did not end the tool call")
+    except DeadlineExceededError:
+        pass
+    assert registered_tools["v2_7_slow_async_tool"]["stats"]["timeouts"] == timeouts
+
+    with deadline_scope(0.05):
+        try:
+            execute_tool("v2_7_slow_async_tool", {"topic": "x"})
+            raise AssertionError("deadline did not reach the tool's own event loop")
+        except DeadlineExceededError:
+            pass
+    print("✅ Deadline reported as DeadlineExceededError")
+
+def test_ttl_result_cache():
+    """Test that repeated arguments are served from the tool cache"""
+    print("=== Testing Tool Result Cache ===")
+
+    async def run():
+        first = await execute_tool_async("v2_7_cached_lookup", {"topic": "measles"})
+        second = await execute_tool_async("v2_7_cached_lookup", {"topic": "measles"})
+        other = await execute_tool_async("v2_7_cached_lookup", {"topic": "mumps"})
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first == second == "facts about measles"
+    assert other == "facts about mumps"
+    assert calls["lookup"] == 2
+    assert get_tool_stats()["v2_7_cached_lookup"]["cache_hits"] == 1
+    print("✅ Cached result reused")
+
+def test_timed_out_thread_keeps_its_slot():
+    """Test that a sync tool's slot stays taken until its timed-out thread actually finishes"""
+    print("=== Testing Slot Release After Timeout ===")
+
+    calls["peak"] = 0
+
+    async def run():
+        results = await asyncio.gather(*[
+            execute_tool_async("v2_7_capped_slow_tool", {"topic": str(i)}) for i in range(3)
+        ], return_exceptions=True)
+        # Let the last abandoned thread finish before the loop closes
+        await asyncio.sleep(0.2)
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+    assert calls["peak"] == 1
+    print(f"✅ Peak concurrency {calls['peak']} with timed-out threads")
+
+def test_error_results_not_cached():
+    """Test that error text from a cached tool is not served to later calls"""
+    print("=== Testing Error Results Not Cached ===")
+
+    async def run():
+        return [await execute_tool_async("v2_7_flaky_search", {"topic": "measles"}) for _ in range(3)]
+
+    first, second, third = asyncio.run(run())
+    assert first == "Search error: rate limited"
+    assert second == third == "articles about measles"
+    stats = get_tool_stats()["v2_7_flaky_search"]
+    assert calls["flaky"] == 2 and stats["cache_hits"] == 1 and stats["errors"] == 1
+    print("✅ Error result retried, success cached")
+
+def test_latency_histograms():
+    """Test that tool latencies are recorded in histograms"""
+    print("=== Testing Latency Histograms ===")
+
+    asyncio.run(execute_tool_async("v2_7_async_tool", {"topic": "a"}))
+    latency = get_tool_stats()["v2_7_async_tool"]["latency"]
+    assert latency["count"] >= 1
+    assert sum(latency["buckets"].values()) == latency["count"]
+    assert "tool:v2_7_async_tool" in tracer.get_dashboard_data()["histograms"]
+    print(f"✅ Histogram: {latency}")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.7 Tool Registry Tests\n")
+    test_modes_detected()
+    test_sync_tools_do_not_block_loop()
+    test_concurrency_cap()
+    test_timeout()
+    test_deadline_cut_is_not_a_tool_timeout()
+    test_ttl_result_cache()
+    test_timed_out_thread_keeps_its_slot()
+    test_error_results_not_cached()
+    test_latency_histograms()
+    print("\n✅ All v2.7 tests completed!")
@@ -0,0 +1,154 @@
+"""Test v2.8: Shared Pooled LLM Transport"""
+
+import asyncio
+import json
+import os
+import logging
+import socketserver
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.llm.transport import LLMTransport, TransportConfig
+
+# Configure logging for v2.8 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "phi4-mini",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "pooled"}}]
+}
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    """Minimal keep-alive /v1/chat/completions endpoint"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        return "local"
+
+    def log_message(self, format, *args):
+        pass
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def start_server(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_persona_calls_reuse_connections():
+    """Test that sequential calls from several agents share pooled connections"""
+    print("=== Testing Connection Reuse ===")
+
+    server = start_server(ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler))
+    transport = LLMTransport(TransportConfig(base_url=f"http://127.0.0.1:{server.server_address[1]}/v1"))
+    model = OpenAIChatCompletionsModel("phi4-mini", transport.create_openai_client())
+    agents = [Agent(f"Persona{i}", f"Persona {i}.", model=model) for i in range(4)]
+
+    async def run():
+        for agent in agents:
+            assert await agent.run("Is this message clear?") == "pooled"
+        await transport.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    stats = transport.get_stats()
+    assert stats['requests'] == 4
+    assert stats['new_connections'] == 1
+    assert stats['reused_connections'] == 3
+    print(f"✅ Transport stats: {stats}")
+
+def test_unix_socket_transport():
+    """Test the optional Unix-socket transport to a co-located server"""
+    print("=== Testing Unix Socket Transport ===")
+
+    path = os.path.join(tempfile.mkdtemp(), "llm.sock")
+    server = start_server(ThreadingUnixHTTPServer(path, CompletionHandler))
+    transport = LLMTransport(TransportConfig(base_url="http://localhost/v1", uds=path))
+    model = OpenAIChatCompletionsModel("phi4-mini", transport.create_openai_client())
+
+    async def run():
+        return [await model.chat([{"role": "user", "content": f"q{i}"}]) for i in range(3)]
+
+    try:
+        assert asyncio.run(run()) == ["pooled"] * 3
+    finally:
+        server.shutdown()
+
+    stats = transport.get_stats()
+    assert stats['new_connections'] == 1 and stats['uds'] == path
+    print(f"✅ {stats['requests']} requests over one Unix socket connection")
+
+def test_pool_survives_new_event_loop():
+    """Test that the shared client keeps working across separate asyncio.run calls"""
+    print("=== Testing Loop-Local Pools ===")
+
+    server = start_server(ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler))
+    transport = LLMTransport(TransportConfig(base_url=f"http://127.0.0.1:{server.server_address[1]}/v1"))
+    model = OpenAIChatCompletionsModel("phi4-mini", transport.create_openai_client())
+
+    try:
+        for i in range(2):
+            assert asyncio.run(model.chat([{"role": "user", "content": f"loop {i}"}])) == "pooled"
+    finally:
+        server.shutdown()
+    assert transport.get_stats()['requests'] == 2
+    print("✅ Second event loop got its own pool")
+
+def test_config_from_env():
+    """Test environment-driven configuration"""
+    print("=== Testing Transport Config ===")
+
+    overrides = {
+        "PREBUNKER_LLM_BASE_URL": "http://llm.internal:8000/v1",
+        "PREBUNKER_LLM_MAX_CONNECTIONS": "8",
+        "PREBUNKER_LLM_READ_TIMEOUT": "45",
+        "PREBUNKER_LLM_HTTP2": "off",
+        "PREBUNKER_LLM_UDS": "/run/ollama.sock"
+    }
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        transport = LLMTransport.from_env()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    assert transport.config.base_url == "http://llm.internal:8000/v1"
+    assert transport.config.max_connections == 8
+    assert transport.config.read_timeout == 45.0
+    assert transport.http2 is False
+    assert transport.config.uds == "/run/ollama.sock"
+    assert str(transport.create_openai_client().base_url).startswith("http://llm.internal:8000/v1")
+    print(f"✅ Config: {transport.config}")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.8 Transport Tests\n")
+    test_persona_calls_reuse_connections()
+    test_unix_socket_transport()
+    test_pool_survives_new_event_loop()
+    test_config_from_env()
+    print("\n✅ All v2.8 tests completed!")
@@ -0,0 +1,202 @@
+"""Test v2.9: Multi-Backend LLM Load Balancing"""
+
+import asyncio
+import json
+import os
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if not os.getenv("OPENAI_API_KEY"):
+    os.environ["OPENAI_API_KEY"] = "sk-dummy-for-local"
+
+from src.agent import Agent, OpenAIChatCompletionsModel
+from src.llm.backends import BackendPool
+from src.llm.transport import LLMTransport
+
+# Configure logging for v2.9 analysis
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_handler(label, delay=0.0, fail=False):
+    """Stand-in model server that answers with its own label"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if fail:
+                self._send(503, {"error": {"message": "down"}})
+            else:
+                self._send(200, {"object": "list", "data": []})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            if fail:
+                self._send(500, {"error": {"message": "backend failure"}})
+                return
+            self._send(200, {
+                "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "phi4-mini",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": label}}]
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+class StandInServers:
+    """Context manager running several local model servers"""
+
+    def __init__(self, specs):
+        self.servers = [ThreadingHTTPServer(("127.0.0.1", 0), make_handler(label, **opts)) for label, opts in specs]
+        self.urls = [f"http://127.0.0.1:{s.server_address[1]}/v1" for s in self.servers]
+
+    def __enter__(self):
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        for server in self.servers:
+            server.shutdown()
+
+def make_model(urls, **pool_options):
+    pool = BackendPool.from_urls(urls, transport=LLMTransport(), **pool_options)
+    return OpenAIChatCompletionsModel("phi4-mini", None, backends=pool), pool
+
+def test_least_outstanding_spreads_load():
+    """Test that concurrent unkeyed calls are spread over all backends"""
+    print("=== Testing Least-Outstanding Routing ===")
+
+    with StandInServers([("a", {"delay": 0.05}), ("b", {"delay": 0.05}), ("c", {"delay": 0.05})]) as servers:
+        model, pool = make_model(servers.urls)
+
+        async def run():
+            return await asyncio.gather(*[model.chat([{"role": "user", "content": f"m{i}"}]) for i in range(9)])
+
+        labels = asyncio.run(run())
+
+    assert sorted(labels) == ["a"] * 3 + ["b"] * 3 + ["c"] * 3
+    assert all(b['outstanding'] == 0 for b in pool.get_stats()['backends'])
+    print(f"✅ Calls per backend: {[b['requests'] for b in pool.get_stats()['backends']]}")
+
+def test_agents_stick_to_backend():
+    """Test that sequential calls from one agent hit the same backend"""
+    print("=== Testing Agent Stickiness ===")
+
+    with StandInServers([("a", {}), ("b", {}), ("c", {})]) as servers:
+        model, pool = make_model(servers.urls)
+        agents = [Agent(f"Persona{i}", f"Persona {i}.", model=model) for i in range(6)]
+
+        async def run():
+            return {agent.name: {await agent.run(f"message {n}") for n in range(4)} for agent in agents}
+
+        routes = asyncio.run(run())
+
+    assert all(len(backends) == 1 for backends in routes.values())
+    assert len({next(iter(b)) for b in routes.values()}) > 1
+    assert pool.get_stats()['sticky_routes'] == 24
+    print(f"✅ Agent routes: {routes}")
+
+def test_sticky_overflow_under_load():
+    """Test that a hot agent spills onto other backends instead of queueing behind one"""
+    print("=== Testing Bounded-Load Stickiness ===")
+
+    with StandInServers([("a", {"delay": 0.05}), ("b", {"delay": 0.05})]) as servers:
+        model, pool = make_model(servers.urls, sticky_load_factor=1.25)
+
+        async def run():
+            return await asyncio.gather(*[
+                model.chat([{"role": "user", "content": f"m{i}"}], agent_name="HotAgent") for i in range(8)
+            ])
+
+        labels = asyncio.run(run())
+
+    assert set(labels) == {"a", "b"}
+    assert pool.get_stats()['overflow_routes'] > 0
+    print(f"✅ Overflow routes: {pool.get_stats()['overflow_routes']}")
+
+def test_failing_backend_ejected():
+    """Test that a backend with repeated failures is ejected"""
+    print("=== Testing Failure Ejection ===")
+
+    with StandInServers([("good", {}), ("bad", {"fail": True})]) as servers:
+        model, pool = make_model(servers.urls, max_consecutive_failures=2)
+        for backend in pool.backends:
+            backend.client = backend.client.with_options(max_retries=0)
+
+        async def run():
+            results = []
+            for i in range(10):
+                try:
+                    results.append(await model.chat([{"role": "user", "content": f"m{i}"}]))
+                except Exception:
+                    results.append("error")
+            return results
+
+        results = asyncio.run(run())
+
+    bad = pool.get_stats()['backends'][1]
+    assert bad['ejected'] and bad['ejections'] == 1
+    assert results.count("error") == 2
+    assert results[-4:] == ["good"] * 4
+    print(f"✅ Results: {results}")
+
+def test_slow_backend_ejected():
+    """Test that a backend much slower than its peers is ejected"""
+    print("=== Testing Latency Ejection ===")
+
+    with StandInServers([("fast1", {}), ("fast2", {}), ("slow", {"delay": 0.15})]) as servers:
+        model, pool = make_model(servers.urls, min_latency_samples=2, slow_latency_factor=3.0)
+
+        async def run():
+            for i in range(12):
+                await model.chat([{"role": "user", "content": f"m{i}"}])
+
+        asyncio.run(run())
+
+    slow = pool.get_stats()['backends'][2]
+    assert slow['ejected']
+    print(f"✅ Slow backend ejected after {slow['requests']} requests")
+
+def test_health_check_marks_unhealthy():
+    """Test active health checks take failing endpoints out of rotation"""
+    print("=== Testing Health Checks ===")
+
+    with StandInServers([("up", {}), ("down", {"fail": True})]) as servers:
+        model, pool = make_model(servers.urls)
+        for backend in pool.backends:
+            backend.client = backend.client.with_options(max_retries=0)
+
+        async def run():
+            health = await pool.health_check()
+            labels = [await model.chat([{"role": "user", "content": f"m{i}"}]) for i in range(4)]
+            return health, labels
+
+        health, labels = asyncio.run(run())
+
+    assert list(health.values()) == [True, False]
+    assert labels == ["up"] * 4
+    print(f"✅ Health: {health}")
+
+if __name__ == "__main__":
+    print("🧪 Running v2.9 Backend Pool Tests\n")
+    test_least_outstanding_spreads_load()
+    test_agents_stick_to_backend()
+    test_sticky_overflow_under_load()
+    test_failing_backend_ejected()
+    test_slow_backend_ejected()
+    test_health_check_marks_unhealthy()
+    print("\n✅ All v2.9 tests completed!")